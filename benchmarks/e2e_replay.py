@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark over recorded or synthetic query fixtures.
+
+Replays each fixture through ``process_restaurant_query`` with zero network
+access and reports wall-clock latency, conversation rounds, tokens and tool
+calls per query, plus latency percentiles over the corpus. Recorded model
+and tool latencies are replayed scaled by ``--time-scale``, so changes that
+overlap work, such as parallel tool calls, show up in the numbers. With
+``pipelined_turns`` a draft gets the recorded reply of the user step it
+stands in for. Overlap is then measured, but acceptance reflects that reply
+rather than what the model would have drafted from partial results.
+
+Fixtures are recorded with ``restaurant-deep-research record``. Without any
+fixture arguments a synthetic corpus is generated.
+
+Run: python benchmarks/e2e_replay.py [FIXTURE_OR_DIR ...] [--time-scale 0.1]
+        [--repeat 3] [--society-kwargs '{"parallel_tool_calls": true}']
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from restaurant_deep_research.replay import load_fixture, replay_query, synthetic_fixture
+
+
+def load_corpus(paths: List[str], synthetic: int) -> List[Tuple[str, dict]]:
+    """Load fixtures from files and directories, or build a synthetic corpus."""
+    corpus = []
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        corpus.extend((f.stem, load_fixture(f)) for f in files)
+    if not corpus:
+        corpus = [
+            (f"synthetic-{i}", synthetic_fixture(candidates=4 + i % 5, seed=i))
+            for i in range(synthetic)
+        ]
+    return corpus
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    corpus = load_corpus(args.fixtures, args.synthetic)
+    society_kwargs = json.loads(args.society_kwargs) if args.society_kwargs else None
+    rows = []
+    for name, fixture in corpus:
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = await replay_query(
+                fixture, time_scale=args.time_scale, society_kwargs=society_kwargs
+            )
+            elapsed = time.perf_counter() - start
+            summary = result.metrics.summary()
+            rows.append(
+                {
+                    "fixture": name,
+                    "seconds": round(elapsed, 4),
+                    "rounds": summary["rounds"],
+                    "prompt_tokens": summary["tokens"]["prompt"],
+                    "completion_tokens": summary["tokens"]["completion"],
+                    "tool_calls": sum(
+                        c["ok"] + c["error"] for c in summary["tool_calls"].values()
+                    ),
+                    "faithful": result.faithful,
+                    "phases": summary["phases"],
+                }
+            )
+    latencies = [row["seconds"] for row in rows]
+    return {
+        "time_scale": args.time_scale,
+        "society_kwargs": society_kwargs,
+        "runs": rows,
+        "aggregate": {
+            "queries": len(rows),
+            "mean_seconds": round(statistics.mean(latencies), 4),
+            "p50_seconds": round(percentile(latencies, 0.5), 4),
+            "p95_seconds": round(percentile(latencies, 0.95), 4),
+            "mean_rounds": round(statistics.mean(r["rounds"] for r in rows), 2),
+            "mean_prompt_tokens": round(statistics.mean(r["prompt_tokens"] for r in rows)),
+            "mean_tool_calls": round(statistics.mean(r["tool_calls"] for r in rows), 2),
+            "unfaithful": sum(not r["faithful"] for r in rows),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("fixtures", nargs="*", help="fixture files or directories")
+    parser.add_argument("--synthetic", type=int, default=5,
+                        help="synthetic fixtures to build when none are given")
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="multiplier for recorded latencies (0 = instant)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--society-kwargs", help="JSON OwlRolePlaying options")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'fixture':<24} {'seconds':>8} {'rounds':>6} {'prompt':>8} "
+          f"{'compl.':>7} {'tools':>5}")
+    for row in report["runs"]:
+        flag = "" if row["faithful"] else "  (diverged)"
+        print(f"{row['fixture']:<24} {row['seconds']:>8.3f} {row['rounds']:>6} "
+              f"{row['prompt_tokens']:>8} {row['completion_tokens']:>7} "
+              f"{row['tool_calls']:>5}{flag}")
+    agg = report["aggregate"]
+    print(f"\n{agg['queries']} runs: mean {agg['mean_seconds']:.3f}s, "
+          f"p50 {agg['p50_seconds']:.3f}s, p95 {agg['p95_seconds']:.3f}s, "
+          f"{agg['mean_rounds']} rounds, {agg['mean_prompt_tokens']} prompt tokens, "
+          f"{agg['mean_tool_calls']} tool calls per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: tail latency of hedged model requests.
+
+Sends sequential requests through a ``HedgedModelBackend`` over two stub
+providers that are usually fast but occasionally stall, with and without
+hedging, and reports latency percentiles and how often the hedge won.
+
+Run: python benchmarks/hedging.py [--requests 500] [--slow-every 25]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from restaurant_deep_research.metrics import QueryMetrics, metrics_scope
+from restaurant_deep_research.models import HedgedModelBackend
+from restaurant_deep_research.replay import StubModelBackend
+
+MESSAGES = [{"role": "user", "content": "Cheap ramen near Shibuya tonight"}]
+
+
+def provider(offset: int, fast: float, slow: float, slow_every: int):
+    """A stub provider whose every ``slow_every``-th call stalls."""
+    return StubModelBackend(
+        "OK", lambda n: slow if n % slow_every == offset else fast
+    )
+
+
+async def measure(args: argparse.Namespace, hedge: bool) -> dict:
+    backend = HedgedModelBackend(
+        {
+            "primary": provider(3, args.fast, args.slow, args.slow_every),
+            "fallback": provider(11, args.fast, args.slow, args.slow_every),
+        },
+        hedge=hedge,
+        min_samples=10,
+        min_hedge_delay=args.fast / 2,
+    )
+    latencies = []
+    metrics = QueryMetrics()
+    with metrics_scope(metrics):
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            await backend.arun(MESSAGES)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {
+        "hedge": hedge,
+        "p50_ms": round(percentile(0.5) * 1000, 1),
+        "p95_ms": round(percentile(0.95) * 1000, 1),
+        "p99_ms": round(percentile(0.99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "provider_calls": sum(p["calls"] for p in backend.stats().values()),
+        "events": metrics.hedging,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    for hedge in (False, True):
+        print(json.dumps(await measure(args, hedge)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--fast", type=float, default=0.02, help="seconds")
+    parser.add_argument("--slow", type=float, default=0.5, help="seconds")
+    parser.add_argument("--slow-every", type=int, default=25)
+    asyncio.run(main(parser.parse_args()))
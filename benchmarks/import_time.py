@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark based on ``python -X importtime``.
+
+Imports each target module in a fresh interpreter, several times, and reports
+the median cumulative import time, the modules with the highest self time and
+whether any of the heavy dependencies (CAMEL's agents, toolkits and model
+clients, dotenv, colorama) were loaded. Importing the package or its
+lightweight modules must not load them; they are only needed once a query
+actually runs.
+
+With ``--check`` the script exits non-zero when a target exceeds its time
+budget or loads a heavy dependency it should not, so it can run in CI next
+to the test suite.
+
+Run: python benchmarks/import_time.py [--repeat 5] [--top 10] [--check]
+        [--budget-ms 300] [MODULE ...]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Dependencies that only a running query needs.
+HEAVY_MODULES = ["camel.agents", "camel.toolkits", "camel.models", "dotenv", "colorama"]
+DEFAULT_TARGETS = [
+    "restaurant_deep_research",
+    "restaurant_deep_research.cli",
+    "restaurant_deep_research.metrics",
+    "restaurant_deep_research.events",
+    "restaurant_deep_research.cache",
+]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int, int]]:
+    """Parse ``-X importtime`` output.
+
+    Args:
+        stderr (str): The interpreter's standard error.
+
+    Returns:
+        Dict[str, Tuple[int, int, int]]: Self and cumulative microseconds and
+            nesting depth, keyed by module name.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def measure(module: str) -> Dict[str, Tuple[int, int, int]]:
+    """Import ``module`` in a fresh interpreter and parse its import times."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def run(targets: List[str], repeat: int, top: int) -> List[dict]:
+    report = []
+    for target in targets:
+        runs = [measure(target) for _ in range(repeat)]
+        totals = [r[target][1] for r in runs if target in r]
+        last = runs[-1]
+        slowest = sorted(
+            ((name, self_us) for name, (self_us, _, _) in last.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:top]
+        report.append(
+            {
+                "module": target,
+                "median_ms": round(statistics.median(totals) / 1000, 2),
+                "min_ms": round(min(totals) / 1000, 2),
+                "modules_loaded": len(last),
+                "heavy_loaded": [m for m in HEAVY_MODULES if m in last],
+                "slowest": [
+                    {"module": name, "ms": round(self_us / 1000, 2)}
+                    for name, self_us in slowest
+                ],
+            }
+        )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modules", nargs="*", help="modules to import")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8,
+                        help="modules with the highest self time to list")
+    parser.add_argument("--check", action="store_true",
+                        help="fail when a budget is exceeded or a heavy module loads")
+    parser.add_argument("--budget-ms", type=float, default=300.0,
+                        help="median import time allowed per target (default: 300)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.modules or DEFAULT_TARGETS, args.repeat, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            heavy = ", ".join(row["heavy_loaded"]) or "none"
+            print(f"{row['module']}: median {row['median_ms']:.1f} ms "
+                  f"(min {row['min_ms']:.1f} ms), {row['modules_loaded']} modules, "
+                  f"heavy: {heavy}")
+            for item in row["slowest"]:
+                print(f"    {item['ms']:>9.1f} ms self  {item['module']}")
+
+    if args.check:
+        failures = [
+            f"{row['module']}: {row['median_ms']:.1f} ms > {args.budget_ms:.0f} ms"
+            for row in report
+            if row["median_ms"] > args.budget_ms
+        ] + [
+            f"{row['module']} loads {', '.join(row['heavy_loaded'])}"
+            for row in report
+            if row["heavy_loaded"]
+        ]
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: deriving suffixed messages in the role-playing loop.
+
+Compares the old ``deepcopy`` + append approach with
+``with_content_suffix``, which shares the message payload, on a large
+Google Maps tool-result style message with attached images.
+
+Run: python benchmarks/message_copy.py [--content-kb 256] [--images 2]
+"""
+
+import argparse
+import json
+import timeit
+import tracemalloc
+from copy import deepcopy
+
+from camel.messages import BaseMessage
+from PIL import Image
+
+from restaurant_deep_research.agents.role_playing import with_content_suffix
+
+SUFFIX = "\n\nIf there are available tools and you want to call them, call them."
+
+
+def make_message(content_kb: int, images: int) -> BaseMessage:
+    """Build a message resembling a bulky place-search tool result."""
+    place = {
+        "name": "Example Izakaya",
+        "formatted_address": "1-2-3 Dogenzaka, Shibuya, Tokyo",
+        "place_id": "ChIJ" + "x" * 23,
+        "rating": 4.4,
+        "reviews": [{"author_name": "A", "text": "Great food " * 20}] * 5,
+    }
+    places = []
+    while len(json.dumps(places)) < content_kb * 1024:
+        places.append(place)
+    return BaseMessage.make_user_message(
+        role_name="user",
+        content=json.dumps({"places": places}),
+        meta_dict={"raw": places},
+        image_list=[Image.new("RGB", (1024, 1024)) for _ in range(images)],
+    )
+
+
+def deepcopy_suffix(message: BaseMessage) -> BaseMessage:
+    derived = deepcopy(message)
+    derived.content += SUFFIX
+    return derived
+
+
+def measure(fn, message: BaseMessage, number: int) -> dict:
+    seconds = timeit.timeit(lambda: fn(message), number=number) / number
+    tracemalloc.start()
+    fn(message)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"us_per_call": seconds * 1e6, "peak_kib": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--content-kb", type=int, default=256)
+    parser.add_argument("--images", type=int, default=2)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    message = make_message(args.content_kb, args.images)
+    results = {
+        "deepcopy": measure(deepcopy_suffix, message, args.number),
+        "with_content_suffix": measure(
+            lambda m: with_content_suffix(m, SUFFIX), message, args.number
+        ),
+    }
+    print(f"content={args.content_kb} KiB images={args.images} calls={args.number}")
+    for name, r in results.items():
+        print(f"{name:>20}: {r['us_per_call']:12.1f} us/call {r['peak_kib']:12.1f} KiB peak")
+    base, new = results["deepcopy"], results["with_content_suffix"]
+    print(
+        f"{'speedup':>20}: {base['us_per_call'] / new['us_per_call']:.1f}x time, "
+        f"{base['peak_kib'] / max(new['peak_kib'], 1e-3):.1f}x allocation"
+    )
+
+
+if __name__ == "__main__":
+    main()
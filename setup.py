@@ -22,6 +22,11 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.8",
+    entry_points={
+        "console_scripts": [
+            "restaurant-deep-research=restaurant_deep_research.cli:main",
+        ],
+    },
     install_requires=[
         "camel-ai",
         "python-dotenv",
@@ -4,18 +4,69 @@ Restaurant Deep Research - A multi-agent system for restaurant recommendations.
 This package provides tools for finding restaurant recommendations using
 a multi-agent conversation system built on the CAMEL framework and
 Google Maps integration via MCP servers.
+
+The public names below are imported lazily: CAMEL's agents, toolkits and
+model clients take seconds to import, so they are only loaded when one of
+these names is first used.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 __version__ = "0.1.0"
 
-# Import main functionality to expose at the package level
-from restaurant_deep_research.main import process_restaurant_query, construct_society
-from restaurant_deep_research.agents import OwlRolePlaying, arun_society
+if TYPE_CHECKING:
+    from restaurant_deep_research.agents import OwlRolePlaying, arun_society
+    from restaurant_deep_research.cache import ToolResultCache
+    from restaurant_deep_research.main import (
+        construct_society,
+        process_restaurant_query,
+        stream_restaurant_query,
+    )
+    from restaurant_deep_research.metrics import QueryMetrics
+    from restaurant_deep_research.tools import (
+        MCPToolkitPool,
+        start_mcp_pool,
+        stop_mcp_pool,
+    )
+
+# Public name -> module that defines it.
+_LAZY_ATTRIBUTES = {
+    "process_restaurant_query": "restaurant_deep_research.main",
+    "stream_restaurant_query": "restaurant_deep_research.main",
+    "construct_society": "restaurant_deep_research.main",
+    "OwlRolePlaying": "restaurant_deep_research.agents.role_playing",
+    "arun_society": "restaurant_deep_research.agents.role_playing",
+    "MCPToolkitPool": "restaurant_deep_research.tools.pool",
+    "start_mcp_pool": "restaurant_deep_research.tools.pool",
+    "stop_mcp_pool": "restaurant_deep_research.tools.pool",
+    "ToolResultCache": "restaurant_deep_research.cache.tool_results",
+    "QueryMetrics": "restaurant_deep_research.metrics",
+}
 
 # Define what gets imported with "from restaurant_finder import *"
 __all__ = [
     "process_restaurant_query",
+    "stream_restaurant_query",
     "construct_society",
     "OwlRolePlaying",
     "arun_society",
-]
\ No newline at end of file
+    "MCPToolkitPool",
+    "start_mcp_pool",
+    "stop_mcp_pool",
+    "ToolResultCache",
+    "QueryMetrics",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
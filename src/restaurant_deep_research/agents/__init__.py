@@ -4,6 +4,44 @@ This module provides agent classes and functions for multi-agent conversations
 and role-playing scenarios used in restaurant recommendations.
 """
 
-from restaurant_deep_research.agents.role_playing import OwlRolePlaying, arun_society
+from restaurant_deep_research.agents.compaction import (
+    MemoryCompactor,
+    extract_places,
+)
+from restaurant_deep_research.agents.convergence import (
+    CompleteRecommendationsDetector,
+    ConvergenceDetector,
+    NoProgressDetector,
+    default_convergence_detectors,
+)
+from restaurant_deep_research.agents.parallel import ParallelToolChatAgent
+from restaurant_deep_research.agents.pipeline import SpeculativePlanner
+from restaurant_deep_research.agents.pool import (
+    ClarifierPool,
+    ObjectPool,
+    PoolExhausted,
+    SocietyPool,
+)
+from restaurant_deep_research.agents.role_playing import (
+    OwlRolePlaying,
+    arun_society,
+    build_society,
+)
 
-__all__ = ["OwlRolePlaying", "arun_society"]
\ No newline at end of file
+__all__ = [
+    "OwlRolePlaying",
+    "ParallelToolChatAgent",
+    "arun_society",
+    "build_society",
+    "ObjectPool",
+    "ClarifierPool",
+    "SocietyPool",
+    "PoolExhausted",
+    "ConvergenceDetector",
+    "CompleteRecommendationsDetector",
+    "NoProgressDetector",
+    "default_convergence_detectors",
+    "MemoryCompactor",
+    "extract_places",
+    "SpeculativePlanner",
+]
\ No newline at end of file
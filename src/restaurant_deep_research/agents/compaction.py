@@ -0,0 +1,286 @@
+"""
+Rolling compaction of agent memory.
+
+Over ten or more rounds both agents' memories accumulate every instruction,
+every solution and every raw Google Maps JSON result, and each turn re-sends
+all of it. :class:`MemoryCompactor` keeps the most recent turns verbatim and,
+once the context exceeds a token threshold, folds everything older into a
+single structured summary: the gist of each earlier exchange plus the places
+found so far (name, rating, price level, address, place_id). Bulky tool
+results in kept turns other than the latest are shrunk the same way.
+"""
+
+import json
+from copy import copy
+from typing import Any, Dict, List, Optional
+
+from camel.agents import ChatAgent
+from camel.logger import get_logger
+from camel.memories import MemoryRecord
+from camel.messages import BaseMessage, FunctionCallingMessage
+from camel.types import OpenAIBackendRole
+
+from restaurant_deep_research.tools.places import parse_places
+
+logger = get_logger(__name__)
+
+SUMMARY_MARKER = "compaction_summary"
+PLACE_FIELDS = ("name", "rating", "price_level", "address", "place_id")
+
+
+def _parse_result(result: Any) -> Any:
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except ValueError:
+            return result
+    return result
+
+
+def extract_places(result: Any, args: Optional[Dict[str, Any]] = None) -> List[dict]:
+    """Pull the summary fields of the places in a Google Maps tool result.
+
+    Args:
+        result (Any): The tool result, as JSON text or decoded.
+        args (Dict[str, Any], optional): The call's arguments, used for the
+            ``place_id`` of details results that omit it.
+
+    Returns:
+        List[dict]: Records with the keys in :data:`PLACE_FIELDS`; fields
+            missing from the result are :obj:`None`.
+    """
+    return [
+        {field: getattr(record, field) for field in PLACE_FIELDS}
+        for record in parse_places(result, args)
+    ]
+
+
+def _excerpt(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class MemoryCompactor:
+    """Summarize old turns of an agent's memory once it grows too large.
+
+    A turn starts with every message the agent receives and includes its
+    tool calls and reply. Compaction runs after a round when the agent's
+    context exceeds ``threshold_tokens``: all but the ``keep_recent_turns``
+    latest turns are replaced by one summary message, and tool results in
+    kept turns (except the latest) longer than ``max_tool_result_chars``
+    are replaced by their extracted place records or an excerpt. Tool calls
+    and their results are always kept or dropped together.
+
+    Args:
+        threshold_tokens (int, optional): Context size that triggers
+            compaction. (default: :obj:`6000`)
+        keep_recent_turns (int, optional): Latest turns kept verbatim.
+            (default: :obj:`2`)
+        max_tool_result_chars (int, optional): Size above which tool results
+            in kept turns are shrunk. (default: :obj:`1500`)
+        excerpt_chars (int, optional): Length of the excerpts of earlier
+            messages and non-place tool results in the summary.
+            (default: :obj:`300`)
+        max_notes (int, optional): Earlier exchanges listed in the summary;
+            older ones are dropped, their places are kept.
+            (default: :obj:`12`)
+    """
+
+    def __init__(
+        self,
+        threshold_tokens: int = 6000,
+        keep_recent_turns: int = 2,
+        max_tool_result_chars: int = 1500,
+        excerpt_chars: int = 300,
+        max_notes: int = 12,
+    ):
+        if keep_recent_turns < 1:
+            raise ValueError("keep_recent_turns must be at least 1")
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_tool_result_chars = max_tool_result_chars
+        self.excerpt_chars = excerpt_chars
+        self.max_notes = max_notes
+
+    def compact(self, agent: ChatAgent) -> Dict[str, Any]:
+        """Compact ``agent``'s memory if its context is over the threshold.
+
+        Args:
+            agent (ChatAgent): The agent whose memory to compact.
+
+        Returns:
+            Dict[str, Any]: Context ``tokens_before`` and ``tokens_after``,
+                whether anything was ``compacted`` and the number of turns
+                folded into the summary.
+        """
+        _, tokens_before = agent.memory.get_context()
+        report = {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_before,
+            "compacted": False,
+            "turns_summarized": 0,
+        }
+        if tokens_before < self.threshold_tokens:
+            return report
+
+        records = [context.memory_record for context in agent.memory.retrieve()]
+        head: List[MemoryRecord] = []
+        summary: Optional[MemoryRecord] = None
+        turns: List[List[MemoryRecord]] = []
+        for record in records:
+            if record.extra_info.get(SUMMARY_MARKER):
+                summary = record
+            elif not turns and record.role_at_backend in (
+                OpenAIBackendRole.SYSTEM,
+                OpenAIBackendRole.DEVELOPER,
+            ):
+                head.append(record)
+            elif record.role_at_backend == OpenAIBackendRole.USER or not turns:
+                turns.append([record])
+            else:
+                turns[-1].append(record)
+
+        old = turns[: -self.keep_recent_turns]
+        recent = turns[-self.keep_recent_turns:]
+        shrunk = [self._shrink_turn(turn) for turn in recent[:-1]] + recent[-1:]
+        changed = bool(old) or any(a is not b for a, b in zip(shrunk, recent))
+        if not changed:
+            return report
+
+        kept: List[MemoryRecord] = list(head)
+        if old or summary is not None:
+            kept.append(self._summarize(summary, old, agent))
+        for turn in shrunk:
+            kept.extend(turn)
+        agent.memory.clear()
+        agent.memory.write_records(kept)
+
+        _, tokens_after = agent.memory.get_context()
+        if tokens_after >= tokens_before:
+            # Short turns can cost less than their summary; keep them.
+            agent.memory.clear()
+            agent.memory.write_records(records)
+            return report
+        report.update(
+            tokens_after=tokens_after,
+            compacted=True,
+            turns_summarized=len(old),
+        )
+        logger.debug(
+            f"Compacted {agent.role_name} memory from {tokens_before} to "
+            f"{tokens_after} tokens ({len(old)} turns summarized)"
+        )
+        return report
+
+    def _shrink_turn(self, turn: List[MemoryRecord]) -> List[MemoryRecord]:
+        shrunk = []
+        changed = False
+        for record in turn:
+            message = record.message
+            if (
+                isinstance(message, FunctionCallingMessage)
+                and message.result is not None
+                and len(str(message.result)) > self.max_tool_result_chars
+            ):
+                compact = copy(message)
+                compact.result = self._compact_result(
+                    message.func_name, message.args, message.result
+                )
+                record = record.model_copy(update={"message": compact})
+                changed = True
+            shrunk.append(record)
+        return shrunk if changed else turn
+
+    def _compact_result(
+        self, func_name: Optional[str], args: Optional[dict], result: Any
+    ) -> str:
+        places = extract_places(result, args)
+        if places:
+            return json.dumps(
+                {"compacted": True, "places": places}, ensure_ascii=False
+            )
+        data = _parse_result(result)
+        text = data if isinstance(data, str) else json.dumps(
+            data, ensure_ascii=False, separators=(",", ":")
+        )
+        return _excerpt(f"[compacted {func_name} result] {text}", self.excerpt_chars)
+
+    def _summarize(
+        self,
+        previous: Optional[MemoryRecord],
+        turns: List[List[MemoryRecord]],
+        agent: ChatAgent,
+    ) -> MemoryRecord:
+        places: Dict[str, dict] = {}
+        notes: List[str] = []
+        if previous is not None:
+            for place in json.loads(previous.extra_info.get("places", "[]")):
+                places[place.get("place_id") or place["name"]] = place
+            notes = json.loads(previous.extra_info.get("notes", "[]"))
+
+        for turn in turns:
+            received = ""
+            replied = ""
+            tools = []
+            for record in turn:
+                message = record.message
+                if isinstance(message, FunctionCallingMessage):
+                    if message.result is None:
+                        continue
+                    found = extract_places(message.result, message.args)
+                    for place in found:
+                        key = place.get("place_id") or place["name"]
+                        places[key] = {**places.get(key, {}), **{
+                            k: v for k, v in place.items() if v is not None
+                        }}
+                    if found:
+                        tools.append(f"{message.func_name} ({len(found)} places)")
+                    else:
+                        tools.append(
+                            self._compact_result(
+                                message.func_name, message.args, message.result
+                            )
+                        )
+                elif record.role_at_backend == OpenAIBackendRole.USER:
+                    received = received or message.content
+                elif message.content:
+                    replied = message.content
+            note = f"- Received: {_excerpt(received, self.excerpt_chars)}"
+            if tools:
+                note += f"\n  Tools: {'; '.join(tools)}"
+            if replied:
+                note += f"\n  Replied: {_excerpt(replied, self.excerpt_chars)}"
+            notes.append(note)
+        notes = notes[-self.max_notes:]
+
+        lines = [
+            "[Summary of earlier conversation, compacted to save context. "
+            "The most recent messages follow verbatim.]",
+            "",
+            "Earlier exchanges:",
+            *notes,
+        ]
+        if places:
+            lines += ["", "Places found so far (name | rating | price level | address | place_id):"]
+            lines += [
+                "- " + " | ".join(
+                    "-" if place.get(key) is None else str(place[key])
+                    for key in PLACE_FIELDS
+                )
+                for place in places.values()
+            ]
+        message = BaseMessage.make_assistant_message(
+            role_name=agent.role_name, content="\n".join(lines)
+        )
+        first = turns[0][0] if turns else previous
+        return MemoryRecord(
+            message=message,
+            role_at_backend=OpenAIBackendRole.ASSISTANT,
+            timestamp=(previous or first).timestamp,
+            agent_id=agent.agent_id,
+            extra_info={
+                SUMMARY_MARKER: "1",
+                "places": json.dumps(list(places.values()), ensure_ascii=False),
+                "notes": json.dumps(notes, ensure_ascii=False),
+            },
+        )
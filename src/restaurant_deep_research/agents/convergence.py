@@ -0,0 +1,265 @@
+"""
+Convergence detection for role-playing conversations.
+
+The conversation loops only stop when an agent terminates or the user agent
+says ``TASK_DONE``, yet the assistant often has a complete recommendation
+list a few rounds earlier. Detectors inspect every finished round and return
+a reason to stop early; :class:`OwlRolePlaying` runs them when configured
+with ``convergence_detectors``.
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Optional, Pattern
+
+from restaurant_deep_research.cache.clarifier import (
+    normalize_query,
+    token_set_similarity,
+)
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Lines that start a new recommendation: "1. Name", "2) Name", "### Name".
+_ENTRY_RE = re.compile(r"^\s{0,3}(?:\d+[.)]\s+|#{2,4}\s+)\S")
+_BOLD_BULLET_RE = re.compile(r"^\s{0,1}[-*•]\s+\*\*")
+
+_NUMBER_WORDS = {
+    "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_REQUESTED_COUNT_RES = [
+    re.compile(
+        r"\b(?:top|best|recommend|suggest|list|find|give me)\s+"
+        r"(\d+|two|three|four|five|six|seven|eight|nine|ten)\b",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"\b(\d+|two|three|four|five|six|seven|eight|nine|ten)\s+"
+        r"(?:\w+\s+)?(?:restaurants|options|places|recommendations|spots)\b",
+        re.IGNORECASE,
+    ),
+    re.compile(r"(\d+)\s*(?:家|个)(?:餐厅|推荐|饭店)"),
+]
+
+DEFAULT_REQUIRED_FIELDS: Dict[str, Pattern] = {
+    "address": re.compile(
+        r"address|地址|\b\d+[-\s]\d+(?:-\d+)?\b|"
+        r"\b\d+\s+[\w .'-]+\b(?:st|street|ave|avenue|rd|road|blvd|ln|lane|dr|drive)\b",
+        re.IGNORECASE,
+    ),
+    "rating": re.compile(
+        r"rating|rated|评分|★|⭐|\b[1-5](?:\.\d)?\s*(?:/\s*5|stars?)\b", re.IGNORECASE
+    ),
+}
+
+# Extra fields required when the clarified spec mentions the constraint.
+_SPEC_FIELDS: List[tuple] = [
+    (
+        re.compile(r"budget|price|cheap|affordable|expensive|预算|价格|人均", re.IGNORECASE),
+        "price",
+        re.compile(r"price|budget|cheap|\$|¥|€|£|人均|价格", re.IGNORECASE),
+    ),
+    (
+        re.compile(r"tonight|open now|hours|opening|营业|今晚", re.IGNORECASE),
+        "hours",
+        re.compile(r"hours|open|closes|营业|\d{1,2}:\d{2}", re.IGNORECASE),
+    ),
+]
+
+
+def _tokens(text: str) -> FrozenSet[str]:
+    return frozenset(_TOKEN_RE.findall(normalize_query(text)))
+
+
+def requested_count(spec: str) -> Optional[int]:
+    """Find how many restaurants the spec asks for.
+
+    Args:
+        spec (str): The clarified task spec.
+
+    Returns:
+        int, optional: The requested number, or :obj:`None` if unspecified.
+    """
+    for pattern in _REQUESTED_COUNT_RES:
+        match = pattern.search(spec)
+        if match:
+            value = match.group(1).lower()
+            count = _NUMBER_WORDS.get(value) or int(value)
+            if 0 < count <= 20:
+                return count
+    return None
+
+
+def split_entries(text: str) -> List[str]:
+    """Split an assistant answer into individual recommendation entries.
+
+    Numbered items and Markdown headings start entries; if there are none,
+    top-level bullets with a bold name do.
+
+    Args:
+        text (str): The assistant's Markdown output.
+
+    Returns:
+        List[str]: One text block per entry.
+    """
+    lines = text.splitlines()
+    for start_re in (_ENTRY_RE, _BOLD_BULLET_RE):
+        entries: List[List[str]] = []
+        for line in lines:
+            if start_re.match(line):
+                entries.append([line])
+            elif entries:
+                entries[-1].append(line)
+        if entries:
+            return ["\n".join(entry) for entry in entries]
+    return []
+
+
+class ConvergenceDetector:
+    """Base class of convergence detectors.
+
+    :meth:`reset` is called with the task prompt when a conversation starts
+    and :meth:`observe` after every round.
+    """
+
+    name = "convergence"
+
+    def reset(self, task: str) -> None:
+        """Prepare for a new conversation.
+
+        Args:
+            task (str): The task prompt given to the society.
+        """
+
+    def observe(
+        self, round: int, instruction: str, solution: str, tool_calls: int
+    ) -> Optional[str]:
+        """Inspect one finished round.
+
+        Args:
+            round (int): Round number, starting at 1.
+            instruction (str): The user agent's instruction.
+            solution (str): The assistant's answer.
+            tool_calls (int): Tool calls the assistant made in the round.
+
+        Returns:
+            str, optional: Why the conversation should stop, or :obj:`None`
+                to continue.
+        """
+        raise NotImplementedError
+
+
+class CompleteRecommendationsDetector(ConvergenceDetector):
+    """Stop once the assistant lists enough fully specified restaurants.
+
+    An entry is fully specified when it mentions every required field (an
+    address and a rating by default, plus price and opening hours when the
+    spec asks about budget or timing).
+
+    Args:
+        min_restaurants (int, optional): Entries required when the spec
+            does not state a number. (default: :obj:`3`)
+        required_fields (Dict[str, Pattern], optional): Field names and
+            patterns every entry must match.
+            (default: :obj:`DEFAULT_REQUIRED_FIELDS`)
+        confirmations (int, optional): Consecutive complete answers needed.
+            (default: :obj:`1`)
+    """
+
+    name = "complete_recommendations"
+
+    def __init__(
+        self,
+        min_restaurants: int = 3,
+        required_fields: Optional[Dict[str, Pattern]] = None,
+        confirmations: int = 1,
+    ):
+        self.min_restaurants = min_restaurants
+        self.base_fields = dict(required_fields or DEFAULT_REQUIRED_FIELDS)
+        self.confirmations = confirmations
+        self.reset("")
+
+    def reset(self, task: str) -> None:
+        self.target = requested_count(task) or self.min_restaurants
+        self.fields = dict(self.base_fields)
+        for trigger, name, pattern in _SPEC_FIELDS:
+            if trigger.search(task):
+                self.fields.setdefault(name, pattern)
+        self._streak = 0
+
+    def complete_entries(self, text: str) -> int:
+        """Count the fully specified entries in ``text``."""
+        return sum(
+            all(pattern.search(entry) for pattern in self.fields.values())
+            for entry in split_entries(text)
+        )
+
+    def observe(
+        self, round: int, instruction: str, solution: str, tool_calls: int
+    ) -> Optional[str]:
+        complete = self.complete_entries(solution)
+        if complete < self.target:
+            self._streak = 0
+            return None
+        self._streak += 1
+        if self._streak < self.confirmations:
+            return None
+        return (
+            f"{self.name}: {complete} restaurants with "
+            f"{', '.join(sorted(self.fields))} (needed {self.target})"
+        )
+
+
+class NoProgressDetector(ConvergenceDetector):
+    """Stop when the conversation keeps repeating itself without tool calls.
+
+    A round is stalled when the assistant made no tool calls and either the
+    instruction or the solution is a near-duplicate of an earlier one.
+
+    Args:
+        patience (int, optional): Consecutive stalled rounds before stopping.
+            (default: :obj:`2`)
+        similarity (float, optional): Token-set similarity at which two
+            messages count as repeated. (default: :obj:`0.85`)
+        window (int, optional): Earlier rounds compared against.
+            (default: :obj:`3`)
+    """
+
+    name = "no_progress"
+
+    def __init__(self, patience: int = 2, similarity: float = 0.85, window: int = 3):
+        self.patience = patience
+        self.similarity = similarity
+        self.window = window
+        self.reset("")
+
+    def reset(self, task: str) -> None:
+        self._instructions: List[FrozenSet[str]] = []
+        self._solutions: List[FrozenSet[str]] = []
+        self._stalled = 0
+
+    def _repeats(self, tokens: FrozenSet[str], history: List[FrozenSet[str]]) -> bool:
+        return bool(tokens) and any(
+            token_set_similarity(tokens, earlier) >= self.similarity
+            for earlier in history[-self.window:]
+        )
+
+    def observe(
+        self, round: int, instruction: str, solution: str, tool_calls: int
+    ) -> Optional[str]:
+        instruction_tokens = _tokens(instruction)
+        solution_tokens = _tokens(solution)
+        stalled = tool_calls == 0 and (
+            self._repeats(instruction_tokens, self._instructions)
+            or self._repeats(solution_tokens, self._solutions)
+        )
+        self._instructions.append(instruction_tokens)
+        self._solutions.append(solution_tokens)
+        self._stalled = self._stalled + 1 if stalled else 0
+        if self._stalled >= self.patience:
+            return f"{self.name}: {self._stalled} rounds repeated earlier messages"
+        return None
+
+
+def default_convergence_detectors() -> List[ConvergenceDetector]:
+    """Return the detectors used by ``convergence_detectors=True``."""
+    return [CompleteRecommendationsDetector(), NoProgressDetector()]
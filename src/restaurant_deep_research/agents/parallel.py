@@ -0,0 +1,102 @@
+"""
+Chat agent that executes independent tool calls concurrently.
+
+A recommendation flow typically searches places and then asks for the details
+of five to ten candidates in a single model response. CAMEL's ``ChatAgent``
+awaits those calls one after another, so enrichment costs one MCP round trip
+per candidate. :class:`ParallelToolChatAgent` starts every call of a response
+as soon as the response arrives, and the agent loop then collects the
+results in their original order, so the conversation memory is unchanged.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from camel.agents import ChatAgent
+from camel.logger import get_logger
+
+from restaurant_deep_research.tools.rate_limit import ToolRateLimiter
+
+logger = get_logger(__name__)
+
+
+class ParallelToolChatAgent(ChatAgent):
+    """A ``ChatAgent`` that runs the tool calls of one response concurrently.
+
+    Only asynchronous steps (:meth:`astep`) are parallelized; :meth:`step`
+    behaves exactly like ``ChatAgent``.
+
+    Args:
+        *args: Positional arguments for ``ChatAgent``.
+        rate_limiter (ToolRateLimiter, optional): Per-tool concurrency cap
+            and rate limit applied to ``tools``. Share one limiter between
+            agents to enforce the limits process-wide.
+            (default: :obj:`ToolRateLimiter()`)
+        **kwargs: Keyword arguments for ``ChatAgent``.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        rate_limiter: Optional[ToolRateLimiter] = None,
+        **kwargs: Any,
+    ):
+        self.rate_limiter = rate_limiter or ToolRateLimiter()
+        if kwargs.get("tools"):
+            kwargs["tools"] = self.rate_limiter.wrap_tools(kwargs["tools"])
+        self._pending_tool_calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.parallel_batches = 0
+        self.parallel_calls = 0
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        """Reset the agent and cancel tool calls that were never collected."""
+        self._cancel_pending_tool_calls()
+        return super().reset()
+
+    def _cancel_pending_tool_calls(self) -> None:
+        for future in self._pending_tool_calls.values():
+            future.cancel()
+        self._pending_tool_calls.clear()
+
+    async def _run_tool(self, func_name: str, args: Dict[str, Any]) -> Any:
+        tool = self._internal_tools[func_name]
+        try:
+            return await tool.async_call(**args)
+        except Exception as e:
+            # Same error capture as ChatAgent._aexecute_tool
+            error_msg = f"Error executing async tool '{func_name}': {e!s}"
+            logger.warning(error_msg)
+            return {"error": error_msg}
+
+    async def _aget_model_response(self, *args: Any, **kwargs: Any):
+        response = await super()._aget_model_response(*args, **kwargs)
+        # Calls left over from an interrupted step belong to stale requests.
+        self._cancel_pending_tool_calls()
+
+        requests: List[Any] = [
+            request
+            for request in (response.tool_call_requests or [])
+            if request.tool_name in self._internal_tools
+        ]
+        if len(requests) > 1:
+            self.parallel_batches += 1
+            self.parallel_calls += len(requests)
+            logger.debug(f"Starting {len(requests)} tool calls concurrently")
+            for request in requests:
+                self._pending_tool_calls[request.tool_call_id] = asyncio.ensure_future(
+                    self._run_tool(request.tool_name, request.args)
+                )
+        return response
+
+    async def _aexecute_tool(self, tool_call_request):
+        future = self._pending_tool_calls.pop(tool_call_request.tool_call_id, None)
+        if future is None:
+            return await super()._aexecute_tool(tool_call_request)
+        result = await future
+        return self._record_tool_calling(
+            tool_call_request.tool_name,
+            tool_call_request.args,
+            result,
+            tool_call_request.tool_call_id,
+        )
@@ -0,0 +1,105 @@
+"""
+Pipelined conversation rounds.
+
+Each round of :class:`OwlRolePlaying` normally pays two model latencies back
+to back: the user agent writes an instruction, then the assistant calls its
+tools and writes a solution. Most of the assistant's solution is already
+determined once its tool results are in, so in pipelined mode the user agent
+drafts its next instruction from those tool results while the assistant is
+still writing the solution. When the solution arrives, a
+:class:`SpeculativePlanner` decides whether the draft still fits it; accepted
+drafts become the next instruction without another model call, rejected ones
+are dropped and the user agent runs as usual.
+
+Drafts are never accepted when they end the conversation, so ``TASK_DONE``
+is only ever given in reply to the assistant's actual solution.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+from camel.messages import BaseMessage
+
+from restaurant_deep_research.tools.places import parse_places
+
+ToolResult = Tuple[str, Dict[str, Any], Any]
+
+_FAILURE_RE = re.compile(
+    r"\b(unable to|could not|couldn't|failed|no results|not found|error)\b",
+    re.IGNORECASE,
+)
+
+
+class SpeculativePlanner:
+    """Drafting and acceptance policy for pipelined rounds.
+
+    The default policy accepts a draft instruction unless it says
+    ``TASK_DONE``, the assistant's solution reports a failure, or the draft
+    names a place from the tool results that the solution does not mention
+    (e.g. because the assistant discarded it).
+
+    Args:
+        max_result_chars (int, optional): Characters of each tool result
+            shown to the user agent in the draft. (default: :obj:`1500`)
+        min_tool_results (int, optional): Tool results needed before a draft
+            is started. (default: :obj:`1`)
+    """
+
+    def __init__(self, max_result_chars: int = 1500, min_tool_results: int = 1):
+        self.max_result_chars = max_result_chars
+        self.min_tool_results = min_tool_results
+
+    def draft_message(
+        self, role_name: str, tool_results: List[ToolResult]
+    ) -> BaseMessage:
+        """Build the provisional assistant message the user agent answers.
+
+        Args:
+            role_name (str): The assistant's role name.
+            tool_results (List[ToolResult]): Name, arguments and result of
+                every tool call of the assistant's current step.
+
+        Returns:
+            BaseMessage: The draft message.
+        """
+        lines = ["Solution (preliminary, from my tool results so far):"]
+        for name, args, result in tool_results:
+            text = result if isinstance(result, str) else json.dumps(
+                result, ensure_ascii=False, default=str
+            )
+            if len(text) > self.max_result_chars:
+                text = text[: self.max_result_chars] + "..."
+            lines.append(
+                f"- {name}({json.dumps(args, ensure_ascii=False, default=str)}): {text}"
+            )
+        return BaseMessage.make_assistant_message(
+            role_name=role_name, content="\n".join(lines)
+        )
+
+    def accepts(
+        self, instruction: str, solution: str, tool_results: List[ToolResult]
+    ) -> bool:
+        """Decide whether a draft instruction still fits the real solution.
+
+        Args:
+            instruction (str): The user agent's draft instruction.
+            solution (str): The assistant's actual solution.
+            tool_results (List[ToolResult]): The tool results the draft was
+                based on.
+
+        Returns:
+            bool: Whether to use the draft as the next instruction.
+        """
+        if "TASK_DONE" in instruction or not solution.strip():
+            return False
+        if _FAILURE_RE.search(solution):
+            return False
+        instruction = instruction.lower()
+        solution = solution.lower()
+        names = {
+            record.name.lower()
+            for name, args, result in tool_results
+            for record in parse_places(result, args)
+        }
+        return all(name in solution for name in names if name in instruction)
@@ -0,0 +1,345 @@
+"""
+Reusable clarifier agents and role-playing societies.
+
+Every query used to build a fresh clarifier ``ChatAgent`` and a fresh
+:class:`OwlRolePlaying` with two more agents, repeating tool schema
+conversion, system message construction and memory setup each time. The
+pools in this module keep finished agents and societies around, reset them
+when they are returned and re-target them at the next task instead.
+
+Pools are bounded: at most ``max_size`` objects exist at once and further
+leases wait for one to be returned. Leases are tracked, so objects held
+longer than ``leak_timeout`` are reported by :meth:`ObjectPool.check_leaks`,
+and objects that are garbage collected without being returned are logged
+and their slot is given back to the pool.
+"""
+
+import asyncio
+import contextlib
+import inspect
+import time
+import weakref
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from camel.agents import ChatAgent
+from camel.logger import get_logger
+from camel.messages import BaseMessage
+from camel.models import BaseModelBackend
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.agents.role_playing import (
+    OwlRolePlaying,
+    build_society,
+)
+from restaurant_deep_research.config.prompts import RESTAURANT_CLARIFIER_PROMPT
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when no pooled object became available within the timeout."""
+
+
+class _Lease:
+    __slots__ = ("ref", "acquired_at", "owner")
+
+    def __init__(self, ref: "weakref.ref", owner: str):
+        self.ref = ref
+        self.acquired_at = time.monotonic()
+        self.owner = owner
+
+
+class ObjectPool(Generic[T]):
+    """A bounded pool of reusable objects with lease tracking.
+
+    Args:
+        create (Callable[..., Union[T, Awaitable[T]]]): Builds a new object
+            from the arguments given to :meth:`acquire`.
+        prepare (Callable[..., None], optional): Re-targets an idle object
+            with the arguments given to :meth:`acquire`. Without it, idle
+            objects are handed out as they are. (default: :obj:`None`)
+        reset (Callable[[T], None], optional): Clears an object's state when
+            it is returned. Objects whose reset raises are discarded.
+            (default: :obj:`None`)
+        max_size (int, optional): Objects that may exist at once, leased or
+            idle. (default: :obj:`4`)
+        acquire_timeout (float, optional): Seconds :meth:`acquire` waits for
+            a free slot before raising :class:`PoolExhausted`, or
+            :obj:`None` to wait forever. (default: :obj:`None`)
+        leak_timeout (float, optional): Seconds after which a lease is
+            reported as a possible leak. (default: :obj:`900.0`)
+        name (str, optional): Name used in log messages.
+            (default: :obj:`"pool"`)
+    """
+
+    def __init__(
+        self,
+        create: Callable[..., Union[T, Awaitable[T]]],
+        prepare: Optional[Callable[..., None]] = None,
+        reset: Optional[Callable[[T], None]] = None,
+        max_size: int = 4,
+        acquire_timeout: Optional[float] = None,
+        leak_timeout: float = 900.0,
+        name: str = "pool",
+    ):
+        if max_size < 1:
+            raise ValueError(f"{type(self).__name__} max_size must be at least 1")
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.leak_timeout = leak_timeout
+        self.name = name
+
+        self._create = create
+        self._prepare = prepare
+        self._reset = reset
+        self._slots = asyncio.Semaphore(max_size)
+        self._idle: List[T] = []
+        self._leases: Dict[int, _Lease] = {}
+        self._created = 0
+        self._reused = 0
+        self._discarded = 0
+        self._leaked = 0
+
+    async def checkout(self, *args: Any, **kwargs: Any) -> T:
+        """Take an object out of the pool; it must be given to :meth:`checkin`.
+
+        Prefer :meth:`acquire`, which always returns the object.
+
+        Args:
+            *args: Arguments for ``create`` or ``prepare``.
+            **kwargs: Keyword arguments for ``create`` or ``prepare``.
+
+        Returns:
+            T: An idle object re-targeted with the arguments, or a new one.
+        """
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhausted(
+                f"{self.name}: all {self.max_size} objects are leased"
+            ) from None
+        try:
+            obj = await self._take(*args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._track(obj)
+        return obj
+
+    def checkin(self, obj: T) -> None:
+        """Reset an object and return it to the pool.
+
+        Args:
+            obj (T): An object obtained from :meth:`checkout`.
+        """
+        lease = self._leases.pop(id(obj), None)
+        if lease is None or lease.ref() is not obj:
+            logger.warning(f"{self.name}: ignoring an object it did not lease")
+            return
+        try:
+            if self._reset is not None:
+                self._reset(obj)
+        except Exception as e:
+            self._discarded += 1
+            logger.warning(f"{self.name}: discarding object that failed to reset: {e!r}")
+        else:
+            self._idle.append(obj)
+        self._slots.release()
+
+    def discard(self, obj: T) -> None:
+        """Drop a leased object instead of returning it, freeing its slot.
+
+        Args:
+            obj (T): An object obtained from :meth:`checkout`.
+        """
+        if self._leases.pop(id(obj), None) is not None:
+            self._discarded += 1
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, *args: Any, **kwargs: Any) -> AsyncIterator[T]:
+        """Lease an object for the duration of the block.
+
+        Objects are discarded rather than reused when the block raises, since
+        an interrupted conversation may leave them in an unknown state.
+
+        Args:
+            *args: Arguments for ``create`` or ``prepare``.
+            **kwargs: Keyword arguments for ``create`` or ``prepare``.
+
+        Yields:
+            T: The leased object.
+        """
+        obj = await self.checkout(*args, **kwargs)
+        try:
+            yield obj
+        except BaseException:
+            self.discard(obj)
+            raise
+        else:
+            self.checkin(obj)
+
+    def check_leaks(self) -> List[dict]:
+        """Report leases held longer than ``leak_timeout``.
+
+        Returns:
+            List[dict]: The owner and age in seconds of every suspect lease.
+        """
+        now = time.monotonic()
+        suspects = [
+            {"owner": lease.owner, "age": round(now - lease.acquired_at, 3)}
+            for lease in self._leases.values()
+            if now - lease.acquired_at > self.leak_timeout
+        ]
+        for suspect in suspects:
+            logger.warning(
+                f"{self.name}: object leased by {suspect['owner']} has not been "
+                f"returned after {suspect['age']:.0f}s"
+            )
+        return suspects
+
+    def clear(self) -> None:
+        """Drop every idle object."""
+        self._idle.clear()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool.
+
+        Returns:
+            dict: Sizes and lifetime counters.
+        """
+        now = time.monotonic()
+        return {
+            "max_size": self.max_size,
+            "leased": len(self._leases),
+            "idle": len(self._idle),
+            "created": self._created,
+            "reused": self._reused,
+            "discarded": self._discarded,
+            "leaked": self._leaked,
+            "suspected_leaks": sum(
+                now - lease.acquired_at > self.leak_timeout
+                for lease in self._leases.values()
+            ),
+        }
+
+    async def _take(self, *args: Any, **kwargs: Any) -> T:
+        while self._idle:
+            obj = self._idle.pop()
+            if self._prepare is None:
+                self._reused += 1
+                return obj
+            try:
+                self._prepare(obj, *args, **kwargs)
+            except Exception as e:
+                self._discarded += 1
+                logger.warning(f"{self.name}: discarding object that failed to prepare: {e!r}")
+                continue
+            self._reused += 1
+            return obj
+        obj = self._create(*args, **kwargs)
+        if inspect.isawaitable(obj):
+            obj = await obj
+        self._created += 1
+        return obj
+
+    def _track(self, obj: T) -> None:
+        key = id(obj)
+        task = asyncio.current_task()
+        owner = task.get_name() if task is not None else "<no task>"
+
+        def collected(ref: "weakref.ref") -> None:
+            lease = self._leases.get(key)
+            if lease is not None and lease.ref is ref:
+                del self._leases[key]
+                self._leaked += 1
+                self._slots.release()
+                logger.warning(
+                    f"{self.name}: object leased by {owner} was garbage collected "
+                    "without being returned"
+                )
+
+        self._leases[key] = _Lease(weakref.ref(obj, collected), owner)
+
+
+class ClarifierPool(ObjectPool[ChatAgent]):
+    """Pool of Request Clarifier agents sharing one model backend.
+
+    Args:
+        model (BaseModelBackend): Backend for the clarifier agents.
+        max_size (int, optional): Agents that may exist at once.
+            (default: :obj:`4`)
+        **kwargs: Further arguments for :class:`ObjectPool`.
+    """
+
+    def __init__(self, model: BaseModelBackend, max_size: int = 4, **kwargs: Any):
+        self.model = model
+        self._sys_msg = BaseMessage.make_user_message(
+            role_name="Request Clarifier",
+            content=RESTAURANT_CLARIFIER_PROMPT,
+        )
+        super().__init__(
+            self._new_agent,
+            reset=lambda agent: agent.reset(),
+            max_size=max_size,
+            name=kwargs.pop("name", "clarifier pool"),
+            **kwargs,
+        )
+
+    def _new_agent(self) -> ChatAgent:
+        return ChatAgent(self._sys_msg, self.model)
+
+
+class SocietyPool(ObjectPool[OwlRolePlaying]):
+    """Pool of role-playing societies re-targeted for every task.
+
+    Societies in one pool share the model backends and options they were
+    built with; :meth:`acquire` takes the task prompt and tools of the next
+    query and re-targets an idle society with
+    :meth:`OwlRolePlaying.retarget`.
+
+    Args:
+        models (Dict[str, BaseModelBackend]): Backends keyed by ``"user"``
+            and ``"assistant"``.
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options for every society. (default: :obj:`None`)
+        max_size (int, optional): Societies that may exist at once.
+            (default: :obj:`4`)
+        **kwargs: Further arguments for :class:`ObjectPool`.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, BaseModelBackend],
+        society_kwargs: Optional[dict] = None,
+        max_size: int = 4,
+        **kwargs: Any,
+    ):
+        self.models = models
+        self.society_kwargs = dict(society_kwargs or {})
+        super().__init__(
+            self._new_society,
+            prepare=OwlRolePlaying.retarget,
+            reset=OwlRolePlaying.reset,
+            max_size=max_size,
+            name=kwargs.pop("name", "society pool"),
+            **kwargs,
+        )
+
+    def _new_society(
+        self, task_prompt: str, tools: List[FunctionTool]
+    ) -> OwlRolePlaying:
+        return build_society(task_prompt, tools, self.models, self.society_kwargs)
@@ -20,17 +20,63 @@ class which manages multi-agent conversations between user and assistant agents.
 # limitations under the License.
 # ========= Copyright 2023-2024 @ CAMEL-AI.org. All Rights Reserved. =========
 
-from typing import Dict, List, Optional, Tuple
-from copy import deepcopy
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from copy import copy
 
 from camel.agents import ChatAgent
 from camel.responses import ChatAgentResponse
 from camel.messages.base import BaseMessage
+from camel.models import BaseModelBackend
 from camel.societies import RolePlaying
+from camel.toolkits import FunctionTool
 from camel.logger import get_logger
+from camel.types import OpenAIBackendRole
+
+from restaurant_deep_research.agents.compaction import MemoryCompactor
+from restaurant_deep_research.agents.convergence import (
+    ConvergenceDetector,
+    default_convergence_detectors,
+)
+from restaurant_deep_research.agents.parallel import ParallelToolChatAgent
+from restaurant_deep_research.agents.pipeline import SpeculativePlanner, ToolResult
+from restaurant_deep_research.metrics import (
+    QueryMetrics,
+    metrics_scope,
+    phase,
+    record_compaction,
+    record_pipeline,
+    record_tokens,
+)
+from restaurant_deep_research.tools.places import PlaceStore
+from restaurant_deep_research.tools.prefetch import PlacePrefetcher
+from restaurant_deep_research.tools.rate_limit import ToolRateLimiter
+from restaurant_deep_research.tools.wrapping import ToolCall, wrap_tool
 
 logger = get_logger(__name__)
 
+TASK_INJECTION_MODES = ("always", "first_turn", "reference")
+
+
+def with_content_suffix(message: BaseMessage, suffix: str) -> BaseMessage:
+    """Derive a message whose content has ``suffix`` appended.
+
+    The derived message is a shallow copy: images, videos, ``meta_dict`` and
+    other payload are shared with ``message`` rather than deep-copied, which
+    keeps per-turn cost independent of the payload size. Neither message is
+    mutated afterwards, so sharing is safe.
+
+    Args:
+        message (BaseMessage): The original message.
+        suffix (str): Text to append to the content.
+
+    Returns:
+        BaseMessage: A new message of the same type.
+    """
+    derived = copy(message)
+    derived.content = message.content + suffix
+    return derived
+
 
 class OwlRolePlaying(RolePlaying):
     """
@@ -64,17 +110,134 @@ class OwlRolePlaying(RolePlaying):
                 - user_agent_kwargs (dict): Arguments for user agent
                 - assistant_agent_kwargs (dict): Arguments for assistant agent
                 - task_prompt (str): The task description
+                - task_injection (str, optional): How the task prompt is
+                  repeated in per-turn messages: ``"always"`` appends the full
+                  task every turn, ``"first_turn"`` only on the first turn and
+                  once the context budget is reached, ``"reference"`` like
+                  ``"first_turn"`` but with a compact reference to the task in
+                  between. (default: ``"always"``)
+                - context_token_budget (int, optional): Token limit for each
+                  agent's context. Older messages are truncated beyond it, so
+                  the full task is re-injected once it is reached.
+                - parallel_tool_calls (bool, optional): Run the tool calls of
+                  one assistant response concurrently in :meth:`astep`.
+                  (default: ``False``)
+                - tool_rate_limiter (ToolRateLimiter, optional): Per-tool
+                  concurrency cap and rate limit for parallel tool calls.
+                  (default: ``ToolRateLimiter()``)
+                - convergence_detectors (Union[bool, List[ConvergenceDetector]],
+                  optional): Detectors that end the conversation early once
+                  the assistant's answer is complete or the agents stop
+                  making progress; ``True`` selects the defaults.
+                  (default: ``None``)
+                - memory_compaction (Union[bool, MemoryCompactor], optional):
+                  Summarize older turns of both agents' memories after each
+                  round once they exceed the compactor's token threshold;
+                  ``True`` selects ``MemoryCompactor()``. (default: ``None``)
+                - compact_tool_results (Union[bool, PlaceStore], optional):
+                  Parse the assistant's Google Maps results into place
+                  records, available as :attr:`places`, and show the model
+                  a trimmed projection instead of the raw JSON; ``True``
+                  selects ``PlaceStore()``. (default: ``None``)
+                - prefetch_place_details (Union[bool, int, PlacePrefetcher],
+                  optional): Fetch details of the top hits of every place
+                  search in the background, while the user agent writes its
+                  next instruction; ``True`` selects ``PlacePrefetcher()``
+                  and an int its ``top_k``. Prefetchers and place stores
+                  hold per-conversation state, so pass instances only to a
+                  single society. (default: ``None``)
+                - pipelined_turns (Union[bool, SpeculativePlanner],
+                  optional): In :meth:`astep`, let the user agent draft its
+                  next instruction from the assistant's tool results while
+                  the assistant writes its solution, and use the draft if
+                  it still fits the solution; ``True`` selects
+                  ``SpeculativePlanner()``. (default: ``None``)
         """
         self.user_role_name = kwargs.get("user_role_name", "user")
         self.assistant_role_name = kwargs.get("assistant_role_name", "assistant")
 
         self.output_language = kwargs.get("output_language", None)
 
-        self.user_agent_kwargs: dict = kwargs.get("user_agent_kwargs", {})
-        self.assistant_agent_kwargs: dict = kwargs.get("assistant_agent_kwargs", {})
+        # Copy the agent kwargs, which are filled in with defaults below and
+        # in _init_agents, so that a caller's dicts can be reused safely.
+        self.user_agent_kwargs: dict = dict(kwargs.get("user_agent_kwargs") or {})
+        self.assistant_agent_kwargs: dict = dict(
+            kwargs.get("assistant_agent_kwargs") or {}
+        )
+        kwargs["user_agent_kwargs"] = self.user_agent_kwargs
+        kwargs["assistant_agent_kwargs"] = self.assistant_agent_kwargs
 
         self.output_language = kwargs.get("output_language", None)
 
+        self.task_injection: str = kwargs.pop("task_injection", "always")
+        if self.task_injection not in TASK_INJECTION_MODES:
+            raise ValueError(
+                f"task_injection must be one of {TASK_INJECTION_MODES}, "
+                f"got {self.task_injection!r}"
+            )
+        self.context_token_budget: Optional[int] = kwargs.pop(
+            "context_token_budget", None
+        )
+        if self.context_token_budget is not None:
+            self.user_agent_kwargs.setdefault("token_limit", self.context_token_budget)
+            self.assistant_agent_kwargs.setdefault(
+                "token_limit", self.context_token_budget
+            )
+
+        self.parallel_tool_calls: bool = kwargs.pop("parallel_tool_calls", False)
+        self.tool_rate_limiter: Optional[ToolRateLimiter] = kwargs.pop(
+            "tool_rate_limiter", None
+        )
+
+        detectors = kwargs.pop("convergence_detectors", None)
+        if detectors is True:
+            detectors = default_convergence_detectors()
+        self.convergence_detectors: List[ConvergenceDetector] = list(detectors or [])
+
+        compactor = kwargs.pop("memory_compaction", None)
+        if compactor is True:
+            compactor = MemoryCompactor()
+        self.memory_compactor: Optional[MemoryCompactor] = compactor or None
+
+        places = kwargs.pop("compact_tool_results", None)
+        if places is True:
+            places = PlaceStore()
+        # An empty store is falsy, so compare against ``False`` explicitly.
+        self.places: Optional[PlaceStore] = places if places is not False else None
+
+        prefetcher = kwargs.pop("prefetch_place_details", None)
+        if prefetcher is True:
+            prefetcher = PlacePrefetcher()
+        elif isinstance(prefetcher, int):
+            prefetcher = PlacePrefetcher(top_k=prefetcher) if prefetcher > 0 else None
+        self.prefetcher: Optional[PlacePrefetcher] = prefetcher or None
+
+        planner = kwargs.pop("pipelined_turns", None)
+        if planner is True:
+            planner = SpeculativePlanner()
+        self.planner: Optional[SpeculativePlanner] = planner or None
+        self._drafting = False
+        self._tools_in_flight = 0
+        self._step_tool_results: List[ToolResult] = []
+        self._draft: Optional["asyncio.Future[ChatAgentResponse]"] = None
+        self._draft_agent: Optional[ChatAgent] = None
+        self._draft_tool_results: List[ToolResult] = []
+        self._planned: Optional[
+            Tuple[BaseMessage, "asyncio.Future[ChatAgentResponse]", List[ToolResult]]
+        ] = None
+        # The solution last returned by astep and the suffix the user agent
+        # receives with it.
+        self._solution_suffix: Optional[Tuple[BaseMessage, str]] = None
+
+        self._token_count_cache: Dict[str, int] = {}
+        self._task_injected = False
+        self._turn = 0
+        self._user_prompt_tokens = 0
+        self._assistant_prompt_tokens = 0
+        self._tokens_omitted = {"user": 0, "assistant": 0}
+        self._turn_prompt_tokens_saved = 0
+        self.prompt_tokens_saved = 0
+
         super().__init__(**kwargs)
 
         init_user_sys_msg, init_assistant_sys_msg = self._construct_gaia_sys_msgs()
@@ -127,11 +290,25 @@ class OwlRolePlaying(RolePlaying):
             elif "model" not in user_agent_kwargs:
                 user_agent_kwargs.update(dict(model=self.model))
 
-        self.assistant_agent = ChatAgent(
-            init_assistant_sys_msg,
-            output_language=output_language,
-            **(assistant_agent_kwargs or {}),
-        )
+        if assistant_agent_kwargs and assistant_agent_kwargs.get("tools"):
+            assistant_agent_kwargs = {
+                **assistant_agent_kwargs,
+                "tools": self._wrap_assistant_tools(assistant_agent_kwargs["tools"]),
+            }
+
+        if self.parallel_tool_calls:
+            self.assistant_agent = ParallelToolChatAgent(
+                init_assistant_sys_msg,
+                output_language=output_language,
+                rate_limiter=self.tool_rate_limiter,
+                **(assistant_agent_kwargs or {}),
+            )
+        else:
+            self.assistant_agent = ChatAgent(
+                init_assistant_sys_msg,
+                output_language=output_language,
+                **(assistant_agent_kwargs or {}),
+            )
         self.assistant_sys_msg = self.assistant_agent.system_message
 
         self.user_agent = ChatAgent(
@@ -141,6 +318,21 @@ class OwlRolePlaying(RolePlaying):
         )
         self.user_sys_msg = self.user_agent.system_message
 
+    def _wrap_assistant_tools(self, tools: List[FunctionTool]) -> List[FunctionTool]:
+        """Apply the prefetcher, place store and draft trigger to tools.
+
+        The prefetcher sits below the place store so that it sees the raw
+        search results and serves raw details, which the store then trims.
+        Pipelined rounds observe the results as the model sees them.
+        """
+        if self.prefetcher is not None:
+            tools = self.prefetcher.wrap_tools(tools)
+        if self.places is not None:
+            tools = self.places.wrap_tools(tools)
+        if self.planner is not None:
+            tools = [wrap_tool(tool, self._observe_tool_call) for tool in tools]
+        return tools
+
     def _construct_gaia_sys_msgs(self):
         """
         Construct system messages for the user and assistant agents.
@@ -221,6 +413,427 @@ Please note that our overall task may be very complicated. Here are some tips th
 
         return user_sys_msg, assistant_sys_msg
 
+    def retarget(
+        self, task_prompt: str, tools: Optional[List[FunctionTool]] = None
+    ) -> None:
+        """Point the society at a new task without rebuilding its agents.
+
+        Rebuilds both system messages around ``task_prompt``, swaps the
+        assistant's tools when given and clears all conversation state, so a
+        pooled society behaves exactly like a freshly constructed one.
+
+        Args:
+            task_prompt (str): The new task description.
+            tools (List[FunctionTool], optional): Tools replacing the
+                assistant's current ones. (default: :obj:`None`)
+        """
+        self.task_prompt = task_prompt
+        user_sys_msg, assistant_sys_msg = self._construct_gaia_sys_msgs()
+        for agent, sys_msg in (
+            (self.user_agent, user_sys_msg),
+            (self.assistant_agent, assistant_sys_msg),
+        ):
+            agent._original_system_message = sys_msg
+            agent._system_message = (
+                agent._generate_system_message_for_output_language()
+            )
+        self.assistant_sys_msg = self.assistant_agent.system_message
+        self.user_sys_msg = self.user_agent.system_message
+
+        if tools is not None:
+            tools = self._wrap_assistant_tools(tools)
+            if isinstance(self.assistant_agent, ParallelToolChatAgent):
+                tools = self.assistant_agent.rate_limiter.wrap_tools(tools)
+            for name in list(self.assistant_agent.tool_dict):
+                self.assistant_agent.remove_tool(name)
+            for tool in tools:
+                self.assistant_agent.add_tool(tool)
+
+        self._token_count_cache.clear()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear both agents' memories and the per-conversation bookkeeping."""
+        self.assistant_agent.reset()
+        self.user_agent.reset()
+        if self.places is not None:
+            self.places.clear()
+        if self.prefetcher is not None:
+            self.prefetcher.reset()
+        self._discard_drafts()
+        self._solution_suffix = None
+        self._task_injected = False
+        self._turn = 0
+        self._user_prompt_tokens = 0
+        self._assistant_prompt_tokens = 0
+        self._tokens_omitted = {"user": 0, "assistant": 0}
+        self._turn_prompt_tokens_saved = 0
+        self.prompt_tokens_saved = 0
+        for detector in self.convergence_detectors:
+            detector.reset(self.task_prompt)
+
+    def init_chat(self, init_msg_content: Optional[str] = None) -> BaseMessage:
+        """Reset the agents and the context-budget bookkeeping.
+
+        Args:
+            init_msg_content (str, optional): Content of the initial message
+                sent to the user agent. (default: :obj:`None`)
+
+        Returns:
+            BaseMessage: The initial message.
+        """
+        self._turn = 0
+        self._user_prompt_tokens = 0
+        self._assistant_prompt_tokens = 0
+        self._tokens_omitted = {"user": 0, "assistant": 0}
+        self._turn_prompt_tokens_saved = 0
+        self.prompt_tokens_saved = 0
+        for detector in self.convergence_detectors:
+            detector.reset(self.task_prompt)
+        self._discard_drafts()
+        self._solution_suffix = None
+        if init_msg_content is None:
+            return super().init_chat()
+        return super().init_chat(init_msg_content)
+
+    def _needs_full_task(self, receiver_prompt_tokens: int) -> bool:
+        """Decide whether the next message must carry the full task text.
+
+        The task is always in the agents' system messages, so it only needs to
+        be repeated on the first turn, or once the receiving agent's context has
+        reached the token budget and older messages start being truncated.
+
+        Args:
+            receiver_prompt_tokens (int): Prompt tokens of the receiving
+                agent's previous model call.
+
+        Returns:
+            bool: Whether to inject the full task prompt.
+        """
+        if self.task_injection == "always" or self._turn <= 1:
+            return True
+        budget = self.context_token_budget
+        return budget is not None and receiver_prompt_tokens >= budget
+
+    def _count_tokens(self, text: str) -> int:
+        tokens = self._token_count_cache.get(text)
+        if tokens is None:
+            try:
+                counter = self.assistant_agent.model_backend.token_counter
+                tokens = counter.count_tokens_from_messages(
+                    [{"role": "user", "content": text}]
+                )
+            except Exception:
+                tokens = len(text) // 4
+            if len(self._token_count_cache) > 64:
+                self._token_count_cache.clear()
+            self._token_count_cache[text] = tokens
+        return tokens
+
+    def _choose_suffix(
+        self, receiver: str, full: str, reference: str, minimal: str
+    ) -> str:
+        """Pick the suffix for one message and account for the tokens saved.
+
+        Args:
+            receiver (str): ``"user"`` or ``"assistant"``, the agent that will
+                receive the message.
+            full (str): Suffix carrying the full task prompt.
+            reference (str): Suffix with a compact reference to the task.
+            minimal (str): Suffix without any task text.
+
+        Returns:
+            str: The suffix to append.
+        """
+        prompt_tokens = (
+            self._user_prompt_tokens
+            if receiver == "user"
+            else self._assistant_prompt_tokens
+        )
+        if self._needs_full_task(prompt_tokens):
+            self._task_injected = True
+            return full
+        suffix = reference if self.task_injection == "reference" else minimal
+        saved = self._count_tokens(full) - self._count_tokens(suffix)
+        # Every omitted copy would otherwise stay in the receiver's memory and
+        # be re-sent on all following turns.
+        self._tokens_omitted[receiver] += saved
+        self._turn_prompt_tokens_saved += self._tokens_omitted[receiver]
+        return suffix
+
+    def _user_msg_suffix(self, user_msg: BaseMessage) -> str:
+        """Build the suffix appended to the user agent's instruction.
+
+        Args:
+            user_msg (BaseMessage): The instruction from the user agent.
+
+        Returns:
+            str: Text to append before passing the instruction to the
+                assistant agent.
+        """
+        self._task_injected = False
+        self._turn_prompt_tokens_saved = 0
+        if "TASK_DONE" in user_msg.content:
+            # The task is done, and the assistant agent need to give the final answer about the original task
+            self._task_injected = True
+            return f"""\n
+            Now please make a final answer of the original task based on our conversation : <task>{self.task_prompt}</task>
+            """
+
+        tool_hint = "If there are available tools and you want to call them, never say 'I will ...', but first call the tool and reply based on tool call's result, and tell me which tool you have called."
+        return self._choose_suffix(
+            "assistant",
+            full=f"""\n
+            Here are auxiliary information about the overall task, which may help you understand the intent of the current task:
+            <auxiliary_information>
+            {self.task_prompt}
+            </auxiliary_information>
+            {tool_hint}
+            """,
+            reference=f"""\n
+            Keep our overall task from your system message in mind when solving the current instruction.
+            {tool_hint}
+            """,
+            minimal=f"""\n
+            {tool_hint}
+            """,
+        )
+
+    def _assistant_msg_suffix(self) -> str:
+        """Build the suffix appended to the assistant's solution.
+
+        Returns:
+            str: Text to append before passing the solution back to the user
+                agent.
+        """
+        follow_up = """Before producing the final answer, please check whether I have rechecked the final answer using different toolkit as much as possible. If not, please remind me to do that.
+                If I have written codes, remind me to run the codes.
+                If you think our task is done, reply with `TASK_DONE` to end our conversation."""
+        return self._choose_suffix(
+            "user",
+            full=f"""\n
+                Provide me with the next instruction and input (if needed) based on my response and our current task: <task>{self.task_prompt}</task>
+                {follow_up}
+            """,
+            reference=f"""\n
+                Provide me with the next instruction and input (if needed) based on my response and our current task from your system message.
+                {follow_up}
+            """,
+            minimal=f"""\n
+                Provide me with the next instruction and input (if needed) based on my response.
+                {follow_up}
+            """,
+        )
+
+    def _record_usage(
+        self, user_response: ChatAgentResponse, assistant_response: ChatAgentResponse
+    ) -> None:
+        """Remember each agent's latest prompt size for truncation detection."""
+        user_usage = user_response.info.get("usage") or {}
+        assistant_usage = assistant_response.info.get("usage") or {}
+        self._user_prompt_tokens = user_usage.get("prompt_tokens", 0)
+        self._assistant_prompt_tokens = assistant_usage.get("prompt_tokens", 0)
+
+    def _context_budget_info(self) -> dict:
+        """Report this turn's task injection and prompt-token savings.
+
+        Returns:
+            dict: ``mode``, ``task_injected``, the estimated prompt tokens
+                saved this turn and the running total.
+        """
+        self.prompt_tokens_saved += self._turn_prompt_tokens_saved
+        return {
+            "mode": self.task_injection,
+            "task_injected": self._task_injected,
+            "prompt_tokens_saved": self._turn_prompt_tokens_saved,
+            "total_prompt_tokens_saved": self.prompt_tokens_saved,
+        }
+
+    async def _observe_tool_call(
+        self, tool_name: str, kwargs: Dict[str, Any], call: ToolCall
+    ) -> Any:
+        """Collect the assistant's tool results and start a draft once the
+        last call of a batch has finished."""
+        self._tools_in_flight += 1
+        try:
+            result = await call(**kwargs)
+        finally:
+            self._tools_in_flight -= 1
+        if self._drafting:
+            self._step_tool_results.append((tool_name, dict(kwargs), result))
+            # Runs once the agent has moved on: to its next tool call, or to
+            # the model call that writes the solution.
+            asyncio.get_running_loop().call_soon(self._start_draft)
+        return result
+
+    def _start_draft(self) -> None:
+        """Let a copy of the user agent answer the current tool results."""
+        results = list(self._step_tool_results)
+        if (
+            not self._drafting
+            or self._tools_in_flight
+            or len(results) < self.planner.min_tool_results
+            or len(results) == len(self._draft_tool_results)
+        ):
+            return
+        self._cancel_draft(self._draft)
+        self._draft_tool_results = results
+        self._draft = asyncio.ensure_future(self._draft_instruction(results))
+        record_pipeline("speculated")
+
+    async def _draft_instruction(
+        self, tool_results: List[ToolResult]
+    ) -> ChatAgentResponse:
+        """Run the user agent's next step on a draft of the solution.
+
+        The draft is answered by a second agent whose memory is reset to a
+        copy of the user agent's, so the real one is untouched until the
+        draft is accepted. At most one draft runs at a time, so the agent is
+        created once and reused.
+        """
+        if self._draft_agent is None:
+            self._draft_agent = ChatAgent(
+                self.user_agent._original_system_message,
+                output_language=self.output_language,
+                **self.user_agent_kwargs,
+            )
+        planner_agent = self._draft_agent
+        # The copied records start with the user agent's current system
+        # message, so a retargeted society needs no new agent.
+        planner_agent.memory.clear()
+        planner_agent.memory.write_records(
+            [context.memory_record for context in self.user_agent.memory.retrieve()]
+        )
+        draft = self.planner.draft_message(self.assistant_role_name, tool_results)
+        with phase("user_draft", round=self._turn + 1):
+            return await planner_agent.astep(draft)
+
+    @staticmethod
+    def _record_draft_tokens(
+        draft: "asyncio.Future[ChatAgentResponse]", role: str
+    ) -> None:
+        """Record the tokens of a finished draft under ``role``.
+
+        Drafts are only counted once it is known whether they are used:
+        as ``"user"`` tokens when accepted, else as ``"draft_wasted"``.
+        """
+        if draft.done() and not draft.cancelled() and draft.exception() is None:
+            record_tokens(role, draft.result().info.get("usage"))
+
+    @classmethod
+    def _cancel_draft(
+        cls, draft: Optional["asyncio.Future[ChatAgentResponse]"]
+    ) -> None:
+        """Cancel a draft that will not be used and count it."""
+        if draft is not None:
+            cls._record_draft_tokens(draft, "draft_wasted")
+            draft.cancel()
+            record_pipeline("cancelled")
+
+    def _discard_drafts(self) -> None:
+        """Cancel the running draft and forget the planned instruction."""
+        for draft in (self._draft, self._planned and self._planned[1]):
+            self._cancel_draft(draft)
+        self._draft = None
+        self._draft_tool_results = []
+        self._planned = None
+
+    async def _auser_step(self, assistant_msg: BaseMessage) -> ChatAgentResponse:
+        """Answer ``assistant_msg``, using the planned draft if it fits."""
+        suffixed, self._solution_suffix = self._solution_suffix, None
+        user_input = assistant_msg
+        if suffixed is not None and suffixed[0] is assistant_msg:
+            user_input = with_content_suffix(assistant_msg, suffixed[1])
+        planned, self._planned = self._planned, None
+        if planned is not None:
+            solution_msg, draft, tool_results = planned
+            response = None
+            if solution_msg is not assistant_msg:
+                self._record_draft_tokens(draft, "draft_wasted")
+                draft.cancel()
+            elif not draft.cancelled():
+                try:
+                    response = await draft
+                except asyncio.CancelledError:
+                    if not draft.cancelled():
+                        raise
+                except Exception as e:
+                    logger.warning(f"Drafting the next instruction failed: {e!r}")
+            if (
+                response is not None
+                and not response.terminated
+                and len(response.msgs) == 1
+                and self.planner.accepts(
+                    response.msg.content, assistant_msg.content, tool_results
+                )
+            ):
+                self.user_agent.update_memory(user_input, OpenAIBackendRole.USER)
+                self.user_agent.update_memory(
+                    response.msg, OpenAIBackendRole.ASSISTANT
+                )
+                self._record_draft_tokens(draft, "user")
+                record_pipeline("accepted")
+                return response
+            if response is not None:
+                self._record_draft_tokens(draft, "draft_wasted")
+            record_pipeline("rejected")
+
+        response = await self.user_agent.astep(user_input)
+        record_tokens("user", response.info.get("usage"))
+        return response
+
+    def _compact_memories(self) -> Optional[dict]:
+        """Compact both agents' memories after a round, if enabled.
+
+        Returns:
+            dict, optional: Each role's context tokens before and after
+                compaction, or :obj:`None` when compaction is disabled.
+        """
+        if self.memory_compactor is None:
+            return None
+        report = {}
+        with phase("memory_compaction", round=self._turn):
+            for role, agent in (
+                ("user", self.user_agent),
+                ("assistant", self.assistant_agent),
+            ):
+                result = self.memory_compactor.compact(agent)
+                if result["compacted"]:
+                    record_compaction(
+                        role, result["tokens_before"], result["tokens_after"]
+                    )
+                report[role] = result
+        return report
+
+    def check_convergence(
+        self, user_response: ChatAgentResponse, assistant_response: ChatAgentResponse
+    ) -> Optional[str]:
+        """Ask the convergence detectors whether the conversation is done.
+
+        Call once after every round that did not otherwise end the
+        conversation.
+
+        Args:
+            user_response (ChatAgentResponse): The round's user response.
+            assistant_response (ChatAgentResponse): The round's assistant
+                response.
+
+        Returns:
+            str, optional: The first detector's reason to stop, or
+                :obj:`None` to continue.
+        """
+        if not self.convergence_detectors:
+            return None
+        instruction = user_response.msg.content if user_response.msgs else ""
+        solution = assistant_response.msg.content if assistant_response.msgs else ""
+        tool_calls = len(assistant_response.info.get("tool_calls") or [])
+        reason = None
+        # Every detector observes every round so their histories stay complete.
+        for detector in self.convergence_detectors:
+            verdict = detector.observe(self._turn, instruction, solution, tool_calls)
+            reason = reason or verdict
+        return reason
+
     def step(
         self, assistant_msg: BaseMessage
     ) -> Tuple[ChatAgentResponse, ChatAgentResponse]:
@@ -234,7 +847,9 @@ Please note that our overall task may be very complicated. Here are some tips th
             Tuple[ChatAgentResponse, ChatAgentResponse]: A tuple containing the
                 assistant's response and the user's response.
         """
-        user_response = self.user_agent.step(assistant_msg)
+        with phase("user_step", round=self._turn + 1):
+            user_response = self.user_agent.step(assistant_msg)
+        record_tokens("user", user_response.info.get("usage"))
         if user_response.terminated or user_response.msgs is None:
             return (
                 ChatAgentResponse(msgs=[], terminated=False, info={}),
@@ -246,25 +861,15 @@ Please note that our overall task may be very complicated. Here are some tips th
             )
         user_msg = self._reduce_message_options(user_response.msgs)
 
-        modified_user_msg = deepcopy(user_msg)
-
-        if "TASK_DONE" not in user_msg.content:
-            modified_user_msg.content += f"""\n
-            Here are auxiliary information about the overall task, which may help you understand the intent of the current task:
-            <auxiliary_information>
-            {self.task_prompt}
-            </auxiliary_information>
-            If there are available tools and you want to call them, never say 'I will ...', but first call the tool and reply based on tool call's result, and tell me which tool you have called.
-            """
-
-        else:
-            # The task is done, and the assistant agent need to give the final answer about the original task
-            modified_user_msg.content += f"""\n
-            Now please make a final answer of the original task based on our conversation : <task>{self.task_prompt}</task>
-            """
+        self._turn += 1
+        modified_user_msg = with_content_suffix(
+            user_msg, self._user_msg_suffix(user_msg)
+        )
 
         # process assistant's response
-        assistant_response = self.assistant_agent.step(modified_user_msg)
+        with phase("assistant_step", round=self._turn):
+            assistant_response = self.assistant_agent.step(modified_user_msg)
+        record_tokens("assistant", assistant_response.info.get("usage"))
         if assistant_response.terminated or assistant_response.msgs is None:
             return (
                 ChatAgentResponse(
@@ -278,14 +883,16 @@ Please note that our overall task may be very complicated. Here are some tips th
             )
         assistant_msg = self._reduce_message_options(assistant_response.msgs)
 
-        modified_assistant_msg = deepcopy(assistant_msg)
+        self._record_usage(user_response, assistant_response)
+        modified_assistant_msg = assistant_msg
         if "TASK_DONE" not in user_msg.content:
-            modified_assistant_msg.content += f"""\n
-                Provide me with the next instruction and input (if needed) based on my response and our current task: <task>{self.task_prompt}</task>
-                Before producing the final answer, please check whether I have rechecked the final answer using different toolkit as much as possible. If not, please remind me to do that.
-                If I have written codes, remind me to run the codes.
-                If you think our task is done, reply with `TASK_DONE` to end our conversation.
-            """
+            modified_assistant_msg = with_content_suffix(
+                assistant_msg, self._assistant_msg_suffix()
+            )
+        assistant_response.info["context_budget"] = self._context_budget_info()
+        compaction = self._compact_memories()
+        if compaction is not None:
+            assistant_response.info["memory_compaction"] = compaction
 
         # return the modified messages
         return (
@@ -306,6 +913,12 @@ Please note that our overall task may be very complicated. Here are some tips th
     ) -> Tuple[ChatAgentResponse, ChatAgentResponse]:
         """
         Perform one asynchronous step of the conversation between agents.
+
+        Unlike :meth:`step`, the assistant's solution is returned without the
+        follow-up suffix, so answers, events and convergence checks see only
+        the assistant's text. The suffix is built in the same turn, and its
+        prompt-token savings are counted the same way. It is appended when
+        the solution is passed back to the next :meth:`astep`.
         
         Args:
             assistant_msg (BaseMessage): The message from the assistant agent.
@@ -314,7 +927,8 @@ Please note that our overall task may be very complicated. Here are some tips th
             Tuple[ChatAgentResponse, ChatAgentResponse]: A tuple containing the
                 assistant's response and the user's response.
         """
-        user_response = await self.user_agent.astep(assistant_msg)
+        with phase("user_step", round=self._turn + 1):
+            user_response = await self._auser_step(assistant_msg)
         if user_response.terminated or user_response.msgs is None:
             return (
                 ChatAgentResponse(msgs=[], terminated=False, info={}),
@@ -326,25 +940,28 @@ Please note that our overall task may be very complicated. Here are some tips th
             )
         user_msg = self._reduce_message_options(user_response.msgs)
 
-        modified_user_msg = deepcopy(user_msg)
-
-        if "TASK_DONE" not in user_msg.content:
-            modified_user_msg.content += f"""\n
-            Here are auxiliary information about the overall task, which may help you understand the intent of the current task:
-            <auxiliary_information>
-            {self.task_prompt}
-            </auxiliary_information>
-            If there are available tools and you want to call them, never say 'I will ...', but first call the tool and reply based on tool call's result, and tell me which tool you have called.
-            """
-
-        else:
-            # The task is done, and the assistant agent need to give the final answer about the original task
-            modified_user_msg.content += f"""\n
-            Now please make a final answer of the original task based on our conversation : <task>{self.task_prompt}</task>
-            """
+        self._turn += 1
+        modified_user_msg = with_content_suffix(
+            user_msg, self._user_msg_suffix(user_msg)
+        )
 
-        assistant_response = await self.assistant_agent.astep(modified_user_msg)
+        self._step_tool_results = []
+        self._draft_tool_results = []
+        self._drafting = self.planner is not None
+        try:
+            with phase("assistant_step", round=self._turn):
+                assistant_response = await self.assistant_agent.astep(
+                    modified_user_msg
+                )
+        except BaseException:
+            self._discard_drafts()
+            raise
+        finally:
+            self._drafting = False
+        draft, self._draft = self._draft, None
+        record_tokens("assistant", assistant_response.info.get("usage"))
         if assistant_response.terminated or assistant_response.msgs is None:
+            self._cancel_draft(draft)
             return (
                 ChatAgentResponse(
                     msgs=[],
@@ -356,15 +973,19 @@ Please note that our overall task may be very complicated. Here are some tips th
                 ),
             )
         assistant_msg = self._reduce_message_options(assistant_response.msgs)
-
-        modified_assistant_msg = deepcopy(assistant_msg)
         if "TASK_DONE" not in user_msg.content:
-            modified_assistant_msg.content += f"""\n
-                Provide me with the next instruction and input (if needed) based on my response and our current task: <task>{self.task_prompt}</task>
-                Before producing the final answer, please check whether I have rechecked the final answer using different toolkit as much as possible. If not, please remind me to do that.
-                If I have written codes, remind me to run the codes.
-                If you think our task is done, reply with `TASK_DONE` to end our conversation.
-            """
+            self._solution_suffix = (assistant_msg, self._assistant_msg_suffix())
+        if draft is not None:
+            if "TASK_DONE" in user_msg.content:
+                self._cancel_draft(draft)
+            else:
+                self._planned = (assistant_msg, draft, self._draft_tool_results)
+
+        self._record_usage(user_response, assistant_response)
+        assistant_response.info["context_budget"] = self._context_budget_info()
+        compaction = self._compact_memories()
+        if compaction is not None:
+            assistant_response.info["memory_compaction"] = compaction
 
         return (
             ChatAgentResponse(
@@ -380,9 +1001,40 @@ Please note that our overall task may be very complicated. Here are some tips th
         )
 
 
+def build_society(
+    task_prompt: str,
+    tools: List[FunctionTool],
+    models: Dict[str, BaseModelBackend],
+    society_kwargs: Optional[dict] = None,
+) -> OwlRolePlaying:
+    """Build the user/assistant society for one task.
+
+    Args:
+        task_prompt (str): The full task prompt.
+        tools (List[FunctionTool]): Tools for the assistant agent.
+        models (Dict[str, BaseModelBackend]): Backends keyed by ``"user"``
+            and ``"assistant"``.
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options. (default: :obj:`None`)
+
+    Returns:
+        OwlRolePlaying: The new society.
+    """
+    return OwlRolePlaying(
+        task_prompt=task_prompt,
+        with_task_specify=False,
+        user_role_name="user",
+        user_agent_kwargs={"model": models["user"]},
+        assistant_role_name="assistant",
+        assistant_agent_kwargs={"model": models["assistant"], "tools": tools},
+        **(society_kwargs or {}),
+    )
+
+
 async def arun_society(
     society: OwlRolePlaying,
     round_limit: int = 15,
+    metrics: Optional[QueryMetrics] = None,
 ) -> Tuple[str, List[dict], dict]:
     """
     Run a society of agents asynchronously.
@@ -391,14 +1043,48 @@ async def arun_society(
         society (OwlRolePlaying): The society of agents to run.
         round_limit (int, optional): Maximum number of conversation rounds.
             Defaults to 15.
+        metrics (QueryMetrics, optional): Object to record per-phase
+            timings and token usage into. Defaults to a new one.
             
     Returns:
         Tuple[str, List[dict], dict]: A tuple containing the final answer,
-            the chat history, and token usage information.
+            the chat history, and token usage information, including the
+            prompt tokens saved by the society's task injection mode, the
+            rounds saved by early convergence, a per-phase metrics summary
+            and, with ``compact_tool_results``, the structured places found.
     """
-    overall_completion_token_count = 0
-    overall_prompt_token_count = 0
+    metrics = metrics or QueryMetrics()
+    with metrics_scope(metrics):
+        answer, chat_history = await _arun_society_rounds(
+            society, round_limit, metrics
+        )
+    metrics.finish()
+
+    token_counts = metrics.tokens
+    token_info = {
+        "completion_token_count": sum(t["completion"] for t in token_counts.values()),
+        "prompt_token_count": sum(t["prompt"] for t in token_counts.values()),
+        "by_role": {role: dict(t) for role, t in token_counts.items()},
+        "prompt_tokens_saved": society.prompt_tokens_saved,
+        "rounds_saved": metrics.rounds_saved,
+        "stop_reason": metrics.stop_reason,
+        "metrics": metrics.summary(),
+    }
+    if society.places is not None:
+        token_info["places"] = society.places.as_dicts()
+        token_info["tool_result_compaction"] = society.places.stats()
+
+    return answer, chat_history, token_info
+
 
+async def _arun_society_rounds(
+    society: OwlRolePlaying, round_limit: int, metrics: QueryMetrics
+) -> Tuple[str, List[dict]]:
+    """Run the conversation rounds of :func:`arun_society`.
+
+    Token usage is recorded per role by ``OwlRolePlaying.astep`` into the
+    active :class:`QueryMetrics`.
+    """
     chat_history = []
     init_prompt = """
     Now please give me instructions to solve over overall task step by step. If the task requires some specific knowledge, please instruct me to use tools to complete the task.
@@ -406,20 +1092,14 @@ async def arun_society(
     input_msg = society.init_chat(init_prompt)
     for _round in range(round_limit):
         assistant_response, user_response = await society.astep(input_msg)
-        # Check if usage info is available before accessing it
-        if assistant_response.info.get("usage") and user_response.info.get("usage"):
-            overall_prompt_token_count += assistant_response.info["usage"].get(
-                "completion_tokens", 0
-            )
-            overall_prompt_token_count += assistant_response.info["usage"].get(
-                "prompt_tokens", 0
-            ) + user_response.info["usage"].get("prompt_tokens", 0)
+        metrics.rounds = _round + 1
 
         # convert tool call to dict
         tool_call_records: List[dict] = []
         if assistant_response.info.get("tool_calls"):
             for tool_call in assistant_response.info["tool_calls"]:
                 tool_call_records.append(tool_call.as_dict())
+                metrics.record_tool_call(tool_call.tool_name)
 
         _data = {
             "user": user_response.msg.content
@@ -448,12 +1128,13 @@ async def arun_society(
         ):
             break
 
+        reason = society.check_convergence(user_response, assistant_response)
+        if reason is not None:
+            metrics.record_early_stop(reason, round_limit - (_round + 1))
+            logger.info(f"Stopping after round #{_round}: {reason}")
+            break
+
         input_msg = assistant_response.msg
 
     answer = chat_history[-1]["assistant"]
-    token_info = {
-        "completion_token_count": overall_completion_token_count,
-        "prompt_token_count": overall_prompt_token_count,
-    }
-
-    return answer, chat_history, token_info
\ No newline at end of file
+    return answer, chat_history
\ No newline at end of file
@@ -0,0 +1,299 @@
+"""
+Batch processing of restaurant queries.
+
+Runs many queries through :func:`process_restaurant_query` with bounded
+concurrency. All queries in a batch share one MCP connection pool and one set
+of model clients, each query gets its own timeout, transient model and tool
+failures are retried, and results are yielded in completion order so that a
+slow society never holds up the rest of the batch.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, TextIO, Union
+
+from camel.logger import get_logger
+from camel.models import BaseModelBackend
+
+from restaurant_deep_research.agents.pool import ClarifierPool, SocietyPool
+from restaurant_deep_research.cache.answers import AnswerCache
+from restaurant_deep_research.cache.clarifier import ClarifierCache
+from restaurant_deep_research.cache.tool_results import ToolResultCache
+from restaurant_deep_research.main import create_models, process_restaurant_query
+from restaurant_deep_research.tools.pool import MCPToolkitPool
+
+logger = get_logger(__name__)
+
+# Exception class names raised by the model and MCP client libraries for
+# failures that are worth retrying, matched by name to avoid importing them.
+_TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "RateLimitError",
+    "ServiceUnavailableError",
+    "McpError",
+}
+
+
+@dataclass
+class BatchQuery:
+    """A single query in a batch.
+
+    Attributes:
+        id (str): Caller-provided identifier, echoed in the result.
+        query (str): The restaurant query text.
+    """
+
+    id: str
+    query: str
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one query in a batch.
+
+    Attributes:
+        id (str): Identifier of the query.
+        query (str): The restaurant query text.
+        status (str): ``"ok"``, ``"error"`` or ``"timeout"``.
+        result (str, optional): The final answer when successful.
+        error (str, optional): Description of the last failure.
+        attempts (int): Number of attempts made.
+        elapsed (float): Wall-clock seconds spent on the query.
+        metrics (dict, optional): Summary of the last attempt's
+            :class:`QueryMetrics` when successful.
+    """
+
+    id: str
+    query: str
+    status: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    metrics: Optional[dict] = None
+
+    def to_json(self) -> str:
+        """Serialize the result as one JSONL line (without newline)."""
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Decide whether a failed query should be retried.
+
+    Args:
+        exc (BaseException): The exception raised by the query.
+
+    Returns:
+        bool: :obj:`True` for connection problems, rate limits and server
+            errors; :obj:`False` for everything else.
+    """
+    if isinstance(exc, (ConnectionError, BrokenPipeError)):
+        return True
+    if type(exc).__name__ in _TRANSIENT_ERROR_NAMES:
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+def load_queries(path: Union[str, Path]) -> List[BatchQuery]:
+    """Read queries from a JSONL file.
+
+    Each non-empty line is either a JSON string or an object with a
+    ``"query"`` field and an optional ``"id"``; ids default to the line number.
+
+    Args:
+        path (Union[str, Path]): The JSONL file.
+
+    Returns:
+        List[BatchQuery]: The queries in file order.
+    """
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                queries.append(BatchQuery(id=str(line_no), query=item))
+            elif isinstance(item, dict) and "query" in item:
+                queries.append(
+                    BatchQuery(id=str(item.get("id", line_no)), query=item["query"])
+                )
+            else:
+                raise ValueError(
+                    f"{path}:{line_no}: expected a string or an object with 'query'"
+                )
+    return queries
+
+
+async def iter_batch(
+    queries: Iterable[Union[str, BatchQuery]],
+    concurrency: int = 4,
+    timeout: Optional[float] = 600.0,
+    retries: int = 2,
+    retry_backoff: float = 2.0,
+    chat_turn_limit: int = 10,
+    pool: Optional[MCPToolkitPool] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    clarifier_cache: Optional[ClarifierCache] = None,
+    models: Optional[Dict[str, BaseModelBackend]] = None,
+    society_kwargs: Optional[dict] = None,
+    reuse_agents: bool = True,
+    answer_cache: Optional[AnswerCache] = None,
+) -> AsyncIterator[BatchResult]:
+    """Process queries concurrently, yielding results as they complete.
+
+    Args:
+        queries (Iterable[Union[str, BatchQuery]]): Queries to process.
+        concurrency (int, optional): Maximum number of queries in flight.
+            (default: :obj:`4`)
+        timeout (float, optional): Seconds allowed per attempt, or
+            :obj:`None` for no limit. Timed-out queries are not retried.
+            (default: :obj:`600.0`)
+        retries (int, optional): Extra attempts after a transient failure.
+            (default: :obj:`2`)
+        retry_backoff (float, optional): Base delay in seconds between
+            attempts, doubled after each retry. (default: :obj:`2.0`)
+        chat_turn_limit (int, optional): Conversation turns per query.
+            (default: :obj:`10`)
+        pool (MCPToolkitPool, optional): Pool to lease MCP tools from. A pool
+            with one connection is started for the batch if omitted.
+        tool_cache (ToolResultCache, optional): Tool result cache shared by
+            the batch. (default: :obj:`None`)
+        clarifier_cache (ClarifierCache, optional): Clarified spec cache
+            shared by the batch. (default: :obj:`None`)
+        models (Dict[str, BaseModelBackend], optional): Shared model backends.
+            Defaults to one set from :func:`create_models`.
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options for every query. (default: :obj:`None`)
+        reuse_agents (bool, optional): Keep up to ``concurrency`` clarifier
+            agents and societies in pools and re-target them for every
+            query instead of building new ones. (default: :obj:`True`)
+        answer_cache (AnswerCache, optional): Final answer cache shared by
+            the batch, so that equivalent requests run the society once.
+            (default: :obj:`None`)
+
+    Yields:
+        BatchResult: One result per query, in completion order.
+    """
+    items = [
+        q if isinstance(q, BatchQuery) else BatchQuery(id=str(i), query=q)
+        for i, q in enumerate(queries, start=1)
+    ]
+    if not items:
+        return
+
+    models = models or create_models()
+    own_pool = pool is None
+    if own_pool:
+        pool = await MCPToolkitPool(size=1).start()
+    semaphore = asyncio.Semaphore(concurrency)
+    agent_pools = {}
+    if reuse_agents:
+        agent_pools = {
+            "clarifier_pool": ClarifierPool(models["clarifier"], max_size=concurrency),
+            "society_pool": SocietyPool(models, society_kwargs, max_size=concurrency),
+        }
+
+    async def run_one(item: BatchQuery) -> BatchResult:
+        async with semaphore:
+            start = time.perf_counter()
+            attempts = 0
+            while True:
+                attempts += 1
+                metrics = None
+                try:
+                    answer, metrics = await asyncio.wait_for(
+                        process_restaurant_query(
+                            item.query,
+                            chat_turn_limit=chat_turn_limit,
+                            verbose=False,
+                            pool=pool,
+                            tool_cache=tool_cache,
+                            clarifier_cache=clarifier_cache,
+                            models=models,
+                            society_kwargs=society_kwargs,
+                            return_metrics=True,
+                            answer_cache=answer_cache,
+                            **agent_pools,
+                        ),
+                        timeout,
+                    )
+                    status, error = "ok", None
+                except asyncio.TimeoutError:
+                    answer, status = None, "timeout"
+                    error = f"Timed out after {timeout}s"
+                except Exception as e:
+                    answer, status, error = None, "error", f"{type(e).__name__}: {e}"
+                    if attempts <= retries and is_transient_error(e):
+                        delay = retry_backoff * 2 ** (attempts - 1)
+                        logger.warning(
+                            f"Query {item.id} attempt {attempts} failed with "
+                            f"{error}; retrying in {delay:.1f}s"
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+                return BatchResult(
+                    id=item.id,
+                    query=item.query,
+                    status=status,
+                    result=answer,
+                    error=error,
+                    attempts=attempts,
+                    elapsed=round(time.perf_counter() - start, 3),
+                    metrics=metrics.summary() if metrics is not None else None,
+                )
+
+    tasks = [asyncio.ensure_future(run_one(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if own_pool:
+            await pool.stop()
+
+
+async def run_batch(
+    input_path: Union[str, Path],
+    output: Optional[Union[str, Path, TextIO]] = None,
+    **kwargs,
+) -> Dict[str, int]:
+    """Process a JSONL file of queries and stream results as JSONL.
+
+    Args:
+        input_path (Union[str, Path]): JSONL file of queries, see
+            :func:`load_queries`.
+        output (Union[str, Path, TextIO], optional): Where to write results,
+            one JSON object per line in completion order. Defaults to stdout.
+        **kwargs: Further arguments for :func:`iter_batch`.
+
+    Returns:
+        Dict[str, int]: Number of results per status.
+    """
+    queries = load_queries(input_path)
+    counts: Dict[str, int] = {}
+    if output is None or hasattr(output, "write"):
+        out = output or sys.stdout
+        close = False
+    else:
+        out = open(output, "w", encoding="utf-8")
+        close = True
+    try:
+        async for result in iter_batch(queries, **kwargs):
+            out.write(result.to_json() + "\n")
+            out.flush()
+            counts[result.status] = counts.get(result.status, 0) + 1
+    finally:
+        if close:
+            out.close()
+    return counts
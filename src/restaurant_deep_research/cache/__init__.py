@@ -0,0 +1,35 @@
+"""Caching functionality for the restaurant finder.
+
+This module provides storage backends and caches that let repeated work, such
+as identical Google Maps tool calls or repeated clarifier requests, be served
+without another round trip, and whole answers to equivalent requests be reused.
+"""
+
+from restaurant_deep_research.cache.answers import (
+    AnswerCache,
+    AnswerSpec,
+    CachedAnswer,
+)
+from restaurant_deep_research.cache.backends import (
+    CacheBackend,
+    MemoryCacheBackend,
+    SQLiteCacheBackend,
+)
+from restaurant_deep_research.cache.clarifier import ClarifierCache, normalize_query
+from restaurant_deep_research.cache.tool_results import (
+    DEFAULT_TOOL_TTLS,
+    ToolResultCache,
+)
+
+__all__ = [
+    "AnswerCache",
+    "AnswerSpec",
+    "CachedAnswer",
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "SQLiteCacheBackend",
+    "ClarifierCache",
+    "normalize_query",
+    "DEFAULT_TOOL_TTLS",
+    "ToolResultCache",
+]
@@ -0,0 +1,573 @@
+"""
+Caching of final answers for equivalent restaurant requests.
+
+Much production traffic asks for the same recommendation in different words
+("cheap ramen near Shibuya tonight", "budget ramen around Shibuya station
+this evening"), and every such query pays for a full multi-round society.
+:class:`AnswerCache` keys final answers on the clarified task spec instead of
+the query text: location, cuisine, budget band, meal period and day, dietary
+needs and language are extracted from the clarifier's Markdown and
+normalized. Lookups are exact on the normalized fields, with a
+character-trigram similarity fallback for the free-text location and
+cuisine. How long an answer stays fresh depends on the spec, so requests for
+"tonight" expire within the hour while open-ended ones last for days.
+"""
+
+import hashlib
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from restaurant_deep_research.cache.backends import CacheBackend, MemoryCacheBackend
+from restaurant_deep_research.cache.clarifier import (
+    normalize_query,
+    token_set_similarity,
+)
+from restaurant_deep_research.config.prompts import RESTAURANT_CLARIFIER_PROMPT
+
+# Spec fields and the labels they are read from: the clarifier template's
+# label first, then variants the model sometimes writes instead.
+SPEC_LABELS: Dict[str, Tuple[str, ...]] = {
+    "location": ("Location", "Area"),
+    "cuisine": ("Cuisine", "Cuisine Type"),
+    "budget": ("Budget", "Price Range"),
+    "timing": ("Timing", "Time", "Date"),
+    "dietary": ("Dietary Needs", "Dietary Restrictions", "Dietary"),
+    "language": ("Query Language", "Language"),
+}
+
+# (spec field, pattern, seconds): the shortest TTL whose pattern matches the
+# field's text applies.
+DEFAULT_TTL_RULES: Tuple[Tuple[str, str, float], ...] = (
+    (
+        "timing",
+        r"\b(now|right now|asap|tonight|this evening|today|late night)\b"
+        r"|现在|今晚|今天|今夜|今日",
+        1800,
+    ),
+    (
+        "timing",
+        r"\b(tomorrow|this week|this weekend)\b|明天|明日|本周|这周|周末",
+        6 * 3600,
+    ),
+)
+
+_EMPTY_RE = re.compile(
+    r"^(-|n/?a|none|no|any|unspecified|unknown|无|没有|未指定|不限)?$"
+    r"|^(none|unspecified)\b"
+    r"|^not (specified|mentioned|provided|stated)\b"
+    r"|^no (specific|particular|dietary|restrictions?|requirements?|preferences?)\b"
+)
+_ITEM_SPLIT_RE = re.compile(r"\s*(?:[,;/|、，；]|\bor\b|\band\b|或|和)\s*")
+_LOCATION_STOPWORDS = frozenset(
+    {"near", "around", "in", "at", "the", "close", "to", "by", "nearby", "area", "of"}
+)
+_WORD_RE = re.compile(r"[^\W_]+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d{3})*(?:\.\d+)?")
+_CURRENCIES = (
+    ("JPY", r"¥|￥|\byen\b|円"),
+    ("CNY", r"\brmb\b|\bcny\b|元|块"),
+    ("EUR", r"€|\beur\b|\beuros?\b"),
+    ("GBP", r"£|\bgbp\b|\bpounds?\b"),
+    ("KRW", r"₩|\bkrw\b|\bwon\b|원"),
+    ("USD", r"\$|\busd\b|\bdollars?\b"),
+)
+_BUDGET_WORDS = (
+    ("high", r"\b(expensive|upscale|luxury|high[- ]end|fine dining|splurge)\b|高档|奢华"),
+    ("mid", r"\b(moderate|mid[- ]?range|medium|reasonable|not too (fancy|expensive))\b|中等|适中"),
+    ("low", r"\b(cheap|budget|inexpensive|affordable|low[- ]cost)\b|便宜|实惠"),
+)
+_MEALS = (
+    ("breakfast", r"\bbreakfast\b|早餐|早饭|朝食|朝ごはん"),
+    ("brunch", r"\bbrunch\b"),
+    ("lunch", r"\blunch\b|\bnoon\b|午餐|午饭|中午|ランチ|昼"),
+    ("late_night", r"\blate[- ]night\b|\bsupper\b|\bmidnight\b|夜宵|宵夜|深夜"),
+    ("dinner", r"\bdinner\b|\bevening\b|\btonight\b|晚餐|晚饭|晚上|今晚|ディナー|夜"),
+)
+_DAYS = (
+    ("today", r"\b(now|right now|asap|tonight|today|this evening)\b|现在|今晚|今天|今夜|今日"),
+    ("tomorrow", r"\btomorrow\b|明天|明日"),
+    ("weekend", r"\bweekends?\b|周末|週末"),
+    ("monday", r"\bmon(day)?\b|周一|星期一"),
+    ("tuesday", r"\btue(s|sday)?\b|周二|星期二"),
+    ("wednesday", r"\bwed(nesday)?\b|周三|星期三"),
+    ("thursday", r"\bthu(rs|rsday)?\b|周四|星期四"),
+    ("friday", r"\bfri(day)?\b|周五|星期五"),
+    ("saturday", r"\bsat(urday)?\b|周六|星期六"),
+    ("sunday", r"\bsun(day)?\b|周日|星期日|星期天"),
+)
+
+# Location trigrams, trigrams of each location word, cuisine trigrams and the
+# fields that must match exactly.
+_Signature = Tuple[FrozenSet[str], Tuple[FrozenSet[str], ...], FrozenSet[str], str]
+
+
+def _spec_value(spec: str, labels: Sequence[str]) -> str:
+    for label in labels:
+        match = re.search(
+            rf"^[ \t]*[-*][ \t]*\**{re.escape(label)}\**[ \t]*[:：]\**[ \t]*(.*)$",
+            spec,
+            re.IGNORECASE | re.MULTILINE,
+        )
+        if match is not None:
+            break
+    else:
+        return ""
+    value = normalize_query(match.group(1).strip("[]* \t"))
+    return "" if _EMPTY_RE.search(value.strip(" .")) else value
+
+
+def _items(value: str) -> Tuple[str, ...]:
+    items = {
+        " ".join(_WORD_RE.findall(item))
+        for item in _ITEM_SPLIT_RE.split(value)
+    }
+    return tuple(sorted(item for item in items if item and not _EMPTY_RE.search(item)))
+
+
+def _first_match(patterns: Sequence[Tuple[str, str]], text: str) -> str:
+    for name, pattern in patterns:
+        if re.search(pattern, text):
+            return name
+    return ""
+
+
+def _budget_band(budget: str) -> str:
+    """Reduce a budget to a currency and an upper bound rounded to 1-2-5."""
+    numbers = [
+        float(n.replace(",", "")) for n in _NUMBER_RE.findall(budget.replace("，", ","))
+    ]
+    numbers = [n for n in numbers if n > 0]
+    if numbers:
+        upper = max(numbers)
+        if re.search(r"\d\s*k\b", budget):
+            upper *= 1000
+        magnitude = 10 ** math.floor(math.log10(upper))
+        step = next(s for s in (1, 2, 5, 10) if upper <= s * magnitude)
+        currency = _first_match(_CURRENCIES, budget) or "?"
+        return f"{currency}<={step * magnitude:g}"
+    signs = re.fullmatch(r"\$+", budget.replace(" ", ""))
+    if signs:
+        return ("low", "mid", "high", "high")[min(len(signs.group()), 4) - 1]
+    return _first_match(_BUDGET_WORDS, budget)
+
+
+def _trigrams(text: str) -> FrozenSet[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _word_trigrams(text: str) -> Tuple[FrozenSet[str], ...]:
+    return tuple(_trigrams(word) for word in sorted(set(text.split())))
+
+
+def _word_similarity(
+    a: Tuple[FrozenSet[str], ...], b: Tuple[FrozenSet[str], ...]
+) -> float:
+    """Similarity of the least similar word of either side to its closest
+    counterpart on the other side.
+
+    Addresses share long suffixes ("shibuya city tokyo japan"), so two areas
+    of the same city can be close as whole strings; a word with no
+    counterpart, such as a different station, keeps them apart.
+    """
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+
+    def worst(words, others):
+        return min(
+            max(token_set_similarity(word, other) for other in others)
+            for word in words
+        )
+
+    return min(worst(a, b), worst(b, a))
+
+
+@dataclass(frozen=True)
+class AnswerSpec:
+    """The normalized parts of a clarified spec that determine the answer.
+
+    Attributes:
+        location (str): Location words, without filler such as "near".
+        cuisine (Tuple[str, ...]): Sorted cuisines and dishes.
+        budget (str): Budget band: ``"low"``, ``"mid"``, ``"high"`` or a
+            currency with a rounded upper bound such as ``"JPY<=5000"``.
+        meal_period (str): ``"breakfast"``, ``"brunch"``, ``"lunch"``,
+            ``"dinner"`` or ``"late_night"``.
+        day (str): ``"today"``, ``"tomorrow"``, ``"weekend"`` or a weekday.
+        dietary (Tuple[str, ...]): Sorted dietary requirements.
+        language (str): Language of the query.
+        raw (Dict[str, str]): The normalized field texts, used by the TTL
+            rules; not part of the key.
+    """
+
+    location: str = ""
+    cuisine: Tuple[str, ...] = ()
+    budget: str = ""
+    meal_period: str = ""
+    day: str = ""
+    dietary: Tuple[str, ...] = ()
+    language: str = ""
+    raw: Dict[str, str] = field(default_factory=dict, compare=False, hash=False)
+
+    @classmethod
+    def from_markdown(cls, spec: str) -> "AnswerSpec":
+        """Parse the clarifier's Markdown spec.
+
+        Args:
+            spec (str): The clarified task spec.
+
+        Returns:
+            AnswerSpec: The normalized fields; fields missing from the spec
+                are empty.
+        """
+        raw = {name: _spec_value(spec, labels) for name, labels in SPEC_LABELS.items()}
+        location_words = [
+            word
+            for word in _WORD_RE.findall(raw["location"])
+            if word not in _LOCATION_STOPWORDS
+        ]
+        language = _WORD_RE.findall(raw["language"])
+        return cls(
+            location=" ".join(location_words),
+            cuisine=_items(raw["cuisine"]),
+            budget=_budget_band(raw["budget"]),
+            meal_period=_first_match(_MEALS, raw["timing"]),
+            day=_first_match(_DAYS, raw["timing"]),
+            dietary=_items(raw["dietary"]),
+            language=language[0] if language else "",
+            raw=raw,
+        )
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the spec is specific enough to share an answer."""
+        return bool(self.location)
+
+    def fields(self) -> Dict[str, Any]:
+        """Return the key fields as a JSON-serializable dict."""
+        return {
+            "location": self.location,
+            "cuisine": list(self.cuisine),
+            "budget": self.budget,
+            "meal_period": self.meal_period,
+            "day": self.day,
+            "dietary": list(self.dietary),
+            "language": self.language,
+        }
+
+
+@dataclass
+class CachedAnswer:
+    """A final answer served from :class:`AnswerCache`.
+
+    Attributes:
+        answer (str): The assistant's final answer.
+        places (List[Dict[str, Any]]): Structured places stored with it.
+        fields (Dict[str, Any]): Key fields of the spec it was stored for.
+        age (float): Seconds since it was stored.
+        fuzzy (bool): Whether it matched by similarity rather than exactly.
+    """
+
+    answer: str
+    places: List[Dict[str, Any]]
+    fields: Dict[str, Any]
+    age: float
+    fuzzy: bool = False
+
+
+class AnswerCache:
+    """Cache final answers keyed on the normalized clarified spec.
+
+    Only the location and cuisine are matched by similarity; budget band,
+    meal period, day, dietary needs and language must always be equal, so a
+    vegetarian or a lunch request never receives an answer researched for
+    something else.
+
+    Args:
+        backend (CacheBackend, optional): Storage for answers. Use a
+            :class:`SQLiteCacheBackend` to persist across processes.
+            (default: :obj:`MemoryCacheBackend()`)
+        ttl (float, optional): Seconds an answer stays valid when no TTL rule
+            matches. (default: :obj:`259200`)
+        ttl_rules (Sequence[Tuple[str, str, float]], optional): Spec field,
+            regular expression and TTL in seconds; the shortest TTL whose
+            pattern matches the field's text applies.
+            (default: :obj:`DEFAULT_TTL_RULES`)
+        fuzzy_threshold (float, optional): Minimum trigram similarity of both
+            location and cuisine, and of every location word to its closest
+            counterpart, for a near-duplicate hit, or :obj:`None` for exact
+            matches only. (default: :obj:`0.7`)
+        prompt (str, optional): The clarifier prompt; its hash versions the
+            cache so that prompt edits invalidate old answers.
+            (default: :obj:`RESTAURANT_CLARIFIER_PROMPT`)
+        version (str, optional): Extra version string, e.g. to invalidate
+            answers after changing models or society prompts.
+            (default: :obj:`""`)
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = 3 * 24 * 3600,
+        ttl_rules: Sequence[Tuple[str, str, float]] = DEFAULT_TTL_RULES,
+        fuzzy_threshold: Optional[float] = 0.7,
+        prompt: str = RESTAURANT_CLARIFIER_PROMPT,
+        version: str = "",
+    ):
+        unknown = {name for name, _, _ in ttl_rules} - set(SPEC_LABELS)
+        if unknown:
+            raise ValueError(f"unknown spec fields in ttl_rules: {sorted(unknown)}")
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.ttl_rules = [
+            (name, re.compile(pattern, re.IGNORECASE), seconds)
+            for name, pattern, seconds in ttl_rules
+        ]
+        self.fuzzy_threshold = fuzzy_threshold
+        self.version = hashlib.sha256(
+            f"{prompt}\n{version}".encode("utf-8")
+        ).hexdigest()[:16]
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidated = 0
+        self._index: Optional[Dict[str, _Signature]] = None
+
+    @staticmethod
+    def parse(spec: str) -> AnswerSpec:
+        """Parse a clarified spec; see :meth:`AnswerSpec.from_markdown`."""
+        return AnswerSpec.from_markdown(spec)
+
+    def key(self, spec: AnswerSpec) -> str:
+        """Return the cache key of ``spec``.
+
+        Args:
+            spec (AnswerSpec): The parsed spec.
+
+        Returns:
+            str: Key derived from the cache version and the key fields.
+        """
+        fields = json.dumps(spec.fields(), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(f"{self.version}\n{fields}".encode("utf-8")).hexdigest()
+
+    def ttl_for(self, spec: AnswerSpec) -> Optional[float]:
+        """Return how long an answer for ``spec`` stays fresh.
+
+        Args:
+            spec (AnswerSpec): The parsed spec.
+
+        Returns:
+            float, optional: The shortest matching rule's TTL, else
+                :attr:`ttl`.
+        """
+        ttls = [
+            seconds
+            for name, pattern, seconds in self.ttl_rules
+            if pattern.search(spec.raw.get(name, ""))
+        ]
+        return min(ttls) if ttls else self.ttl
+
+    def get(self, spec: str) -> Optional[CachedAnswer]:
+        """Look up the answer for a clarified spec.
+
+        Args:
+            spec (str): The clarifier's Markdown output.
+
+        Returns:
+            CachedAnswer, optional: The cached answer, or :obj:`None` on a
+                miss or if the spec names no location.
+        """
+        parsed = self.parse(spec)
+        if parsed.cacheable:
+            entry = self.backend.get(self.key(parsed))
+            if entry is not None:
+                self.hits += 1
+                return self._answer(entry, fuzzy=False)
+            if self.fuzzy_threshold is not None:
+                entry = self._fuzzy_get(parsed)
+                if entry is not None:
+                    self.fuzzy_hits += 1
+                    return self._answer(entry, fuzzy=True)
+        self.misses += 1
+        return None
+
+    def set(
+        self,
+        spec: str,
+        answer: str,
+        places: Optional[List[Dict[str, Any]]] = None,
+    ) -> bool:
+        """Store the final answer for a clarified spec.
+
+        Args:
+            spec (str): The clarifier's Markdown output.
+            answer (str): The final answer.
+            places (List[Dict[str, Any]], optional): Structured places found
+                for it. (default: :obj:`None`)
+
+        Returns:
+            bool: Whether the answer was stored; specs without a location
+                are not cached.
+        """
+        parsed = self.parse(spec)
+        if not parsed.cacheable or not answer:
+            return False
+        key = self.key(parsed)
+        self.backend.set(
+            key,
+            {
+                "version": self.version,
+                "fields": parsed.fields(),
+                "answer": answer,
+                "places": places or [],
+                "stored_at": time.time(),
+            },
+            self.ttl_for(parsed),
+        )
+        self.stores += 1
+        if self._index is not None:
+            self._index[key] = self._signature(parsed.fields())
+        return True
+
+    def invalidate(
+        self,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        **fields: str,
+    ) -> int:
+        """Drop cached answers, e.g. after a restaurant closes.
+
+        With neither ``predicate`` nor ``fields`` every answer is dropped.
+
+        Args:
+            predicate (Callable[[Dict[str, Any]], bool], optional): Called
+                with an entry's key fields (see :meth:`AnswerSpec.fields`);
+                entries for which it returns :obj:`True` are dropped.
+            **fields (str): Drop entries whose field contains the text, e.g.
+                ``location="shibuya"``; list fields match any item.
+
+        Returns:
+            int: Number of answers dropped.
+        """
+        unknown = set(fields) - set(AnswerSpec().fields())
+        if unknown:
+            raise ValueError(f"unknown spec fields: {sorted(unknown)}")
+        needles = {name: normalize_query(text) for name, text in fields.items()}
+
+        def matches(entry_fields: Dict[str, Any]) -> bool:
+            for name, needle in needles.items():
+                value = entry_fields.get(name)
+                values = value if isinstance(value, list) else [value or ""]
+                if not any(needle in item for item in values):
+                    return False
+            return predicate is None or predicate(entry_fields)
+
+        doomed = [
+            key
+            for key, entry in self.backend.items()
+            if entry.get("version") == self.version and matches(entry["fields"])
+        ]
+        for key in doomed:
+            self.backend.delete(key)
+            if self._index is not None:
+                self._index.pop(key, None)
+        self.invalidated += len(doomed)
+        return len(doomed)
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        self.backend.clear()
+        self._index = None
+
+    def stats(self) -> dict:
+        """Return hit, miss and invalidation counters.
+
+        Returns:
+            dict: Exact hits, fuzzy hits, misses, the overall hit rate,
+                answers stored and answers invalidated.
+        """
+        lookups = self.hits + self.fuzzy_hits + self.misses
+        return {
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+            "stored": self.stores,
+            "invalidated": self.invalidated,
+        }
+
+    @staticmethod
+    def _signature(fields: Dict[str, Any]) -> _Signature:
+        exact = json.dumps(
+            {k: v for k, v in fields.items() if k not in ("location", "cuisine")},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return (
+            _trigrams(fields["location"]),
+            _word_trigrams(fields["location"]),
+            _trigrams(" ".join(fields["cuisine"])),
+            exact,
+        )
+
+    @staticmethod
+    def _answer(entry: Dict[str, Any], fuzzy: bool) -> CachedAnswer:
+        return CachedAnswer(
+            answer=entry["answer"],
+            places=list(entry.get("places") or []),
+            fields=dict(entry["fields"]),
+            age=max(0.0, time.time() - entry.get("stored_at", time.time())),
+            fuzzy=fuzzy,
+        )
+
+    def _fuzzy_get(self, spec: AnswerSpec) -> Optional[Dict[str, Any]]:
+        if self._index is None:
+            self._index = {
+                key: self._signature(entry["fields"])
+                for key, entry in self.backend.items()
+                if entry.get("version") == self.version
+            }
+        location, words, cuisine, exact = self._signature(spec.fields())
+        ranked = sorted(
+            (
+                (
+                    min(
+                        token_set_similarity(location, other_location),
+                        _word_similarity(words, other_words),
+                        token_set_similarity(cuisine, other_cuisine),
+                    ),
+                    key,
+                )
+                for key, (
+                    other_location,
+                    other_words,
+                    other_cuisine,
+                    other_exact,
+                ) in self._index.items()
+                if other_exact == exact
+            ),
+            reverse=True,
+        )
+        for score, key in ranked:
+            if score < self.fuzzy_threshold:
+                break
+            entry = self.backend.get(key)
+            if entry is None:
+                # Expired or evicted since it was indexed.
+                del self._index[key]
+                continue
+            return entry
+        return None
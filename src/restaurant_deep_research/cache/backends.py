@@ -0,0 +1,255 @@
+"""
+Key-value storage backends for the caches.
+
+Both backends store JSON-serializable values with an optional per-entry TTL
+and evict the least recently used entries once ``max_entries`` is exceeded.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple, Union
+
+
+class CacheBackend:
+    """Interface shared by all cache backends."""
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under ``key``.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Any, optional: The value, or :obj:`None` if missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``.
+
+        Args:
+            key (str): The cache key.
+            value (Any): A JSON-serializable value.
+            ttl (float, optional): Seconds until the entry expires, or
+                :obj:`None` to keep it until evicted. (default: :obj:`None`)
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present.
+
+        Args:
+            key (str): The cache key.
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over all live entries without touching their LRU order.
+
+        Yields:
+            Tuple[str, Any]: Key and value pairs.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache.
+
+    Args:
+        max_entries (int, optional): Maximum number of entries to keep.
+            (default: :obj:`1024`)
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entries = list(self._data.items())
+        for key, (expires_at, value) in entries:
+            if expires_at is None or expires_at > now:
+                yield key, value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk LRU cache backed by SQLite.
+
+    Every method runs one or two indexed statements synchronously on the
+    calling thread, serialized by a lock, which keeps a local database well
+    under a millisecond per call and so safe to use from the event loop.
+    Reads only write when the entry expired or its recorded access time is
+    older than ``touch_interval``, and expired and surplus entries are
+    evicted once every ``evict_every`` writes, so the LRU order is
+    approximate and the table can briefly exceed ``max_entries``. On slow
+    or network file systems, call it through :func:`asyncio.to_thread`.
+
+    Args:
+        path (Union[str, Path]): Database file. Parent directories are created.
+        max_entries (int, optional): Maximum number of entries to keep.
+            (default: :obj:`100000`)
+        table (str, optional): Table name, so several caches can share one
+            file. (default: :obj:`"cache"`)
+        touch_interval (float, optional): Seconds for which a read does not
+            refresh the entry's access time again. (default: :obj:`60.0`)
+        evict_every (int, optional): Writes between evictions.
+            (default: :obj:`64`)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 100000,
+        table: str = "cache",
+        touch_interval: float = 60.0,
+        evict_every: int = 64,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.table = table
+        self.touch_interval = touch_interval
+        self.evict_every = max(1, evict_every)
+        self._writes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_last_access "
+                f"ON {table} (last_access)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_expires_at "
+                f"ON {table} (expires_at)"
+            )
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, expires_at, last_access FROM {self.table} "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, last_access = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            if now - last_access >= self.touch_interval:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                    (now, key),
+                )
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes >= self.evict_every:
+                self._writes = 0
+                self._evict(now)
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value FROM {self.table} "
+                "WHERE expires_at IS NULL OR expires_at > ?",
+                (time.time(),),
+            ).fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()[0]
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        )
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
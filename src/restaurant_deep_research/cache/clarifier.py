@@ -0,0 +1,196 @@
+"""
+Memoization of clarified task specs.
+
+The Request Clarifier turns a free-text query into a structured Markdown spec
+with a full LLM round trip. Production traffic repeats the same requests with
+different casing or whitespace, so :class:`ClarifierCache` stores specs keyed
+on the normalized query text and the clarifier prompt version, optionally
+matching near-duplicates by token-set similarity.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from restaurant_deep_research.cache.backends import CacheBackend, MemoryCacheBackend
+from restaurant_deep_research.config.prompts import RESTAURANT_CLARIFIER_PROMPT
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for exact-match lookups.
+
+    Applies Unicode NFKC normalization (so full-width characters match their
+    ASCII forms), case folding and whitespace collapsing.
+
+    Args:
+        query (str): The raw user query.
+
+    Returns:
+        str: The normalized query.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _signature(normalized: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    tokens = frozenset(_TOKEN_RE.findall(normalized))
+    numbers = frozenset(n.replace(",", "") for n in _NUMBER_RE.findall(normalized))
+    return tokens, numbers
+
+
+def token_set_similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets.
+
+    Args:
+        a (FrozenSet[str]): First token set.
+        b (FrozenSet[str]): Second token set.
+
+    Returns:
+        float: Similarity in ``[0, 1]``.
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class ClarifierCache:
+    """Cache clarified task specs for repeated and near-duplicate queries.
+
+    Args:
+        backend (CacheBackend, optional): Storage for specs. Use a
+            :class:`SQLiteCacheBackend` to persist across processes.
+            (default: :obj:`MemoryCacheBackend()`)
+        ttl (float, optional): Seconds a spec stays valid.
+            (default: :obj:`86400`)
+        fuzzy_threshold (float, optional): Minimum token-set similarity for a
+            near-duplicate hit, or :obj:`None` for exact matches only.
+            Near-duplicates must also contain exactly the same numbers, so
+            queries differing only in budget or group size never collide.
+            (default: :obj:`None`)
+        prompt (str, optional): The clarifier prompt; its hash versions the
+            cache so that prompt edits invalidate old specs.
+            (default: :obj:`RESTAURANT_CLARIFIER_PROMPT`)
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = 24 * 3600,
+        fuzzy_threshold: Optional[float] = None,
+        prompt: str = RESTAURANT_CLARIFIER_PROMPT,
+    ):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.fuzzy_threshold = fuzzy_threshold
+        self.prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._index: Optional[Dict[str, Tuple[FrozenSet[str], FrozenSet[str]]]] = None
+
+    def key(self, query: str) -> str:
+        """Return the cache key of ``query``.
+
+        Args:
+            query (str): The raw user query.
+
+        Returns:
+            str: Key derived from the prompt version and normalized query.
+        """
+        normalized = normalize_query(query)
+        return hashlib.sha256(
+            f"{self.prompt_version}\n{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, query: str) -> Optional[str]:
+        """Look up the clarified spec for ``query``.
+
+        Args:
+            query (str): The raw user query.
+
+        Returns:
+            str, optional: The cached spec, or :obj:`None` on a miss.
+        """
+        entry = self.backend.get(self.key(query))
+        if entry is not None:
+            self.hits += 1
+            return entry["spec"]
+        if self.fuzzy_threshold is not None:
+            spec = self._fuzzy_get(normalize_query(query))
+            if spec is not None:
+                self.fuzzy_hits += 1
+                return spec
+        self.misses += 1
+        return None
+
+    def set(self, query: str, spec: str) -> None:
+        """Store the clarified spec for ``query``.
+
+        Args:
+            query (str): The raw user query.
+            spec (str): The clarifier's Markdown output.
+        """
+        normalized = normalize_query(query)
+        key = self.key(query)
+        self.backend.set(
+            key,
+            {
+                "prompt_version": self.prompt_version,
+                "query": normalized,
+                "spec": spec,
+            },
+            self.ttl,
+        )
+        if self._index is not None:
+            self._index[key] = _signature(normalized)
+
+    def clear(self) -> None:
+        """Drop every cached spec."""
+        self.backend.clear()
+        self._index = None
+
+    def stats(self) -> dict:
+        """Return hit and miss counters.
+
+        Returns:
+            dict: Exact hits, fuzzy hits, misses and the overall hit rate.
+        """
+        lookups = self.hits + self.fuzzy_hits + self.misses
+        return {
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+        }
+
+    def _fuzzy_get(self, normalized: str) -> Optional[str]:
+        if self._index is None:
+            self._index = {
+                key: _signature(entry["query"])
+                for key, entry in self.backend.items()
+                if entry.get("prompt_version") == self.prompt_version
+            }
+        tokens, numbers = _signature(normalized)
+        ranked = sorted(
+            (
+                (token_set_similarity(tokens, other_tokens), key)
+                for key, (other_tokens, other_numbers) in self._index.items()
+                if other_numbers == numbers
+            ),
+            reverse=True,
+        )
+        for score, key in ranked:
+            if score < self.fuzzy_threshold:
+                break
+            entry = self.backend.get(key)
+            if entry is None:
+                # Expired or evicted since it was indexed.
+                del self._index[key]
+                continue
+            return entry["spec"]
+        return None
@@ -0,0 +1,163 @@
+"""
+Content-addressed cache for Google Maps MCP tool results.
+
+Queries about the same area repeat the same geocode, place search and place
+details calls. :class:`ToolResultCache` wraps the MCP ``FunctionTool`` objects
+so that identical calls, keyed on the tool name and canonicalized arguments,
+are served from a cache backend until their per-tool TTL expires.
+"""
+
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from restaurant_deep_research.cache.backends import CacheBackend, MemoryCacheBackend
+from restaurant_deep_research.tools.wrapping import (
+    ToolCall,
+    looks_like_tool_error,
+    tool_call_key,
+    wrap_tool,
+)
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+# Seconds each tool's results stay fresh. Geocodes are effectively static,
+# while travel times depend on traffic and should only be reused briefly.
+DEFAULT_TOOL_TTLS: Dict[str, Optional[float]] = {
+    "maps_geocode": 30 * 24 * 3600,
+    "maps_reverse_geocode": 30 * 24 * 3600,
+    "maps_elevation": 30 * 24 * 3600,
+    "maps_search_places": 6 * 3600,
+    "maps_place_details": 24 * 3600,
+    "maps_distance_matrix": 10 * 60,
+    "maps_directions": 10 * 60,
+}
+
+
+class _ToolStats:
+    __slots__ = ("hits", "misses", "errors", "miss_seconds", "saved_seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.miss_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+class ToolResultCache:
+    """Cache MCP tool results keyed on tool name and canonical arguments.
+
+    Args:
+        backend (CacheBackend, optional): Storage for cached results.
+            (default: :obj:`MemoryCacheBackend()`)
+        ttls (Dict[str, float], optional): Per-tool TTLs in seconds, merged
+            over :data:`DEFAULT_TOOL_TTLS`. A TTL of ``0`` disables caching
+            for that tool. (default: :obj:`None`)
+        default_ttl (float, optional): TTL for tools without an entry.
+            (default: :obj:`3600`)
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+        default_ttl: Optional[float] = 3600,
+    ):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = {**DEFAULT_TOOL_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._stats: Dict[str, _ToolStats] = defaultdict(_ToolStats)
+
+    def ttl_for(self, tool_name: str) -> Optional[float]:
+        """Return the TTL used for ``tool_name``.
+
+        Args:
+            tool_name (str): Name of the tool.
+
+        Returns:
+            float, optional: TTL in seconds, or :obj:`None` for no expiry.
+        """
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def wrap_tools(self, tools: List["FunctionTool"]) -> List["FunctionTool"]:
+        """Return cached versions of ``tools``.
+
+        Args:
+            tools (List[FunctionTool]): The MCP tools to wrap.
+
+        Returns:
+            List[FunctionTool]: Tools with identical names and schemas.
+        """
+        return [wrap_tool(tool, self._call) for tool in tools]
+
+    def invalidate(self, tool_name: str, **kwargs: Any) -> None:
+        """Drop the cached result of one call.
+
+        Args:
+            tool_name (str): Name of the tool.
+            **kwargs: Arguments of the call to forget.
+        """
+        self.backend.delete(tool_call_key(tool_name, kwargs))
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters overall and per tool.
+
+        ``saved_seconds`` estimates the latency avoided by hits from the mean
+        latency of misses of the same tool.
+
+        Returns:
+            dict: The counters.
+        """
+        hits = sum(s.hits for s in self._stats.values())
+        misses = sum(s.misses for s in self._stats.values())
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_seconds": round(
+                sum(s.saved_seconds for s in self._stats.values()), 3
+            ),
+            "entries": len(self.backend),
+            "tools": {name: s.as_dict() for name, s in self._stats.items()},
+        }
+
+    async def _call(
+        self, tool_name: str, kwargs: Dict[str, Any], call_original: ToolCall
+    ) -> Any:
+        ttl = self.ttl_for(tool_name)
+        stats = self._stats[tool_name]
+        if ttl == 0:
+            return await call_original(**kwargs)
+
+        key = tool_call_key(tool_name, kwargs)
+        cached = self.backend.get(key)
+        if cached is not None:
+            stats.hits += 1
+            if stats.misses:
+                stats.saved_seconds += stats.miss_seconds / stats.misses
+            return cached["result"]
+
+        stats.misses += 1
+        start = time.perf_counter()
+        result = await call_original(**kwargs)
+        stats.miss_seconds += time.perf_counter() - start
+        if looks_like_tool_error(result):
+            stats.errors += 1
+        else:
+            self.backend.set(key, {"tool": tool_name, "result": result}, ttl)
+        return result
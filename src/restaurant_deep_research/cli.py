@@ -0,0 +1,367 @@
+"""Command-line interface for restaurant_deep_research."""
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional
+
+
+def _add_society_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--early-stop", action="store_true",
+        help=(
+            "end conversations once the assistant lists enough complete "
+            "recommendations or the agents stop making progress"
+        ),
+    )
+    parser.add_argument(
+        "--parallel-tools", type=int, default=0, metavar="N",
+        help=(
+            "run the tool calls of one model response concurrently, with at "
+            "most N calls per tool in flight across all queries (default: off)"
+        ),
+    )
+    parser.add_argument(
+        "--compact-tool-results", action="store_true",
+        help=(
+            "show the assistant compact place records instead of raw Google "
+            "Maps JSON results"
+        ),
+    )
+    parser.add_argument(
+        "--prefetch-details", type=int, default=0, metavar="K",
+        help=(
+            "fetch details of the top K hits of every place search in the "
+            "background (default: off)"
+        ),
+    )
+    parser.add_argument(
+        "--pipelined", action="store_true",
+        help=(
+            "let the user agent draft its next instruction from tool results "
+            "while the assistant is still writing its solution"
+        ),
+    )
+    parser.add_argument(
+        "--compact-memory", type=int, default=0, metavar="TOKENS",
+        help=(
+            "summarize older turns and bulky tool results once an agent's "
+            "context exceeds TOKENS (default: off)"
+        ),
+    )
+
+
+def _society_kwargs(args: argparse.Namespace) -> Optional[dict]:
+    from restaurant_deep_research.tools.rate_limit import ToolRateLimiter
+
+    society_kwargs = {}
+    if args.parallel_tools > 0:
+        society_kwargs["parallel_tool_calls"] = True
+        society_kwargs["tool_rate_limiter"] = ToolRateLimiter(
+            max_concurrency=args.parallel_tools
+        )
+    if args.early_stop:
+        society_kwargs["convergence_detectors"] = True
+    if args.compact_tool_results:
+        society_kwargs["compact_tool_results"] = True
+    if args.prefetch_details > 0:
+        society_kwargs["prefetch_place_details"] = args.prefetch_details
+    if args.pipelined:
+        society_kwargs["pipelined_turns"] = True
+    if args.compact_memory > 0:
+        from restaurant_deep_research.agents.compaction import MemoryCompactor
+
+        society_kwargs["memory_compaction"] = MemoryCompactor(
+            threshold_tokens=args.compact_memory
+        )
+    return society_kwargs or None
+
+
+def _add_answer_cache_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--answer-cache", nargs="?", const="", default=None, metavar="DB",
+        help=(
+            "answer equivalent requests from a cache of final answers keyed "
+            "on the clarified spec, kept in SQLite file DB if given"
+        ),
+    )
+
+
+def _add_routing_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--route-models", action="store_true",
+        help=(
+            "use a fast model for the clarifier and user agent and escalate "
+            "to the strong model when their output is malformed"
+        ),
+    )
+    parser.add_argument(
+        "--hedge-models", action="store_true",
+        help=(
+            "send a duplicate model request when a call is slower than usual, "
+            "fail over on errors and skip failing providers; uses "
+            "GEMINI_FALLBACK_API_KEY for the duplicates when set"
+        ),
+    )
+
+
+def _add_scheduler_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--maps-qps", type=float, default=None, metavar="QPS",
+        help=(
+            "schedule the Google Maps tool calls of all queries fairly at up "
+            "to QPS calls per second per API key, backing off and retrying "
+            "when the API reports OVER_QUERY_LIMIT (default: off)"
+        ),
+    )
+    parser.add_argument(
+        "--coalesce-tools", action="store_true",
+        help=(
+            "send identical Google Maps tool calls that are in flight at the "
+            "same time only once and share the result between queries"
+        ),
+    )
+
+
+def _install_tool_coordination(args: argparse.Namespace) -> None:
+    if args.maps_qps is not None:
+        from restaurant_deep_research.tools.scheduler import (
+            ToolScheduler,
+            set_tool_scheduler,
+        )
+
+        set_tool_scheduler(ToolScheduler(key_rate=args.maps_qps))
+    if args.coalesce_tools:
+        from restaurant_deep_research.tools.coalescing import (
+            ToolCallCoalescer,
+            set_tool_coalescer,
+        )
+
+        set_tool_coalescer(ToolCallCoalescer())
+
+
+def _models(args: argparse.Namespace):
+    if not (args.route_models or args.hedge_models):
+        return None
+    from restaurant_deep_research.main import create_models
+
+    return create_models(routed=args.route_models, hedged=args.hedge_models)
+
+
+def _answer_cache(args: argparse.Namespace):
+    if args.answer_cache is None:
+        return None
+    from restaurant_deep_research.cache import AnswerCache, SQLiteCacheBackend
+
+    backend = (
+        SQLiteCacheBackend(args.answer_cache, table="answers")
+        if args.answer_cache
+        else None
+    )
+    return AnswerCache(backend=backend)
+
+
+def _add_batch_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "batch",
+        help="Process a JSONL file of queries concurrently.",
+        description=(
+            "Each input line is a JSON string or an object with a 'query' "
+            "field and an optional 'id'. Results are written as JSONL in "
+            "completion order."
+        ),
+    )
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument(
+        "-o", "--output", help="JSONL file for results (default: stdout)"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=4,
+        help="maximum number of queries in flight (default: 4)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=600.0,
+        help="seconds allowed per query attempt (default: 600)",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=2,
+        help="retries after transient model or tool failures (default: 2)",
+    )
+    parser.add_argument(
+        "--turn-limit", type=int, default=10,
+        help="maximum conversation turns per query (default: 10)",
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=1,
+        help="number of MCP connections shared by the batch (default: 1)",
+    )
+    _add_answer_cache_argument(parser)
+    _add_routing_argument(parser)
+    _add_scheduler_argument(parser)
+    _add_society_arguments(parser)
+
+
+def _add_serve_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "serve",
+        help="Run a long-lived HTTP service with warm models and MCP connections.",
+        description=(
+            "POST /query answers {\"query\": ...}; GET /healthz, /stats and "
+            "/metrics report health, admission statistics and Prometheus metrics."
+        ),
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8080, help="TCP port (default: 8080)"
+    )
+    parser.add_argument(
+        "--unix", metavar="PATH", help="listen on a Unix socket instead of TCP"
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=4,
+        help="queries processed at once (default: 4)",
+    )
+    parser.add_argument(
+        "--max-queue", type=int, default=32,
+        help="queries allowed to wait for a slot before rejecting (default: 32)",
+    )
+    parser.add_argument(
+        "--queue-timeout", type=float, default=30.0,
+        help="seconds a query may wait for a slot (default: 30)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=600.0,
+        help="seconds allowed per query (default: 600)",
+    )
+    parser.add_argument(
+        "--turn-limit", type=int, default=10,
+        help="default conversation turns per query (default: 10)",
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=1,
+        help="MCP connections kept open (default: 1)",
+    )
+    _add_answer_cache_argument(parser)
+    _add_routing_argument(parser)
+    _add_scheduler_argument(parser)
+    _add_society_arguments(parser)
+
+
+async def _run_serve(args: argparse.Namespace) -> int:
+    from restaurant_deep_research.server import serve
+
+    _install_tool_coordination(args)
+    await serve(
+        host=args.host,
+        port=args.port,
+        unix_path=args.unix,
+        max_concurrency=args.concurrency,
+        max_queue=args.max_queue,
+        queue_timeout=args.queue_timeout,
+        request_timeout=args.timeout,
+        pool_size=args.pool_size,
+        chat_turn_limit=args.turn_limit,
+        models=_models(args),
+        answer_cache=_answer_cache(args),
+        society_kwargs=_society_kwargs(args),
+    )
+    return 0
+
+
+def _add_record_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "record",
+        help="Record a live query as a fixture for offline replay.",
+        description=(
+            "Runs the query against the live models and Google Maps MCP "
+            "server and saves every model response and tool result as JSON."
+        ),
+    )
+    parser.add_argument("query", help="the restaurant query")
+    parser.add_argument("-o", "--output", required=True, help="fixture file to write")
+    parser.add_argument(
+        "--turn-limit", type=int, default=10,
+        help="maximum conversation turns (default: 10)",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="print the conversation"
+    )
+
+
+async def _run_record(args: argparse.Namespace) -> int:
+    from restaurant_deep_research.replay import record_query
+
+    fixture = await record_query(
+        args.query,
+        args.output,
+        chat_turn_limit=args.turn_limit,
+        verbose=args.verbose,
+    )
+    calls = sum(len(c) for c in fixture["model_calls"].values())
+    print(
+        f"Recorded {calls} model calls and {len(fixture['tool_calls'])} tool "
+        f"calls to {args.output}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+async def _run_batch(args: argparse.Namespace) -> int:
+    from restaurant_deep_research.batch import run_batch
+    from restaurant_deep_research.tools.pool import MCPToolkitPool
+
+    _install_tool_coordination(args)
+    async with MCPToolkitPool(size=args.pool_size) as pool:
+        counts = await run_batch(
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            retries=args.retries,
+            chat_turn_limit=args.turn_limit,
+            pool=pool,
+            models=_models(args),
+            answer_cache=_answer_cache(args),
+            society_kwargs=_society_kwargs(args),
+        )
+    summary = ", ".join(f"{status}: {n}" for status, n in sorted(counts.items()))
+    print(f"Batch finished ({summary or 'no queries'})", file=sys.stderr)
+    return 0 if set(counts) <= {"ok"} else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the ``restaurant-deep-research`` command.
+
+    Args:
+        argv (List[str], optional): Arguments, defaulting to ``sys.argv[1:]``.
+
+    Returns:
+        int: The process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="restaurant-deep-research",
+        description="Multi-agent restaurant recommendations.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    _add_batch_parser(subparsers)
+    _add_record_parser(subparsers)
+    _add_serve_parser(subparsers)
+    args = parser.parse_args(argv)
+
+    from restaurant_deep_research.config.environment import load_environment
+
+    load_environment()
+    if args.command == "batch":
+        return asyncio.run(_run_batch(args))
+    if args.command == "record":
+        return asyncio.run(_run_record(args))
+    if args.command == "serve":
+        return asyncio.run(_run_serve(args))
+    parser.error(f"unknown command {args.command!r}")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,25 @@
 """Configuration module for restaurant deepresearch."""
 
+from restaurant_deep_research.config.environment import load_environment
+from restaurant_deep_research.config.mcp import (
+    MCPConfigError,
+    MCPServerConfig,
+    create_mcp_toolkit,
+    find_mcp_config_file,
+    load_mcp_config,
+    parse_mcp_config,
+    reload_mcp_config,
+)
 from restaurant_deep_research.config.prompts import RESTAURANT_CLARIFIER_PROMPT
 
-__all__ = ["RESTAURANT_CLARIFIER_PROMPT"]
\ No newline at end of file
+__all__ = [
+    "RESTAURANT_CLARIFIER_PROMPT",
+    "load_environment",
+    "MCPConfigError",
+    "MCPServerConfig",
+    "create_mcp_toolkit",
+    "find_mcp_config_file",
+    "load_mcp_config",
+    "parse_mcp_config",
+    "reload_mcp_config",
+]
@@ -0,0 +1,23 @@
+"""Loading of API keys from ``.env``."""
+
+import threading
+
+_environment_loaded = False
+_lock = threading.Lock()
+
+
+def load_environment() -> None:
+    """Load API keys from ``.env`` the first time they are needed.
+
+    Deferred from import time so that importing the package stays cheap;
+    variables already set in the environment take precedence.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    with _lock:
+        if not _environment_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _environment_loaded = True
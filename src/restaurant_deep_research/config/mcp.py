@@ -0,0 +1,223 @@
+"""
+In-memory MCP server configuration.
+
+The MCP servers config used to be rewritten to ``config/mcp_servers_config.json``
+on every query whenever ``GOOGLE_MAPS_API_KEY`` was set, so that CAMEL's
+``MCPToolkit`` could read the key back from disk. This module resolves the
+configuration once per process instead: the JSON file is read and validated
+on first use (or a built-in Google Maps config is used when there is none),
+empty ``env`` placeholders are filled from the environment, and the result
+is cached until :func:`reload_mcp_config` is called. Toolkits are built
+straight from the cached config, so the request path never touches disk.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from restaurant_deep_research.config.environment import load_environment
+
+if TYPE_CHECKING:
+    from camel.toolkits import MCPToolkit
+
+CONFIG_FILE_NAME = "mcp_servers_config.json"
+# config/ at the project root, next to src/.
+PACKAGE_CONFIG_PATH = Path(__file__).parents[3] / "config" / CONFIG_FILE_NAME
+
+GOOGLE_MAPS_SERVER = {
+    "command": "npx",
+    "args": ["-y", "@modelcontextprotocol/server-google-maps"],
+    "env": {"GOOGLE_MAPS_API_KEY": ""},
+}
+
+
+class MCPConfigError(ValueError):
+    """Raised when an MCP servers config is missing or malformed."""
+
+
+@dataclass(frozen=True)
+class MCPServerConfig:
+    """Validated settings of one MCP server.
+
+    Attributes:
+        name (str): The server's key in ``mcpServers``.
+        command_or_url (str): Command to spawn (stdio) or URL (SSE).
+        args (Tuple[str, ...]): Command-line arguments.
+        env (Dict[str, str]): Extra environment variables for the server.
+        timeout (float, optional): Request timeout in seconds.
+    """
+
+    name: str
+    command_or_url: str
+    args: Tuple[str, ...] = ()
+    env: Dict[str, str] = field(default_factory=dict)
+    timeout: Optional[float] = None
+
+
+def parse_mcp_config(data: Any, source: str = "<config>") -> Tuple[MCPServerConfig, ...]:
+    """Validate an ``{"mcpServers": {...}}`` mapping.
+
+    Unlike ``MCPToolkit``, which skips malformed entries with a warning, any
+    problem is an error: a half-configured toolkit only fails later, in the
+    middle of a conversation.
+
+    Empty ``env`` values are placeholders and are filled from the process
+    environment, so the checked-in config never needs to contain API keys.
+
+    Args:
+        data (Any): The decoded JSON config.
+        source (str, optional): Where the config came from, for error
+            messages. (default: :obj:`"<config>"`)
+
+    Returns:
+        Tuple[MCPServerConfig, ...]: One entry per server.
+
+    Raises:
+        MCPConfigError: If the config is malformed or names no server.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("mcpServers"), dict):
+        raise MCPConfigError(f"{source}: expected an object with an 'mcpServers' object")
+    servers = []
+    for name, cfg in data["mcpServers"].items():
+        where = f"{source}: server {name!r}"
+        if not isinstance(cfg, dict):
+            raise MCPConfigError(f"{where} must be an object")
+        command_or_url = cfg.get("command") or cfg.get("url")
+        if not isinstance(command_or_url, str) or not command_or_url:
+            raise MCPConfigError(f"{where} needs a 'command' or 'url' string")
+        args = cfg.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+            raise MCPConfigError(f"{where}: 'args' must be a list of strings")
+        env = cfg.get("env", {})
+        if not isinstance(env, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in env.items()
+        ):
+            raise MCPConfigError(f"{where}: 'env' must map strings to strings")
+        timeout = cfg.get("timeout")
+        if timeout is not None and not isinstance(timeout, (int, float)):
+            raise MCPConfigError(f"{where}: 'timeout' must be a number")
+        env = {key: value or os.environ.get(key, "") for key, value in env.items()}
+        missing = [key for key, value in env.items() if not value]
+        if missing:
+            raise MCPConfigError(
+                f"{where}: no value for {', '.join(missing)} in the config "
+                "or the environment"
+            )
+        servers.append(
+            MCPServerConfig(
+                name=name,
+                command_or_url=command_or_url,
+                args=tuple(args),
+                env=env,
+                timeout=timeout,
+            )
+        )
+    if not servers:
+        raise MCPConfigError(f"{source}: no MCP servers configured")
+    return tuple(servers)
+
+
+def find_mcp_config_file() -> Optional[Path]:
+    """Locate the MCP servers config file.
+
+    Returns:
+        Path, optional: ``config/mcp_servers_config.json`` of the project,
+            else ``mcp_servers_config.json`` in the working directory, else
+            :obj:`None`.
+    """
+    for path in (PACKAGE_CONFIG_PATH, Path.cwd() / CONFIG_FILE_NAME):
+        if path.exists():
+            return path
+    return None
+
+
+_cache: Dict[Optional[str], Tuple[MCPServerConfig, ...]] = {}
+_cache_lock = threading.Lock()
+
+
+def _resolve(config_path: Optional[str]) -> Tuple[MCPServerConfig, ...]:
+    load_environment()
+    path = Path(config_path) if config_path else find_mcp_config_file()
+    if path is None:
+        if not os.environ.get("GOOGLE_MAPS_API_KEY"):
+            raise MCPConfigError(
+                f"Could not find {CONFIG_FILE_NAME} and GOOGLE_MAPS_API_KEY is not set"
+            )
+        return parse_mcp_config(
+            {"mcpServers": {"google-maps": GOOGLE_MAPS_SERVER}}, "<built-in>"
+        )
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise MCPConfigError(f"MCP config not found: {path}") from None
+    except json.JSONDecodeError as e:
+        raise MCPConfigError(f"{path}: invalid JSON: {e}") from None
+    return parse_mcp_config(data, str(path))
+
+
+def load_mcp_config(config_path: Optional[str] = None) -> Tuple[MCPServerConfig, ...]:
+    """Return the validated MCP config, resolving it on first use.
+
+    Args:
+        config_path (str, optional): Explicit config file. Defaults to
+            :func:`find_mcp_config_file`, or a built-in Google Maps config
+            when no file exists and ``GOOGLE_MAPS_API_KEY`` is set.
+
+    Returns:
+        Tuple[MCPServerConfig, ...]: The cached server configs.
+
+    Raises:
+        MCPConfigError: If no usable config can be resolved.
+    """
+    servers = _cache.get(config_path)
+    if servers is None:
+        with _cache_lock:
+            servers = _cache.get(config_path)
+            if servers is None:
+                servers = _cache[config_path] = _resolve(config_path)
+    return servers
+
+
+def reload_mcp_config(config_path: Optional[str] = None) -> Tuple[MCPServerConfig, ...]:
+    """Drop every cached config and resolve ``config_path`` again.
+
+    Call after editing the config file or changing API keys in the
+    environment. Toolkits that are already connected are not affected;
+    restart the MCP pool to apply the new config to them.
+
+    Args:
+        config_path (str, optional): See :func:`load_mcp_config`.
+
+    Returns:
+        Tuple[MCPServerConfig, ...]: The freshly resolved server configs.
+    """
+    with _cache_lock:
+        _cache.clear()
+    return load_mcp_config(config_path)
+
+
+def create_mcp_toolkit(config_path: Optional[str] = None) -> "MCPToolkit":
+    """Build an unconnected ``MCPToolkit`` from the cached config.
+
+    Args:
+        config_path (str, optional): See :func:`load_mcp_config`.
+
+    Returns:
+        MCPToolkit: A toolkit with one client per configured server.
+    """
+    from camel.toolkits import MCPToolkit
+    from camel.toolkits.mcp_toolkit import MCPClient
+
+    clients: List[MCPClient] = [
+        MCPClient(
+            command_or_url=server.command_or_url,
+            args=list(server.args),
+            env={**os.environ, **server.env},
+            timeout=server.timeout,
+        )
+        for server in load_mcp_config(config_path)
+    ]
+    return MCPToolkit(servers=clients)
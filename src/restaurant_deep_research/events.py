@@ -0,0 +1,222 @@
+"""
+Typed events emitted while a restaurant query is processed.
+
+:func:`stream_restaurant_query` yields these events as they happen, so that a
+frontend can show progress long before the final answer is ready. Events are
+routed through a context variable, which lets deeply nested code such as tool
+wrappers and model backends report progress for the query they run in
+without threading a callback through every call.
+"""
+
+import contextlib
+import itertools
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+from restaurant_deep_research.tools.wrapping import (
+    ToolCall,
+    looks_like_tool_error,
+    wrap_tool,
+)
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+EventSink = Callable[["QueryEvent"], None]
+
+_event_sink: ContextVar[Optional[EventSink]] = ContextVar(
+    "restaurant_event_sink", default=None
+)
+_call_ids = itertools.count(1)
+
+
+@dataclass
+class QueryEvent:
+    """Base class of all query events.
+
+    Attributes:
+        type (str): Event type, stable across releases for serialization.
+        timestamp (float): Unix time at which the event was created.
+    """
+
+    type = "event"
+    timestamp: float = field(default_factory=time.time, init=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation of the event."""
+        return {"type": self.type, **asdict(self)}
+
+
+@dataclass
+class ClarifiedSpecEvent(QueryEvent):
+    """The Request Clarifier produced the structured task spec."""
+
+    type = "clarified_spec"
+    spec: str = ""
+
+
+@dataclass
+class SocietyReadyEvent(QueryEvent):
+    """The role-playing society was built and is about to start."""
+
+    type = "society_ready"
+    task: str = ""
+    tool_names: List[str] = field(default_factory=list)
+    assistant_sys_msg: str = ""
+    user_sys_msg: str = ""
+
+
+@dataclass
+class ToolCallStartedEvent(QueryEvent):
+    """The assistant started a tool call."""
+
+    type = "tool_call_started"
+    call_id: int = 0
+    tool_name: str = ""
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ToolCallEvent(QueryEvent):
+    """A tool call finished."""
+
+    type = "tool_call"
+    call_id: int = 0
+    tool_name: str = ""
+    args: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class TokenEvent(QueryEvent):
+    """A streamed chunk of model output, when token streaming is enabled."""
+
+    type = "token"
+    role: str = ""
+    delta: str = ""
+
+
+@dataclass
+class UserInstructionEvent(QueryEvent):
+    """The user agent issued an instruction."""
+
+    type = "user_instruction"
+    round: int = 0
+    content: str = ""
+
+
+@dataclass
+class AssistantSolutionEvent(QueryEvent):
+    """The assistant agent answered an instruction."""
+
+    type = "assistant_solution"
+    round: int = 0
+    content: str = ""
+
+
+@dataclass
+class TerminatedEvent(QueryEvent):
+    """An agent terminated the conversation."""
+
+    type = "terminated"
+    role: str = ""
+    reasons: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ConvergedEvent(QueryEvent):
+    """A convergence detector ended the conversation early."""
+
+    type = "converged"
+    round: int = 0
+    reason: str = ""
+    rounds_saved: int = 0
+
+
+@dataclass
+class FinalAnswerEvent(QueryEvent):
+    """The conversation ended with a final answer.
+
+    ``metrics`` holds the query's :meth:`QueryMetrics.summary`; ``places``
+    holds the structured places found when the society compacts tool
+    results.
+    """
+
+    type = "final_answer"
+    answer: str = ""
+    rounds: int = 0
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    places: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def emit_event(event: QueryEvent) -> None:
+    """Send ``event`` to the sink of the current query, if any.
+
+    Args:
+        event (QueryEvent): The event to emit.
+    """
+    sink = _event_sink.get()
+    if sink is not None:
+        sink(event)
+
+
+@contextlib.contextmanager
+def event_sink(sink: Optional[EventSink]) -> Iterator[None]:
+    """Route events emitted in the current context to ``sink``.
+
+    Tasks created inside the block inherit the sink.
+
+    Args:
+        sink (EventSink, optional): Callback receiving every event, or
+            :obj:`None` to drop events.
+    """
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+async def _report_tool_call(
+    tool_name: str, kwargs: Dict[str, Any], call_original: ToolCall
+) -> Any:
+    call_id = next(_call_ids)
+    emit_event(ToolCallStartedEvent(call_id=call_id, tool_name=tool_name, args=kwargs))
+    start = time.perf_counter()
+    error = None
+    result = None
+    try:
+        result = await call_original(**kwargs)
+        if looks_like_tool_error(result):
+            error = str(result)[:300]
+        return result
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        emit_event(
+            ToolCallEvent(
+                call_id=call_id,
+                tool_name=tool_name,
+                args=kwargs,
+                result=result,
+                error=error,
+                elapsed=time.perf_counter() - start,
+            )
+        )
+
+
+def report_tool_calls(tools: List["FunctionTool"]) -> List["FunctionTool"]:
+    """Wrap tools so that every call emits start and finish events.
+
+    Args:
+        tools (List[FunctionTool]): The tools to wrap.
+
+    Returns:
+        List[FunctionTool]: Tools with identical names and schemas.
+    """
+    return [wrap_tool(tool, _report_tool_call) for tool in tools]
@@ -1,75 +1,242 @@
 """Main functionality for restaurant_deep_research."""
 
 import asyncio
-import json
-import sys
-from pathlib import Path
-from typing import List, Optional
+import contextlib
 import os
+import sys
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
 from camel.agents import ChatAgent
 from camel.configs import GeminiConfig
-from camel.toolkits import MCPToolkit, FunctionTool
+from camel.toolkits import FunctionTool
 from camel.messages import BaseMessage
-from camel.models import ModelFactory
+from camel.models import BaseModelBackend, ModelFactory
 from camel.types import ModelType, ModelPlatformType
 from camel.utils import print_text_animated
 from colorama import Fore
-from dotenv import load_dotenv
 
-from restaurant_deep_research.agents.role_playing import OwlRolePlaying, arun_society
+from restaurant_deep_research.agents.pool import ClarifierPool, SocietyPool
+from restaurant_deep_research.agents.role_playing import (
+    OwlRolePlaying,
+    arun_society,
+    build_society,
+)
+from restaurant_deep_research.cache.answers import AnswerCache
+from restaurant_deep_research.cache.clarifier import ClarifierCache
+from restaurant_deep_research.cache.tool_results import ToolResultCache
+from restaurant_deep_research.config.environment import load_environment
+from restaurant_deep_research.config.mcp import create_mcp_toolkit, find_mcp_config_file
 from restaurant_deep_research.config.prompts import RESTAURANT_CLARIFIER_PROMPT
-
-# Load environment variables
-load_dotenv()
+from restaurant_deep_research.events import (
+    AssistantSolutionEvent,
+    ClarifiedSpecEvent,
+    ConvergedEvent,
+    FinalAnswerEvent,
+    QueryEvent,
+    SocietyReadyEvent,
+    TerminatedEvent,
+    UserInstructionEvent,
+    emit_event,
+    event_sink,
+    report_tool_calls,
+)
+from restaurant_deep_research.metrics import (
+    QueryMetrics,
+    default_registry,
+    measure_tool_calls,
+    metrics_scope,
+    phase,
+    record_tokens,
+)
+from restaurant_deep_research.models.hedging import hedge_models
+from restaurant_deep_research.models.routing import ModelRouter
+from restaurant_deep_research.models.streaming import TokenStreamBackend
+from restaurant_deep_research.tools.coalescing import get_tool_coalescer
+from restaurant_deep_research.tools.pool import MCPToolkitPool, get_mcp_pool
+from restaurant_deep_research.tools.scheduler import get_tool_scheduler
 
 def get_default_config_path() -> str:
-    """Get the default config path for MCP servers."""
-    # First check if it's in the package directory
-    package_config_dir = Path(__file__).parent.parent.parent / "config"
-    package_config = package_config_dir / "mcp_servers_config.json"
-    
-    # Get Google Maps API key from environment
-    google_maps_api_key = os.environ.get("GOOGLE_MAPS_API_KEY")
-    
-    if google_maps_api_key:
-        # Create or update the config file with the API key from environment
-        config_data = {
-            "mcpServers": {
-                "google-maps": {
-                    "command": "npx",
-                    "args": [
-                        "-y",
-                        "@modelcontextprotocol/server-google-maps"
-                    ],
-                    "env": {
-                        "GOOGLE_MAPS_API_KEY": google_maps_api_key
-                    }
-                }
-            }
+    """Get the default config path for MCP servers.
+
+    The file is only read, never written; API keys missing from it are
+    taken from the environment by :func:`load_mcp_config`.
+    """
+    path = find_mcp_config_file()
+    if path is None:
+        raise FileNotFoundError("Could not find mcp_servers_config.json")
+    return str(path)
+
+# Sampling temperature per role, shared by every model tier.
+ROLE_TEMPERATURES = {"clarifier": 0.2, "user": 0.3, "assistant": 0.4}
+
+# Roles whose responses are streamed when streaming is requested. CAMEL's
+# ChatAgent drops tool calls from streamed responses, so the tool-using
+# assistant is never streamed; its complete answers are emitted as one
+# TokenEvent each instead.
+STREAMED_ROLES = ("clarifier", "user")
+
+def _streams(role: str, stream: bool) -> bool:
+    return stream and role in STREAMED_ROLES
+
+def _fallback_models(
+    model_type: ModelType, stream: bool
+) -> Dict[str, List[BaseModelBackend]]:
+    """Per-role backends of ``model_type`` using ``GEMINI_FALLBACK_API_KEY``."""
+    api_key = os.environ.get("GEMINI_FALLBACK_API_KEY")
+    if not api_key:
+        return {}
+    return {
+        role: [
+            ModelFactory.create(
+                model_platform=ModelPlatformType.GEMINI,
+                model_type=model_type,
+                model_config_dict=GeminiConfig(
+                    temperature=temperature, stream=_streams(role, stream)
+                ).as_dict(),
+                api_key=api_key,
+            )
+        ]
+        for role, temperature in ROLE_TEMPERATURES.items()
+    }
+
+def create_router(
+    stream: bool = False,
+    routes: Optional[Dict[str, str]] = None,
+    hedged: bool = False,
+) -> ModelRouter:
+    """Create a :class:`ModelRouter` with a fast and a strong Gemini tier.
+
+    Args:
+        stream (bool, optional): Request streamed responses for the roles
+            in :data:`STREAMED_ROLES`. Streamed responses cannot be checked,
+            so they are only escalated after failed tool calls or backend
+            errors. (default: :obj:`False`)
+        routes (Dict[str, str], optional): Tier per role or
+            ``"role/phase"``. Defaults to the fast tier for the clarifier
+            and user agent and the strong tier for the assistant.
+        hedged (bool, optional): Hedge and fail over each tier's calls as
+            in :func:`create_models`. (default: :obj:`False`)
+
+    Returns:
+        ModelRouter: The router; ``router.models()`` gives routed backends.
+    """
+    load_environment()
+    tiers = {
+        tier: {
+            role: ModelFactory.create(
+                model_platform=ModelPlatformType.GEMINI,
+                model_type=model_type,
+                model_config_dict=GeminiConfig(
+                    temperature=temperature, stream=_streams(role, stream)
+                ).as_dict(),
+            )
+            for role, temperature in ROLE_TEMPERATURES.items()
         }
-        
-        # Ensure the config directory exists
-        package_config_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Write the config file
-        with open(package_config, 'w') as f:
-            json.dump(config_data, f, indent=4)
-    
-    if package_config.exists():
-        return str(package_config)
-    
-    # Fall back to the current directory
-    current_dir_config = Path.cwd() / "mcp_servers_config.json"
-    if current_dir_config.exists():
-        return str(current_dir_config)
-    
-    raise FileNotFoundError("Could not find mcp_servers_config.json")
+        for tier, model_type in (
+            ("fast", ModelType.GEMINI_2_0_FLASH),
+            ("strong", ModelType.GEMINI_2_5_PRO_EXP),
+        )
+    }
+    if hedged:
+        tiers = {
+            "fast": hedge_models(
+                tiers["fast"], _fallback_models(ModelType.GEMINI_2_0_FLASH, stream)
+            ),
+            "strong": hedge_models(
+                tiers["strong"], _fallback_models(ModelType.GEMINI_2_5_PRO_EXP, stream)
+            ),
+        }
+    return ModelRouter(tiers, routes)
+
+def create_models(
+    stream: bool = False,
+    routed: Union[bool, ModelRouter] = False,
+    hedged: bool = False,
+) -> Dict[str, BaseModelBackend]:
+    """Create the model backends used by the clarifier and the society.
+
+    Model backends are stateless clients, so one set can be shared by any
+    number of concurrent queries.
+
+    Args:
+        stream (bool, optional): Stream the clarifier's and user agent's
+            responses and report each chunk as a ``TokenEvent`` to
+            :func:`stream_restaurant_query`. The assistant is not streamed,
+            since CAMEL drops tool calls from streamed responses; each of its
+            text answers is reported as a single ``TokenEvent``.
+            (default: :obj:`False`)
+        routed (Union[bool, ModelRouter], optional): Route each role to a
+            model tier with :func:`create_router`, or with the given router,
+            instead of using the strongest model everywhere.
+            (default: :obj:`False`)
+        hedged (bool, optional): Wrap each backend in a
+            :class:`~restaurant_deep_research.models.HedgedModelBackend` that
+            sends a duplicate request when a call is slower than its recent
+            p95, fails over on errors and trips a circuit breaker on
+            repeated failures. Duplicates and failovers go to the same model
+            with ``GEMINI_FALLBACK_API_KEY`` when it is set, else to the
+            primary key. Ignored for a given ``routed`` router.
+            (default: :obj:`False`)
+
+    Returns:
+        Dict[str, BaseModelBackend]: Backends keyed by ``"clarifier"``,
+            ``"user"`` and ``"assistant"``.
+    """
+    load_environment()
+    if routed:
+        router = (
+            routed
+            if isinstance(routed, ModelRouter)
+            else create_router(stream, hedged=hedged)
+        )
+        models = router.models()
+    else:
+        models = _create_single_tier_models(stream)
+        if hedged:
+            models = hedge_models(
+                models, _fallback_models(ModelType.GEMINI_2_5_PRO_EXP, stream)
+            )
+    if stream:
+        models = {
+            role: TokenStreamBackend(
+                backend, role, emit_complete=role not in STREAMED_ROLES
+            )
+            for role, backend in models.items()
+        }
+    return models
+
+def _create_single_tier_models(stream: bool) -> Dict[str, BaseModelBackend]:
+    return {
+        # Create a single model instance to fully understand the needs from user and translate into markdown format to make models easy to understand.
+        "clarifier": ModelFactory.create(
+            model_platform=ModelPlatformType.GEMINI,
+            model_type=ModelType.GEMINI_2_5_PRO_EXP, # Hah, you know why you should use a solid model here.
+            model_config_dict=GeminiConfig(
+                temperature=0.2, stream=_streams("clarifier", stream)
+            ).as_dict(),
+        ),
+        "user": ModelFactory.create(
+            model_platform=ModelPlatformType.GEMINI,
+            model_type=ModelType.GEMINI_2_5_PRO_EXP, 
+            model_config_dict=GeminiConfig(
+                temperature=0.3, stream=_streams("user", stream)
+            ).as_dict(),
+        ),
+        "assistant": ModelFactory.create(
+            model_platform=ModelPlatformType.GEMINI,
+            model_type=ModelType.GEMINI_2_5_PRO_EXP, # Highly recommend use some really strong reansoning and tool-calling model, that will make the result solid.
+            model_config_dict=GeminiConfig(
+                temperature=0.4, stream=_streams("assistant", stream)
+            ).as_dict(),
+        ),
+    }
 
 async def construct_society(
     question: str,
     tools: List[FunctionTool],
     tool_names: List[str],
+    models: Optional[Dict[str, BaseModelBackend]] = None,
+    society_kwargs: Optional[dict] = None,
 ) -> OwlRolePlaying:
     """Build a multi-agent OwlRolePlaying instance.
 
@@ -77,169 +244,511 @@ async def construct_society(
         question (str): The question to ask.
         tools (List[FunctionTool]): The MCP tools to use.
         tool_names (List[str]): The names of the available tools.
+        models (Dict[str, BaseModelBackend], optional): Backends keyed by
+            ``"user"`` and ``"assistant"``. Defaults to :func:`create_models`.
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options, such as ``task_injection``, ``context_token_budget``,
+            ``parallel_tool_calls`` or ``convergence_detectors``.
         
     Returns:
         OwlRolePlaying: The configured society instance.
     """
-    models = {
-        "user": ModelFactory.create(
-            model_platform=ModelPlatformType.GEMINI,
-            model_type=ModelType.GEMINI_2_5_PRO_EXP, 
-            model_config_dict=GeminiConfig(temperature=0.3).as_dict(),
-        ),
-        "assistant": ModelFactory.create(
-            model_platform=ModelPlatformType.GEMINI,
-            model_type=ModelType.GEMINI_2_5_PRO_EXP, # Highly recommend use some really strong reansoning and tool-calling model, that will make the result solid.
-            model_config_dict=GeminiConfig(temperature=0.4).as_dict(),
-        ),
-    }
+    models = models or create_models()
+    return build_society(
+        tool_restricted_task(question, tool_names),
+        tools,
+        models,
+        society_kwargs,
+    )
 
-    # Modify the question to include the available tools
-    question_with_tools = f"{question}\n\nNOTE: Only the following Google Maps tools are available: {', '.join(tool_names)}. Do not try to use any other tools like search_web, search_google, etc."
-    
-    # Use only MCP tools
-    all_tools = tools
+def tool_restricted_task(question: str, tool_names: List[str]) -> str:
+    """Append the list of usable tools to the clarified task.
 
-    user_agent_kwargs = {"model": models["user"]}
-    assistant_agent_kwargs = {
-        "model": models["assistant"],
-        "tools": all_tools,
-    }
+    Args:
+        question (str): The clarified task.
+        tool_names (List[str]): The names of the available tools.
 
-    task_kwargs = {
-        "task_prompt": question_with_tools,
-        "with_task_specify": False,
-    }
+    Returns:
+        str: The task prompt given to the society.
+    """
+    return f"{question}\n\nNOTE: Only the following Google Maps tools are available: {', '.join(tool_names)}. Do not try to use any other tools like search_web, search_google, etc."
+
+async def _aclarify(
+    query: str,
+    model: BaseModelBackend,
+    clarifier_cache: Optional[ClarifierCache] = None,
+    clarifier_pool: Optional[ClarifierPool] = None,
+) -> str:
+    """Turn the free-text query into a structured task spec without blocking.
 
-    society = OwlRolePlaying(
-        **task_kwargs,
-        user_role_name="user",
-        user_agent_kwargs=user_agent_kwargs,
-        assistant_role_name="assistant",
-        assistant_agent_kwargs=assistant_agent_kwargs,
+    Uses ``ChatAgent.astep`` when available and otherwise runs the blocking
+    ``step`` in the default executor. Cached specs skip the model entirely.
+
+    Args:
+        query (str): The user's restaurant query.
+        model (BaseModelBackend): Backend for the Request Clarifier agent.
+        clarifier_cache (ClarifierCache, optional): Cache of clarified specs.
+        clarifier_pool (ClarifierPool, optional): Pool to lease the agent
+            from instead of building one; its agents use the pool's model.
+
+    Returns:
+        str: The clarified task in Markdown.
+    """
+    if clarifier_cache is not None:
+        cached = clarifier_cache.get(query)
+        if cached is not None:
+            with phase("clarifier", cache_hit=True):
+                return cached
+
+    async with contextlib.AsyncExitStack() as stack:
+        if clarifier_pool is not None:
+            md_agent = await stack.enter_async_context(clarifier_pool.acquire())
+        else:
+            md_task_sys_msg = BaseMessage.make_user_message(
+                role_name="Request Clarifier",
+                content=RESTAURANT_CLARIFIER_PROMPT,
+            )
+            md_agent = ChatAgent(md_task_sys_msg, model)
+            md_agent.reset()
+
+        with phase("clarifier", cache_hit=False):
+            if hasattr(md_agent, "astep"):
+                response = await md_agent.astep(query)
+            else:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(None, md_agent.step, query)
+    record_tokens("clarifier", response.info.get("usage"))
+    spec = response.msg.content
+
+    if clarifier_cache is not None:
+        clarifier_cache.set(query, spec)
+    return spec
+
+@contextlib.asynccontextmanager
+async def _lease_mcp_tools(
+    config_path: Optional[str] = None,
+    pool: Optional[MCPToolkitPool] = None,
+    verbose: bool = True,
+    tools: Optional[List[FunctionTool]] = None,
+) -> AsyncIterator[List[FunctionTool]]:
+    """Provide MCP tools for one query.
+
+    Tools come from ``pool`` or the process-wide pool started with
+    :func:`start_mcp_pool` when available; otherwise a dedicated toolkit is
+    connected for the query and disconnected afterwards.
+
+    Args:
+        config_path (str, optional): Path to MCP config for a dedicated toolkit.
+        pool (MCPToolkitPool, optional): Pool to lease a connection from.
+        verbose (bool, optional): Whether to report disconnect failures.
+        tools (List[FunctionTool], optional): Tools to use instead of MCP,
+            e.g. replayed tools from :mod:`restaurant_deep_research.replay`.
+
+    Yields:
+        List[FunctionTool]: The MCP tools.
+    """
+    if tools is not None:
+        yield tools
+        return
+
+    pool = pool or get_mcp_pool()
+    if pool is not None:
+        async with contextlib.AsyncExitStack() as stack:
+            with phase("mcp_lease"):
+                connection = await stack.enter_async_context(pool.lease())
+            yield connection.tools
+        return
+
+    mcp_toolkit = create_mcp_toolkit(config_path)
+    try:
+        with phase("mcp_connect"):
+            await mcp_toolkit.connect()
+        with phase("tool_discovery"):
+            tools = mcp_toolkit.get_tools()
+        yield tools
+    finally:
+        # Make sure to disconnect safely after all operations are completed.
+        try:
+            await mcp_toolkit.disconnect()
+        except Exception:
+            if verbose:
+                print("Disconnect failed")
+
+def _cached_answer(
+    answer_cache: AnswerCache, task: str, metrics: QueryMetrics
+) -> Optional[str]:
+    """Finish the query from ``answer_cache`` if it holds an answer for ``task``."""
+    with phase("answer_cache_lookup"):
+        cached = answer_cache.get(task)
+    if cached is None:
+        metrics.answer_cache = "miss"
+        return None
+    metrics.answer_cache = "fuzzy_hit" if cached.fuzzy else "hit"
+    metrics.finish()
+    emit_event(
+        FinalAnswerEvent(
+            answer=cached.answer,
+            rounds=0,
+            metrics=metrics.summary(),
+            places=cached.places,
+        )
     )
-    return society
+    return cached.answer
 
-async def process_restaurant_query(
-    query: Optional[str] = None, 
+DEFAULT_QUERY = "I'm looking for a casual yet authentic Japanese restaurant near Shibuya Station in Tokyo for dinner tonight. My budget is around ¥2,000–¥4,000, and I'm interested in sushi, ramen, or izakaya-style dishes. It should have good local reviews, an enjoyable atmosphere, and not be too fancy. Please recommend a few options."
+
+async def _run_query(
+    query: Optional[str] = None,
     config_path: Optional[str] = None,
     chat_turn_limit: int = 10,
-    verbose: bool = True
+    verbose: bool = True,
+    pool: Optional[MCPToolkitPool] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    models: Optional[Dict[str, BaseModelBackend]] = None,
+    clarifier_cache: Optional[ClarifierCache] = None,
+    society_kwargs: Optional[dict] = None,
+    metrics: Optional[QueryMetrics] = None,
+    tools: Optional[List[FunctionTool]] = None,
+    clarifier_pool: Optional[ClarifierPool] = None,
+    society_pool: Optional[SocietyPool] = None,
+    answer_cache: Optional[AnswerCache] = None,
 ) -> str:
-    """Process a restaurant query using multi-agent conversation.
-    
-    Args:
-        query (str, optional): The restaurant query. Defaults to a sample query.
-        config_path (str, optional): Path to MCP config. Defaults to looking in package directory.
-        chat_turn_limit (int, optional): Maximum conversation turns. Defaults to 10.
-        verbose (bool, optional): Whether to print detailed output. Defaults to True.
-        
+    """Run the clarifier and the society, emitting events as they happen.
+
+    See :func:`process_restaurant_query` for the arguments. Events go to the
+    sink installed with :func:`event_sink`; timings and tokens are recorded
+    into the active :func:`metrics_scope`, and ``metrics`` also receives the
+    round count. Answers found in ``answer_cache`` end the query right after
+    clarification, without leasing MCP tools or building a society; with an
+    answer cache, tools are therefore only leased once clarification is
+    done instead of while it runs.
+
     Returns:
         str: The final response from the assistant.
     """
-    # Create a single model instance to fully understand the needs from user and translate into markdown format to make models easy to understand.
-    model = ModelFactory.create(
-        model_platform=ModelPlatformType.GEMINI,
-        model_type=ModelType.GEMINI_2_5_PRO_EXP, # Hah, you know why you should use a solid model here.
-        model_config_dict=GeminiConfig(temperature=0.2).as_dict(),
-    )
+    metrics = metrics or QueryMetrics()
+    models = models or create_models()
 
     # Use default query if none provided
     if query is None:
-        query = "I'm looking for a casual yet authentic Japanese restaurant near Shibuya Station in Tokyo for dinner tonight. My budget is around ¥2,000–¥4,000, and I'm interested in sushi, ramen, or izakaya-style dishes. It should have good local reviews, an enjoyable atmosphere, and not be too fancy. Please recommend a few options."
+        query = DEFAULT_QUERY
 
-    # Process the query
-    md_task_sys_msg = BaseMessage.make_user_message(
-        role_name="Request Clarifier",
-        content=RESTAURANT_CLARIFIER_PROMPT,
+    # Clarify the request while the MCP toolkit connects and discovers tools,
+    # so the two slowest startup phases overlap, unless the clarified spec
+    # may be answered from the answer cache without any tools.
+    clarify_task = asyncio.ensure_future(
+        _aclarify(
+            query,
+            models["clarifier"],
+            clarifier_cache,
+            clarifier_pool=clarifier_pool,
+        )
     )
-    md_agent = ChatAgent(md_task_sys_msg, model)
-    md_agent.reset()
-    
-    response = md_agent.step(query)
-    if verbose:
-        print("Initial response:", response)
+    try:
+        task = None
+        if answer_cache is not None:
+            task = await clarify_task
+            emit_event(ClarifiedSpecEvent(spec=task))
+            answer = _cached_answer(answer_cache, task, metrics)
+            if answer is not None:
+                return answer
 
-    # Initialize MCP toolkit with Google Maps
-    config_path = config_path or get_default_config_path()
-    mcp_toolkit = MCPToolkit(config_path=config_path)
+        # Lease Google Maps MCP tools, reusing a pooled connection when available
+        async with contextlib.AsyncExitStack() as stack:
+            tools = await stack.enter_async_context(
+                _lease_mcp_tools(config_path, pool, verbose, tools)
+            )
+            if task is None:
+                task = await clarify_task
+                emit_event(ClarifiedSpecEvent(spec=task))
 
-    try:
-        await mcp_toolkit.connect()
-        default_task = response
-        task = default_task
+            # Schedule below the cache so that cache hits never wait for a turn,
+            # and coalesce above the scheduler so that duplicates take no token.
+            scheduler = get_tool_scheduler()
+            if scheduler is not None:
+                tools = scheduler.wrap_tools(tools)
+            coalescer = get_tool_coalescer()
+            if coalescer is not None:
+                tools = coalescer.wrap_tools(tools)
+            if tool_cache is not None:
+                tools = tool_cache.wrap_tools(tools)
+            tools = report_tool_calls(measure_tool_calls(tools))
 
-        # Connect to MCP servers
-        tools = mcp_toolkit.get_tools()
-        tool_names = [tool.get_function_name() for tool in tools]
-        
-        if verbose:
-            print("Available MCP tools:", tool_names)
-        
-        society = await construct_society(task, tools, tool_names)
-        
-        if verbose:
-            print(Fore.GREEN + f"AI Assistant sys message:\n{society.assistant_sys_msg}\n")
-            print(Fore.BLUE + f"AI User sys message:\n{society.user_sys_msg}\n")
-            print(Fore.YELLOW + f"Original task prompt:\n{task}\n")
-        
-        # Start the conversation loop
-        n = 0
-        input_msg = society.init_chat()
-        final_response = None
-
-        while n < chat_turn_limit:
-            n += 1
-            assistant_response, user_response = await society.astep(input_msg)
-
-            if assistant_response.terminated:
-                if verbose:
-                    print(
-                        Fore.GREEN
-                        + (
-                            "AI Assistant terminated. Reason: "
-                            f"{assistant_response.info['termination_reasons']}."
+            tool_names = [tool.get_function_name() for tool in tools]
+            if society_pool is not None:
+                with phase("society_lease"):
+                    society = await stack.enter_async_context(
+                        society_pool.acquire(
+                            tool_restricted_task(task, tool_names), tools
                         )
                     )
-                break
-                
-            if user_response.terminated:
-                if verbose:
-                    print(
-                        Fore.GREEN
-                        + (
-                            "AI User terminated. "
-                            f"Reason: {user_response.info['termination_reasons']}."
+            else:
+                society = await construct_society(
+                    task, tools, tool_names, models, society_kwargs
+                )
+            emit_event(
+                SocietyReadyEvent(
+                    task=task,
+                    tool_names=tool_names,
+                    assistant_sys_msg=society.assistant_sys_msg.content,
+                    user_sys_msg=society.user_sys_msg.content,
+                )
+            )
+
+            # Start the conversation loop
+            n = 0
+            input_msg = society.init_chat()
+            final_response = None
+
+            while n < chat_turn_limit:
+                n += 1
+                metrics.rounds = n
+                assistant_response, user_response = await society.astep(input_msg)
+
+                if assistant_response.terminated:
+                    emit_event(
+                        TerminatedEvent(
+                            role="assistant",
+                            reasons=assistant_response.info["termination_reasons"],
                         )
                     )
-                break
+                    break
 
-            if verbose:
-                print_text_animated(
-                    Fore.BLUE + f"AI User:\n\n{user_response.msg.content}\n"
+                if user_response.terminated:
+                    emit_event(
+                        TerminatedEvent(
+                            role="user",
+                            reasons=user_response.info["termination_reasons"],
+                        )
+                    )
+                    break
+
+                emit_event(
+                    UserInstructionEvent(round=n, content=user_response.msg.content)
                 )
 
-            if "TASK_DONE" in user_response.msg.content:
-                final_response = assistant_response.msg.content
-                break
+                if "TASK_DONE" in user_response.msg.content:
+                    final_response = assistant_response.msg.content
+                    break
 
-            if verbose:
-                print_text_animated(
-                    Fore.GREEN + "AI Assistant:\n\n"
-                    f"{assistant_response.msg.content}\n"
+                emit_event(
+                    AssistantSolutionEvent(
+                        round=n, content=assistant_response.msg.content
+                    )
+                )
+
+                reason = society.check_convergence(user_response, assistant_response)
+                if reason is not None:
+                    metrics.record_early_stop(reason, chat_turn_limit - n)
+                    emit_event(
+                        ConvergedEvent(
+                            round=n, reason=reason, rounds_saved=metrics.rounds_saved
+                        )
+                    )
+                    final_response = assistant_response.msg.content
+                    break
+
+                input_msg = assistant_response.msg
+
+            answer = final_response or assistant_response.msg.content
+            places = society.places.as_dicts() if society.places is not None else []
+            # Only answers the society settled on are worth serving again.
+            if answer_cache is not None and final_response is not None:
+                answer_cache.set(task, answer, places)
+            metrics.finish()
+            emit_event(
+                FinalAnswerEvent(
+                    answer=answer,
+                    rounds=n,
+                    metrics=metrics.summary(),
+                    places=places,
                 )
+            )
+            return answer
+    finally:
+        if not clarify_task.done():
+            clarify_task.cancel()
+
+@contextlib.contextmanager
+def _measure_query(metrics: QueryMetrics) -> Iterator[QueryMetrics]:
+    """Record a query into ``metrics`` and the process-wide registry."""
+    try:
+        with metrics_scope(metrics):
+            yield metrics
+    finally:
+        metrics.finish()
+        default_registry.observe(metrics)
+
+def _print_event(event: QueryEvent) -> None:
+    """Print query progress the way the interactive CLI always has."""
+    if isinstance(event, ClarifiedSpecEvent):
+        print("Initial response:", event.spec)
+    elif isinstance(event, SocietyReadyEvent):
+        print("Available MCP tools:", event.tool_names)
+        print(Fore.GREEN + f"AI Assistant sys message:\n{event.assistant_sys_msg}\n")
+        print(Fore.BLUE + f"AI User sys message:\n{event.user_sys_msg}\n")
+        print(Fore.YELLOW + f"Original task prompt:\n{event.task}\n")
+    elif isinstance(event, TerminatedEvent):
+        name = "AI Assistant" if event.role == "assistant" else "AI User"
+        print(Fore.GREEN + f"{name} terminated. Reason: {event.reasons}.")
+    elif isinstance(event, UserInstructionEvent):
+        print_text_animated(Fore.BLUE + f"AI User:\n\n{event.content}\n")
+    elif isinstance(event, AssistantSolutionEvent):
+        print_text_animated(Fore.GREEN + f"AI Assistant:\n\n{event.content}\n")
+    elif isinstance(event, ConvergedEvent):
+        print(
+            Fore.YELLOW + f"Stopping early after round {event.round} "
+            f"({event.rounds_saved} rounds saved): {event.reason}"
+        )
+
+async def process_restaurant_query(
+    query: Optional[str] = None, 
+    config_path: Optional[str] = None,
+    chat_turn_limit: int = 10,
+    verbose: bool = True,
+    pool: Optional[MCPToolkitPool] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    models: Optional[Dict[str, BaseModelBackend]] = None,
+    clarifier_cache: Optional[ClarifierCache] = None,
+    society_kwargs: Optional[dict] = None,
+    return_metrics: bool = False,
+    tools: Optional[List[FunctionTool]] = None,
+    clarifier_pool: Optional[ClarifierPool] = None,
+    society_pool: Optional[SocietyPool] = None,
+    answer_cache: Optional[AnswerCache] = None,
+) -> Union[str, Tuple[str, QueryMetrics]]:
+    """Process a restaurant query using multi-agent conversation.
+    
+    Args:
+        query (str, optional): The restaurant query. Defaults to a sample query.
+        config_path (str, optional): Path to MCP config. Defaults to looking in package directory.
+        chat_turn_limit (int, optional): Maximum conversation turns. Defaults to 10.
+        verbose (bool, optional): Whether to print detailed output. Defaults to True.
+        pool (MCPToolkitPool, optional): MCP connection pool to lease tools
+            from. Defaults to the pool started with :func:`start_mcp_pool`,
+            or a dedicated connection for this query if none is running.
+        tool_cache (ToolResultCache, optional): Cache for Google Maps tool
+            results, shared across queries. Defaults to no caching.
+        models (Dict[str, BaseModelBackend], optional): Model backends from
+            :func:`create_models`, shared across queries. Defaults to a new set.
+        clarifier_cache (ClarifierCache, optional): Cache of clarified task
+            specs, letting repeated queries skip the clarifier model call.
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options, e.g. ``{"task_injection": "reference"}``.
+        return_metrics (bool, optional): Also return the query's
+            :class:`QueryMetrics` with per-phase timings, tokens per role and
+            tool-call counts. Defaults to False.
+        tools (List[FunctionTool], optional): Google Maps tools to use
+            instead of connecting to MCP, e.g. recorded or replayed tools
+            from :mod:`restaurant_deep_research.replay`.
+        clarifier_pool (ClarifierPool, optional): Pool of clarifier agents
+            reused across queries instead of building one per query.
+        society_pool (SocietyPool, optional): Pool of societies re-targeted
+            at each query instead of constructing a new one. Pooled
+            societies use the pool's models and options, overriding
+            ``models`` and ``society_kwargs`` for the conversation.
+        answer_cache (AnswerCache, optional): Cache of final answers keyed
+            on the clarified spec. Hits return right after clarification
+            without leasing tools or running the society; answers the
+            society finishes with are stored. Defaults to no caching.
+        
+    Returns:
+        str: The final response from the assistant, or a tuple of the
+            response and its metrics if ``return_metrics`` is set.
+    """
+    metrics = QueryMetrics()
+    with event_sink(_print_event if verbose else None), _measure_query(metrics):
+        answer = await _run_query(
+            query,
+            config_path,
+            chat_turn_limit,
+            verbose,
+            pool,
+            tool_cache,
+            models,
+            clarifier_cache,
+            society_kwargs,
+            metrics,
+            tools,
+            clarifier_pool,
+            society_pool,
+            answer_cache,
+        )
+    if return_metrics:
+        return answer, metrics
+    return answer
+
+async def stream_restaurant_query(
+    query: Optional[str] = None,
+    config_path: Optional[str] = None,
+    chat_turn_limit: int = 10,
+    pool: Optional[MCPToolkitPool] = None,
+    tool_cache: Optional[ToolResultCache] = None,
+    models: Optional[Dict[str, BaseModelBackend]] = None,
+    clarifier_cache: Optional[ClarifierCache] = None,
+    society_kwargs: Optional[dict] = None,
+    metrics: Optional[QueryMetrics] = None,
+    tools: Optional[List[FunctionTool]] = None,
+    clarifier_pool: Optional[ClarifierPool] = None,
+    society_pool: Optional[SocietyPool] = None,
+    answer_cache: Optional[AnswerCache] = None,
+) -> AsyncIterator[QueryEvent]:
+    """Process a restaurant query, yielding progress events in real time.
+
+    Yields the clarified spec, tool calls with their arguments and timing,
+    every user instruction and assistant solution, and finally a
+    :class:`FinalAnswerEvent`. Token-level :class:`TokenEvent` objects are
+    included when the models come from ``create_models(stream=True)``.
+    Closing the generator early cancels the query.
+
+    Args:
+        See :func:`process_restaurant_query`. ``metrics`` optionally receives
+        the query's :class:`QueryMetrics`; a summary is also attached to the
+        final answer event.
+
+    Yields:
+        QueryEvent: Events in the order they happen.
+    """
+    queue: "asyncio.Queue[Optional[QueryEvent]]" = asyncio.Queue()
 
-            input_msg = assistant_response.msg
-            
-        return final_response or assistant_response.msg.content
+    metrics = metrics or QueryMetrics()
 
+    async def produce() -> str:
+        with event_sink(queue.put_nowait), _measure_query(metrics):
+            try:
+                return await _run_query(
+                    query,
+                    config_path,
+                    chat_turn_limit,
+                    False,
+                    pool,
+                    tool_cache,
+                    models,
+                    clarifier_cache,
+                    society_kwargs,
+                    metrics,
+                    tools,
+                    clarifier_pool,
+                    society_pool,
+                    answer_cache,
+                )
+            finally:
+                queue.put_nowait(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield event
+        # Surface any exception raised by the query.
+        await producer
     finally:
-        # Make sure to disconnect safely after all operations are completed.
-        try:
-            await mcp_toolkit.disconnect()
-        except Exception:
-            if verbose:
-                print("Disconnect failed")
+        if not producer.done():
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
 
 async def main():
     """Main entry point for the application."""
@@ -0,0 +1,844 @@
+"""
+Per-phase latency and token instrumentation.
+
+A :class:`QueryMetrics` object records a tree of timed spans for one query
+(clarifier call, MCP connect, tool discovery, each user-agent and assistant
+step, each tool call), the prompt and completion tokens used per role and the
+number of tool calls. The active object is kept in a context variable so that
+instrumented code only needs :func:`phase` and :func:`record_tokens`, which
+are no-ops when nothing is being measured.
+
+Metrics can be read as a plain summary, exported as Prometheus text or as
+OpenTelemetry-style spans, and are aggregated process-wide in
+:data:`default_registry`.
+"""
+
+import contextlib
+import itertools
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from restaurant_deep_research.tools.wrapping import (
+    ToolCall,
+    looks_like_tool_error,
+    wrap_tool,
+)
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+_current_metrics: ContextVar[Optional["QueryMetrics"]] = ContextVar(
+    "restaurant_query_metrics", default=None
+)
+_current_span: ContextVar[Optional["Span"]] = ContextVar(
+    "restaurant_query_span", default=None
+)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """A timed phase of a query.
+
+    Attributes:
+        name (str): Phase name, e.g. ``"assistant_step"``.
+        span_id (int): Identifier unique within the process.
+        parent_id (int, optional): Identifier of the enclosing span.
+        attributes (Dict[str, Any]): Extra labels such as the round number.
+        start_time (float): Unix start time.
+        duration (float): Wall-clock seconds, set when the span ends.
+        error (str, optional): Exception raised inside the span, if any.
+    """
+
+    __slots__ = (
+        "name",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start_time",
+        "duration",
+        "error",
+        "_start",
+    )
+
+    def __init__(self, name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    def end(self) -> None:
+        """Stop the span's clock."""
+        self.duration = time.perf_counter() - self._start
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "attributes": dict(self.attributes),
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "error": self.error,
+        }
+
+
+class QueryMetrics:
+    """Latency, token and tool-call measurements for one query.
+
+    Args:
+        query_id (str, optional): Identifier reported in exports.
+            (default: :obj:`None`)
+    """
+
+    def __init__(self, query_id: Optional[str] = None):
+        self.query_id = query_id
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.tool_calls: Dict[str, Dict[str, int]] = {}
+        self.compaction: Dict[str, Dict[str, int]] = {}
+        self.prefetch: Dict[str, int] = {}
+        self.pipeline: Dict[str, int] = {}
+        self.answer_cache: Optional[str] = None
+        self.model_calls: Dict[str, Dict[str, int]] = {}
+        self.escalations: Dict[str, Dict[str, int]] = {}
+        self.hedging: Dict[str, int] = {}
+        self.tool_queue: Dict[str, int] = {}
+        self.tool_queue_seconds = 0.0
+        self.coalescing: Dict[str, int] = {}
+        self.rounds = 0
+        self.rounds_saved = 0
+        self.stop_reason: Optional[str] = None
+        self._start = time.perf_counter()
+        self.total_seconds = 0.0
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time a phase, nested under the currently open span.
+
+        Args:
+            name (str): Phase name.
+            **attributes: Labels attached to the span.
+
+        Yields:
+            Span: The open span; more attributes may be added to it.
+        """
+        parent = _current_span.get()
+        span = Span(name, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+            self.spans.append(span)
+
+    def record_tokens(self, role: str, prompt: int = 0, completion: int = 0) -> None:
+        """Add token usage of one model call.
+
+        Args:
+            role (str): ``"clarifier"``, ``"user"``, ``"assistant"``, or
+                ``"draft_wasted"`` for pipelined drafts that were not used.
+            prompt (int, optional): Prompt tokens. (default: :obj:`0`)
+            completion (int, optional): Completion tokens. (default: :obj:`0`)
+        """
+        counts = self.tokens.setdefault(role, {"prompt": 0, "completion": 0, "calls": 0})
+        counts["prompt"] += prompt
+        counts["completion"] += completion
+        counts["calls"] += 1
+
+    def record_tool_call(self, tool_name: str, failed: bool = False) -> None:
+        """Count one tool call.
+
+        Args:
+            tool_name (str): Name of the tool.
+            failed (bool, optional): Whether the call failed.
+                (default: :obj:`False`)
+        """
+        counts = self.tool_calls.setdefault(tool_name, {"ok": 0, "error": 0})
+        counts["error" if failed else "ok"] += 1
+
+    def record_compaction(self, role: str, before: int, after: int) -> None:
+        """Add one memory compaction.
+
+        Args:
+            role (str): Role of the agent whose memory was compacted.
+            before (int): Context tokens before compaction.
+            after (int): Context tokens after compaction.
+        """
+        counts = self.compaction.setdefault(
+            role, {"runs": 0, "tokens_before": 0, "tokens_after": 0}
+        )
+        counts["runs"] += 1
+        counts["tokens_before"] += before
+        counts["tokens_after"] += after
+
+    def record_prefetch(self, event: str) -> None:
+        """Count one speculative prefetch event.
+
+        Args:
+            event (str): ``"issued"``, ``"used"``, ``"hits"``, ``"misses"``
+                or ``"errors"``.
+        """
+        self.prefetch[event] = self.prefetch.get(event, 0) + 1
+
+    def prefetch_summary(self) -> Dict[str, Any]:
+        """Return prefetch counts with derived waste and hit rate.
+
+        Returns:
+            Dict[str, Any]: The counts, ``wasted`` prefetches (issued but
+                never used) and the ``hit_rate`` of details calls; empty if
+                nothing was prefetched.
+        """
+        if not self.prefetch:
+            return {}
+        counts = {
+            name: self.prefetch.get(name, 0)
+            for name in ("issued", "used", "hits", "misses", "errors")
+        }
+        counts["wasted"] = counts["issued"] - counts["used"]
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return counts
+
+    def record_pipeline(self, event: str) -> None:
+        """Count one speculative user-agent draft event.
+
+        Args:
+            event (str): ``"speculated"``, ``"cancelled"``, ``"accepted"``
+                or ``"rejected"``.
+        """
+        self.pipeline[event] = self.pipeline.get(event, 0) + 1
+
+    def pipeline_summary(self) -> Dict[str, Any]:
+        """Return pipelined-round counts with the draft acceptance rate.
+
+        Returns:
+            Dict[str, Any]: The counts, the ``wasted`` drafts that were not
+                accepted and the ``acceptance_rate`` of drafts that reached a
+                decision; empty if nothing was drafted.
+        """
+        if not self.pipeline:
+            return {}
+        counts = {
+            name: self.pipeline.get(name, 0)
+            for name in ("speculated", "cancelled", "accepted", "rejected")
+        }
+        counts["wasted"] = counts["speculated"] - counts["accepted"]
+        decided = counts["accepted"] + counts["rejected"]
+        counts["acceptance_rate"] = (
+            round(counts["accepted"] / decided, 4) if decided else 0.0
+        )
+        return counts
+
+    def record_model_call(self, role: str, tier: str) -> None:
+        """Count one routed model call.
+
+        Args:
+            role (str): The calling role.
+            tier (str): The model tier that served it.
+        """
+        counts = self.model_calls.setdefault(role, {})
+        counts[tier] = counts.get(tier, 0) + 1
+
+    def record_escalation(self, role: str, reason: str) -> None:
+        """Count one escalation of a routed model call to a stronger tier.
+
+        Args:
+            role (str): The calling role.
+            reason (str): ``"malformed"``, ``"truncated"``, ``"tool_error"``
+                or ``"error"``.
+        """
+        counts = self.escalations.setdefault(role, {})
+        counts[reason] = counts.get(reason, 0) + 1
+
+    def record_hedging(self, event: str) -> None:
+        """Count one hedging or failover event of a model call.
+
+        Args:
+            event (str): ``"hedged"``, ``"hedge_won"``, ``"failover"`` or
+                ``"unavailable"``.
+        """
+        self.hedging[event] = self.hedging.get(event, 0) + 1
+
+    def record_tool_queue(self, event: str, waited: float = 0.0) -> None:
+        """Count one event of the process-wide tool-call scheduler.
+
+        Args:
+            event (str): ``"scheduled"``, ``"retried"`` or ``"throttled"``.
+            waited (float, optional): Seconds the call waited for its turn.
+                (default: :obj:`0.0`)
+        """
+        self.tool_queue[event] = self.tool_queue.get(event, 0) + 1
+        self.tool_queue_seconds += waited
+
+    def record_tool_coalescing(self, event: str) -> None:
+        """Count one tool call seen by the single-flight coalescer.
+
+        Args:
+            event (str): ``"upstream"`` if the call was sent, or
+                ``"coalesced"`` if it awaited an identical call in flight.
+        """
+        self.coalescing[event] = self.coalescing.get(event, 0) + 1
+
+    def record_early_stop(self, reason: str, rounds_saved: int) -> None:
+        """Record that a convergence detector ended the conversation.
+
+        Args:
+            reason (str): The detector's reason.
+            rounds_saved (int): Rounds left unused before the turn limit.
+        """
+        self.stop_reason = reason
+        self.rounds_saved = max(0, rounds_saved)
+
+    def finish(self) -> None:
+        """Record the total wall time of the query."""
+        self.total_seconds = time.perf_counter() - self._start
+
+    def phase_totals(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate span durations by phase name.
+
+        Returns:
+            Dict[str, Dict[str, float]]: ``count``, ``seconds`` and ``max``
+                per phase.
+        """
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, {"count": 0, "seconds": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += span.duration
+            entry["max"] = max(entry["max"], span.duration)
+        return totals
+
+    def summary(self) -> dict:
+        """Return a JSON-serializable overview of the query.
+
+        Returns:
+            dict: Total time, rounds (and rounds saved by early
+                convergence), per-phase timings, tokens per role,
+                tool-call counts, memory compactions per role,
+                speculative prefetch counts, pipelined-round counts, the
+                answer cache outcome (``"hit"``, ``"fuzzy_hit"``, ``"miss"``
+                or :obj:`None` without a cache), routed model calls per
+                role and tier with their escalations, and hedged or failed
+                over model calls.
+        """
+        prompt = sum(t["prompt"] for t in self.tokens.values())
+        completion = sum(t["completion"] for t in self.tokens.values())
+        return {
+            "query_id": self.query_id,
+            "total_seconds": round(self.total_seconds, 4),
+            "rounds": self.rounds,
+            "rounds_saved": self.rounds_saved,
+            "stop_reason": self.stop_reason,
+            "phases": {
+                name: {k: round(v, 4) for k, v in entry.items()}
+                for name, entry in self.phase_totals().items()
+            },
+            "tokens": {
+                "prompt": prompt,
+                "completion": completion,
+                "by_role": {role: dict(t) for role, t in self.tokens.items()},
+            },
+            "tool_calls": {name: dict(c) for name, c in self.tool_calls.items()},
+            "memory_compaction": {role: dict(c) for role, c in self.compaction.items()},
+            "prefetch": self.prefetch_summary(),
+            "pipeline": self.pipeline_summary(),
+            "answer_cache": self.answer_cache,
+            "model_routing": {
+                "calls": {role: dict(c) for role, c in self.model_calls.items()},
+                "escalations": {
+                    role: dict(c) for role, c in self.escalations.items()
+                },
+            }
+            if self.model_calls
+            else {},
+            "hedging": dict(self.hedging),
+            "tool_queue": {
+                **self.tool_queue,
+                "waited_seconds": round(self.tool_queue_seconds, 4),
+            }
+            if self.tool_queue
+            else {},
+            "tool_coalescing": dict(self.coalescing),
+        }
+
+    def to_prometheus(self, prefix: str = "restaurant") -> str:
+        """Render this query's measurements in Prometheus text format.
+
+        Args:
+            prefix (str, optional): Metric name prefix.
+                (default: :obj:`"restaurant"`)
+
+        Returns:
+            str: The exposition text.
+        """
+        registry = MetricsRegistry()
+        registry.observe(self)
+        return registry.to_prometheus(prefix)
+
+    def to_otel_spans(self) -> List[dict]:
+        """Export spans in the OpenTelemetry (OTLP JSON) span layout.
+
+        Returns:
+            List[dict]: One dict per span with ``traceId``, ``spanId``,
+                ``parentSpanId``, ``name``, start/end times in nanoseconds,
+                ``attributes`` and ``status``.
+        """
+        spans = []
+        for span in self.spans:
+            start_ns = int(span.start_time * 1e9)
+            attributes = [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in span.attributes.items()
+            ]
+            if self.query_id is not None:
+                attributes.append(
+                    {"key": "query.id", "value": {"stringValue": str(self.query_id)}}
+                )
+            spans.append(
+                {
+                    "traceId": self.trace_id,
+                    "spanId": f"{span.span_id:016x}",
+                    "parentSpanId": f"{span.parent_id:016x}" if span.parent_id else "",
+                    "name": span.name,
+                    "startTimeUnixNano": start_ns,
+                    "endTimeUnixNano": start_ns + int(span.duration * 1e9),
+                    "attributes": attributes,
+                    "status": {"code": 2, "message": span.error}
+                    if span.error
+                    else {"code": 1},
+                }
+            )
+        return spans
+
+    def export_to_opentelemetry(self, tracer: Any = None) -> None:
+        """Replay the recorded spans through an OpenTelemetry tracer.
+
+        Requires the optional ``opentelemetry-api`` package.
+
+        Args:
+            tracer (Any, optional): A tracer; defaults to one from the global
+                tracer provider. (default: :obj:`None`)
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                "export_to_opentelemetry requires the 'opentelemetry-api' package"
+            ) from e
+
+        tracer = tracer or trace.get_tracer("restaurant_deep_research")
+        otel_spans: Dict[int, Any] = {}
+        for span in sorted(self.spans, key=lambda s: s.start_time):
+            parent = otel_spans.get(span.parent_id)
+            context = trace.set_span_in_context(parent) if parent else None
+            otel_span = tracer.start_span(
+                span.name,
+                context=context,
+                attributes={k: str(v) for k, v in span.attributes.items()},
+                start_time=int(span.start_time * 1e9),
+            )
+            if span.error:
+                otel_span.set_status(trace.Status(trace.StatusCode.ERROR, span.error))
+            otel_spans[span.span_id] = otel_span
+        for span in self.spans:
+            otel_spans[span.span_id].end(
+                end_time=int((span.start_time + span.duration) * 1e9)
+            )
+
+
+class MetricsRegistry:
+    """Process-wide aggregation of :class:`QueryMetrics`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.rounds = 0
+        self.rounds_saved = 0
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.tool_calls: Dict[str, Dict[str, int]] = {}
+        self.compaction_tokens_saved: Dict[str, int] = {}
+        self.prefetch: Dict[str, int] = {}
+        self.pipeline: Dict[str, int] = {}
+        self.answer_cache: Dict[str, int] = {}
+        self.model_calls: Dict[str, Dict[str, int]] = {}
+        self.escalations: Dict[str, Dict[str, int]] = {}
+        self.hedging: Dict[str, int] = {}
+        self.tool_queue: Dict[str, int] = {}
+        self.tool_queue_seconds = 0.0
+        self.coalescing: Dict[str, int] = {}
+
+    def observe(self, metrics: QueryMetrics) -> None:
+        """Add one finished query to the totals.
+
+        Args:
+            metrics (QueryMetrics): The query's measurements.
+        """
+        with self._lock:
+            self.queries += 1
+            self.query_seconds += metrics.total_seconds
+            self.rounds += metrics.rounds
+            self.rounds_saved += metrics.rounds_saved
+            for name, entry in metrics.phase_totals().items():
+                total = self.phases.setdefault(name, {"count": 0, "seconds": 0.0})
+                total["count"] += entry["count"]
+                total["seconds"] += entry["seconds"]
+            for role, counts in metrics.tokens.items():
+                total = self.tokens.setdefault(role, {"prompt": 0, "completion": 0})
+                total["prompt"] += counts["prompt"]
+                total["completion"] += counts["completion"]
+            for tool, counts in metrics.tool_calls.items():
+                total = self.tool_calls.setdefault(tool, {"ok": 0, "error": 0})
+                total["ok"] += counts["ok"]
+                total["error"] += counts["error"]
+            for role, counts in metrics.compaction.items():
+                self.compaction_tokens_saved[role] = self.compaction_tokens_saved.get(
+                    role, 0
+                ) + (counts["tokens_before"] - counts["tokens_after"])
+            for event, count in metrics.prefetch_summary().items():
+                if event != "hit_rate":
+                    self.prefetch[event] = self.prefetch.get(event, 0) + count
+            for event, count in metrics.pipeline.items():
+                self.pipeline[event] = self.pipeline.get(event, 0) + count
+            if metrics.answer_cache is not None:
+                self.answer_cache[metrics.answer_cache] = (
+                    self.answer_cache.get(metrics.answer_cache, 0) + 1
+                )
+            for totals, counts_by_role in (
+                (self.model_calls, metrics.model_calls),
+                (self.escalations, metrics.escalations),
+            ):
+                for role, counts in counts_by_role.items():
+                    total = totals.setdefault(role, {})
+                    for name, count in counts.items():
+                        total[name] = total.get(name, 0) + count
+            for event, count in metrics.hedging.items():
+                self.hedging[event] = self.hedging.get(event, 0) + count
+            for event, count in metrics.tool_queue.items():
+                self.tool_queue[event] = self.tool_queue.get(event, 0) + count
+            self.tool_queue_seconds += metrics.tool_queue_seconds
+            for event, count in metrics.coalescing.items():
+                self.coalescing[event] = self.coalescing.get(event, 0) + count
+
+    def to_prometheus(self, prefix: str = "restaurant") -> str:
+        """Render the totals in Prometheus text format.
+
+        Args:
+            prefix (str, optional): Metric name prefix.
+                (default: :obj:`"restaurant"`)
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_queries_total Queries processed.",
+                f"# TYPE {prefix}_queries_total counter",
+                f"{prefix}_queries_total {self.queries}",
+                f"# HELP {prefix}_query_seconds Wall time per query.",
+                f"# TYPE {prefix}_query_seconds summary",
+                f"{prefix}_query_seconds_sum {self.query_seconds:.6f}",
+                f"{prefix}_query_seconds_count {self.queries}",
+                f"# HELP {prefix}_rounds_total Conversation rounds run.",
+                f"# TYPE {prefix}_rounds_total counter",
+                f"{prefix}_rounds_total {self.rounds}",
+                f"# HELP {prefix}_rounds_saved_total Rounds skipped by early convergence.",
+                f"# TYPE {prefix}_rounds_saved_total counter",
+                f"{prefix}_rounds_saved_total {self.rounds_saved}",
+                f"# HELP {prefix}_phase_seconds Wall time per query phase.",
+                f"# TYPE {prefix}_phase_seconds summary",
+            ]
+            for name, entry in sorted(self.phases.items()):
+                lines.append(f'{prefix}_phase_seconds_sum{{phase="{name}"}} {entry["seconds"]:.6f}')
+                lines.append(f'{prefix}_phase_seconds_count{{phase="{name}"}} {entry["count"]}')
+            lines += [
+                f"# HELP {prefix}_tokens_total Model tokens by role and kind.",
+                f"# TYPE {prefix}_tokens_total counter",
+            ]
+            for role, counts in sorted(self.tokens.items()):
+                for kind in ("prompt", "completion"):
+                    lines.append(
+                        f'{prefix}_tokens_total{{role="{role}",kind="{kind}"}} {counts[kind]}'
+                    )
+            lines += [
+                f"# HELP {prefix}_tool_calls_total Tool calls by tool and status.",
+                f"# TYPE {prefix}_tool_calls_total counter",
+            ]
+            for tool, counts in sorted(self.tool_calls.items()):
+                for status in ("ok", "error"):
+                    lines.append(
+                        f'{prefix}_tool_calls_total{{tool="{tool}",status="{status}"}} {counts[status]}'
+                    )
+            lines += [
+                f"# HELP {prefix}_compaction_tokens_saved_total Context tokens removed by memory compaction.",
+                f"# TYPE {prefix}_compaction_tokens_saved_total counter",
+            ]
+            for role, saved in sorted(self.compaction_tokens_saved.items()):
+                lines.append(
+                    f'{prefix}_compaction_tokens_saved_total{{role="{role}"}} {saved}'
+                )
+            lines += [
+                f"# HELP {prefix}_prefetch_total Speculative place-details prefetches by outcome.",
+                f"# TYPE {prefix}_prefetch_total counter",
+            ]
+            for event, count in sorted(self.prefetch.items()):
+                lines.append(f'{prefix}_prefetch_total{{event="{event}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_pipeline_drafts_total Speculative user-agent drafts by outcome.",
+                f"# TYPE {prefix}_pipeline_drafts_total counter",
+            ]
+            for event, count in sorted(self.pipeline.items()):
+                lines.append(f'{prefix}_pipeline_drafts_total{{event="{event}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_answer_cache_lookups_total Final-answer cache lookups by result.",
+                f"# TYPE {prefix}_answer_cache_lookups_total counter",
+            ]
+            for result, count in sorted(self.answer_cache.items()):
+                lines.append(
+                    f'{prefix}_answer_cache_lookups_total{{result="{result}"}} {count}'
+                )
+            lines += [
+                f"# HELP {prefix}_model_calls_total Routed model calls by role and tier.",
+                f"# TYPE {prefix}_model_calls_total counter",
+            ]
+            for role, counts in sorted(self.model_calls.items()):
+                for tier, count in sorted(counts.items()):
+                    lines.append(
+                        f'{prefix}_model_calls_total{{role="{role}",tier="{tier}"}} {count}'
+                    )
+            lines += [
+                f"# HELP {prefix}_model_escalations_total Routed model calls moved to a stronger tier.",
+                f"# TYPE {prefix}_model_escalations_total counter",
+            ]
+            for role, counts in sorted(self.escalations.items()):
+                for reason, count in sorted(counts.items()):
+                    lines.append(
+                        f'{prefix}_model_escalations_total{{role="{role}",reason="{reason}"}} {count}'
+                    )
+            lines += [
+                f"# HELP {prefix}_model_hedging_total Hedged and failed-over model calls by event.",
+                f"# TYPE {prefix}_model_hedging_total counter",
+            ]
+            for event, count in sorted(self.hedging.items()):
+                lines.append(f'{prefix}_model_hedging_total{{event="{event}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_tool_queue_events_total Scheduled, retried and throttled tool calls.",
+                f"# TYPE {prefix}_tool_queue_events_total counter",
+            ]
+            for event, count in sorted(self.tool_queue.items()):
+                lines.append(f'{prefix}_tool_queue_events_total{{event="{event}"}} {count}')
+            lines += [
+                f"# HELP {prefix}_tool_queue_wait_seconds_total Time tool calls waited for the scheduler.",
+                f"# TYPE {prefix}_tool_queue_wait_seconds_total counter",
+                f"{prefix}_tool_queue_wait_seconds_total {self.tool_queue_seconds:.6f}",
+                f"# HELP {prefix}_tool_coalescing_total Tool calls sent upstream or coalesced with an identical call.",
+                f"# TYPE {prefix}_tool_coalescing_total counter",
+            ]
+            for event, count in sorted(self.coalescing.items()):
+                lines.append(f'{prefix}_tool_coalescing_total{{event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+default_registry = MetricsRegistry()
+
+
+def current_metrics() -> Optional[QueryMetrics]:
+    """Return the metrics of the query running in this context, if any."""
+    return _current_metrics.get()
+
+
+@contextlib.contextmanager
+def metrics_scope(metrics: QueryMetrics) -> Iterator[QueryMetrics]:
+    """Make ``metrics`` the active measurements for the enclosed code.
+
+    Tasks created inside the block inherit it.
+
+    Args:
+        metrics (QueryMetrics): The object to record into.
+
+    Yields:
+        QueryMetrics: The same object.
+    """
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextlib.contextmanager
+def phase(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a phase of the active query; a no-op outside :func:`metrics_scope`.
+
+    Args:
+        name (str): Phase name.
+        **attributes: Labels attached to the span.
+
+    Yields:
+        Span, optional: The open span, or :obj:`None` when not measuring.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield None
+        return
+    with metrics.span(name, **attributes) as span:
+        yield span
+
+
+def current_phase() -> Optional[str]:
+    """Return the name of the innermost open phase, if any."""
+    span = _current_span.get()
+    return span.name if span is not None else None
+
+
+def record_tokens(role: str, usage: Optional[Dict[str, Any]]) -> None:
+    """Record a model call's usage dict for the active query, if any.
+
+    Args:
+        role (str): Role of the agent that made the call.
+        usage (Dict[str, Any], optional): OpenAI-style usage with
+            ``prompt_tokens`` and ``completion_tokens``.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None or not usage:
+        return
+    metrics.record_tokens(
+        role,
+        prompt=usage.get("prompt_tokens", 0) or 0,
+        completion=usage.get("completion_tokens", 0) or 0,
+    )
+
+
+def record_compaction(role: str, before: int, after: int) -> None:
+    """Record a memory compaction for the active query, if any.
+
+    Args:
+        role (str): Role of the agent whose memory was compacted.
+        before (int): Context tokens before compaction.
+        after (int): Context tokens after compaction.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_compaction(role, before, after)
+
+
+def record_prefetch(event: str) -> None:
+    """Count a speculative prefetch event for the active query, if any.
+
+    Args:
+        event (str): See :meth:`QueryMetrics.record_prefetch`.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_prefetch(event)
+
+
+def record_pipeline(event: str) -> None:
+    """Count a pipelined-round event for the active query, if any.
+
+    Args:
+        event (str): See :meth:`QueryMetrics.record_pipeline`.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_pipeline(event)
+
+
+def record_model_call(role: str, tier: str) -> None:
+    """Count a routed model call for the active query, if any.
+
+    Args:
+        role (str): The calling role.
+        tier (str): The model tier that served it.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_model_call(role, tier)
+
+
+def record_escalation(role: str, reason: str) -> None:
+    """Count a model-tier escalation for the active query, if any.
+
+    Args:
+        role (str): The calling role.
+        reason (str): See :meth:`QueryMetrics.record_escalation`.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_escalation(role, reason)
+
+
+def record_hedging(event: str) -> None:
+    """Count a hedging or failover event for the active query, if any.
+
+    Args:
+        event (str): See :meth:`QueryMetrics.record_hedging`.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_hedging(event)
+
+
+def record_tool_queue(event: str, waited: float = 0.0) -> None:
+    """Count a tool-call scheduler event for the active query, if any.
+
+    Args:
+        event (str): See :meth:`QueryMetrics.record_tool_queue`.
+        waited (float, optional): Seconds the call waited for its turn.
+            (default: :obj:`0.0`)
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_tool_queue(event, waited)
+
+
+def record_tool_coalescing(event: str) -> None:
+    """Count a single-flight coalescing event for the active query, if any.
+
+    Args:
+        event (str): See :meth:`QueryMetrics.record_tool_coalescing`.
+    """
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_tool_coalescing(event)
+
+
+async def _measure_tool_call(
+    tool_name: str, kwargs: Dict[str, Any], call_original: ToolCall
+) -> Any:
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return await call_original(**kwargs)
+    failed = True
+    try:
+        with metrics.span("tool_call", tool=tool_name):
+            result = await call_original(**kwargs)
+        failed = looks_like_tool_error(result)
+        return result
+    finally:
+        metrics.record_tool_call(tool_name, failed)
+
+
+def measure_tool_calls(tools: List["FunctionTool"]) -> List["FunctionTool"]:
+    """Wrap tools so that every call is timed and counted.
+
+    Args:
+        tools (List[FunctionTool]): The tools to wrap.
+
+    Returns:
+        List[FunctionTool]: Tools with identical names and schemas.
+    """
+    return [wrap_tool(tool, _measure_tool_call) for tool in tools]
@@ -0,0 +1,34 @@
+"""Model-backend functionality for the restaurant finder.
+
+This module provides wrappers around CAMEL model backends that add behavior,
+such as token streaming, routing each role to a model tier or hedging across
+providers, without changing how agents use them.
+"""
+
+from restaurant_deep_research.models.base import ForwardingModelBackend
+from restaurant_deep_research.models.hedging import (
+    AdaptiveConcurrencyLimit,
+    CircuitBreaker,
+    HedgedModelBackend,
+    ProvidersUnavailable,
+    hedge_models,
+)
+from restaurant_deep_research.models.routing import (
+    DEFAULT_ROUTES,
+    ModelRouter,
+    RoutedModelBackend,
+)
+from restaurant_deep_research.models.streaming import TokenStreamBackend
+
+__all__ = [
+    "ForwardingModelBackend",
+    "AdaptiveConcurrencyLimit",
+    "CircuitBreaker",
+    "HedgedModelBackend",
+    "ProvidersUnavailable",
+    "hedge_models",
+    "DEFAULT_ROUTES",
+    "ModelRouter",
+    "RoutedModelBackend",
+    "TokenStreamBackend",
+]
@@ -0,0 +1,66 @@
+"""
+Model backends that wrap other model backends.
+
+CAMEL agents accept any ``BaseModelBackend``. :class:`ForwardingModelBackend`
+delegates every call to an inner backend, so features such as token
+streaming can be layered on top of the backends built by ``ModelFactory``
+without the agents noticing.
+"""
+
+from typing import Any, Dict, List, Optional, Type
+
+from camel.messages import OpenAIMessage
+from camel.models import BaseModelBackend
+from camel.utils import BaseTokenCounter
+from pydantic import BaseModel
+
+
+class ForwardingModelBackend(BaseModelBackend):
+    """A backend that forwards every request to ``inner``.
+
+    Subclasses override :meth:`_run` and :meth:`_arun` to add behavior around
+    the forwarded call.
+
+    Args:
+        inner (BaseModelBackend): The backend to delegate to.
+    """
+
+    def __init__(self, inner: BaseModelBackend):
+        self.inner = inner
+        super().__init__(
+            model_type=inner.model_type,
+            model_config_dict=inner.model_config_dict,
+        )
+
+    @property
+    def token_counter(self) -> BaseTokenCounter:
+        return self.inner.token_counter
+
+    @property
+    def token_limit(self) -> int:
+        return self.inner.token_limit
+
+    @property
+    def stream(self) -> bool:
+        return self.inner.stream
+
+    def check_model_config(self) -> None:
+        # The inner backend validated its own configuration.
+        pass
+
+    def _run(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Any:
+        return self.inner.run(messages, response_format, tools)
+
+    async def _arun(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Any:
+        return await self.inner.arun(messages, response_format, tools)
+
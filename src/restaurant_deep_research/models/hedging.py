@@ -0,0 +1,488 @@
+"""
+Hedged requests and failover across model providers.
+
+The role-playing loop is sequential, so one slow or rate-limited model
+response stalls the whole conversation. :class:`HedgedModelBackend` spreads a
+role's calls over several equivalent backends (providers, API keys or
+regions):
+
+* **Hedging**: when the first attempt has not answered within the
+  provider's recent p95 latency, a duplicate request goes to the next
+  provider and whichever answers first wins; the other is cancelled.
+* **Failover**: a failed attempt immediately moves on to the next provider.
+* **Circuit breakers**: a provider that keeps failing is skipped until a
+  cool-down has passed, then probed with a single request.
+* **Adaptive concurrency**: each provider's concurrency limit grows while
+  calls succeed and halves on rate limits and timeouts (AIMD), so a
+  throttled provider is not flooded while others take over.
+
+Everything runs against any ``BaseModelBackend``, so the policies can be
+exercised offline with :class:`~restaurant_deep_research.replay.StubModelBackend`.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from camel.logger import get_logger
+from camel.models import BaseModelBackend
+
+from restaurant_deep_research.metrics import record_hedging
+from restaurant_deep_research.models.base import ForwardingModelBackend
+
+logger = get_logger(__name__)
+
+# Exception class names that signal throttling rather than a broken provider.
+_RATE_LIMIT_ERROR_NAMES = {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+
+
+class ProvidersUnavailable(RuntimeError):
+    """Raised when every provider's circuit breaker is open."""
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether ``error`` reports throttling (HTTP 429 or a rate-limit class).
+
+    Args:
+        error (BaseException): The exception raised by a backend.
+
+    Returns:
+        bool: :obj:`True` for rate-limit errors.
+    """
+    return (
+        type(error).__name__ in _RATE_LIMIT_ERROR_NAMES
+        or getattr(error, "status_code", None) == 429
+    )
+
+
+class CircuitBreaker:
+    """Stop sending requests to a provider that keeps failing.
+
+    The breaker opens after ``failure_threshold`` consecutive failures. Once
+    ``reset_timeout`` seconds have passed it lets a single probe through
+    (half-open); the probe's outcome closes or re-opens it.
+
+    Args:
+        failure_threshold (int, optional): Consecutive failures that open the
+            breaker. (default: :obj:`5`)
+        reset_timeout (float, optional): Seconds before an open breaker lets
+            a probe through. (default: :obj:`30.0`)
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """``"closed"``, ``"open"`` or ``"half_open"``."""
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the half-open probe."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker at the threshold."""
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self._opened_at is None or self._probing:
+                self.opened += 1
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """Give up a claimed probe without an outcome, e.g. when cancelled."""
+        self._probing = False
+
+
+class AdaptiveConcurrencyLimit:
+    """Additive-increase, multiplicative-decrease limit on calls in flight.
+
+    Each success raises the limit by ``1 / limit`` (one slot per full window
+    of successes); each rate limit or timeout halves it.
+
+    Args:
+        initial (int, optional): Starting limit. (default: :obj:`8`)
+        min_limit (int, optional): Lowest limit. (default: :obj:`1`)
+        max_limit (int, optional): Highest limit. (default: :obj:`64`)
+        backoff (float, optional): Factor applied on throttling.
+            (default: :obj:`0.5`)
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+    ):
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("expected 1 <= min_limit <= initial <= max_limit")
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.in_flight = 0
+        self._released: Optional[asyncio.Condition] = None
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot, waiting while the limit is reached."""
+        if self._released is None:
+            self._released = asyncio.Condition()
+        async with self._released:
+            await self._released.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._released:
+                self.in_flight -= 1
+                self._released.notify_all()
+
+    def record_success(self) -> None:
+        """Grow the limit additively."""
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def record_throttled(self) -> None:
+        """Shrink the limit multiplicatively."""
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+
+
+class _Provider:
+    __slots__ = (
+        "name",
+        "backend",
+        "breaker",
+        "concurrency",
+        "latencies",
+        "counts",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        backend: BaseModelBackend,
+        breaker: CircuitBreaker,
+        concurrency: AdaptiveConcurrencyLimit,
+        window: int,
+    ):
+        self.name = name
+        self.backend = backend
+        self.breaker = breaker
+        self.concurrency = concurrency
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.counts = dict.fromkeys(
+            ("calls", "successes", "failures", "throttled", "hedges", "wins", "cancelled"),
+            0,
+        )
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HedgedModelBackend(ForwardingModelBackend):
+    """A backend that hedges and fails over across equivalent backends.
+
+    Providers are tried in the given order, skipping those whose circuit
+    breaker is open. Attempt ``i`` goes to the ``i``-th available provider,
+    wrapping around, so with a single provider hedges are duplicate requests
+    to it. Token counting and limits come from the first provider.
+
+    Synchronous calls (``run``) fail over but never hedge.
+
+    Args:
+        providers (Union[Sequence[BaseModelBackend], Dict[str, BaseModelBackend]]):
+            Equivalent backends in order of preference, optionally named.
+        hedge (bool, optional): Send a duplicate request when the first is
+            slow. (default: :obj:`True`)
+        hedge_quantile (float, optional): Latency quantile of the serving
+            provider after which a hedge is sent. (default: :obj:`0.95`)
+        hedge_delay (float, optional): Hedge delay in seconds until
+            ``min_samples`` latencies are known. (default: :obj:`10.0`)
+        min_hedge_delay (float, optional): Lower bound of the hedge delay.
+            (default: :obj:`0.1`)
+        min_samples (int, optional): Latencies needed before the quantile is
+            used. (default: :obj:`20`)
+        max_attempts (int, optional): Attempts per call, counting hedges and
+            failovers. Defaults to the number of providers, at least two.
+        attempt_timeout (float, optional): Seconds after which an attempt is
+            abandoned and counted as a failure, or :obj:`None`.
+            (default: :obj:`None`)
+        failure_threshold (int, optional): Consecutive failures that open a
+            provider's circuit breaker. (default: :obj:`5`)
+        reset_timeout (float, optional): Seconds before an open breaker is
+            probed. (default: :obj:`30.0`)
+        initial_concurrency (int, optional): Starting concurrency limit per
+            provider. (default: :obj:`8`)
+        max_concurrency (int, optional): Highest concurrency limit per
+            provider. (default: :obj:`64`)
+        latency_window (int, optional): Recent latencies kept per provider.
+            (default: :obj:`200`)
+    """
+
+    def __init__(
+        self,
+        providers: Union[Sequence[BaseModelBackend], Dict[str, BaseModelBackend]],
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        hedge_delay: float = 10.0,
+        min_hedge_delay: float = 0.1,
+        min_samples: int = 20,
+        max_attempts: Optional[int] = None,
+        attempt_timeout: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        initial_concurrency: int = 8,
+        max_concurrency: int = 64,
+        latency_window: int = 200,
+    ):
+        named = (
+            dict(providers)
+            if isinstance(providers, dict)
+            else {f"{backend.model_type}#{i}": backend for i, backend in enumerate(providers)}
+        )
+        if not named:
+            raise ValueError("at least one provider is required")
+        super().__init__(next(iter(named.values())))
+        self.providers = [
+            _Provider(
+                name,
+                backend,
+                CircuitBreaker(failure_threshold, reset_timeout),
+                AdaptiveConcurrencyLimit(
+                    min(initial_concurrency, max_concurrency), max_limit=max_concurrency
+                ),
+                latency_window,
+            )
+            for name, backend in named.items()
+        ]
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.max_attempts = max_attempts or max(2, len(self.providers))
+        self.attempt_timeout = attempt_timeout
+
+    def _available(self) -> List[_Provider]:
+        available = [p for p in self.providers if p.breaker.state != "open"]
+        if not available:
+            record_hedging("unavailable")
+            raise ProvidersUnavailable(
+                f"all {len(self.providers)} model providers have open circuit breakers"
+            )
+        return available
+
+    def _claim(self, available: List[_Provider], attempt: int) -> Optional[_Provider]:
+        """Pick the provider of attempt ``attempt``, skipping open breakers."""
+        for offset in range(len(available)):
+            provider = available[(attempt + offset) % len(available)]
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    def _delay(self, provider: _Provider) -> float:
+        if len(provider.latencies) < self.min_samples:
+            return self.hedge_delay
+        return max(self.min_hedge_delay, provider.quantile(self.hedge_quantile))
+
+    def _succeeded(self, provider: _Provider, seconds: float) -> None:
+        provider.counts["successes"] += 1
+        provider.latencies.append(seconds)
+        provider.breaker.record_success()
+        provider.concurrency.record_success()
+
+    def _failed(self, provider: _Provider, error: BaseException) -> None:
+        provider.counts["failures"] += 1
+        provider.breaker.record_failure()
+        if is_rate_limit_error(error) or isinstance(error, asyncio.TimeoutError):
+            provider.counts["throttled"] += 1
+            provider.concurrency.record_throttled()
+        logger.debug(f"Model provider {provider.name} failed: {error!r}")
+
+    async def _attempt(
+        self, provider: _Provider, messages, response_format, tools
+    ) -> Any:
+        async with provider.concurrency.slot():
+            provider.counts["calls"] += 1
+            start = time.perf_counter()
+            try:
+                call = provider.backend.arun(messages, response_format, tools)
+                if self.attempt_timeout is not None:
+                    response = await asyncio.wait_for(call, self.attempt_timeout)
+                else:
+                    response = await call
+            except asyncio.CancelledError:
+                provider.counts["cancelled"] += 1
+                provider.breaker.release()
+                raise
+            except Exception as e:
+                self._failed(provider, e)
+                raise
+            self._succeeded(provider, time.perf_counter() - start)
+            return response
+
+    def _run(self, messages, response_format=None, tools=None) -> Any:
+        available = self._available()
+        error: Optional[BaseException] = None
+        for attempt in range(self.max_attempts):
+            provider = self._claim(available, attempt)
+            if provider is None:
+                break
+            if attempt:
+                record_hedging("failover")
+            provider.counts["calls"] += 1
+            start = time.perf_counter()
+            try:
+                response = provider.backend.run(messages, response_format, tools)
+            except Exception as e:
+                self._failed(provider, e)
+                error = e
+                continue
+            self._succeeded(provider, time.perf_counter() - start)
+            return response
+        if error is None:
+            raise ProvidersUnavailable("no model provider accepted the request")
+        raise error
+
+    async def _arun(self, messages, response_format=None, tools=None) -> Any:
+        started = time.perf_counter()
+        available = self._available()
+        attempts: Dict["asyncio.Future", _Provider] = {}
+        hedges: Set["asyncio.Future"] = set()
+
+        def launch(reason: Optional[str]) -> bool:
+            provider = self._claim(available, len(attempts))
+            if provider is None:
+                return False
+            if reason is not None:
+                if reason == "hedged":
+                    provider.counts["hedges"] += 1
+                record_hedging(reason)
+            task = asyncio.ensure_future(
+                self._attempt(provider, messages, response_format, tools)
+            )
+            attempts[task] = provider
+            if reason == "hedged":
+                hedges.add(task)
+            return True
+
+        if not launch(None):
+            raise ProvidersUnavailable("no model provider accepted the request")
+        first = next(iter(attempts))
+        pending = {first}
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not hedged and len(attempts) < self.max_attempts:
+                    delay = self._delay(attempts[first])
+                    timeout = max(0.0, delay - (time.perf_counter() - started))
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The first attempt is slower than usual: race a duplicate.
+                    hedged = True
+                    if launch("hedged"):
+                        pending = {t for t in attempts if not t.done()}
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        # Only a hedge makes a race; failovers run alone.
+                        if hedges:
+                            attempts[task].counts["wins"] += 1
+                            if task in hedges:
+                                record_hedging("hedge_won")
+                        return task.result()
+                    error = task.exception()
+                if len(attempts) < self.max_attempts and launch("failover"):
+                    pending = {t for t in attempts if not t.done()}
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        """Return per-provider counters, latency and protection state.
+
+        Returns:
+            dict: For each provider, calls, successes, failures, throttled
+                failures, hedges sent to it, races it won, attempts
+                cancelled after losing, p50/p95 latency, circuit breaker
+                state and the current concurrency limit.
+        """
+        return {
+            provider.name: {
+                **provider.counts,
+                "p50_seconds": round(provider.quantile(0.5) or 0.0, 4),
+                "p95_seconds": round(provider.quantile(0.95) or 0.0, 4),
+                "breaker": provider.breaker.state,
+                "breaker_opened": provider.breaker.opened,
+                "concurrency_limit": round(provider.concurrency.limit, 2),
+                "in_flight": provider.concurrency.in_flight,
+            }
+            for provider in self.providers
+        }
+
+
+def hedge_models(
+    models: Dict[str, BaseModelBackend],
+    fallbacks: Dict[str, Sequence[BaseModelBackend]],
+    **options: Any,
+) -> Dict[str, BaseModelBackend]:
+    """Wrap each role's backend with its fallbacks in a :class:`HedgedModelBackend`.
+
+    Args:
+        models (Dict[str, BaseModelBackend]): Primary backends keyed by role.
+        fallbacks (Dict[str, Sequence[BaseModelBackend]]): Equivalent
+            backends per role; roles without fallbacks hedge against their
+            primary backend.
+        **options: Arguments for :class:`HedgedModelBackend`.
+
+    Returns:
+        Dict[str, BaseModelBackend]: The hedged backends keyed by role.
+    """
+    return {
+        role: HedgedModelBackend([backend, *fallbacks.get(role, ())], **options)
+        for role, backend in models.items()
+    }
@@ -0,0 +1,456 @@
+"""
+Tiered model routing.
+
+The clarifier fills a fixed Markdown template and the user agent writes
+one-line instructions; only the assistant, which plans tool calls and writes
+the recommendations, needs the strongest model. :class:`ModelRouter` assigns
+a model tier to each role, optionally per phase (e.g. the user agent's
+speculative drafts), and escalates a call to the next stronger tier when the
+cheaper model's output is malformed or truncated, when the model is asked to
+recover from a failed tool call, or when the cheaper backend raises.
+
+Every call is timed and its tokens are counted per role and tier, so routes
+can be tuned from :meth:`ModelRouter.stats` and the query metrics.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from camel.logger import get_logger
+from camel.messages import OpenAIMessage
+from camel.models import BaseModelBackend
+from openai.types.chat import ChatCompletion
+
+from restaurant_deep_research.metrics import (
+    current_phase,
+    record_escalation,
+    record_model_call,
+)
+from restaurant_deep_research.models.base import ForwardingModelBackend
+from restaurant_deep_research.tools.wrapping import looks_like_tool_error
+
+logger = get_logger(__name__)
+
+# A validator returns the reason a response should be escalated, or None.
+Validator = Callable[
+    [ChatCompletion, List[OpenAIMessage], Optional[List[Dict[str, Any]]]],
+    Optional[str],
+]
+TierBackends = Union[BaseModelBackend, Mapping[str, BaseModelBackend]]
+
+# Routes keyed by role, or by ``"role/phase"`` for one phase of a role.
+DEFAULT_ROUTES: Dict[str, str] = {
+    "clarifier": "fast",
+    "user": "fast",
+    "assistant": "strong",
+}
+
+_CLARIFIER_LABELS = ("Cuisine", "Location", "Budget", "Timing")
+
+
+def _message(response: ChatCompletion) -> Any:
+    return response.choices[0].message if response.choices else None
+
+
+def check_clarifier_output(
+    response: ChatCompletion,
+    messages: List[OpenAIMessage],
+    tools: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[str]:
+    """Require the clarifier's Markdown template fields.
+
+    Returns:
+        str, optional: ``"malformed"`` if fewer than two of the Cuisine,
+            Location, Budget and Timing fields are present.
+    """
+    message = _message(response)
+    content = (message.content if message is not None else None) or ""
+    found = sum(
+        bool(
+            re.search(
+                rf"^[ \t]*[-*][ \t]*\**{label}", content, re.IGNORECASE | re.MULTILINE
+            )
+        )
+        for label in _CLARIFIER_LABELS
+    )
+    return None if found >= 2 else "malformed"
+
+
+def check_user_output(
+    response: ChatCompletion,
+    messages: List[OpenAIMessage],
+    tools: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[str]:
+    """Require an ``Instruction:`` or ``TASK_DONE`` from the user agent.
+
+    Returns:
+        str, optional: ``"malformed"`` if the reply has neither.
+    """
+    message = _message(response)
+    content = (message.content if message is not None else None) or ""
+    if "TASK_DONE" in content or "Instruction" in content:
+        return None
+    return "malformed"
+
+
+def check_assistant_output(
+    response: ChatCompletion,
+    messages: List[OpenAIMessage],
+    tools: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[str]:
+    """Require content or valid calls of offered tools from the assistant.
+
+    Returns:
+        str, optional: ``"malformed"`` if the reply is empty, calls a tool
+            that was not offered or passes arguments that are not a JSON
+            object.
+    """
+    message = _message(response)
+    if message is None:
+        return "malformed"
+    tool_calls = message.tool_calls or []
+    if not tool_calls:
+        return None if (message.content or "").strip() else "malformed"
+    offered = {
+        tool.get("function", {}).get("name") for tool in tools or [] if isinstance(tool, dict)
+    }
+    for call in tool_calls:
+        if offered and call.function.name not in offered:
+            return "malformed"
+        try:
+            arguments = json.loads(call.function.arguments or "{}")
+        except ValueError:
+            return "malformed"
+        if not isinstance(arguments, dict):
+            return "malformed"
+    return None
+
+
+DEFAULT_VALIDATORS: Dict[str, Validator] = {
+    "clarifier": check_clarifier_output,
+    "user": check_user_output,
+    "assistant": check_assistant_output,
+}
+
+
+def _failed_tool_result(messages: List[OpenAIMessage]) -> bool:
+    """Whether the latest messages are tool results including a failure."""
+    failed = False
+    for message in reversed(messages):
+        if message.get("role") != "tool":
+            break
+        failed = failed or looks_like_tool_error(message.get("content"))
+    return failed
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _TierStats:
+    __slots__ = (
+        "calls",
+        "errors",
+        "escalated",
+        "seconds",
+        "prompt_tokens",
+        "completion_tokens",
+        "latencies",
+    )
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.escalated = 0
+        self.seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def as_dict(self) -> dict:
+        latencies = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "escalated": self.escalated,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "mean_seconds": round(self.seconds / self.calls, 4) if self.calls else 0.0,
+            "p50_seconds": round(_percentile(latencies, 0.5), 4) if latencies else 0.0,
+            "p95_seconds": round(_percentile(latencies, 0.95), 4) if latencies else 0.0,
+        }
+
+
+class ModelRouter:
+    """Route each role's model calls to a tier and escalate when needed.
+
+    Tiers are ordered from cheapest to strongest; escalation moves a call to
+    the next tier, and the strongest tier's response is always accepted. A
+    call starts one tier above its route when it follows a failed tool call,
+    so the stronger model handles the recovery. Routing decisions depend only
+    on the call itself, so one router can serve concurrent queries.
+
+    Args:
+        tiers (Dict[str, Union[BaseModelBackend, Mapping[str, BaseModelBackend]]]):
+            Tier name to backend, cheapest first. A tier may map role names
+            to backends instead, e.g. to keep per-role temperatures.
+        routes (Dict[str, str], optional): Tier per role, or per
+            ``"role/phase"`` where the phase is the active
+            :func:`~restaurant_deep_research.metrics.phase` such as
+            ``"user_draft"``. Unrouted roles use the cheapest tier.
+            (default: :obj:`DEFAULT_ROUTES`)
+        validators (Dict[str, Validator], optional): Per-role checks of
+            non-streamed responses; a returned reason escalates the call.
+            (default: :obj:`DEFAULT_VALIDATORS`)
+        escalate_on_tool_error (bool, optional): Start calls that follow a
+            failed tool call one tier higher. (default: :obj:`True`)
+        escalate_on_error (bool, optional): Retry calls whose backend raised
+            on the next tier. (default: :obj:`True`)
+        latency_window (int, optional): Recent calls per role and tier kept
+            for latency percentiles. (default: :obj:`512`)
+    """
+
+    def __init__(
+        self,
+        tiers: Dict[str, TierBackends],
+        routes: Optional[Dict[str, str]] = None,
+        validators: Optional[Dict[str, Validator]] = None,
+        escalate_on_tool_error: bool = True,
+        escalate_on_error: bool = True,
+        latency_window: int = 512,
+    ):
+        if not tiers:
+            raise ValueError("at least one tier is required")
+        self.tiers = dict(tiers)
+        self.tier_names = list(self.tiers)
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        unknown = set(self.routes.values()) - set(self.tiers)
+        if unknown:
+            raise ValueError(f"routes use unknown tiers: {sorted(unknown)}")
+        self.validators = dict(DEFAULT_VALIDATORS if validators is None else validators)
+        self.escalate_on_tool_error = escalate_on_tool_error
+        self.escalate_on_error = escalate_on_error
+        self.latency_window = latency_window
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, _TierStats]] = {}
+        self._escalations: Dict[str, Dict[str, int]] = {}
+
+    def route(self, role: str, phase: Optional[str] = None) -> str:
+        """Return the tier a call of ``role`` starts on.
+
+        Args:
+            role (str): The calling role.
+            phase (str, optional): The active phase. (default: :obj:`None`)
+
+        Returns:
+            str: The tier name.
+        """
+        if phase is not None and f"{role}/{phase}" in self.routes:
+            return self.routes[f"{role}/{phase}"]
+        return self.routes.get(role, self.tier_names[0])
+
+    def backend(self, tier: str, role: str) -> BaseModelBackend:
+        """Return the backend of ``tier`` used for ``role``.
+
+        Raises:
+            KeyError: If a per-role tier has no backend for ``role``.
+        """
+        entry = self.tiers[tier]
+        return entry[role] if isinstance(entry, Mapping) else entry
+
+    def model(self, role: str) -> "RoutedModelBackend":
+        """Return a backend that routes ``role``'s calls through this router.
+
+        Args:
+            role (str): The role, e.g. ``"assistant"``.
+
+        Returns:
+            RoutedModelBackend: The routed backend.
+        """
+        return RoutedModelBackend(self, role)
+
+    def models(
+        self, roles: Sequence[str] = ("clarifier", "user", "assistant")
+    ) -> Dict[str, BaseModelBackend]:
+        """Return routed backends keyed by role, as :func:`create_models` does."""
+        return {role: self.model(role) for role in roles}
+
+    def _candidates(self, role: str, messages: List[OpenAIMessage]) -> List[str]:
+        start = self.tier_names.index(self.route(role, current_phase()))
+        if (
+            self.escalate_on_tool_error
+            and start < len(self.tier_names) - 1
+            and _failed_tool_result(messages)
+        ):
+            self._escalate(role, self.tier_names[start], "tool_error")
+            start += 1
+        return self.tier_names[start:]
+
+    def _check(
+        self,
+        role: str,
+        response: Any,
+        messages: List[OpenAIMessage],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> Optional[str]:
+        if not isinstance(response, ChatCompletion):
+            # Streams are consumed by the agent; they cannot be checked here.
+            return None
+        if response.choices and response.choices[0].finish_reason == "length":
+            return "truncated"
+        validator = self.validators.get(role)
+        return validator(response, messages, tools) if validator is not None else None
+
+    def _record(
+        self, role: str, tier: str, seconds: float, response: Any, failed: bool
+    ) -> None:
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            stats = self._stats.setdefault(role, {}).get(tier)
+            if stats is None:
+                stats = self._stats[role][tier] = _TierStats(self.latency_window)
+            stats.calls += 1
+            stats.errors += failed
+            stats.seconds += seconds
+            stats.latencies.append(seconds)
+            if usage is not None:
+                stats.prompt_tokens += usage.prompt_tokens or 0
+                stats.completion_tokens += usage.completion_tokens or 0
+        record_model_call(role, tier)
+
+    def _escalate(self, role: str, tier: str, reason: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(role, {}).get(tier)
+            if stats is None:
+                stats = self._stats[role][tier] = _TierStats(self.latency_window)
+            stats.escalated += 1
+            reasons = self._escalations.setdefault(role, {})
+            reasons[reason] = reasons.get(reason, 0) + 1
+        record_escalation(role, reason)
+        logger.debug(f"Escalating {role} call from tier {tier}: {reason}")
+
+    def call(
+        self,
+        role: str,
+        messages: List[OpenAIMessage],
+        response_format: Any = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Any:
+        """Run a model call of ``role``, escalating as needed.
+
+        Args:
+            role (str): The calling role.
+            messages (List[OpenAIMessage]): The prompt.
+            response_format (Any, optional): Structured output format.
+            tools (List[Dict[str, Any]], optional): Tool schemas offered.
+
+        Returns:
+            Any: The accepted response.
+        """
+        candidates = self._candidates(role, messages)
+        for i, tier in enumerate(candidates):
+            last = i == len(candidates) - 1
+            start = time.perf_counter()
+            try:
+                response = self.backend(tier, role).run(messages, response_format, tools)
+            except Exception:
+                self._record(role, tier, time.perf_counter() - start, None, True)
+                if last or not self.escalate_on_error:
+                    raise
+                self._escalate(role, tier, "error")
+                continue
+            self._record(role, tier, time.perf_counter() - start, response, False)
+            reason = None if last else self._check(role, response, messages, tools)
+            if reason is None:
+                return response
+            self._escalate(role, tier, reason)
+
+    async def acall(
+        self,
+        role: str,
+        messages: List[OpenAIMessage],
+        response_format: Any = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Any:
+        """Async counterpart of :meth:`call`."""
+        candidates = self._candidates(role, messages)
+        for i, tier in enumerate(candidates):
+            last = i == len(candidates) - 1
+            start = time.perf_counter()
+            try:
+                response = await self.backend(tier, role).arun(
+                    messages, response_format, tools
+                )
+            except Exception:
+                self._record(role, tier, time.perf_counter() - start, None, True)
+                if last or not self.escalate_on_error:
+                    raise
+                self._escalate(role, tier, "error")
+                continue
+            self._record(role, tier, time.perf_counter() - start, response, False)
+            reason = None if last else self._check(role, response, messages, tools)
+            if reason is None:
+                return response
+            self._escalate(role, tier, reason)
+
+    def stats(self) -> dict:
+        """Return per-role latency, token and escalation statistics.
+
+        Returns:
+            dict: For each role, the tier it is routed to, statistics per
+                tier (calls, errors, calls escalated away from the tier,
+                tokens, mean, p50 and p95 latency) and escalation counts
+                by reason (``"malformed"``, ``"truncated"``,
+                ``"tool_error"`` or ``"error"``).
+        """
+        with self._lock:
+            roles = set(self._stats) | {key for key in self.routes if "/" not in key}
+            return {
+                role: {
+                    "route": self.route(role),
+                    "tiers": {
+                        tier: stats.as_dict()
+                        for tier, stats in self._stats.get(role, {}).items()
+                    },
+                    "escalations": dict(self._escalations.get(role, {})),
+                }
+                for role in sorted(roles)
+            }
+
+
+class RoutedModelBackend(ForwardingModelBackend):
+    """A role's view of a :class:`ModelRouter`.
+
+    Token counting and limits come from the backend of the role's routed
+    tier.
+
+    Args:
+        router (ModelRouter): The router.
+        role (str): The role whose calls are routed.
+    """
+
+    def __init__(self, router: ModelRouter, role: str):
+        super().__init__(router.backend(router.route(role), role))
+        self.router = router
+        self.role = role
+
+    def _run(self, messages, response_format=None, tools=None) -> Any:
+        return self.router.call(self.role, messages, response_format, tools)
+
+    async def _arun(self, messages, response_format=None, tools=None) -> Any:
+        return await self.router.acall(self.role, messages, response_format, tools)
@@ -0,0 +1,97 @@
+"""
+Token-level streaming pass-through.
+
+When a backend is configured with ``stream=True``, CAMEL's ``ChatAgent``
+consumes the chunk stream internally and only returns the complete message.
+:class:`TokenStreamBackend` taps that stream on its way to the agent and emits
+a :class:`TokenEvent` per chunk to the current query's event sink.
+
+CAMEL 0.2.45 returns no tool calls for streamed responses, so tool-using
+agents must not stream. With ``emit_complete=True`` their complete text
+responses are emitted as a single :class:`TokenEvent` instead.
+"""
+
+from typing import Any, AsyncIterator, Iterator
+
+from camel.models import BaseModelBackend
+from openai.types.chat import ChatCompletion
+
+from restaurant_deep_research.events import TokenEvent, emit_event
+from restaurant_deep_research.models.base import ForwardingModelBackend
+
+
+def _chunk_text(chunk: Any) -> str:
+    choices = getattr(chunk, "choices", None) or []
+    if not choices:
+        return ""
+    delta = getattr(choices[0], "delta", None)
+    return getattr(delta, "content", None) or ""
+
+
+class _TappedStream:
+    """Iterate a chunk stream while emitting each text delta."""
+
+    def __init__(self, stream: Any, role: str):
+        self._stream = stream
+        self._role = role
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self._stream:
+            text = _chunk_text(chunk)
+            if text:
+                emit_event(TokenEvent(role=self._role, delta=text))
+            yield chunk
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class _TappedAsyncStream(_TappedStream):
+    """Async counterpart of :class:`_TappedStream`."""
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        async for chunk in self._stream:
+            text = _chunk_text(chunk)
+            if text:
+                emit_event(TokenEvent(role=self._role, delta=text))
+            yield chunk
+
+
+class TokenStreamBackend(ForwardingModelBackend):
+    """Emit streamed tokens of ``inner`` as :class:`TokenEvent` objects.
+
+    Non-streamed responses pass through untouched, so wrapping a backend
+    that does not stream is harmless.
+
+    Args:
+        inner (BaseModelBackend): The backend to wrap.
+        role (str): Role reported in the events, e.g. ``"assistant"``.
+        emit_complete (bool, optional): Emit the text of non-streamed
+            responses as one event. (default: :obj:`False`)
+    """
+
+    def __init__(
+        self, inner: BaseModelBackend, role: str, emit_complete: bool = False
+    ):
+        super().__init__(inner)
+        self.role = role
+        self.emit_complete = emit_complete
+
+    def _complete(self, response: ChatCompletion) -> ChatCompletion:
+        if self.emit_complete and response.choices:
+            text = response.choices[0].message.content
+            if text:
+                emit_event(TokenEvent(role=self.role, delta=text))
+        return response
+
+    def _run(self, messages, response_format=None, tools=None) -> Any:
+        response = self.inner.run(messages, response_format, tools)
+        if isinstance(response, ChatCompletion):
+            return self._complete(response)
+        return _TappedStream(response, self.role)
+
+    async def _arun(self, messages, response_format=None, tools=None) -> Any:
+        response = await self.inner.arun(messages, response_format, tools)
+        if isinstance(response, ChatCompletion):
+            return self._complete(response)
+        return _TappedAsyncStream(response, self.role)
@@ -0,0 +1,52 @@
+"""Offline record and replay of restaurant queries.
+
+This module records the model responses and Google Maps tool results of live
+runs into JSON fixtures and replays them with zero network access, so that
+the pipeline can be benchmarked and regression-tested without API keys.
+"""
+
+from restaurant_deep_research.replay.backends import (
+    ApproxTokenCounter,
+    RecordingModelBackend,
+    ReplayError,
+    ReplayModelBackend,
+    StubModelBackend,
+)
+from restaurant_deep_research.replay.fake_maps import (
+    FAKE_MAPS_TOOL_SCHEMAS,
+    FakeMapsServer,
+)
+from restaurant_deep_research.replay.fixtures import (
+    Recorder,
+    ReplayTools,
+    load_fixture,
+    replay_models,
+    save_fixture,
+)
+from restaurant_deep_research.replay.runner import (
+    ReplayResult,
+    record_query,
+    replay_query,
+    replay_society,
+)
+from restaurant_deep_research.replay.synthetic import synthetic_fixture
+
+__all__ = [
+    "ApproxTokenCounter",
+    "RecordingModelBackend",
+    "ReplayError",
+    "ReplayModelBackend",
+    "StubModelBackend",
+    "FAKE_MAPS_TOOL_SCHEMAS",
+    "FakeMapsServer",
+    "Recorder",
+    "ReplayTools",
+    "load_fixture",
+    "replay_models",
+    "save_fixture",
+    "ReplayResult",
+    "record_query",
+    "replay_query",
+    "replay_society",
+    "synthetic_fixture",
+]
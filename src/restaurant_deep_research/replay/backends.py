@@ -0,0 +1,354 @@
+"""
+Model backends for recording and replaying model responses.
+
+:class:`RecordingModelBackend` forwards requests to a real backend and keeps
+every response; :class:`ReplayModelBackend` serves recorded responses without
+touching the network, one per distinct request, reporting prompt tokens for
+the messages actually sent so that society options can be compared.
+:class:`StubModelBackend` answers
+any request with a canned reply after a configurable delay or failure, for
+exercising latency and failure handling offline.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from camel.messages import OpenAIMessage
+from camel.models import BaseModelBackend
+from camel.types import ChatCompletion
+from camel.utils import BaseTokenCounter
+from pydantic import BaseModel
+
+from restaurant_deep_research.models.base import ForwardingModelBackend
+
+
+class ReplayError(RuntimeError):
+    """Raised when a replay runs past or away from its recording."""
+
+
+# Bits per character in an ApproxTokenCounter token; code points are stored
+# plus one so that shorter final chunks decode unambiguously.
+_CHAR_BITS = 21
+_CHARS_PER_TOKEN = 4
+
+
+class ApproxTokenCounter(BaseTokenCounter):
+    """Offline token counter estimating four characters per token.
+
+    Replays must not download tokenizer files, and exact counts only matter
+    for context truncation, which recorded runs rarely reach. Each token id
+    packs the code points of up to four characters, so :meth:`decode`
+    inverts :meth:`encode` without a vocabulary.
+    """
+
+    def count_tokens_from_messages(self, messages: List[OpenAIMessage]) -> int:
+        chars = 0
+        for message in messages:
+            chars += len(str(message.get("content") or ""))
+            if message.get("tool_calls"):
+                chars += len(json.dumps(message["tool_calls"], default=str))
+        return chars // _CHARS_PER_TOKEN
+
+    def encode(self, text: str) -> List[int]:
+        token_ids = []
+        for start in range(0, len(text), _CHARS_PER_TOKEN):
+            token_id = 0
+            for char in reversed(text[start : start + _CHARS_PER_TOKEN]):
+                token_id = (token_id << _CHAR_BITS) | (ord(char) + 1)
+            token_ids.append(token_id)
+        return token_ids
+
+    def decode(self, token_ids: List[int]) -> str:
+        chars = []
+        mask = (1 << _CHAR_BITS) - 1
+        for token_id in token_ids:
+            while token_id:
+                chars.append(chr((token_id & mask) - 1))
+                token_id >>= _CHAR_BITS
+        return "".join(chars)
+
+
+def _prompt_tokens(
+    counter: BaseTokenCounter,
+    messages: List[OpenAIMessage],
+    tools: Optional[List[Dict[str, Any]]],
+) -> int:
+    tokens = counter.count_tokens_from_messages(messages)
+    if tools:
+        tokens += len(json.dumps(tools, default=str)) // _CHARS_PER_TOKEN
+    return tokens
+
+
+def _request_key(messages: List[OpenAIMessage]) -> str:
+    """Fingerprint the history a request continues, i.e. all but its last
+    message."""
+    history = json.dumps(messages[:-1], sort_keys=True, default=str)
+    return hashlib.sha256(history.encode()).hexdigest()
+
+
+class RecordingModelBackend(ForwardingModelBackend):
+    """Forward requests to ``inner`` and record every response.
+
+    Args:
+        inner (BaseModelBackend): The real backend. Streaming backends are not
+            supported because their responses cannot be replayed verbatim.
+        calls (List[dict], optional): List the recorded calls are appended
+            to, as ``{"response": ..., "elapsed": ...}`` dicts.
+    """
+
+    def __init__(self, inner: BaseModelBackend, calls: Optional[List[dict]] = None):
+        if inner.stream:
+            raise ValueError("Cannot record a streaming model backend")
+        super().__init__(inner)
+        self.calls = calls if calls is not None else []
+
+    def _record(self, response: Any, elapsed: float) -> None:
+        if not isinstance(response, ChatCompletion):
+            raise ValueError(f"Cannot record a {type(response).__name__} response")
+        self.calls.append(
+            {"response": response.model_dump(mode="json"), "elapsed": round(elapsed, 4)}
+        )
+
+    def _run(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Any:
+        start = time.perf_counter()
+        response = super()._run(messages, response_format, tools)
+        self._record(response, time.perf_counter() - start)
+        return response
+
+    async def _arun(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> Any:
+        start = time.perf_counter()
+        response = await super()._arun(messages, response_format, tools)
+        self._record(response, time.perf_counter() - start)
+        return response
+
+
+class ReplayModelBackend(BaseModelBackend):
+    """Serve recorded responses, without any network access.
+
+    Requests are keyed on the history they continue: every new history
+    takes the next recorded response in order, and a request continuing a
+    history seen before gets that history's response again. A pipelined
+    draft of the user agent's next instruction and the real step it stands
+    in for share their history, so both are answered with the round's one
+    recording instead of consuming two.
+
+    Only the recorded completion is replayed: ``usage.prompt_tokens`` is
+    recomputed from the messages and tool schemas of each request with
+    :class:`ApproxTokenCounter`, so prompt sizes respond to options such as
+    ``task_injection`` or ``compact_tool_results``.
+
+    Args:
+        calls (List[dict]): Recorded calls from :class:`RecordingModelBackend`.
+        model_type (str, optional): Model name reported to the agents.
+            (default: :obj:`"replay"`)
+        time_scale (float, optional): Multiplier for the recorded latency of
+            each call; ``0`` replays instantly and ``1`` in real time.
+            (default: :obj:`0.0`)
+        token_limit (int, optional): Context size reported to the agents.
+            (default: :obj:`1000000`)
+    """
+
+    def __init__(
+        self,
+        calls: List[dict],
+        model_type: str = "replay",
+        time_scale: float = 0.0,
+        token_limit: int = 1_000_000,
+    ):
+        super().__init__(model_type, {}, token_counter=ApproxTokenCounter())
+        self.calls = list(calls)
+        self.time_scale = time_scale
+        self._token_limit = token_limit
+        self.position = 0
+        self._served: Dict[str, dict] = {}
+
+    @property
+    def token_counter(self) -> BaseTokenCounter:
+        return self._token_counter
+
+    @property
+    def token_limit(self) -> int:
+        return self._token_limit
+
+    @property
+    def stream(self) -> bool:
+        return False
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded responses not yet served."""
+        return len(self.calls) - self.position
+
+    def check_model_config(self) -> None:
+        pass
+
+    def _next(self, messages: List[OpenAIMessage]) -> dict:
+        key = _request_key(messages)
+        call = self._served.get(key)
+        if call is not None:
+            return call
+        if self.position >= len(self.calls):
+            raise ReplayError(
+                f"Replay of {self.model_type} ran out of recorded responses "
+                f"after {len(self.calls)} calls"
+            )
+        call = self.calls[self.position]
+        self.position += 1
+        self._served[key] = call
+        return call
+
+    def _response(
+        self,
+        call: dict,
+        messages: List[OpenAIMessage],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> ChatCompletion:
+        response = ChatCompletion.model_validate(call["response"])
+        if response.usage is not None:
+            prompt_tokens = _prompt_tokens(self.token_counter, messages, tools)
+            response.usage.prompt_tokens = prompt_tokens
+            response.usage.total_tokens = (
+                prompt_tokens + response.usage.completion_tokens
+            )
+        return response
+
+    def _run(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> ChatCompletion:
+        call = self._next(messages)
+        if self.time_scale:
+            time.sleep(call.get("elapsed", 0.0) * self.time_scale)
+        return self._response(call, messages, tools)
+
+    async def _arun(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> ChatCompletion:
+        call = self._next(messages)
+        if self.time_scale:
+            await asyncio.sleep(call.get("elapsed", 0.0) * self.time_scale)
+        return self._response(call, messages, tools)
+
+
+class StubModelBackend(BaseModelBackend):
+    """Answer every request with a canned reply, without network access.
+
+    Args:
+        content (Union[str, Callable[[List[OpenAIMessage]], str]], optional):
+            Reply text, or a function of the prompt returning it.
+            (default: :obj:`"OK"`)
+        latency (Union[float, Callable[[int], float]], optional): Seconds each
+            call takes, or a function of the call number returning them,
+            e.g. to simulate a heavy tail. (default: :obj:`0.0`)
+        fail (Callable[[int], Optional[BaseException]], optional): Function
+            of the call number returning an exception to raise after the
+            delay, or :obj:`None` to answer. (default: :obj:`None`)
+        model_type (str, optional): Model name reported to the agents.
+            (default: :obj:`"stub"`)
+    """
+
+    def __init__(
+        self,
+        content: Union[str, Callable[[List[OpenAIMessage]], str]] = "OK",
+        latency: Union[float, Callable[[int], float]] = 0.0,
+        fail: Optional[Callable[[int], Optional[BaseException]]] = None,
+        model_type: str = "stub",
+    ):
+        super().__init__(model_type, {}, token_counter=ApproxTokenCounter())
+        self.content = content
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    @property
+    def token_counter(self) -> BaseTokenCounter:
+        return self._token_counter
+
+    @property
+    def token_limit(self) -> int:
+        return 1_000_000
+
+    @property
+    def stream(self) -> bool:
+        return False
+
+    def check_model_config(self) -> None:
+        pass
+
+    def _start(self) -> Tuple[int, float]:
+        number = self.calls
+        self.calls += 1
+        delay = self.latency(number) if callable(self.latency) else self.latency
+        return number, delay
+
+    def _respond(
+        self,
+        number: int,
+        messages: List[OpenAIMessage],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> ChatCompletion:
+        error = self.fail(number) if self.fail is not None else None
+        if error is not None:
+            raise error
+        content = self.content(messages) if callable(self.content) else self.content
+        prompt_tokens = _prompt_tokens(self.token_counter, messages, tools)
+        return ChatCompletion.model_validate(
+            {
+                "id": f"{self.model_type}-{number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": str(self.model_type),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": prompt_tokens + len(content) // 4,
+                },
+            }
+        )
+
+    def _run(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> ChatCompletion:
+        number, delay = self._start()
+        if delay:
+            time.sleep(delay)
+        return self._respond(number, messages, tools)
+
+    async def _arun(
+        self,
+        messages: List[OpenAIMessage],
+        response_format: Optional[Type[BaseModel]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+    ) -> ChatCompletion:
+        number, delay = self._start()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(number, messages, tools)
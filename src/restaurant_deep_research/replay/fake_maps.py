@@ -0,0 +1,357 @@
+"""
+In-process stand-in for the Google Maps MCP server.
+
+:class:`FakeMapsServer` exposes the same seven tools as
+``@modelcontextprotocol/server-google-maps`` with the same schemas and JSON
+result layout. Results are synthetic but deterministic: they are derived
+from a hash of the seed, tool name and arguments, so repeated runs see
+identical data. Useful for benchmarks and as a fallback for replays.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any, Dict, List, Optional, Union
+
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.tools.wrapping import canonicalize_args
+
+
+def _schema(name: str, description: str, properties: dict, required: List[str]) -> dict:
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": required,
+            },
+        },
+    }
+
+
+_LOCATION = {
+    "type": "object",
+    "properties": {
+        "latitude": {"type": "number", "description": "Latitude coordinate"},
+        "longitude": {"type": "number", "description": "Longitude coordinate"},
+    },
+    "required": ["latitude", "longitude"],
+}
+_MODE = {
+    "type": "string",
+    "description": "Travel mode (driving, walking, bicycling, transit)",
+    "enum": ["driving", "walking", "bicycling", "transit"],
+}
+
+FAKE_MAPS_TOOL_SCHEMAS: List[dict] = [
+    _schema(
+        "maps_geocode",
+        "Convert an address into geographic coordinates",
+        {"address": {"type": "string", "description": "The address to geocode"}},
+        ["address"],
+    ),
+    _schema(
+        "maps_reverse_geocode",
+        "Convert coordinates into an address",
+        {
+            "latitude": {"type": "number", "description": "Latitude coordinate"},
+            "longitude": {"type": "number", "description": "Longitude coordinate"},
+        },
+        ["latitude", "longitude"],
+    ),
+    _schema(
+        "maps_search_places",
+        "Search for places using Google Places API",
+        {
+            "query": {"type": "string", "description": "Search query"},
+            "location": {**_LOCATION, "description": "Optional center point"},
+            "radius": {"type": "number", "description": "Search radius in meters"},
+        },
+        ["query"],
+    ),
+    _schema(
+        "maps_place_details",
+        "Get detailed information about a specific place",
+        {"place_id": {"type": "string", "description": "The place ID to look up"}},
+        ["place_id"],
+    ),
+    _schema(
+        "maps_distance_matrix",
+        "Calculate travel distance and time for multiple origins and destinations",
+        {
+            "origins": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Array of origin addresses or coordinates",
+            },
+            "destinations": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Array of destination addresses or coordinates",
+            },
+            "mode": _MODE,
+        },
+        ["origins", "destinations"],
+    ),
+    _schema(
+        "maps_elevation",
+        "Get elevation data for locations on the earth",
+        {
+            "locations": {
+                "type": "array",
+                "items": _LOCATION,
+                "description": "Array of locations to get elevation for",
+            }
+        },
+        ["locations"],
+    ),
+    _schema(
+        "maps_directions",
+        "Get directions between two points",
+        {
+            "origin": {
+                "type": "string",
+                "description": "Starting point address or coordinates",
+            },
+            "destination": {
+                "type": "string",
+                "description": "Ending point address or coordinates",
+            },
+            "mode": _MODE,
+        },
+        ["origin", "destination"],
+    ),
+]
+
+_CUISINES = ["Ramen", "Sushi", "Izakaya", "Trattoria", "Bistro", "Taqueria", "Curry House"]
+_WORDS = ["Golden", "Little", "Corner", "Harbor", "Maple", "Lantern", "Blue", "Old Town"]
+_STREETS = ["Main St", "2nd Ave", "Market St", "Station Rd", "Park Ln", "River Rd"]
+_REVIEWS = [
+    "Great food and friendly staff.",
+    "A bit noisy, but the dishes were excellent.",
+    "Good value for money; expect a queue at peak times.",
+    "Service was slow tonight, food was fine.",
+    "Cozy place, perfect for a small group.",
+]
+
+
+class FakeMapsServer:
+    """Deterministic synthetic Google Maps tools.
+
+    Args:
+        seed (int, optional): Seed mixed into every result.
+            (default: :obj:`0`)
+        latency (Union[float, Dict[str, float]], optional): Seconds each call
+            takes, overall or per tool name, to mimic network round trips.
+            (default: :obj:`0.0`)
+        places_per_search (int, optional): Results per place search.
+            (default: :obj:`8`)
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: Union[float, Dict[str, float]] = 0.0,
+        places_per_search: int = 8,
+    ):
+        self.seed = seed
+        self.latency = latency
+        self.places_per_search = places_per_search
+        self.calls: Dict[str, int] = {}
+
+    def tools(self) -> List[FunctionTool]:
+        """Return the fake tools with the real server's schemas."""
+        return [self._make_tool(schema) for schema in FAKE_MAPS_TOOL_SCHEMAS]
+
+    def _make_tool(self, schema: dict) -> FunctionTool:
+        name = schema["function"]["name"]
+
+        async def fake_tool(**kwargs: Any) -> str:
+            return await self.call(name, kwargs)
+
+        fake_tool.__name__ = name
+        return FunctionTool(fake_tool, openai_tool_schema=schema)
+
+    def _rng(self, *parts: Any) -> random.Random:
+        payload = json.dumps([self.seed, *parts], sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _latency(self, tool_name: str) -> float:
+        if isinstance(self.latency, dict):
+            return self.latency.get(tool_name, 0.0)
+        return self.latency
+
+    async def call(self, tool_name: str, kwargs: Dict[str, Any]) -> str:
+        """Answer one tool call.
+
+        Args:
+            tool_name (str): Name of the tool.
+            kwargs (Dict[str, Any]): Arguments of the call.
+
+        Returns:
+            str: JSON text, or an error message for unknown tools.
+        """
+        self.calls[tool_name] = self.calls.get(tool_name, 0) + 1
+        latency = self._latency(tool_name)
+        if latency:
+            await asyncio.sleep(latency)
+        return self.result(tool_name, kwargs)
+
+    def result(self, tool_name: str, kwargs: Dict[str, Any]) -> str:
+        """Compute the result of one call without latency or bookkeeping.
+
+        Args:
+            tool_name (str): Name of the tool.
+            kwargs (Dict[str, Any]): Arguments of the call.
+
+        Returns:
+            str: JSON text, or an error message for unknown tools.
+        """
+        handler = getattr(self, "_" + tool_name, None)
+        if handler is None:
+            return f"Unknown tool: {tool_name}"
+        result = handler(self._rng(tool_name, canonicalize_args(kwargs)), **kwargs)
+        return json.dumps(result, ensure_ascii=False, indent=2)
+
+    def _location(self, rng: random.Random, near: Optional[dict] = None) -> dict:
+        if near:
+            lat, lng = near.get("latitude", 0.0), near.get("longitude", 0.0)
+            return {
+                "lat": round(lat + rng.uniform(-0.01, 0.01), 6),
+                "lng": round(lng + rng.uniform(-0.01, 0.01), 6),
+            }
+        return {
+            "lat": round(rng.uniform(-60, 60), 6),
+            "lng": round(rng.uniform(-180, 180), 6),
+        }
+
+    def _address(self, rng: random.Random) -> str:
+        return f"{rng.randint(1, 999)} {rng.choice(_STREETS)}"
+
+    def _place_id(self, rng: random.Random) -> str:
+        return "ChIJ" + "".join(
+            rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789")
+            for _ in range(23)
+        )
+
+    def _maps_geocode(self, rng: random.Random, address: str = "", **_: Any) -> dict:
+        return {
+            "location": self._location(rng),
+            "formatted_address": address,
+            "place_id": self._place_id(rng),
+        }
+
+    def _maps_reverse_geocode(self, rng: random.Random, **_: Any) -> dict:
+        return {
+            "formatted_address": self._address(rng),
+            "place_id": self._place_id(rng),
+            "address_components": [],
+        }
+
+    def _maps_search_places(
+        self, rng: random.Random, query: str = "", location: Optional[dict] = None, **_: Any
+    ) -> dict:
+        places = []
+        for _i in range(self.places_per_search):
+            places.append(
+                {
+                    "name": f"{rng.choice(_WORDS)} {rng.choice(_CUISINES)}",
+                    "formatted_address": self._address(rng),
+                    "location": self._location(rng, location),
+                    "place_id": self._place_id(rng),
+                    "rating": round(rng.uniform(3.2, 4.9), 1),
+                    "types": ["restaurant", "food", "point_of_interest"],
+                }
+            )
+        return {"places": places}
+
+    def _maps_place_details(self, rng: random.Random, place_id: str = "", **_: Any) -> dict:
+        return {
+            "name": f"{rng.choice(_WORDS)} {rng.choice(_CUISINES)}",
+            "formatted_address": self._address(rng),
+            "location": self._location(rng),
+            "formatted_phone_number": f"+1 555-{rng.randint(1000, 9999)}",
+            "website": f"https://example.com/{place_id[-6:] or 'place'}",
+            "rating": round(rng.uniform(3.2, 4.9), 1),
+            "price_level": rng.randint(1, 4),
+            "reviews": [
+                {
+                    "author_name": f"Reviewer {rng.randint(1, 500)}",
+                    "rating": rng.randint(2, 5),
+                    "text": rng.choice(_REVIEWS),
+                    "time": rng.randint(1_600_000_000, 1_700_000_000),
+                }
+                for _i in range(3)
+            ],
+            "opening_hours": {
+                "open_now": rng.random() < 0.7,
+                "weekday_text": [f"Day {d}: 11:00 AM - 10:00 PM" for d in range(1, 8)],
+            },
+        }
+
+    def _maps_distance_matrix(
+        self,
+        rng: random.Random,
+        origins: Optional[List[str]] = None,
+        destinations: Optional[List[str]] = None,
+        **_: Any,
+    ) -> dict:
+        origins, destinations = origins or [], destinations or []
+        rows = []
+        for _origin in origins:
+            elements = []
+            for _destination in destinations:
+                meters = rng.randint(200, 15000)
+                seconds = meters // 5
+                elements.append(
+                    {
+                        "status": "OK",
+                        "distance": {"text": f"{meters / 1000:.1f} km", "value": meters},
+                        "duration": {"text": f"{seconds // 60} mins", "value": seconds},
+                    }
+                )
+            rows.append({"elements": elements})
+        return {
+            "origin_addresses": origins,
+            "destination_addresses": destinations,
+            "results": rows,
+        }
+
+    def _maps_elevation(
+        self, rng: random.Random, locations: Optional[List[dict]] = None, **_: Any
+    ) -> dict:
+        return {
+            "results": [
+                {
+                    "elevation": round(rng.uniform(0, 500), 2),
+                    "location": {
+                        "lat": loc.get("latitude"),
+                        "lng": loc.get("longitude"),
+                    },
+                    "resolution": 4.77,
+                }
+                for loc in locations or []
+            ]
+        }
+
+    def _maps_directions(
+        self, rng: random.Random, origin: str = "", destination: str = "", **_: Any
+    ) -> dict:
+        meters = rng.randint(500, 20000)
+        seconds = meters // 5
+        return {
+            "routes": [
+                {
+                    "summary": f"{origin} to {destination}",
+                    "distance": {"text": f"{meters / 1000:.1f} km", "value": meters},
+                    "duration": {"text": f"{seconds // 60} mins", "value": seconds},
+                    "steps": [],
+                }
+            ]
+        }
@@ -0,0 +1,271 @@
+"""
+Recording and replaying whole queries as JSON fixtures.
+
+A fixture holds everything a query exchanged with the outside world: the
+responses of each model role in call order, the schemas of the Google Maps
+tools and the result of every tool call. :class:`Recorder` captures a live
+run; :func:`replay_models` and :class:`ReplayTools` play it back offline.
+"""
+
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+from camel.logger import get_logger
+from camel.models import BaseModelBackend
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.replay.backends import (
+    RecordingModelBackend,
+    ReplayError,
+    ReplayModelBackend,
+)
+from restaurant_deep_research.tools.wrapping import (
+    ToolCall,
+    canonicalize_args,
+    tool_call_key,
+    wrap_tool,
+)
+
+logger = get_logger(__name__)
+
+FIXTURE_VERSION = 1
+
+
+class Recorder:
+    """Capture the model responses and tool results of live runs.
+
+    Wrap the models and tools used by :func:`process_restaurant_query` or a
+    hand-built society, run it, then :meth:`save` the fixture::
+
+        recorder = Recorder(query)
+        models = recorder.wrap_models(create_models())
+        tools = recorder.wrap_tools(mcp_tools)
+
+    For a society run directly with :func:`arun_society`, set ``task`` to
+    the task prompt so that :func:`replay_society` can rebuild the society.
+
+    Args:
+        query (str, optional): The query being recorded, stored for replay.
+        task (str, optional): The clarified task given to the society.
+    """
+
+    def __init__(self, query: Optional[str] = None, task: Optional[str] = None):
+        self.query = query
+        self.task = task
+        self.answer: Optional[str] = None
+        self.settings: Dict[str, Any] = {}
+        self.model_calls: Dict[str, List[dict]] = defaultdict(list)
+        self.model_types: Dict[str, str] = {}
+        self.tool_schemas: Dict[str, dict] = {}
+        self.tool_calls: List[dict] = []
+
+    def wrap_models(
+        self, models: Dict[str, BaseModelBackend]
+    ) -> Dict[str, BaseModelBackend]:
+        """Return recording versions of the backends keyed by role.
+
+        Args:
+            models (Dict[str, BaseModelBackend]): Non-streaming backends, as
+                returned by :func:`create_models`.
+
+        Returns:
+            Dict[str, BaseModelBackend]: Backends with the same keys.
+        """
+        recorded = {}
+        for role, model in models.items():
+            self.model_types[role] = str(model.model_type)
+            recorded[role] = RecordingModelBackend(model, self.model_calls[role])
+        return recorded
+
+    def wrap_tools(self, tools: List[FunctionTool]) -> List[FunctionTool]:
+        """Return recording versions of ``tools``.
+
+        Args:
+            tools (List[FunctionTool]): The live Google Maps tools.
+
+        Returns:
+            List[FunctionTool]: Tools with identical names and schemas.
+        """
+        for tool in tools:
+            self.tool_schemas[tool.get_function_name()] = tool.get_openai_tool_schema()
+        return [wrap_tool(tool, self._record_call) for tool in tools]
+
+    async def _record_call(
+        self, tool_name: str, kwargs: Dict[str, Any], call_original: ToolCall
+    ) -> Any:
+        start = time.perf_counter()
+        result = await call_original(**kwargs)
+        self.tool_calls.append(
+            {
+                "tool": tool_name,
+                "args": canonicalize_args(kwargs),
+                "result": result,
+                "elapsed": round(time.perf_counter() - start, 4),
+            }
+        )
+        return result
+
+    def to_fixture(self) -> dict:
+        """Return the recording as a JSON-serializable fixture."""
+        return {
+            "version": FIXTURE_VERSION,
+            "query": self.query,
+            "task": self.task,
+            "answer": self.answer,
+            "settings": dict(self.settings),
+            "model_types": dict(self.model_types),
+            "model_calls": {role: list(calls) for role, calls in self.model_calls.items()},
+            "tool_schemas": list(self.tool_schemas.values()),
+            "tool_calls": list(self.tool_calls),
+        }
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the fixture to ``path``.
+
+        Args:
+            path (Union[str, Path]): JSON file to write.
+        """
+        save_fixture(self.to_fixture(), path)
+
+
+def save_fixture(fixture: dict, path: Union[str, Path]) -> None:
+    """Write a fixture as indented JSON.
+
+    Args:
+        fixture (dict): The fixture.
+        path (Union[str, Path]): JSON file to write. Parent directories are
+            created.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False, indent=2, default=str)
+        f.write("\n")
+
+
+def load_fixture(path: Union[str, Path]) -> dict:
+    """Read a fixture written by :func:`save_fixture`.
+
+    Args:
+        path (Union[str, Path]): The JSON file.
+
+    Returns:
+        dict: The fixture.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    if fixture.get("version") != FIXTURE_VERSION:
+        raise ValueError(
+            f"{path}: unsupported fixture version {fixture.get('version')!r}"
+        )
+    return fixture
+
+
+def replay_models(
+    fixture: dict, time_scale: float = 0.0
+) -> Dict[str, ReplayModelBackend]:
+    """Build replay backends for every model role in ``fixture``.
+
+    Args:
+        fixture (dict): The fixture.
+        time_scale (float, optional): Multiplier for recorded model latency.
+            (default: :obj:`0.0`)
+
+    Returns:
+        Dict[str, ReplayModelBackend]: Backends keyed by role, ready to pass
+            as ``models`` to :func:`process_restaurant_query`.
+    """
+    model_types = fixture.get("model_types", {})
+    return {
+        role: ReplayModelBackend(
+            calls,
+            model_type=model_types.get(role, "replay"),
+            time_scale=time_scale,
+        )
+        for role, calls in fixture["model_calls"].items()
+    }
+
+
+class ReplayTools:
+    """Serve recorded tool results keyed on tool name and canonical arguments.
+
+    Repeated calls get the recorded results in order, then the last one
+    again. Calls that were never recorded are answered by ``fallback`` when
+    given, raise :class:`ReplayError` when ``strict``, or otherwise return a
+    Maps-style failure message so the agents can carry on.
+
+    Args:
+        fixture (dict): The fixture.
+        time_scale (float, optional): Multiplier for recorded tool latency.
+            (default: :obj:`0.0`)
+        fallback (Any, optional): Object with a ``call(tool_name, kwargs)``
+            coroutine, such as :class:`FakeMapsServer`, for unrecorded calls.
+            (default: :obj:`None`)
+        strict (bool, optional): Raise on unrecorded calls without a fallback.
+            (default: :obj:`False`)
+    """
+
+    def __init__(
+        self,
+        fixture: dict,
+        time_scale: float = 0.0,
+        fallback: Any = None,
+        strict: bool = False,
+    ):
+        self.schemas: List[dict] = list(fixture.get("tool_schemas", []))
+        self.time_scale = time_scale
+        self.fallback = fallback
+        self.strict = strict
+        self.served = 0
+        self.unrecorded: List[dict] = []
+        self._results: Dict[str, Deque[dict]] = defaultdict(deque)
+        for call in fixture.get("tool_calls", []):
+            self._results[tool_call_key(call["tool"], call["args"])].append(call)
+        self._last: Dict[str, dict] = {}
+
+    def tools(self) -> List[FunctionTool]:
+        """Return ``FunctionTool`` objects with the recorded schemas."""
+        return [self._make_tool(schema) for schema in self.schemas]
+
+    def _make_tool(self, schema: dict) -> FunctionTool:
+        name = schema["function"]["name"]
+
+        async def replayed_tool(**kwargs: Any) -> Any:
+            return await self.call(name, kwargs)
+
+        replayed_tool.__name__ = name
+        return FunctionTool(replayed_tool, openai_tool_schema=schema)
+
+    async def call(self, tool_name: str, kwargs: Dict[str, Any]) -> Any:
+        """Return the recorded result of one call.
+
+        Args:
+            tool_name (str): Name of the tool.
+            kwargs (Dict[str, Any]): Arguments of the call.
+
+        Returns:
+            Any: The recorded (or fallback) result.
+        """
+        key = tool_call_key(tool_name, kwargs)
+        queue = self._results.get(key)
+        if queue:
+            call = queue.popleft()
+            self._last[key] = call
+        elif key in self._last:
+            call = self._last[key]
+        else:
+            self.unrecorded.append({"tool": tool_name, "args": kwargs})
+            if self.fallback is not None:
+                return await self.fallback.call(tool_name, kwargs)
+            if self.strict:
+                raise ReplayError(f"No recorded result for {tool_name}({kwargs})")
+            logger.warning(f"No recorded result for {tool_name}({kwargs})")
+            return f"Replay failed: no recorded result for {tool_name}"
+        self.served += 1
+        if self.time_scale:
+            await asyncio.sleep(call.get("elapsed", 0.0) * self.time_scale)
+        return call["result"]
@@ -0,0 +1,210 @@
+"""
+Recording live queries and replaying them offline.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from camel.models import BaseModelBackend
+
+from restaurant_deep_research.agents.role_playing import arun_society
+from restaurant_deep_research.main import (
+    _lease_mcp_tools,
+    construct_society,
+    create_models,
+    process_restaurant_query,
+)
+from restaurant_deep_research.metrics import QueryMetrics
+from restaurant_deep_research.replay.fixtures import (
+    Recorder,
+    ReplayTools,
+    load_fixture,
+    replay_models,
+)
+from restaurant_deep_research.tools.pool import MCPToolkitPool
+
+FixtureSource = Union[str, Path, dict]
+
+
+@dataclass
+class ReplayResult:
+    """The outcome of replaying one fixture.
+
+    Attributes:
+        answer (str): The final answer of the replayed run.
+        metrics (QueryMetrics): Timings, rounds, tokens and tool calls.
+        recorded_answer (str, optional): The answer of the recorded run.
+        unused_model_calls (Dict[str, int]): Recorded responses per role that
+            the replay never requested.
+        unrecorded_tool_calls (List[dict]): Tool calls the recording did not
+            contain.
+    """
+
+    answer: str
+    metrics: QueryMetrics
+    recorded_answer: Optional[str] = None
+    unused_model_calls: Dict[str, int] = field(default_factory=dict)
+    unrecorded_tool_calls: List[dict] = field(default_factory=list)
+
+    @property
+    def faithful(self) -> bool:
+        """Whether the replay consumed exactly what was recorded."""
+        return not self.unrecorded_tool_calls and not any(
+            self.unused_model_calls.values()
+        )
+
+
+async def record_query(
+    query: str,
+    path: Union[str, Path],
+    config_path: Optional[str] = None,
+    pool: Optional[MCPToolkitPool] = None,
+    models: Optional[Dict[str, BaseModelBackend]] = None,
+    chat_turn_limit: int = 10,
+    society_kwargs: Optional[dict] = None,
+    verbose: bool = False,
+) -> dict:
+    """Run ``query`` against the live model and MCP tools and save a fixture.
+
+    Args:
+        query (str): The restaurant query.
+        path (Union[str, Path]): JSON file for the fixture.
+        config_path (str, optional): Path to MCP config.
+        pool (MCPToolkitPool, optional): MCP connection pool to lease from.
+        models (Dict[str, BaseModelBackend], optional): Non-streaming model
+            backends. Defaults to :func:`create_models`.
+        chat_turn_limit (int, optional): Maximum conversation turns.
+            (default: :obj:`10`)
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options. (default: :obj:`None`)
+        verbose (bool, optional): Print the conversation.
+            (default: :obj:`False`)
+
+    Returns:
+        dict: The saved fixture.
+    """
+    recorder = Recorder(query)
+    recorder.settings["chat_turn_limit"] = chat_turn_limit
+    recorded_models = recorder.wrap_models(models or create_models())
+    async with _lease_mcp_tools(config_path, pool, verbose) as tools:
+        recorder.answer = await process_restaurant_query(
+            query,
+            chat_turn_limit=chat_turn_limit,
+            verbose=verbose,
+            models=recorded_models,
+            society_kwargs=society_kwargs,
+            tools=recorder.wrap_tools(tools),
+        )
+    recorder.save(path)
+    return recorder.to_fixture()
+
+
+def _load(source: FixtureSource) -> dict:
+    return source if isinstance(source, dict) else load_fixture(source)
+
+
+async def replay_query(
+    source: FixtureSource,
+    time_scale: float = 0.0,
+    chat_turn_limit: Optional[int] = None,
+    society_kwargs: Optional[dict] = None,
+    fallback: Any = None,
+    strict: bool = False,
+    verbose: bool = False,
+) -> ReplayResult:
+    """Replay a fixture from :func:`record_query` without network access.
+
+    Args:
+        source (Union[str, Path, dict]): The fixture or its path.
+        time_scale (float, optional): Multiplier for recorded model and tool
+            latency; ``0`` replays instantly, ``1`` in real time.
+            (default: :obj:`0.0`)
+        chat_turn_limit (int, optional): Maximum conversation turns.
+            Defaults to the recorded setting.
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options, e.g. to compare task injection modes.
+        fallback (Any, optional): Answers unrecorded tool calls, e.g. a
+            :class:`FakeMapsServer`. (default: :obj:`None`)
+        strict (bool, optional): Fail on unrecorded tool calls.
+            (default: :obj:`False`)
+        verbose (bool, optional): Print the conversation.
+            (default: :obj:`False`)
+
+    Returns:
+        ReplayResult: The answer, metrics and any divergence from the
+            recording.
+    """
+    fixture = _load(source)
+    models = replay_models(fixture, time_scale)
+    replay_tools = ReplayTools(fixture, time_scale, fallback=fallback, strict=strict)
+    if chat_turn_limit is None:
+        chat_turn_limit = fixture.get("settings", {}).get("chat_turn_limit", 10)
+    answer, metrics = await process_restaurant_query(
+        fixture["query"],
+        chat_turn_limit=chat_turn_limit,
+        verbose=verbose,
+        models=models,
+        society_kwargs=society_kwargs,
+        return_metrics=True,
+        tools=replay_tools.tools(),
+    )
+    return ReplayResult(
+        answer=answer,
+        metrics=metrics,
+        recorded_answer=fixture.get("answer"),
+        unused_model_calls={role: m.remaining for role, m in models.items()},
+        unrecorded_tool_calls=replay_tools.unrecorded,
+    )
+
+
+async def replay_society(
+    source: FixtureSource,
+    round_limit: int = 15,
+    time_scale: float = 0.0,
+    society_kwargs: Optional[dict] = None,
+    fallback: Any = None,
+    strict: bool = False,
+) -> ReplayResult:
+    """Replay a fixture recorded around :func:`arun_society`.
+
+    The fixture's ``task`` (or its ``query``) is used as the task prompt and
+    only the ``user`` and ``assistant`` roles are replayed.
+
+    Args:
+        source (Union[str, Path, dict]): The fixture or its path.
+        round_limit (int, optional): Maximum conversation rounds.
+            (default: :obj:`15`)
+        time_scale (float, optional): Multiplier for recorded latency.
+            (default: :obj:`0.0`)
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options. (default: :obj:`None`)
+        fallback (Any, optional): Answers unrecorded tool calls.
+            (default: :obj:`None`)
+        strict (bool, optional): Fail on unrecorded tool calls.
+            (default: :obj:`False`)
+
+    Returns:
+        ReplayResult: The answer, metrics and any divergence from the
+            recording.
+    """
+    fixture = _load(source)
+    models = replay_models(fixture, time_scale)
+    replay_tools = ReplayTools(fixture, time_scale, fallback=fallback, strict=strict)
+    tools = replay_tools.tools()
+    society = await construct_society(
+        fixture.get("task") or fixture["query"],
+        tools,
+        [tool.get_function_name() for tool in tools],
+        models,
+        society_kwargs,
+    )
+    metrics = QueryMetrics()
+    answer, _, _ = await arun_society(society, round_limit=round_limit, metrics=metrics)
+    return ReplayResult(
+        answer=answer,
+        metrics=metrics,
+        recorded_answer=fixture.get("answer"),
+        unused_model_calls={role: m.remaining for role, m in models.items()},
+        unrecorded_tool_calls=replay_tools.unrecorded,
+    )
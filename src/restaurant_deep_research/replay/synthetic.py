@@ -0,0 +1,212 @@
+"""
+Synthetic fixtures for benchmarking without any recorded runs.
+
+:func:`synthetic_fixture` scripts a typical recommendation conversation —
+search, enrich the candidates with place details, compare travel times,
+answer — with tool results from :class:`FakeMapsServer` and plausible
+model latencies and token counts, so that performance work on the society
+can be measured on a machine that has never had API keys.
+"""
+
+import json
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from restaurant_deep_research.replay.fake_maps import (
+    FAKE_MAPS_TOOL_SCHEMAS,
+    FakeMapsServer,
+)
+from restaurant_deep_research.replay.fixtures import FIXTURE_VERSION
+
+
+class _Script:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.calls: Dict[str, List[dict]] = {"clarifier": [], "user": [], "assistant": []}
+        self.context_tokens = {"clarifier": 400, "user": 900, "assistant": 1100}
+        self._ids = 0
+
+    def respond(
+        self,
+        role: str,
+        content: Optional[str] = None,
+        tool_calls: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+        latency: float = 2.0,
+    ) -> List[str]:
+        completion_tokens = len(content or "") // 4 + 20 * len(tool_calls or [])
+        prompt_tokens = self.context_tokens[role]
+        self.context_tokens[role] += completion_tokens + 150
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        ids = []
+        if tool_calls:
+            message["tool_calls"] = []
+            for name, args in tool_calls:
+                self._ids += 1
+                ids.append(f"call_{self._ids}")
+                message["tool_calls"].append(
+                    {
+                        "id": ids[-1],
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(args)},
+                    }
+                )
+        self.calls[role].append(
+            {
+                "response": {
+                    "id": f"synthetic-{role}-{len(self.calls[role])}",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "synthetic",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": "tool_calls" if tool_calls else "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                },
+                "elapsed": round(latency * self.rng.uniform(0.8, 1.2), 3),
+            }
+        )
+        return ids
+
+
+def synthetic_fixture(
+    query: str = "Cheap ramen near Shibuya Station for 4 people tonight",
+    candidates: int = 6,
+    seed: int = 0,
+    tool_latency: float = 0.4,
+    model_latency: float = 2.0,
+) -> dict:
+    """Build a fixture for a scripted four-round recommendation conversation.
+
+    Args:
+        query (str, optional): The query text.
+        candidates (int, optional): Places enriched with ``maps_place_details``
+            in a single assistant response. (default: :obj:`6`)
+        seed (int, optional): Seed for tool results and latency jitter.
+            (default: :obj:`0`)
+        tool_latency (float, optional): Mean recorded seconds per tool call.
+            (default: :obj:`0.4`)
+        model_latency (float, optional): Mean recorded seconds per model call.
+            (default: :obj:`2.0`)
+
+    Returns:
+        dict: A fixture accepted by :func:`replay_query`.
+    """
+    rng = random.Random(seed)
+    server = FakeMapsServer(seed=seed, places_per_search=max(candidates, 1))
+    script = _Script(rng)
+    tool_calls: List[dict] = []
+
+    def run_tool(name: str, args: Dict[str, Any]) -> str:
+        result = server.result(name, args)
+        tool_calls.append(
+            {
+                "tool": name,
+                "args": args,
+                "result": result,
+                "elapsed": round(tool_latency * rng.uniform(0.6, 1.6), 3),
+            }
+        )
+        return result
+
+    script.respond(
+        "clarifier",
+        f"# Restaurant Search Task\n\n## Request\n{query}\n\n"
+        "## Requirements\n- Budget: cheap\n- Party size: 4\n- Time: tonight\n",
+        latency=model_latency,
+    )
+
+    # Round 1: locate the area and search.
+    script.respond(
+        "user",
+        "Instruction: Geocode the area and search for matching restaurants.\n"
+        "Input: None",
+        latency=model_latency * 0.6,
+    )
+    area = "Shibuya Station, Tokyo"
+    geocode = json.loads(run_tool("maps_geocode", {"address": area}))
+    location = {
+        "latitude": geocode["location"]["lat"],
+        "longitude": geocode["location"]["lng"],
+    }
+    script.respond(
+        "assistant", tool_calls=[("maps_geocode", {"address": area})], latency=model_latency
+    )
+    search_args = {"query": "cheap ramen", "location": location, "radius": 1000}
+    places = json.loads(run_tool("maps_search_places", search_args))["places"]
+    script.respond(
+        "assistant", tool_calls=[("maps_search_places", search_args)], latency=model_latency
+    )
+    script.respond(
+        "assistant",
+        "Solution: Found these candidates:\n"
+        + "\n".join(f"- {p['name']} ({p['rating']})" for p in places[:candidates]),
+        latency=model_latency,
+    )
+
+    # Round 2: enrich every candidate in one response.
+    script.respond(
+        "user",
+        "Instruction: Get details, hours and reviews for each candidate.\n"
+        "Input: None",
+        latency=model_latency * 0.6,
+    )
+    detail_calls = [
+        ("maps_place_details", {"place_id": p["place_id"]}) for p in places[:candidates]
+    ]
+    for name, args in detail_calls:
+        run_tool(name, args)
+    script.respond("assistant", tool_calls=detail_calls, latency=model_latency)
+    script.respond(
+        "assistant",
+        "Solution: Collected details for all candidates; most are open tonight.",
+        latency=model_latency * 1.5,
+    )
+
+    # Round 3: travel times.
+    script.respond(
+        "user",
+        "Instruction: Compare walking times from the station.\nInput: None",
+        latency=model_latency * 0.6,
+    )
+    matrix_args = {
+        "origins": [area],
+        "destinations": [p["formatted_address"] for p in places[:candidates]],
+        "mode": "walking",
+    }
+    run_tool("maps_distance_matrix", matrix_args)
+    script.respond(
+        "assistant", tool_calls=[("maps_distance_matrix", matrix_args)], latency=model_latency
+    )
+    script.respond(
+        "assistant",
+        "Solution: All candidates are within a 15 minute walk.",
+        latency=model_latency,
+    )
+
+    # Round 4: done.
+    script.respond("user", "TASK_DONE", latency=model_latency * 0.4)
+    answer = "## Recommendations\n\n" + "\n".join(
+        f"{i}. **{p['name']}** - {p['formatted_address']} (rating {p['rating']})"
+        for i, p in enumerate(places[:3], start=1)
+    )
+    script.respond("assistant", answer, latency=model_latency * 2)
+
+    return {
+        "version": FIXTURE_VERSION,
+        "query": query,
+        "task": None,
+        "answer": answer,
+        "settings": {"chat_turn_limit": 10},
+        "model_types": {role: "synthetic" for role in script.calls},
+        "model_calls": script.calls,
+        "tool_schemas": FAKE_MAPS_TOOL_SCHEMAS,
+        "tool_calls": tool_calls,
+    }
@@ -0,0 +1,595 @@
+"""
+Long-running query service with an asyncio HTTP API.
+
+One-shot runs pay for importing CAMEL, loading the environment, creating the
+model clients and spawning the Google Maps MCP server on every query.
+:class:`RestaurantService` does all of that once and keeps it warm, admitting
+at most ``max_concurrency`` queries at a time with a bounded waiting queue.
+:class:`RestaurantHTTPServer` exposes the service over HTTP/1.1 (TCP or a
+Unix socket) using only the standard library:
+
+* ``POST /query`` with ``{"query": ..., "chat_turn_limit": 10}`` returns
+  ``{"answer": ..., "metrics": ...}``; with ``"stream": true`` it streams the
+  query events as newline-delimited JSON instead.
+* ``GET /healthz`` reports MCP connection health.
+* ``GET /stats`` reports admission and cache statistics.
+* ``GET /metrics`` serves the Prometheus metrics of all queries.
+"""
+
+import asyncio
+import contextlib
+import json
+import signal
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from camel.logger import get_logger
+from camel.models import BaseModelBackend
+
+from restaurant_deep_research.agents.pool import ClarifierPool, SocietyPool
+from restaurant_deep_research.cache.answers import AnswerCache
+from restaurant_deep_research.cache.clarifier import ClarifierCache
+from restaurant_deep_research.cache.tool_results import ToolResultCache
+from restaurant_deep_research.config.environment import load_environment
+from restaurant_deep_research.events import QueryEvent
+from restaurant_deep_research.main import (
+    create_models,
+    process_restaurant_query,
+    stream_restaurant_query,
+)
+from restaurant_deep_research.metrics import default_registry
+from restaurant_deep_research.tools.coalescing import get_tool_coalescer
+from restaurant_deep_research.tools.pool import MCPToolkitPool
+from restaurant_deep_research.tools.scheduler import get_tool_scheduler
+
+logger = get_logger(__name__)
+
+_MAX_BODY_BYTES = 64 * 1024
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class ServiceOverloaded(RuntimeError):
+    """Raised when a query is rejected by admission control."""
+
+
+class RestaurantService:
+    """Warm models, MCP connections and caches shared by all queries.
+
+    Args:
+        max_concurrency (int, optional): Queries processed at once.
+            (default: :obj:`4`)
+        max_queue (int, optional): Queries allowed to wait for a slot; more
+            are rejected with :class:`ServiceOverloaded`. (default: :obj:`32`)
+        queue_timeout (float, optional): Seconds a query may wait for a slot.
+            (default: :obj:`30.0`)
+        request_timeout (float, optional): Seconds allowed per query, or
+            :obj:`None` for no limit. (default: :obj:`600.0`)
+        pool_size (int, optional): MCP connections kept open.
+            (default: :obj:`1`)
+        chat_turn_limit (int, optional): Default conversation turns.
+            (default: :obj:`10`)
+        society_kwargs (dict, optional): Extra :class:`OwlRolePlaying`
+            options for every query. (default: :obj:`None`)
+        tool_cache (ToolResultCache, optional): Tool result cache.
+            (default: :obj:`ToolResultCache()`)
+        clarifier_cache (ClarifierCache, optional): Clarified spec cache.
+            (default: :obj:`ClarifierCache()`)
+        pool (MCPToolkitPool, optional): MCP connection pool to use instead
+            of starting one with ``pool_size`` connections; it is started if
+            necessary but not stopped by the service. (default: :obj:`None`)
+        models (Dict[str, BaseModelBackend], optional): Model backends to use
+            instead of :func:`create_models`. (default: :obj:`None`)
+        reuse_agents (bool, optional): Keep up to ``max_concurrency``
+            clarifier agents and societies in pools and re-target them for
+            every query instead of building new ones. (default: :obj:`True`)
+        answer_cache (AnswerCache, optional): Final answer cache; equivalent
+            requests are answered from it without running a society.
+            (default: :obj:`None`)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queue: int = 32,
+        queue_timeout: float = 30.0,
+        request_timeout: Optional[float] = 600.0,
+        pool_size: int = 1,
+        chat_turn_limit: int = 10,
+        society_kwargs: Optional[dict] = None,
+        tool_cache: Optional[ToolResultCache] = None,
+        clarifier_cache: Optional[ClarifierCache] = None,
+        pool: Optional[MCPToolkitPool] = None,
+        models: Optional[Dict[str, BaseModelBackend]] = None,
+        reuse_agents: bool = True,
+        answer_cache: Optional[AnswerCache] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.chat_turn_limit = chat_turn_limit
+        self.society_kwargs = society_kwargs
+        self.tool_cache = tool_cache if tool_cache is not None else ToolResultCache()
+        self.clarifier_cache = (
+            clarifier_cache if clarifier_cache is not None else ClarifierCache()
+        )
+        self._own_pool = pool is None
+        self.pool = pool if pool is not None else MCPToolkitPool(size=pool_size)
+        self.models = models
+        self.reuse_agents = reuse_agents
+        self.answer_cache = answer_cache
+        self.clarifier_pool: Optional[ClarifierPool] = None
+        self.society_pool: Optional[SocietyPool] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queue_seconds = 0.0
+        self.started_at: Optional[float] = None
+
+    async def start(self) -> "RestaurantService":
+        """Create the model clients and connect to the MCP server."""
+        load_environment()
+        if self.models is None:
+            self.models = create_models()
+        if self.reuse_agents:
+            self.clarifier_pool = ClarifierPool(
+                self.models["clarifier"], max_size=self.max_concurrency
+            )
+            self.society_pool = SocietyPool(
+                self.models, self.society_kwargs, max_size=self.max_concurrency
+            )
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        if not self.pool.started:
+            await self.pool.start()
+        self.started_at = time.time()
+        logger.info(
+            f"Service ready: {self.max_concurrency} concurrent queries, "
+            f"queue of {self.max_queue}"
+        )
+        return self
+
+    async def stop(self) -> None:
+        """Close the MCP connections the service opened."""
+        if self._own_pool:
+            await self.pool.stop()
+
+    async def __aenter__(self) -> "RestaurantService":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    @contextlib.asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold one processing slot, waiting in the queue if necessary.
+
+        Raises:
+            ServiceOverloaded: If the queue is full or the wait times out.
+        """
+        if self._slots is None:
+            raise RuntimeError("RestaurantService.start() has not been called")
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise ServiceOverloaded(f"queue is full ({self.max_queue} waiting)")
+        self._waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ServiceOverloaded(
+                f"no slot became free within {self.queue_timeout}s"
+            ) from None
+        finally:
+            self._waiting -= 1
+            self.queue_seconds += time.perf_counter() - start
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    def _query_kwargs(self, chat_turn_limit: Optional[int]) -> dict:
+        return {
+            "chat_turn_limit": chat_turn_limit or self.chat_turn_limit,
+            "pool": self.pool,
+            "tool_cache": self.tool_cache,
+            "clarifier_cache": self.clarifier_cache,
+            "models": self.models,
+            "society_kwargs": self.society_kwargs,
+            "clarifier_pool": self.clarifier_pool,
+            "society_pool": self.society_pool,
+            "answer_cache": self.answer_cache,
+        }
+
+    async def query(
+        self, query: str, chat_turn_limit: Optional[int] = None
+    ) -> Tuple[str, dict]:
+        """Answer one query.
+
+        Args:
+            query (str): The restaurant query.
+            chat_turn_limit (int, optional): Conversation turns for this query.
+
+        Returns:
+            Tuple[str, dict]: The answer and its metrics summary.
+
+        Raises:
+            ServiceOverloaded: If admission control rejects the query.
+            asyncio.TimeoutError: If the query exceeds ``request_timeout``.
+        """
+        async with self.admit():
+            try:
+                answer, metrics = await asyncio.wait_for(
+                    process_restaurant_query(
+                        query,
+                        verbose=False,
+                        return_metrics=True,
+                        **self._query_kwargs(chat_turn_limit),
+                    ),
+                    self.request_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            self.completed += 1
+            return answer, metrics.summary()
+
+    async def stream(
+        self, query: str, chat_turn_limit: Optional[int] = None
+    ) -> AsyncIterator[QueryEvent]:
+        """Answer one query, yielding its events as they happen.
+
+        Args:
+            query (str): The restaurant query.
+            chat_turn_limit (int, optional): Conversation turns for this query.
+
+        Yields:
+            QueryEvent: The query events, ending with the final answer.
+        """
+        async with self.admit():
+            deadline = (
+                time.monotonic() + self.request_timeout
+                if self.request_timeout is not None
+                else None
+            )
+            events = stream_restaurant_query(
+                query, **self._query_kwargs(chat_turn_limit)
+            )
+            try:
+                while True:
+                    timeout = (
+                        max(0.0, deadline - time.monotonic())
+                        if deadline is not None
+                        else None
+                    )
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        break
+                    yield event
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                await events.aclose()
+            self.completed += 1
+
+    def _routing_stats(self) -> Optional[dict]:
+        routers = {}
+        for backend in (self.models or {}).values():
+            # Routed backends may be wrapped, e.g. for token streaming.
+            while backend is not None and not hasattr(backend, "router"):
+                backend = getattr(backend, "inner", None)
+            if backend is not None:
+                routers[id(backend.router)] = backend.router
+        if not routers:
+            return None
+        stats: dict = {}
+        for router in routers.values():
+            stats.update(router.stats())
+        return stats
+
+    def stats(self) -> dict:
+        """Return admission, pool, cache, model routing and tool queue statistics."""
+        scheduler = get_tool_scheduler()
+        coalescer = get_tool_coalescer()
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1)
+            if self.started_at
+            else 0.0,
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "queue_seconds": round(self.queue_seconds, 3),
+            "pool": self.pool.stats(),
+            "tool_cache": self.tool_cache.stats(),
+            "clarifier_cache": self.clarifier_cache.stats(),
+            "answer_cache": self.answer_cache.stats()
+            if self.answer_cache is not None
+            else None,
+            "model_routing": self._routing_stats(),
+            "tool_scheduler": scheduler.stats() if scheduler is not None else None,
+            "tool_coalescing": coalescer.stats() if coalescer is not None else None,
+            "agent_pools": {
+                name: agent_pool.stats()
+                for name, agent_pool in (
+                    ("clarifier", self.clarifier_pool),
+                    ("society", self.society_pool),
+                )
+                if agent_pool is not None
+            },
+        }
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class RestaurantHTTPServer:
+    """Minimal HTTP/1.1 front end for :class:`RestaurantService`.
+
+    Every response closes its connection; streamed responses use chunked
+    transfer encoding.
+
+    Args:
+        service (RestaurantService): The started service.
+        host (str, optional): Interface to bind. (default: :obj:`"127.0.0.1"`)
+        port (int, optional): TCP port. (default: :obj:`8080`)
+        unix_path (str, optional): Listen on this Unix socket instead of TCP.
+            (default: :obj:`None`)
+    """
+
+    def __init__(
+        self,
+        service: RestaurantService,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        unix_path: Optional[str] = None,
+    ):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start listening."""
+        if self.unix_path:
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=self.unix_path
+            )
+            logger.info(f"Listening on unix:{self.unix_path}")
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            logger.info(f"Listening on http://{self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stop accepting connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Serve until SIGINT or SIGTERM, then shut down cleanly."""
+        await self.start()
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(sig, stopped.set)
+        try:
+            await stopped.wait()
+        finally:
+            await self.stop()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            try:
+                method, path, body = await self._read_request(reader)
+                await self._route(method, path, body, writer)
+            except _HTTPError as e:
+                await self._send_json(writer, e.status, {"error": e.message}, e.headers)
+            except Exception as e:
+                logger.error(f"Request failed: {type(e).__name__}: {e}")
+                await self._send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise _HTTPError(400, "malformed request line")
+        method, target, _version = parts
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        value = headers.get("content-length") or "0"
+        # int() would also take signs, underscores and non-ASCII digits.
+        if not (value.isascii() and value.isdigit()):
+            raise _HTTPError(400, "Content-Length must be a non-negative integer")
+        length = int(value)
+        if length > _MAX_BODY_BYTES:
+            raise _HTTPError(413, f"body exceeds {_MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], body
+
+    async def _route(
+        self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter
+    ) -> None:
+        routes = {
+            "/query": "POST",
+            "/healthz": "GET",
+            "/stats": "GET",
+            "/metrics": "GET",
+        }
+        if path not in routes:
+            raise _HTTPError(404, f"no route for {path}")
+        if method != routes[path]:
+            raise _HTTPError(405, f"{path} only accepts {routes[path]}")
+
+        if path == "/healthz":
+            health = await self.service.pool.check_health()
+            healthy = bool(health) and all(health.values())
+            await self._send_json(
+                writer,
+                200 if healthy else 503,
+                {"status": "ok" if healthy else "degraded", "connections": health},
+            )
+        elif path == "/stats":
+            await self._send_json(writer, 200, self.service.stats())
+        elif path == "/metrics":
+            text = default_registry.to_prometheus()
+            scheduler = get_tool_scheduler()
+            if scheduler is not None:
+                text += scheduler.to_prometheus()
+            await self._send(
+                writer, 200, text.encode("utf-8"), "text/plain; version=0.0.4"
+            )
+        else:
+            await self._query(body, writer)
+
+    async def _query(self, body: bytes, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise _HTTPError(400, "body must be JSON") from None
+        query = request.get("query") if isinstance(request, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            raise _HTTPError(400, "'query' must be a non-empty string")
+        turn_limit = request.get("chat_turn_limit")
+        if turn_limit is not None and (not isinstance(turn_limit, int) or turn_limit < 1):
+            raise _HTTPError(400, "'chat_turn_limit' must be a positive integer")
+
+        try:
+            if request.get("stream"):
+                await self._stream(query, turn_limit, writer)
+                return
+            answer, metrics = await self.service.query(query, turn_limit)
+        except ServiceOverloaded as e:
+            raise _HTTPError(429, str(e), {"Retry-After": "5"}) from None
+        except asyncio.TimeoutError:
+            raise _HTTPError(504, "query timed out") from None
+        await self._send_json(writer, 200, {"answer": answer, "metrics": metrics})
+
+    async def _stream(
+        self, query: str, turn_limit: Optional[int], writer: asyncio.StreamWriter
+    ) -> None:
+        events = self.service.stream(query, turn_limit)
+        # Wait for admission before committing to a 200 response.
+        first = await events.__anext__()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        try:
+            event: Optional[QueryEvent] = first
+            while event is not None:
+                line = json.dumps(event.to_dict(), ensure_ascii=False, default=str)
+                self._write_chunk(writer, (line + "\n").encode("utf-8"))
+                await writer.drain()
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            error = {"type": "error", "error": f"{type(e).__name__}: {e}"}
+            self._write_chunk(writer, (json.dumps(error) + "\n").encode("utf-8"))
+        finally:
+            await events.aclose()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    async def _send_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Any,
+        headers: Optional[dict] = None,
+    ) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        await self._send(writer, status, body, "application/json", headers)
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: Optional[dict] = None,
+    ) -> None:
+        lines = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    unix_path: Optional[str] = None,
+    **service_kwargs: Any,
+) -> None:
+    """Run the HTTP service until interrupted.
+
+    Args:
+        host (str, optional): Interface to bind. (default: :obj:`"127.0.0.1"`)
+        port (int, optional): TCP port. (default: :obj:`8080`)
+        unix_path (str, optional): Unix socket path to listen on instead.
+        **service_kwargs: Arguments for :class:`RestaurantService`.
+    """
+    async with RestaurantService(**service_kwargs) as service:
+        await RestaurantHTTPServer(service, host, port, unix_path).serve_forever()
@@ -0,0 +1,84 @@
+"""Tool-related functionality for the restaurant finder.
+
+This module provides helpers around the Google Maps MCP tools, such as a pool
+of long-lived MCP connections shared across queries, per-tool rate limits, a
+process-wide scheduler and single-flight coalescing for the tool calls of all
+queries, compact place records parsed from tool results and speculative
+prefetching of place details. The MCP pool is imported lazily since it pulls
+in CAMEL's toolkits, and the prefetcher, scheduler and coalescer since they
+depend on the event and metrics modules, which import this package.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+from restaurant_deep_research.tools.places import PlaceRecord, PlaceStore, parse_places
+from restaurant_deep_research.tools.rate_limit import TokenBucket, ToolRateLimiter
+
+if TYPE_CHECKING:
+    from restaurant_deep_research.tools.coalescing import (
+        ToolCallCoalescer,
+        get_tool_coalescer,
+        set_tool_coalescer,
+    )
+    from restaurant_deep_research.tools.prefetch import PlacePrefetcher
+    from restaurant_deep_research.tools.scheduler import (
+        ToolScheduler,
+        get_tool_scheduler,
+        set_tool_scheduler,
+    )
+    from restaurant_deep_research.tools.pool import (
+        MCPToolkitPool,
+        PooledConnection,
+        get_mcp_pool,
+        start_mcp_pool,
+        stop_mcp_pool,
+    )
+
+_LAZY_ATTRIBUTES = {
+    "PlacePrefetcher": "restaurant_deep_research.tools.prefetch",
+    "MCPToolkitPool": "restaurant_deep_research.tools.pool",
+    "PooledConnection": "restaurant_deep_research.tools.pool",
+    "get_mcp_pool": "restaurant_deep_research.tools.pool",
+    "start_mcp_pool": "restaurant_deep_research.tools.pool",
+    "stop_mcp_pool": "restaurant_deep_research.tools.pool",
+    "ToolScheduler": "restaurant_deep_research.tools.scheduler",
+    "get_tool_scheduler": "restaurant_deep_research.tools.scheduler",
+    "set_tool_scheduler": "restaurant_deep_research.tools.scheduler",
+    "ToolCallCoalescer": "restaurant_deep_research.tools.coalescing",
+    "get_tool_coalescer": "restaurant_deep_research.tools.coalescing",
+    "set_tool_coalescer": "restaurant_deep_research.tools.coalescing",
+}
+
+__all__ = [
+    "MCPToolkitPool",
+    "PooledConnection",
+    "get_mcp_pool",
+    "start_mcp_pool",
+    "stop_mcp_pool",
+    "TokenBucket",
+    "ToolRateLimiter",
+    "ToolScheduler",
+    "get_tool_scheduler",
+    "set_tool_scheduler",
+    "ToolCallCoalescer",
+    "get_tool_coalescer",
+    "set_tool_coalescer",
+    "PlaceRecord",
+    "PlaceStore",
+    "parse_places",
+    "PlacePrefetcher",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
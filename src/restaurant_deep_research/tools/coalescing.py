@@ -0,0 +1,154 @@
+"""
+Single-flight coalescing of identical in-flight tool calls.
+
+When several concurrent queries target the same area, their assistants often
+issue the exact same ``maps_search_places`` or ``maps_geocode`` call within
+the same second. The tool result cache only helps once the first call has
+returned, so until then every duplicate goes to the Google Maps API.
+
+A :class:`ToolCallCoalescer` wraps the MCP tools of every query in the
+process. Calls are keyed on the tool name and canonicalized arguments with
+:func:`~restaurant_deep_research.tools.wrapping.tool_call_key`, so the key
+does not depend on which pooled MCP connection serves a query: the first
+call goes upstream and identical calls that arrive while it is in flight
+await its result. Callers share the result object, which must therefore not
+be mutated.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from restaurant_deep_research.metrics import record_tool_coalescing
+from restaurant_deep_research.tools.wrapping import ToolCall, tool_call_key, wrap_tool
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+
+class _Flight:
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.callers = 0
+
+
+class ToolCallCoalescer:
+    """Share one upstream call between identical concurrent tool calls.
+
+    The upstream call runs in its own task, so a caller that is cancelled
+    does not cancel it for the others; it is only cancelled once every
+    caller waiting for it was. Exceptions are raised to all callers.
+
+    Args:
+        tools (Iterable[str], optional): Names of the tools to coalesce, or
+            :obj:`None` for all tools. Only read-only tools should be
+            coalesced; all Google Maps MCP tools are. (default: :obj:`None`)
+    """
+
+    def __init__(self, tools: Optional[Iterable[str]] = None):
+        self.tools = frozenset(tools) if tools is not None else None
+        self._flights: Dict[str, _Flight] = {}
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._coalesced: Dict[str, int] = defaultdict(int)
+
+    def wrap_tools(self, tools: List["FunctionTool"]) -> List["FunctionTool"]:
+        """Return coalescing versions of ``tools``.
+
+        Args:
+            tools (List[FunctionTool]): The MCP tools to wrap.
+
+        Returns:
+            List[FunctionTool]: Tools with identical names and schemas.
+        """
+        return [
+            wrap_tool(tool, self._call)
+            if self.tools is None or tool.get_function_name() in self.tools
+            else tool
+            for tool in tools
+        ]
+
+    def stats(self) -> dict:
+        """Return upstream and coalesced calls overall and per tool.
+
+        Returns:
+            dict: ``calls`` sent upstream, ``coalesced`` calls that awaited
+                an identical call instead, the resulting ``coalesced_rate``
+                and the calls currently ``in_flight``.
+        """
+        calls = sum(self._calls.values())
+        coalesced = sum(self._coalesced.values())
+        total = calls + coalesced
+        return {
+            "calls": calls,
+            "coalesced": coalesced,
+            "coalesced_rate": round(coalesced / total, 4) if total else 0.0,
+            "in_flight": len(self._flights),
+            "tools": {
+                name: {"calls": count, "coalesced": self._coalesced.get(name, 0)}
+                for name, count in self._calls.items()
+            },
+        }
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _done(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        # Retrieve the exception so that an upstream call whose callers were
+        # all cancelled is not reported as never retrieved.
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    async def _call(
+        self, tool_name: str, kwargs: Dict[str, Any], call_original: ToolCall
+    ) -> Any:
+        key = tool_call_key(tool_name, kwargs)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call_original(**kwargs)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._done(key, flight))
+            self._calls[tool_name] += 1
+            record_tool_coalescing("upstream")
+        else:
+            self._coalesced[tool_name] += 1
+            record_tool_coalescing("coalesced")
+        flight.callers += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                flight.callers -= 1
+                if not flight.callers:
+                    # Later identical calls must not join a cancelled call.
+                    self._forget(key, flight)
+                    flight.task.cancel()
+            raise
+
+
+_default_coalescer: Optional[ToolCallCoalescer] = None
+
+
+def get_tool_coalescer() -> Optional[ToolCallCoalescer]:
+    """Return the process-wide coalescer set with :func:`set_tool_coalescer`."""
+    return _default_coalescer
+
+
+def set_tool_coalescer(
+    coalescer: Optional[ToolCallCoalescer],
+) -> Optional[ToolCallCoalescer]:
+    """Coalesce identical MCP tool calls of all queries through ``coalescer``.
+
+    Args:
+        coalescer (ToolCallCoalescer, optional): The coalescer, or
+            :obj:`None` to stop coalescing.
+
+    Returns:
+        ToolCallCoalescer, optional: The previous coalescer.
+    """
+    global _default_coalescer
+    previous, _default_coalescer = _default_coalescer, coalescer
+    return previous
@@ -0,0 +1,395 @@
+"""
+Structured place records extracted from Google Maps tool results.
+
+The Maps MCP tools return verbose JSON (every search hit with its types and
+geometry, details with all reviews and the full week of opening hours) that
+the assistant receives as raw text and that stays in its memory for the rest
+of the conversation. :class:`PlaceStore` wraps the tools, parses each result
+into compact :class:`PlaceRecord` objects deduplicated by place_id, and hands
+the model a trimmed projection with only the fields it needs. The store
+keeps the merged records, so callers get machine-readable results next to
+the prose answer.
+"""
+
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from restaurant_deep_research.tools.wrapping import (
+    ToolCall,
+    looks_like_tool_error,
+    wrap_tool,
+)
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+# Fields the model sees for search hits and for place details.
+SEARCH_FIELDS: Tuple[str, ...] = (
+    "place_id",
+    "name",
+    "address",
+    "location",
+    "rating",
+    "user_ratings_total",
+    "price_level",
+    "open_now",
+)
+DETAILS_FIELDS: Tuple[str, ...] = SEARCH_FIELDS + (
+    "opening_hours",
+    "phone",
+    "website",
+    "reviews",
+)
+DETAILS_TOOLS = frozenset({"maps_place_details"})
+
+
+class PlaceRecord:
+    """One place, with the fields the agents use.
+
+    Attributes:
+        place_id (str, optional): Google place ID.
+        name (str): Place name.
+        address (str, optional): Formatted address or vicinity.
+        lat (float, optional): Latitude.
+        lng (float, optional): Longitude.
+        rating (float, optional): Average rating.
+        user_ratings_total (int, optional): Number of ratings.
+        price_level (int, optional): Price level from 0 to 4.
+        open_now (bool, optional): Whether the place was open when fetched.
+        opening_hours (Tuple[str, ...]): Opening hours per weekday.
+        phone (str, optional): Phone number.
+        website (str, optional): Website URL.
+        types (Tuple[str, ...]): Place types.
+        reviews (Tuple[Tuple[int, str], ...]): Rating and text of reviews.
+    """
+
+    __slots__ = (
+        "place_id",
+        "name",
+        "address",
+        "lat",
+        "lng",
+        "rating",
+        "user_ratings_total",
+        "price_level",
+        "open_now",
+        "opening_hours",
+        "phone",
+        "website",
+        "types",
+        "reviews",
+    )
+
+    def __init__(self, name: str, place_id: Optional[str] = None, **fields: Any):
+        self.name = name
+        self.place_id = place_id
+        for slot in self.__slots__[2:]:
+            setattr(self, slot, fields.pop(slot, None))
+        if fields:
+            raise TypeError(f"unknown place fields: {', '.join(fields)}")
+        self.opening_hours = tuple(self.opening_hours or ())
+        self.types = tuple(self.types or ())
+        self.reviews = tuple(self.reviews or ())
+
+    @classmethod
+    def from_result(
+        cls, item: Dict[str, Any], place_id: Optional[str] = None
+    ) -> Optional["PlaceRecord"]:
+        """Parse one place object of a Maps result.
+
+        Args:
+            item (Dict[str, Any]): A search hit or a details result.
+            place_id (str, optional): ID to use when ``item`` has none, e.g.
+                the argument of a details call. (default: :obj:`None`)
+
+        Returns:
+            PlaceRecord, optional: The record, or :obj:`None` if ``item`` is
+                not a named place.
+        """
+        if not isinstance(item, dict) or not item.get("name"):
+            return None
+        location = item.get("location") or (item.get("geometry") or {}).get("location")
+        location = location if isinstance(location, dict) else {}
+        hours = item.get("opening_hours") or item.get("current_opening_hours") or {}
+        hours = hours if isinstance(hours, dict) else {}
+        reviews = item.get("reviews") or []
+        return cls(
+            name=str(item["name"]),
+            place_id=item.get("place_id") or place_id,
+            address=item.get("formatted_address")
+            or item.get("address")
+            or item.get("vicinity"),
+            lat=location.get("lat"),
+            lng=location.get("lng"),
+            rating=item.get("rating"),
+            user_ratings_total=item.get("user_ratings_total"),
+            price_level=item.get("price_level"),
+            open_now=hours.get("open_now"),
+            opening_hours=hours.get("weekday_text") or (),
+            phone=item.get("formatted_phone_number")
+            or item.get("international_phone_number"),
+            website=item.get("website"),
+            types=item.get("types") or (),
+            reviews=[
+                (review.get("rating"), str(review.get("text", "")))
+                for review in reviews
+                if isinstance(review, dict)
+            ],
+        )
+
+    @property
+    def key(self) -> str:
+        """Deduplication key: the place ID, else the name and address."""
+        return self.place_id or f"{self.name}|{self.address or ''}"
+
+    def merge(self, other: "PlaceRecord") -> None:
+        """Fill in or update fields from a newer record of the same place.
+
+        Args:
+            other (PlaceRecord): The newer record.
+        """
+        for slot in self.__slots__:
+            value = getattr(other, slot)
+            if value is not None and value != ():
+                setattr(self, slot, value)
+
+    def project(
+        self,
+        fields: Sequence[str] = DETAILS_FIELDS,
+        max_reviews: int = 3,
+        review_chars: int = 200,
+    ) -> Dict[str, Any]:
+        """Return the given fields as a JSON-serializable dict.
+
+        Missing fields are omitted; ``location`` combines ``lat`` and
+        ``lng``, and reviews are limited and truncated.
+
+        Args:
+            fields (Sequence[str], optional): Fields to include.
+                (default: :obj:`DETAILS_FIELDS`)
+            max_reviews (int, optional): Reviews to include.
+                (default: :obj:`3`)
+            review_chars (int, optional): Characters kept per review.
+                (default: :obj:`200`)
+
+        Returns:
+            Dict[str, Any]: The projection.
+        """
+        data: Dict[str, Any] = {}
+        for name in fields:
+            if name == "location":
+                if self.lat is not None and self.lng is not None:
+                    data["location"] = {"lat": self.lat, "lng": self.lng}
+            elif name == "reviews":
+                if self.reviews and max_reviews > 0:
+                    data["reviews"] = [
+                        {"rating": rating, "text": text[:review_chars]}
+                        for rating, text in self.reviews[:max_reviews]
+                    ]
+            else:
+                value = getattr(self, name)
+                if value is not None and value != ():
+                    data[name] = list(value) if isinstance(value, tuple) else value
+        return data
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return every known field as a JSON-serializable dict."""
+        data = self.project(DETAILS_FIELDS, max_reviews=len(self.reviews), review_chars=10**6)
+        if self.types:
+            data["types"] = list(self.types)
+        return data
+
+    def __repr__(self) -> str:
+        return f"PlaceRecord(name={self.name!r}, place_id={self.place_id!r})"
+
+
+def parse_places(result: Any, args: Optional[Dict[str, Any]] = None) -> List[PlaceRecord]:
+    """Parse the places in a Google Maps tool result.
+
+    Handles place searches (a ``places`` or ``results`` list) and place
+    details (a single named object, possibly under ``result``).
+
+    Args:
+        result (Any): The tool result, as JSON text or decoded.
+        args (Dict[str, Any], optional): The call's arguments, whose
+            ``place_id`` identifies details results that omit it.
+            (default: :obj:`None`)
+
+    Returns:
+        List[PlaceRecord]: The places, in result order.
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return []
+    if not isinstance(result, dict):
+        return []
+    items = result.get("places") or result.get("results")
+    if isinstance(items, list):
+        place_id = None
+    else:
+        items = [result.get("result", result)]
+        place_id = (args or {}).get("place_id")
+    records = []
+    for item in items:
+        record = PlaceRecord.from_result(item, place_id)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+class PlaceStore:
+    """Places seen in one conversation, deduplicated by place_id.
+
+    :meth:`wrap_tools` routes every Maps tool result through the store.
+    Results containing places are replaced, for the model, by a compact
+    JSON projection (:data:`SEARCH_FIELDS` for searches,
+    :data:`DETAILS_FIELDS` for details); other results pass through
+    unchanged.
+
+    Args:
+        project_results (bool, optional): Replace place results with their
+            projection. With :obj:`False` the store only collects records.
+            (default: :obj:`True`)
+        max_reviews (int, optional): Reviews included in details
+            projections. (default: :obj:`3`)
+        review_chars (int, optional): Characters kept per review.
+            (default: :obj:`200`)
+    """
+
+    def __init__(
+        self,
+        project_results: bool = True,
+        max_reviews: int = 3,
+        review_chars: int = 200,
+    ):
+        self.project_results = project_results
+        self.max_reviews = max_reviews
+        self.review_chars = review_chars
+        self._places: Dict[str, PlaceRecord] = {}
+        self._results_compacted = 0
+        self._raw_chars = 0
+        self._projected_chars = 0
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def __iter__(self) -> Iterator[PlaceRecord]:
+        return iter(self._places.values())
+
+    def __contains__(self, place_id: object) -> bool:
+        return place_id in self._places
+
+    def get(self, place_id: str) -> Optional[PlaceRecord]:
+        """Return the record of ``place_id``, if it has been seen."""
+        return self._places.get(place_id)
+
+    def add(self, record: PlaceRecord) -> PlaceRecord:
+        """Insert a record or merge it into the existing one.
+
+        Args:
+            record (PlaceRecord): The record to add.
+
+        Returns:
+            PlaceRecord: The stored record.
+        """
+        existing = self._places.get(record.key)
+        if existing is None:
+            self._places[record.key] = record
+            return record
+        existing.merge(record)
+        return existing
+
+    def ingest(
+        self, tool_name: str, args: Optional[Dict[str, Any]], result: Any
+    ) -> List[PlaceRecord]:
+        """Add the places of one tool result to the store.
+
+        Args:
+            tool_name (str): Name of the tool.
+            args (Dict[str, Any], optional): Arguments of the call.
+            result (Any): The tool result.
+
+        Returns:
+            List[PlaceRecord]: The stored records, in result order.
+        """
+        return [self.add(record) for record in parse_places(result, args)]
+
+    def project(self, tool_name: str, records: List[PlaceRecord]) -> str:
+        """Render records as the compact result the model receives.
+
+        Args:
+            tool_name (str): Name of the tool that returned them.
+            records (List[PlaceRecord]): The records.
+
+        Returns:
+            str: JSON text; a single object for details tools, else an
+                object with a ``places`` list.
+        """
+        fields = DETAILS_FIELDS if tool_name in DETAILS_TOOLS else SEARCH_FIELDS
+        projected = [
+            record.project(fields, self.max_reviews, self.review_chars)
+            for record in records
+        ]
+        payload = (
+            projected[0]
+            if tool_name in DETAILS_TOOLS and len(projected) == 1
+            else {"places": projected}
+        )
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+    def wrap_tools(self, tools: List["FunctionTool"]) -> List["FunctionTool"]:
+        """Wrap tools so that their place results go through the store.
+
+        Args:
+            tools (List[FunctionTool]): Tools to wrap.
+
+        Returns:
+            List[FunctionTool]: Wrapped tools with the same names and
+                schemas.
+        """
+        return [wrap_tool(tool, self._handle) for tool in tools]
+
+    async def _handle(
+        self, tool_name: str, kwargs: Dict[str, Any], call: ToolCall
+    ) -> Any:
+        result = await call(**kwargs)
+        if looks_like_tool_error(result):
+            return result
+        records = self.ingest(tool_name, kwargs, result)
+        if not records or not self.project_results:
+            return result
+        raw = result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+        projected = self.project(tool_name, records)
+        if len(projected) >= len(raw):
+            return result
+        self._results_compacted += 1
+        self._raw_chars += len(raw)
+        self._projected_chars += len(projected)
+        return projected
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Return every stored place with all known fields."""
+        return [record.as_dict() for record in self._places.values()]
+
+    def clear(self) -> None:
+        """Forget all places and reset the statistics."""
+        self._places.clear()
+        self._results_compacted = 0
+        self._raw_chars = 0
+        self._projected_chars = 0
+
+    def stats(self) -> dict:
+        """Return the number of places and the size reduction of results.
+
+        Returns:
+            dict: ``places``, ``results_compacted``, ``raw_chars`` and
+                ``projected_chars``.
+        """
+        return {
+            "places": len(self._places),
+            "results_compacted": self._results_compacted,
+            "raw_chars": self._raw_chars,
+            "projected_chars": self._projected_chars,
+        }
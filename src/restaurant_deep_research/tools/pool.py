@@ -0,0 +1,459 @@
+"""
+Pooled, long-lived MCP connections.
+
+Starting the Google Maps MCP server means spawning ``npx`` and resolving the
+package, which costs seconds per query. This module keeps a configurable number
+of ``MCPToolkit`` connections alive for the lifetime of the process, checks
+their health in the background, reconnects them when they fail and leases them
+to queries so that many ``process_restaurant_query`` calls share the same
+server processes.
+"""
+
+import asyncio
+import contextlib
+import itertools
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from camel.logger import get_logger
+from camel.toolkits import FunctionTool, MCPToolkit
+
+logger = get_logger(__name__)
+
+
+class PooledConnection:
+    """A single MCP toolkit connection owned by a :class:`MCPToolkitPool`.
+
+    The MCP stdio transport must be entered and exited from the same task, so
+    every connection is driven by a dedicated owner task that connects, waits
+    until it is asked to restart or stop, and then disconnects. A connection
+    asked to restart first drains: it takes no new leases and waits for the
+    queries still holding its tools to finish, or for ``drain_timeout``.
+
+    Attributes:
+        index (int): Position of the connection in the pool.
+        toolkit (MCPToolkit, optional): The connected toolkit, if any.
+        tools (List[FunctionTool]): Tools discovered on the last connect.
+        active_leases (int): Number of queries currently using the connection.
+        draining (bool): Whether the connection waits for its leases to end
+            before reconnecting.
+        connect_count (int): How many times the connection has been opened.
+        last_error (BaseException, optional): The last connect or health
+            check failure.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        toolkit_factory: Callable[[], MCPToolkit],
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        drain_timeout: Optional[float] = 120.0,
+    ):
+        self.index = index
+        self.toolkit: Optional[MCPToolkit] = None
+        self.tools: List[FunctionTool] = []
+        self.active_leases = 0
+        self.draining = False
+        self.connect_count = 0
+        self.last_error: Optional[BaseException] = None
+
+        self._toolkit_factory = toolkit_factory
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._drain_timeout = drain_timeout
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        """bool: Whether the connection is open and usable."""
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        """Spawn the owner task that keeps this connection open."""
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> None:
+        """Wait until the connection is open.
+
+        Args:
+            timeout (float, optional): Seconds to wait before giving up.
+                (default: :obj:`None`)
+        """
+        await asyncio.wait_for(self._ready.wait(), timeout)
+
+    def acquire(self) -> None:
+        """Count a query that starts using this connection's tools."""
+        self.active_leases += 1
+        self._idle.clear()
+
+    def release(self) -> None:
+        """Count a query that stopped using this connection's tools."""
+        self.active_leases -= 1
+        if not self.active_leases:
+            self._idle.set()
+
+    def request_reconnect(self) -> None:
+        """Ask the owner task to drain, close and reopen the connection."""
+        self._ready.clear()
+        self._wake.set()
+
+    async def stop(self) -> None:
+        """Disconnect and stop the owner task."""
+        self._closing = True
+        self._ready.clear()
+        self._wake.set()
+        if self._task is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def check_health(self, timeout: float) -> bool:
+        """Ping every MCP server behind the toolkit.
+
+        Args:
+            timeout (float): Seconds to wait for each ping.
+
+        Returns:
+            bool: :obj:`True` if every server answered.
+        """
+        toolkit = self.toolkit
+        if toolkit is None or not self.healthy:
+            return False
+        try:
+            for server in getattr(toolkit, "servers", []):
+                session = getattr(server, "_session", None) or getattr(
+                    server, "session", None
+                )
+                if session is None:
+                    return False
+                if hasattr(session, "send_ping"):
+                    await asyncio.wait_for(session.send_ping(), timeout)
+        except Exception as e:
+            self.last_error = e
+            return False
+        return True
+
+    async def _run(self) -> None:
+        delay = self._reconnect_delay
+        while not self._closing:
+            toolkit = self._toolkit_factory()
+            try:
+                await toolkit.connect()
+                tools = toolkit.get_tools()
+            except Exception as e:
+                self.last_error = e
+                logger.warning(
+                    f"MCP connection #{self.index} failed to connect: {e!r}; "
+                    f"retrying in {delay:.1f}s"
+                )
+                with contextlib.suppress(Exception):
+                    await toolkit.disconnect()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                delay = min(delay * 2, self._max_reconnect_delay)
+                continue
+
+            delay = self._reconnect_delay
+            self.toolkit = toolkit
+            self.tools = tools
+            self.connect_count += 1
+            self._ready.set()
+            logger.info(
+                f"MCP connection #{self.index} ready with {len(tools)} tools"
+            )
+
+            await self._wake.wait()
+            self._wake.clear()
+            self._ready.clear()
+            if not self._closing:
+                await self._drain()
+            try:
+                await toolkit.disconnect()
+            except Exception as e:
+                logger.warning(f"MCP connection #{self.index} disconnect failed: {e!r}")
+            self.toolkit = None
+            self.tools = []
+
+    async def _drain(self) -> None:
+        """Wait for leased tools to be returned before disconnecting, unless
+        the connection is stopped meanwhile."""
+        if self._idle.is_set():
+            return
+        logger.info(
+            f"MCP connection #{self.index} draining {self.active_leases} "
+            "lease(s) before reconnecting"
+        )
+        self.draining = True
+        waiters = [
+            asyncio.ensure_future(self._idle.wait()),
+            asyncio.ensure_future(self._wake.wait()),
+        ]
+        try:
+            done, _ = await asyncio.wait(
+                waiters,
+                timeout=self._drain_timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            self.draining = False
+        if not done:
+            logger.warning(
+                f"MCP connection #{self.index} still has {self.active_leases} "
+                f"lease(s) after {self._drain_timeout}s; reconnecting anyway"
+            )
+
+
+class MCPToolkitPool:
+    """A pool of long-lived MCP toolkit connections.
+
+    MCP sessions multiplex concurrent requests, so a connection may be leased
+    by several queries at once; :meth:`lease` always hands out the healthy
+    connection with the fewest active leases.
+
+    Args:
+        size (int, optional): Number of MCP connections to keep open.
+            (default: :obj:`1`)
+        config_path (str, optional): Path to the MCP servers config. Defaults
+            to the config resolved by :func:`load_mcp_config`.
+            (default: :obj:`None`)
+        toolkit_factory (Callable[[], MCPToolkit], optional): Factory for new
+            toolkits, overriding ``config_path``. (default: :obj:`None`)
+        health_check_interval (float, optional): Seconds between background
+            health checks, or :obj:`None` to disable them.
+            (default: :obj:`30.0`)
+        health_check_timeout (float, optional): Seconds to wait for a ping.
+            (default: :obj:`5.0`)
+        connect_timeout (float, optional): Seconds :meth:`start` and
+            :meth:`lease` wait for a connection to come up.
+            (default: :obj:`60.0`)
+        drain_timeout (float, optional): Seconds an unhealthy connection
+            waits for its active leases to end before reconnecting, or
+            :obj:`None` to wait indefinitely. (default: :obj:`120.0`)
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        config_path: Optional[str] = None,
+        toolkit_factory: Optional[Callable[[], MCPToolkit]] = None,
+        health_check_interval: Optional[float] = 30.0,
+        health_check_timeout: float = 5.0,
+        connect_timeout: float = 60.0,
+        drain_timeout: Optional[float] = 120.0,
+    ):
+        if size < 1:
+            raise ValueError("MCPToolkitPool size must be at least 1")
+        if toolkit_factory is None:
+            from restaurant_deep_research.config.mcp import (
+                create_mcp_toolkit,
+                load_mcp_config,
+            )
+
+            # Validate now so a broken config fails here, not on connect.
+            load_mcp_config(config_path)
+
+            def toolkit_factory() -> MCPToolkit:
+                return create_mcp_toolkit(config_path)
+
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.connect_timeout = connect_timeout
+        self.drain_timeout = drain_timeout
+
+        self._toolkit_factory = toolkit_factory
+        self._connections: List[PooledConnection] = []
+        self._health_task: Optional[asyncio.Task] = None
+        self._round_robin = itertools.count()
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        """bool: Whether :meth:`start` has been called without :meth:`stop`."""
+        return self._started
+
+    async def start(self) -> "MCPToolkitPool":
+        """Open every connection and start the health checker.
+
+        Returns:
+            MCPToolkitPool: The pool itself, for chaining.
+        """
+        if self._started:
+            return self
+        self._connections = [
+            PooledConnection(
+                i, self._toolkit_factory, drain_timeout=self.drain_timeout
+            )
+            for i in range(self.size)
+        ]
+        for connection in self._connections:
+            connection.start()
+        self._started = True
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(c.wait_ready() for c in self._connections)),
+                self.connect_timeout,
+            )
+        except asyncio.TimeoutError:
+            if not any(c.healthy for c in self._connections):
+                await self.stop()
+                raise
+            logger.warning("Some MCP connections are still starting up")
+        if self.health_check_interval:
+            self._health_task = asyncio.create_task(self._health_loop())
+        return self
+
+    async def stop(self) -> None:
+        """Stop the health checker and disconnect every connection."""
+        self._started = False
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._health_task
+            self._health_task = None
+        await asyncio.gather(
+            *(c.stop() for c in self._connections), return_exceptions=True
+        )
+        self._connections = []
+
+    async def __aenter__(self) -> "MCPToolkitPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    @contextlib.asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledConnection]:
+        """Lease a healthy connection for the duration of a query.
+
+        Yields:
+            PooledConnection: The leased connection. Use its ``tools``.
+        """
+        if not self._started:
+            raise RuntimeError("MCPToolkitPool.start() must be called first")
+        connection = await self._pick_connection()
+        connection.acquire()
+        try:
+            yield connection
+        finally:
+            connection.release()
+
+    async def check_health(self) -> Dict[int, bool]:
+        """Check every connection and reconnect the unhealthy ones.
+
+        Returns:
+            Dict[int, bool]: Health of each connection, keyed by index.
+        """
+        results = await asyncio.gather(
+            *(c.check_health(self.health_check_timeout) for c in self._connections)
+        )
+        health = {}
+        for connection, ok in zip(self._connections, results):
+            health[connection.index] = ok
+            if not ok and connection.healthy:
+                logger.warning(
+                    f"MCP connection #{connection.index} failed health check: "
+                    f"{connection.last_error!r}; reconnecting"
+                )
+                connection.request_reconnect()
+        return health
+
+    def stats(self) -> List[dict]:
+        """Return a snapshot of every connection in the pool.
+
+        Returns:
+            List[dict]: One entry per connection.
+        """
+        return [
+            {
+                "index": c.index,
+                "healthy": c.healthy,
+                "draining": c.draining,
+                "active_leases": c.active_leases,
+                "connect_count": c.connect_count,
+                "tools": len(c.tools),
+                "last_error": repr(c.last_error) if c.last_error else None,
+            }
+            for c in self._connections
+        ]
+
+    async def _pick_connection(self) -> PooledConnection:
+        healthy = [c for c in self._connections if c.healthy]
+        if not healthy:
+            waiters = [
+                asyncio.ensure_future(c.wait_ready()) for c in self._connections
+            ]
+            try:
+                done, _ = await asyncio.wait(
+                    waiters,
+                    timeout=self.connect_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            healthy = [c for c in self._connections if c.healthy]
+            if not healthy:
+                raise ConnectionError("No healthy MCP connection available")
+        offset = next(self._round_robin)
+        rotated = healthy[offset % len(healthy):] + healthy[: offset % len(healthy)]
+        return min(rotated, key=lambda c: c.active_leases)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.warning(f"MCP health check failed: {e!r}")
+
+
+_default_pool: Optional[MCPToolkitPool] = None
+
+
+async def start_mcp_pool(size: int = 1, **kwargs) -> MCPToolkitPool:
+    """Start the process-wide MCP pool used by ``process_restaurant_query``.
+
+    Args:
+        size (int, optional): Number of MCP connections. (default: :obj:`1`)
+        **kwargs: Further arguments for :class:`MCPToolkitPool`.
+
+    Returns:
+        MCPToolkitPool: The started pool.
+    """
+    global _default_pool
+    if _default_pool is None or not _default_pool.started:
+        _default_pool = MCPToolkitPool(size=size, **kwargs)
+        await _default_pool.start()
+    return _default_pool
+
+
+async def stop_mcp_pool() -> None:
+    """Stop the process-wide MCP pool, if one is running."""
+    global _default_pool
+    if _default_pool is not None:
+        pool, _default_pool = _default_pool, None
+        await pool.stop()
+
+
+def get_mcp_pool() -> Optional[MCPToolkitPool]:
+    """Return the process-wide MCP pool if it has been started.
+
+    Returns:
+        MCPToolkitPool, optional: The running pool, or :obj:`None`.
+    """
+    if _default_pool is not None and _default_pool.started:
+        return _default_pool
+    return None
@@ -0,0 +1,201 @@
+"""
+Speculative prefetch of place details.
+
+The role-playing conversation is predictable: the user agent asks for a
+place search, and its next instruction almost always asks for details or
+reviews of the top hits. :class:`PlacePrefetcher` watches search results in
+the assistant's tools and, while the user agent is still writing that next
+instruction, fetches details of the top-K places in the background. The
+assistant's follow-up ``maps_place_details`` calls are then served from the
+prefetched results, or join the fetch that is still in flight.
+
+Prefetched results expire after a short TTL and are dropped when the
+conversation is reset. Hits, misses and prefetches that were never used
+(wasted calls) are counted per prefetcher and in the query metrics.
+"""
+
+import asyncio
+import inspect
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from camel.logger import get_logger
+
+from restaurant_deep_research.events import event_sink
+from restaurant_deep_research.metrics import phase, record_prefetch
+from restaurant_deep_research.tools.places import parse_places
+from restaurant_deep_research.tools.wrapping import (
+    ToolCall,
+    looks_like_tool_error,
+    wrap_tool,
+)
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+logger = get_logger(__name__)
+
+SEARCH_TOOLS = ("maps_search_places",)
+DETAILS_TOOL = "maps_place_details"
+
+
+class _Prefetch:
+    __slots__ = ("task", "expires_at", "used")
+
+    def __init__(self, task: "asyncio.Future", expires_at: float):
+        self.task = task
+        self.expires_at = expires_at
+        self.used = False
+
+
+class PlacePrefetcher:
+    """Fetch details of the top search hits before the assistant asks.
+
+    Args:
+        top_k (int, optional): Hits of each search to prefetch.
+            (default: :obj:`3`)
+        ttl (float, optional): Seconds a prefetched result may be served.
+            (default: :obj:`120.0`)
+        max_concurrency (int, optional): Prefetches in flight at once.
+            (default: :obj:`3`)
+        search_tools (Iterable[str], optional): Tools whose results trigger
+            prefetching. (default: :obj:`SEARCH_TOOLS`)
+        details_tool (str, optional): Tool used to fetch details.
+            (default: :obj:`DETAILS_TOOL`)
+    """
+
+    def __init__(
+        self,
+        top_k: int = 3,
+        ttl: float = 120.0,
+        max_concurrency: int = 3,
+        search_tools: Iterable[str] = SEARCH_TOOLS,
+        details_tool: str = DETAILS_TOOL,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.top_k = top_k
+        self.ttl = ttl
+        self.search_tools = frozenset(search_tools)
+        self.details_tool = details_tool
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._fetch_details: Optional[Callable[..., Any]] = None
+        self._entries: Dict[str, _Prefetch] = {}
+        self._counts = {"issued": 0, "used": 0, "hits": 0, "misses": 0, "errors": 0}
+
+    def wrap_tools(self, tools: List["FunctionTool"]) -> List["FunctionTool"]:
+        """Wrap the search and details tools; other tools are unchanged.
+
+        Without a details tool among ``tools`` nothing can be prefetched
+        and the tools are returned as they are.
+
+        Args:
+            tools (List[FunctionTool]): The assistant's tools.
+
+        Returns:
+            List[FunctionTool]: The tools, with search and details wrapped.
+        """
+        details = next(
+            (t for t in tools if t.get_function_name() == self.details_tool), None
+        )
+        if details is None:
+            logger.debug(f"No {self.details_tool} tool; prefetching disabled")
+            return tools
+        self._fetch_details = details.func
+        return [
+            wrap_tool(tool, self._handle)
+            if tool.get_function_name() in self.search_tools | {self.details_tool}
+            else tool
+            for tool in tools
+        ]
+
+    async def _handle(
+        self, tool_name: str, kwargs: Dict[str, Any], call: ToolCall
+    ) -> Any:
+        if tool_name == self.details_tool:
+            return await self._details(kwargs, call)
+        result = await call(**kwargs)
+        if self.top_k > 0 and not looks_like_tool_error(result):
+            for record in parse_places(result)[: self.top_k]:
+                if record.place_id:
+                    self._schedule(record.place_id)
+        return result
+
+    async def _details(self, kwargs: Dict[str, Any], call: ToolCall) -> Any:
+        place_id = kwargs.get("place_id")
+        entry = self._entries.get(place_id) if set(kwargs) == {"place_id"} else None
+        if entry is not None and entry.expires_at > time.monotonic():
+            try:
+                # Shielded so that a cancelled assistant step does not cancel
+                # a fetch other callers may still use.
+                result = await asyncio.shield(entry.task)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                result = None
+            if not looks_like_tool_error(result):
+                if not entry.used:
+                    entry.used = True
+                    self._count("used")
+                self._count("hits")
+                return result
+        self._count("misses")
+        return await call(**kwargs)
+
+    def _schedule(self, place_id: str) -> None:
+        entry = self._entries.get(place_id)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return
+        if entry is not None and not entry.task.done():
+            entry.task.cancel()
+        task = asyncio.ensure_future(self._prefetch(place_id))
+        task.add_done_callback(self._fetched)
+        self._entries[place_id] = _Prefetch(task, time.monotonic() + self.ttl)
+        self._count("issued")
+
+    async def _prefetch(self, place_id: str) -> Any:
+        # Speculative calls are not the assistant's; keep them out of its
+        # event stream but measure them.
+        with event_sink(None):
+            async with self._slots:
+                with phase("prefetch", place_id=place_id):
+                    result = self._fetch_details(place_id=place_id)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    return result
+
+    def _fetched(self, task: "asyncio.Future") -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None or looks_like_tool_error(task.result()):
+            self._count("errors")
+            if error is not None:
+                logger.debug(f"Prefetch failed: {error!r}")
+
+    def _count(self, name: str) -> None:
+        self._counts[name] += 1
+        record_prefetch(name)
+
+    def reset(self) -> None:
+        """Cancel pending prefetches, drop all results and zero the counters."""
+        for entry in self._entries.values():
+            if not entry.task.done():
+                entry.task.cancel()
+        self._entries.clear()
+        self._counts = dict.fromkeys(self._counts, 0)
+
+    def stats(self) -> dict:
+        """Return prefetch counters.
+
+        Returns:
+            dict: Prefetches ``issued`` and ``used``, details calls
+                served from them (``hits``) or not (``misses``), failed
+                prefetches (``errors``), prefetches not used so far
+                (``wasted``) and the ``hit_rate`` of details calls.
+        """
+        counts = dict(self._counts)
+        counts["wasted"] = counts["issued"] - counts["used"]
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 4) if lookups else 0.0
+        return counts
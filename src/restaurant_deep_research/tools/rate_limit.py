@@ -0,0 +1,232 @@
+"""
+Concurrency caps and rate limits for MCP tool calls.
+
+Running tool calls concurrently must not overwhelm the Google Maps API.
+:class:`ToolRateLimiter` wraps tools so that each one has at most
+``max_concurrency`` calls in flight and starts at most ``rate`` calls per
+second, using a :class:`TokenBucket` per tool.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from restaurant_deep_research.tools.wrapping import ToolCall, wrap_tool
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+# Refilling in floating point can leave a bucket a rounding error short of a
+# whole token; waiting for that would reschedule itself without end.
+_TOKEN_EPSILON = 1e-9
+
+
+class TokenBucket:
+    """Asynchronous token bucket.
+
+    Args:
+        rate (float): Tokens added per second.
+        burst (float, optional): Bucket capacity. Defaults to ``rate``, but
+            at least one token.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1.0, burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - max(self._updated, self._paused_until)
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def available_in(self, tokens: float = 1.0) -> float:
+        """Return the seconds until ``tokens`` can be taken, 0 if now.
+
+        Args:
+            tokens (float, optional): Number of tokens. (default: :obj:`1.0`)
+
+        Returns:
+            float: Seconds to wait.
+        """
+        self._refill()
+        if self._tokens + _TOKEN_EPSILON >= tokens:
+            return 0.0
+        paused = max(0.0, self._paused_until - self._updated)
+        return paused + (tokens - self._tokens) / self.rate
+
+    @property
+    def paused_seconds(self) -> float:
+        """Seconds left of the current :meth:`pause`, 0 if not paused."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` if they are available, without waiting.
+
+        Args:
+            tokens (float, optional): Number of tokens. (default: :obj:`1.0`)
+
+        Returns:
+            bool: Whether the tokens were taken.
+        """
+        if self.available_in(tokens):
+            return False
+        self._tokens -= tokens
+        return True
+
+    def pause(self, seconds: float) -> None:
+        """Empty the bucket and stop refilling it for ``seconds``.
+
+        Args:
+            seconds (float): Length of the pause.
+        """
+        self._refill()
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, self._updated + seconds)
+
+    def set_rate(self, rate: float) -> None:
+        """Change the refill rate, keeping the tokens accrued so far.
+
+        Args:
+            rate (float): Tokens added per second.
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self._refill()
+        self.rate = rate
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Wait until ``tokens`` are available and take them.
+
+        Waiters are served in arrival order.
+
+        Args:
+            tokens (float, optional): Number of tokens to take.
+                (default: :obj:`1.0`)
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                wait = self.available_in(tokens)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            self._tokens -= tokens
+        return time.monotonic() - start
+
+
+class ToolRateLimiter:
+    """Per-tool concurrency caps and rate limits.
+
+    One limiter can be shared by every society in a process, so that the
+    limits hold across concurrent queries.
+
+    Args:
+        max_concurrency (int, optional): Calls of one tool in flight at once.
+            (default: :obj:`4`)
+        rate (float, optional): Calls of one tool started per second, or
+            :obj:`None` for no rate limit. (default: :obj:`None`)
+        burst (float, optional): Calls that may start back to back before
+            ``rate`` applies. Defaults to ``rate``.
+        per_tool (Dict[str, dict], optional): Overrides keyed by tool name,
+            each a dict with any of ``max_concurrency``, ``rate`` and
+            ``burst``. (default: :obj:`None`)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        per_tool: Optional[Dict[str, dict]] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.per_tool = per_tool or {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._peak: Dict[str, int] = {}
+        self._waited: Dict[str, float] = {}
+
+    def _limits(self, tool_name: str) -> dict:
+        limits = {
+            "max_concurrency": self.max_concurrency,
+            "rate": self.rate,
+            "burst": self.burst,
+        }
+        limits.update(self.per_tool.get(tool_name, {}))
+        return limits
+
+    def _semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._limits(tool_name)["max_concurrency"])
+            self._semaphores[tool_name] = semaphore
+        return semaphore
+
+    def _bucket(self, tool_name: str) -> Optional[TokenBucket]:
+        if tool_name not in self._buckets:
+            limits = self._limits(tool_name)
+            self._buckets[tool_name] = (
+                TokenBucket(limits["rate"], limits["burst"])
+                if limits["rate"]
+                else None
+            )
+        return self._buckets[tool_name]
+
+    def wrap_tools(self, tools: List["FunctionTool"]) -> List["FunctionTool"]:
+        """Return rate-limited versions of ``tools``.
+
+        Args:
+            tools (List[FunctionTool]): The tools to wrap.
+
+        Returns:
+            List[FunctionTool]: Tools with identical names and schemas.
+        """
+        return [wrap_tool(tool, self._call) for tool in tools]
+
+    def stats(self) -> dict:
+        """Return peak concurrency and rate-limit waiting time per tool.
+
+        Returns:
+            dict: ``{"peak_concurrency": ..., "waited_seconds": ...}`` keyed
+                by tool name.
+        """
+        return {
+            "peak_concurrency": dict(self._peak),
+            "waited_seconds": {
+                name: round(seconds, 3) for name, seconds in self._waited.items()
+            },
+        }
+
+    async def _call(
+        self, tool_name: str, kwargs: Dict[str, Any], call_original: ToolCall
+    ) -> Any:
+        async with self._semaphore(tool_name):
+            bucket = self._bucket(tool_name)
+            if bucket is not None:
+                waited = await bucket.acquire()
+                self._waited[tool_name] = self._waited.get(tool_name, 0.0) + waited
+            in_flight = self._in_flight.get(tool_name, 0) + 1
+            self._in_flight[tool_name] = in_flight
+            self._peak[tool_name] = max(self._peak.get(tool_name, 0), in_flight)
+            try:
+                return await call_original(**kwargs)
+            finally:
+                self._in_flight[tool_name] -= 1
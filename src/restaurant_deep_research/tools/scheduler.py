@@ -0,0 +1,468 @@
+"""
+Process-wide scheduling of Google Maps tool calls.
+
+:class:`~restaurant_deep_research.tools.rate_limit.ToolRateLimiter` caps the
+parallel tool calls of one agent, but under concurrent load many societies
+call the same Maps tools at once and nothing coordinates them: bursts exceed
+the API key's QPS quota, the server answers ``OVER_QUERY_LIMIT``, and the
+agents' retries make the storm worse.
+
+A :class:`ToolScheduler` sits in front of the MCP tool functions of every
+query in the process. Each call waits for a token from the bucket of its tool
+and from the bucket of its API key, and waiting calls are granted round-robin
+across queries, so one query issuing many searches cannot starve the others.
+Throttled responses pause the key with exponential backoff, halve its rate
+and are retried by the scheduler; the rate recovers gradually on successes.
+Queue depths, waiting times and throttling are reported by
+:meth:`ToolScheduler.stats` and in the query metrics.
+"""
+
+import asyncio
+import functools
+import hashlib
+import itertools
+import os
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+from camel.logger import get_logger
+
+from restaurant_deep_research.metrics import record_tool_queue
+from restaurant_deep_research.tools.rate_limit import TokenBucket
+from restaurant_deep_research.tools.wrapping import ToolCall, is_throttled, wrap_tool
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+logger = get_logger(__name__)
+
+
+class _Key:
+    __slots__ = ("label", "bucket", "base_rate", "consecutive", "throttled")
+
+    def __init__(self, label: str, rate: float, burst: Optional[float]):
+        self.label = label
+        self.bucket = TokenBucket(rate, burst)
+        self.base_rate = rate
+        self.consecutive = 0
+        self.throttled = 0
+
+
+class _Waiter:
+    __slots__ = ("future", "flow", "key", "enqueued")
+
+    def __init__(self, future: "asyncio.Future", flow: int, key: _Key):
+        self.future = future
+        self.flow = flow
+        self.key = key
+        self.enqueued = time.monotonic()
+
+
+class _Lane:
+    """Queue, bucket and counters of one tool."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate: Optional[float],
+        burst: Optional[float],
+        window: int,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.base_rate = rate
+        self.in_flight = 0
+        # Waiting calls per flow, and the flows with waiting calls in
+        # round-robin order.
+        self.flows: Dict[int, Deque[_Waiter]] = {}
+        self.ready: Deque[int] = deque()
+        self.queued = 0
+        self.peak_queued = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.waits: Deque[float] = deque(maxlen=window)
+        self.waited = 0.0
+        self.counts = {"calls": 0, "throttled": 0, "retried": 0}
+
+    def push(self, waiter: _Waiter, first: bool) -> None:
+        queue = self.flows.get(waiter.flow)
+        if queue is None:
+            queue = self.flows[waiter.flow] = deque()
+        if not queue:
+            if first:
+                self.ready.appendleft(waiter.flow)
+            else:
+                self.ready.append(waiter.flow)
+        if first:
+            queue.appendleft(waiter)
+        else:
+            queue.append(waiter)
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+
+
+def _percentile(values: Deque[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+class ToolScheduler:
+    """Rate limits, fair queuing and backoff for tool calls of all queries.
+
+    Every :meth:`wrap_tools` call starts a new flow, normally one per query.
+    A call starts once its tool has fewer than ``max_concurrency`` calls in
+    flight and both the tool's and the API key's token buckets have a token;
+    when calls wait, flows take turns.
+
+    Args:
+        rate (float, optional): Calls of one tool started per second, or
+            :obj:`None` to limit only per key. (default: :obj:`None`)
+        burst (float, optional): Calls of one tool that may start back to
+            back. Defaults to ``rate``.
+        key_rate (float, optional): Calls per second for one API key, across
+            all tools. (default: :obj:`10.0`)
+        key_burst (float, optional): Calls of one key that may start back to
+            back. Defaults to ``key_rate``.
+        max_concurrency (int, optional): Calls of one tool in flight at once.
+            (default: :obj:`8`)
+        per_tool (Dict[str, dict], optional): Overrides keyed by tool name,
+            each a dict with any of ``max_concurrency``, ``rate`` and
+            ``burst``. (default: :obj:`None`)
+        max_retries (int, optional): Times a throttled call is retried after
+            the backoff before its result is returned. (default: :obj:`2`)
+        backoff (float, optional): Seconds a key is paused after its first
+            throttled call; doubles with every consecutive one.
+            (default: :obj:`1.0`)
+        max_backoff (float, optional): Longest pause. (default: :obj:`30.0`)
+        min_rate_fraction (float, optional): Lowest rate, as a fraction of
+            the configured one, that throttling may reduce a bucket to.
+            (default: :obj:`0.1`)
+        recovery (float, optional): Fraction of the configured rate restored
+            after every successful call. (default: :obj:`0.05`)
+        wait_window (int, optional): Recent waiting times kept per tool for
+            percentiles. (default: :obj:`1000`)
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        key_rate: float = 10.0,
+        key_burst: Optional[float] = None,
+        max_concurrency: int = 8,
+        per_tool: Optional[Dict[str, dict]] = None,
+        max_retries: int = 2,
+        backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        min_rate_fraction: float = 0.1,
+        recovery: float = 0.05,
+        wait_window: int = 1000,
+    ):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        if key_rate <= 0:
+            raise ValueError(f"key_rate must be positive, got {key_rate}")
+        self.rate = rate
+        self.burst = burst
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self.max_concurrency = max_concurrency
+        self.per_tool = per_tool or {}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.min_rate_fraction = min_rate_fraction
+        self.recovery = recovery
+        self.wait_window = wait_window
+        self._lanes: Dict[str, _Lane] = {}
+        self._keys: Dict[str, _Key] = {}
+        self._flows = itertools.count()
+
+    def _lane(self, tool_name: str) -> _Lane:
+        lane = self._lanes.get(tool_name)
+        if lane is None:
+            limits = {
+                "max_concurrency": self.max_concurrency,
+                "rate": self.rate,
+                "burst": self.burst,
+            }
+            limits.update(self.per_tool.get(tool_name, {}))
+            lane = self._lanes[tool_name] = _Lane(
+                tool_name,
+                limits["max_concurrency"],
+                limits["rate"],
+                limits["burst"],
+                self.wait_window,
+            )
+        return lane
+
+    def _key(self, api_key: str) -> _Key:
+        # Stats and metrics only ever show a digest of the key.
+        label = (
+            "key-" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+            if api_key
+            else "default"
+        )
+        key = self._keys.get(label)
+        if key is None:
+            key = self._keys[label] = _Key(label, self.key_rate, self.key_burst)
+        return key
+
+    def wrap_tools(
+        self, tools: List["FunctionTool"], api_key: Optional[str] = None
+    ) -> List["FunctionTool"]:
+        """Return scheduled versions of ``tools`` forming one flow.
+
+        Args:
+            tools (List[FunctionTool]): The tools of one query.
+            api_key (str, optional): API key the tools use. Defaults to
+                ``GOOGLE_MAPS_API_KEY``.
+
+        Returns:
+            List[FunctionTool]: Tools with identical names and schemas.
+        """
+        if api_key is None:
+            api_key = os.environ.get("GOOGLE_MAPS_API_KEY", "")
+        handler = functools.partial(self._call, next(self._flows), self._key(api_key))
+        return [wrap_tool(tool, handler) for tool in tools]
+
+    def stats(self) -> dict:
+        """Return queue, waiting and throttling statistics.
+
+        Returns:
+            dict: ``{"tools": ..., "keys": ...}``. Per tool: calls waiting
+                (``queued``) and their peak, calls in flight, calls started,
+                throttled and retried, total and p50/p95 waiting seconds and
+                the current rate. Per key digest: current and configured
+                rate, throttled calls and the remaining backoff.
+        """
+        tools = {}
+        for name, lane in self._lanes.items():
+            tools[name] = {
+                "queued": lane.queued,
+                "peak_queued": lane.peak_queued,
+                "in_flight": lane.in_flight,
+                **lane.counts,
+                "waited_seconds": round(lane.waited, 3),
+                "p50_wait_seconds": _percentile(lane.waits, 0.5),
+                "p95_wait_seconds": _percentile(lane.waits, 0.95),
+                "rate": round(lane.bucket.rate, 3) if lane.bucket else None,
+            }
+        keys = {}
+        for label, key in self._keys.items():
+            keys[label] = {
+                "rate": round(key.bucket.rate, 3),
+                "base_rate": key.base_rate,
+                "throttled": key.throttled,
+                "backoff_seconds": round(key.bucket.paused_seconds, 3),
+            }
+        return {"tools": tools, "keys": keys}
+
+    def to_prometheus(self, prefix: str = "restaurant") -> str:
+        """Render the current queue depths and rates as Prometheus gauges.
+
+        Args:
+            prefix (str, optional): Metric name prefix.
+                (default: :obj:`"restaurant"`)
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = [
+            f"# HELP {prefix}_tool_queue_depth Tool calls waiting for the scheduler.",
+            f"# TYPE {prefix}_tool_queue_depth gauge",
+        ]
+        for name, lane in sorted(self._lanes.items()):
+            lines.append(f'{prefix}_tool_queue_depth{{tool="{name}"}} {lane.queued}')
+        lines += [
+            f"# HELP {prefix}_tool_in_flight Scheduled tool calls in flight.",
+            f"# TYPE {prefix}_tool_in_flight gauge",
+        ]
+        for name, lane in sorted(self._lanes.items()):
+            lines.append(f'{prefix}_tool_in_flight{{tool="{name}"}} {lane.in_flight}')
+        lines += [
+            f"# HELP {prefix}_tool_key_rate Current calls per second allowed per API key.",
+            f"# TYPE {prefix}_tool_key_rate gauge",
+        ]
+        for label, key in sorted(self._keys.items()):
+            lines.append(
+                f'{prefix}_tool_key_rate{{key="{label}"}} {key.bucket.rate:.6f}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def _wait_time(self, lane: _Lane, key: _Key) -> float:
+        wait = key.bucket.available_in()
+        if lane.bucket is not None:
+            wait = max(wait, lane.bucket.available_in())
+        return wait
+
+    def _start(self, lane: _Lane, key: _Key, waited: float) -> None:
+        key.bucket.try_acquire()
+        if lane.bucket is not None:
+            lane.bucket.try_acquire()
+        lane.in_flight += 1
+        lane.counts["calls"] += 1
+        lane.waits.append(waited)
+        lane.waited += waited
+
+    def _pump(self, lane: _Lane) -> None:
+        """Start waiting calls of ``lane`` while limits allow, round-robin."""
+        if lane.timer is not None:
+            lane.timer.cancel()
+            lane.timer = None
+        delay: Optional[float] = None
+        while lane.ready and lane.in_flight < lane.max_concurrency:
+            started = False
+            for _ in range(len(lane.ready)):
+                if not lane.ready:
+                    break
+                flow = lane.ready[0]
+                queue = lane.flows[flow]
+                # Cancelled waiters were already taken off the count.
+                while queue and queue[0].future.done():
+                    queue.popleft()
+                if not queue:
+                    lane.ready.popleft()
+                    del lane.flows[flow]
+                    continue
+                waiter = queue[0]
+                wait = self._wait_time(lane, waiter.key)
+                if wait:
+                    delay = wait if delay is None else min(delay, wait)
+                    lane.ready.rotate(-1)
+                    continue
+                queue.popleft()
+                lane.ready.popleft()
+                if queue:
+                    lane.ready.append(flow)
+                else:
+                    del lane.flows[flow]
+                lane.queued -= 1
+                waited = time.monotonic() - waiter.enqueued
+                self._start(lane, waiter.key, waited)
+                waiter.future.set_result(waited)
+                started = True
+                break
+            if not started:
+                break
+        if lane.ready and delay is not None and lane.in_flight < lane.max_concurrency:
+            lane.timer = asyncio.get_running_loop().call_later(
+                delay, self._pump, lane
+            )
+
+    async def _acquire(self, lane: _Lane, key: _Key, flow: int, retry: bool) -> float:
+        if (
+            not lane.ready
+            and lane.in_flight < lane.max_concurrency
+            and not self._wait_time(lane, key)
+        ):
+            self._start(lane, key, 0.0)
+            return 0.0
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), flow, key)
+        # Retries go first in their flow, they have waited already.
+        lane.push(waiter, first=retry)
+        self._pump(lane)
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                lane.queued -= 1
+            else:
+                self._release(lane)
+            raise
+
+    def _release(self, lane: _Lane) -> None:
+        lane.in_flight -= 1
+        self._pump(lane)
+
+    def _adapt(self, lane: _Lane, key: _Key, outcome: Any) -> bool:
+        """Back off after a throttled call, recover after any other one.
+
+        Returns:
+            bool: Whether ``outcome``, a result or exception, was throttled.
+        """
+        throttled = is_throttled(outcome)
+        buckets = [(key.bucket, key.base_rate)]
+        if lane.bucket is not None:
+            buckets.append((lane.bucket, lane.base_rate))
+        if throttled:
+            key.throttled += 1
+            lane.counts["throttled"] += 1
+            record_tool_queue("throttled")
+            if key.bucket.paused_seconds:
+                # Calls that were in flight together belong to one episode.
+                return True
+            key.consecutive += 1
+            delay = min(self.max_backoff, self.backoff * 2 ** (key.consecutive - 1))
+            # Jitter keeps flows that were throttled together from retrying
+            # in lockstep.
+            delay *= random.uniform(0.5, 1.0)
+            key.bucket.pause(delay)
+            for bucket, base_rate in buckets:
+                bucket.set_rate(max(base_rate * self.min_rate_fraction, bucket.rate / 2))
+            logger.warning(
+                f"{lane.name} throttled; pausing {key.label} for {delay:.2f}s "
+                f"at {key.bucket.rate:.2f} calls/s"
+            )
+        else:
+            key.consecutive = 0
+            for bucket, base_rate in buckets:
+                if bucket.rate < base_rate:
+                    bucket.set_rate(
+                        min(base_rate, bucket.rate + base_rate * self.recovery)
+                    )
+        return throttled
+
+    async def _call(
+        self,
+        flow: int,
+        key: _Key,
+        tool_name: str,
+        kwargs: Dict[str, Any],
+        call_original: ToolCall,
+    ) -> Any:
+        lane = self._lane(tool_name)
+        attempt = 0
+        while True:
+            waited = await self._acquire(lane, key, flow, retry=attempt > 0)
+            record_tool_queue("retried" if attempt else "scheduled", waited)
+            try:
+                result = await call_original(**kwargs)
+            except Exception as e:
+                if not self._adapt(lane, key, e) or attempt >= self.max_retries:
+                    raise
+            else:
+                if not self._adapt(lane, key, result) or attempt >= self.max_retries:
+                    return result
+            finally:
+                self._release(lane)
+            attempt += 1
+            lane.counts["retried"] += 1
+
+
+_default_scheduler: Optional[ToolScheduler] = None
+
+
+def get_tool_scheduler() -> Optional[ToolScheduler]:
+    """Return the process-wide scheduler set with :func:`set_tool_scheduler`."""
+    return _default_scheduler
+
+
+def set_tool_scheduler(scheduler: Optional[ToolScheduler]) -> Optional[ToolScheduler]:
+    """Schedule the MCP tool calls of every query through ``scheduler``.
+
+    Args:
+        scheduler (ToolScheduler, optional): The scheduler, or :obj:`None`
+            to stop scheduling.
+
+    Returns:
+        ToolScheduler, optional: The previous scheduler.
+    """
+    global _default_scheduler
+    previous, _default_scheduler = _default_scheduler, scheduler
+    return previous
@@ -0,0 +1,200 @@
+"""
+Helpers for wrapping MCP ``FunctionTool`` objects.
+
+Caching, rate limiting and similar layers all need to intercept tool calls
+while keeping the original OpenAI tool schema, so that the agents see exactly
+the same tools. :func:`wrap_tool` does this once for all of them.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import re
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from camel.toolkits import FunctionTool
+
+ToolCall = Callable[..., Awaitable[Any]]
+ToolHandler = Callable[[str, Dict[str, Any], ToolCall], Awaitable[Any]]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Failed calls come back in an error envelope at the start of the result:
+# the Google Maps MCP server answers "Place search failed: OVER_QUERY_LIMIT"
+# or "Error: ...", and CAMEL reports tool exceptions as {"error": ...}.
+_ERROR_PREFIX_RE = re.compile(
+    r"""^\s*(?:
+        error\s*:\s*(?P<error>.*)
+        | [a-z][a-z ]{0,48}\bfailed:\s*(?P<failed>.*)
+        | \{\s*['"]error['"]\s*:\s*['"]?(?P<dict>.*)
+    )""",
+    re.IGNORECASE | re.DOTALL | re.VERBOSE,
+)
+# Only results this short are parsed for a "status" or "isError" field;
+# error envelopes are small and real results can be large.
+_ENVELOPE_MAX_CHARS = 4096
+_OK_STATUSES = frozenset({"OK", "ZERO_RESULTS"})
+THROTTLED_STATUSES = frozenset({"OVER_QUERY_LIMIT", "RESOURCE_EXHAUSTED"})
+_THROTTLED_RE = re.compile(
+    r"^(?:(?:HTTP(?:/[\d.]+)?\s+)?429\b|(?:%s)\b)|\bstatus code 429\b"
+    % "|".join(sorted(THROTTLED_STATUSES))
+)
+
+
+def wrap_tool(tool: "FunctionTool", handler: ToolHandler) -> "FunctionTool":
+    """Wrap a tool so that every call goes through ``handler``.
+
+    Args:
+        tool (FunctionTool): The tool to wrap.
+        handler (ToolHandler): Coroutine called as
+            ``handler(tool_name, kwargs, call_original)``; it decides whether
+            and how to invoke ``call_original(**kwargs)``.
+
+    Returns:
+        FunctionTool: A new tool with the same name and schema.
+    """
+    func = tool.func
+    name = tool.get_function_name()
+
+    async def call_original(**kwargs: Any) -> Any:
+        result = func(**kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    @functools.wraps(func)
+    async def wrapper(**kwargs: Any) -> Any:
+        return await handler(name, kwargs, call_original)
+
+    from camel.toolkits import FunctionTool
+
+    return FunctionTool(wrapper, openai_tool_schema=tool.get_openai_tool_schema())
+
+
+def canonicalize_args(value: Any) -> Any:
+    """Normalize tool arguments so that equivalent calls compare equal.
+
+    Dictionary keys are sorted, runs of whitespace in strings are collapsed
+    and floats are rounded to six decimals (about 0.1 m for coordinates).
+
+    Args:
+        value (Any): The arguments, or any nested value within them.
+
+    Returns:
+        Any: A JSON-serializable canonical form.
+    """
+    if isinstance(value, dict):
+        return {str(k): canonicalize_args(value[k]) for k in sorted(value, key=str)}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize_args(v) for v in value]
+    if isinstance(value, str):
+        return _WHITESPACE_RE.sub(" ", value).strip()
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def tool_call_key(tool_name: str, kwargs: Dict[str, Any]) -> str:
+    """Build a content-addressed key for a tool call.
+
+    Args:
+        tool_name (str): Name of the tool.
+        kwargs (Dict[str, Any]): Arguments of the call.
+
+    Returns:
+        str: A SHA-256 hex digest of the tool name and canonical arguments.
+    """
+    payload = json.dumps(
+        [tool_name, canonicalize_args(kwargs)],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _envelope_error(envelope: Dict[str, Any]) -> Optional[str]:
+    if envelope.get("isError"):
+        content = envelope.get("content")
+        if isinstance(content, list):
+            texts = [c.get("text", "") for c in content if isinstance(c, dict)]
+            content = " ".join(t for t in texts if t)
+        text = str(content or "")
+        return tool_error(text) or text or "isError"
+    error = envelope.get("error")
+    if error:
+        return error if isinstance(error, str) else json.dumps(error, default=str)
+    status = envelope.get("status")
+    if isinstance(status, str) and status not in _OK_STATUSES:
+        return f"{status}: {envelope.get('error_message', '')}".rstrip(": ")
+    return None
+
+
+def tool_error(result: Any) -> Optional[str]:
+    """Return the error message of a failed Google Maps tool call.
+
+    The MCP server reports failures as text such as
+    ``"Place search failed: OVER_QUERY_LIMIT"`` rather than raising. Only the
+    error envelope is inspected: a leading ``Error:`` or ``... failed:``, an
+    ``{"error": ...}`` or ``isError`` object, or a non-OK ``status`` field.
+    Reviews or addresses that merely mention errors are not errors.
+
+    Args:
+        result (Any): The value returned or the exception raised by a tool.
+
+    Returns:
+        str, optional: The error message, or :obj:`None` if the call
+            succeeded.
+    """
+    if result is None:
+        return "no result"
+    if isinstance(result, BaseException):
+        return str(result) or type(result).__name__
+    if isinstance(result, dict):
+        return _envelope_error(result)
+    text = result if isinstance(result, str) else str(result)
+    match = _ERROR_PREFIX_RE.match(text)
+    if match:
+        return next(g for g in match.groups() if g is not None).strip()
+    stripped = text.lstrip()
+    if stripped.startswith("{") and len(stripped) <= _ENVELOPE_MAX_CHARS:
+        try:
+            envelope = json.loads(stripped)
+        except ValueError:
+            return None
+        if isinstance(envelope, dict):
+            return _envelope_error(envelope)
+    return None
+
+
+def looks_like_tool_error(result: Any) -> bool:
+    """Detect a failed Google Maps tool call; see :func:`tool_error`.
+
+    Args:
+        result (Any): The value returned by the tool.
+
+    Returns:
+        bool: :obj:`True` if the result is an error envelope.
+    """
+    return tool_error(result) is not None
+
+
+def is_throttled(result: Any) -> bool:
+    """Detect a tool result or exception caused by a Maps quota limit.
+
+    A call is throttled when its error (see :func:`tool_error`) starts with
+    the ``OVER_QUERY_LIMIT`` or ``RESOURCE_EXHAUSTED`` status or an HTTP 429
+    status, or when the exception carries ``status_code == 429``.
+
+    Args:
+        result (Any): The value returned or the exception raised by a tool.
+
+    Returns:
+        bool: :obj:`True` if the call was rejected for exceeding a quota.
+    """
+    if getattr(result, "status_code", None) == 429:
+        return True
+    error = tool_error(result)
+    return error is not None and bool(_THROTTLED_RE.search(error[:300]))
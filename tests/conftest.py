@@ -0,0 +1,59 @@
+"""Shared helpers for the test suite.
+
+Tests run offline against the replay and stub model backends. Async code is
+driven with :func:`asyncio.run` so that no pytest plugin is needed.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+
+def recorded_call(
+    content: Optional[str] = None,
+    tool_calls: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+) -> dict:
+    """Build a recorded model call for :class:`ReplayModelBackend`.
+
+    Args:
+        content (str, optional): Reply text. (default: :obj:`None`)
+        tool_calls (List[Tuple[str, Dict[str, Any]]], optional): Tool names
+            and arguments requested by the reply. (default: :obj:`None`)
+
+    Returns:
+        dict: A ``{"response": ..., "elapsed": ...}`` call.
+    """
+    message: Dict[str, Any] = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [
+            {
+                "id": f"call_{i}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(args)},
+            }
+            for i, (name, args) in enumerate(tool_calls)
+        ]
+    return {
+        "response": {
+            "id": "test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "test",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 5, "total_tokens": 5},
+        },
+        "elapsed": 0.0,
+    }
+
+
+@pytest.fixture
+def make_call():
+    """Return :func:`recorded_call`."""
+    return recorded_call
@@ -0,0 +1,203 @@
+"""Tests for :class:`AnswerCache` and :class:`AnswerSpec`."""
+
+import pytest
+
+from restaurant_deep_research.cache import AnswerCache, AnswerSpec
+
+
+def _spec(
+    location="Near Shibuya Station, Tokyo",
+    cuisine="Ramen",
+    budget="Cheap",
+    timing="Tonight",
+    dietary="None",
+    language="English",
+):
+    return (
+        "## Core Requirements\n"
+        f"- Cuisine: {cuisine}\n"
+        f"- Location: {location}\n"
+        f"- Budget: {budget}\n"
+        "## Practical Details\n"
+        "- Group Size: 2\n"
+        f"- Timing: {timing}\n"
+        f"- Dietary Needs: {dietary}\n"
+        "## Language\n"
+        f"- Query Language: {language}\n"
+    )
+
+
+def test_spec_is_normalized():
+    spec = AnswerSpec.from_markdown(_spec())
+
+    assert spec.fields() == {
+        "location": "shibuya station tokyo",
+        "cuisine": ["ramen"],
+        "budget": "low",
+        "meal_period": "dinner",
+        "day": "today",
+        "dietary": [],
+        "language": "english",
+    }
+    assert spec.cacheable
+
+
+def test_equivalent_specs_share_a_key():
+    cache = AnswerCache()
+    first = cache.parse(_spec(cuisine="Sushi, Ramen", dietary="vegetarian; no pork"))
+    # Label variants, filler words and item order do not change the key.
+    second = cache.parse(
+        "- **Area**: around Shibuya station, Tokyo\n"
+        "- Cuisine Type: ramen or sushi\n"
+        "- Price Range: inexpensive\n"
+        "- Time: this evening\n"
+        "- Dietary Restrictions: No pork and Vegetarian\n"
+        "- Language: English\n"
+    )
+
+    assert first == second
+    assert cache.key(first) == cache.key(second)
+    assert first.cuisine == ("ramen", "sushi")
+    assert first.dietary == ("no pork", "vegetarian")
+
+
+@pytest.mark.parametrize(
+    "budget, band",
+    [
+        ("¥1,000-3,000 per person", "JPY<=5000"),
+        ("Under 2k yen", "JPY<=2000"),
+        ("$$", "mid"),
+        ("Upscale, fine dining", "high"),
+        ("Not specified", ""),
+    ],
+)
+def test_budget_is_reduced_to_a_band(budget, band):
+    assert AnswerSpec.from_markdown(_spec(budget=budget)).budget == band
+
+
+def test_spec_without_location_is_not_cached():
+    cache = AnswerCache()
+    spec = _spec(location="Not specified")
+
+    assert not cache.parse(spec).cacheable
+    assert not cache.set(spec, "Ichiran Shibuya")
+    assert cache.get(spec) is None
+
+
+@pytest.mark.parametrize(
+    "timing, ttl",
+    [
+        ("Tonight", 1800),
+        ("Right now", 1800),
+        ("今晚", 1800),
+        ("Tomorrow lunch", 6 * 3600),
+        ("This weekend", 6 * 3600),
+        ("Next Friday", 3 * 24 * 3600),
+        ("Not specified", 3 * 24 * 3600),
+    ],
+)
+def test_ttl_depends_on_timing(timing, ttl):
+    cache = AnswerCache()
+    assert cache.ttl_for(cache.parse(_spec(timing=timing))) == ttl
+
+
+def test_exact_and_fuzzy_hits():
+    cache = AnswerCache()
+    assert cache.set(_spec(), "Ichiran Shibuya", [{"name": "Ichiran Shibuya"}])
+
+    exact = cache.get(_spec(location="near shibuya station tokyo"))
+    fuzzy = cache.get(_spec(location="Station Shibuya, Tokyo"))
+
+    assert (exact.answer, exact.fuzzy) == ("Ichiran Shibuya", False)
+    assert exact.places == [{"name": "Ichiran Shibuya"}]
+    assert (fuzzy.answer, fuzzy.fuzzy) == ("Ichiran Shibuya", True)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["fuzzy_hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "location, cuisine, threshold, hit",
+    [
+        # Trigram similarity 0.83 for the reordered location.
+        ("Station Shibuya, Tokyo", "Ramen", 0.7, True),
+        ("Station Shibuya, Tokyo", "Ramen", 0.9, False),
+        ("Station Shibuya, Tokyo", "Ramen", None, False),
+        # Similarity 0.67: an abbreviation is below the default threshold.
+        ("Shibuya Stn, Tokyo", "Ramen", 0.7, False),
+        ("Shibuya Station, Tokyo", "Tonkotsu Ramen", 0.7, False),
+    ],
+)
+def test_fuzzy_threshold(location, cuisine, threshold, hit):
+    cache = AnswerCache(fuzzy_threshold=threshold)
+    cache.set(_spec(), "Ichiran Shibuya")
+
+    result = cache.get(_spec(location=location, cuisine=cuisine))
+
+    assert (result is not None) == hit
+
+
+@pytest.mark.parametrize(
+    "stored, other",
+    [
+        ("Near Shibuya Station, Tokyo", "Near Shinjuku Station, Tokyo"),
+        # The shared city and country make these 0.78 similar as strings.
+        (
+            "Near Shibuya Station, Shibuya City, Tokyo, Japan",
+            "Near Ebisu Station, Shibuya City, Tokyo, Japan",
+        ),
+    ],
+)
+def test_specs_differing_only_in_area_do_not_match(stored, other):
+    cache = AnswerCache(fuzzy_threshold=0.5)
+    cache.set(_spec(location=stored), "Ichiran Shibuya")
+
+    assert cache.get(_spec(location=other)) is None
+    assert cache.get(_spec(location=stored)) is not None
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"dietary": "Vegetarian"},
+        {"timing": "Tomorrow lunch"},
+        {"budget": "Upscale"},
+        {"language": "Chinese"},
+    ],
+)
+def test_other_fields_must_match_exactly(change):
+    cache = AnswerCache()
+    cache.set(_spec(), "Ichiran Shibuya")
+
+    assert cache.get(_spec(location="Station Shibuya, Tokyo", **change)) is None
+
+
+def test_invalidate_by_field():
+    cache = AnswerCache()
+    cache.set(_spec(), "Ichiran Shibuya")
+    cache.set(_spec(cuisine="Sushi, Ramen"), "Uobei Shibuya")
+    cache.set(_spec(location="Shinjuku, Tokyo"), "Fuunji")
+    # Index entries for fuzzy lookups, which must be dropped as well.
+    assert cache.get(_spec(location="Station Shibuya, Tokyo")).fuzzy
+
+    assert cache.invalidate(location="Shibuya", cuisine="sushi") == 1
+    assert cache.get(_spec(cuisine="Sushi, Ramen")) is None
+    assert cache.invalidate(location="shibuya") == 1
+    assert cache.get(_spec()) is None
+    assert cache.get(_spec(location="Station Shibuya, Tokyo")) is None
+    assert cache.get(_spec(location="Shinjuku, Tokyo")).answer == "Fuunji"
+    assert cache.stats()["invalidated"] == 2
+
+
+def test_invalidate_with_predicate_and_everything():
+    cache = AnswerCache()
+    cache.set(_spec(), "Ichiran Shibuya")
+    cache.set(_spec(location="Shinjuku, Tokyo"), "Fuunji")
+
+    assert cache.invalidate(lambda fields: "shinjuku" in fields["location"]) == 1
+    assert cache.invalidate() == 1
+    assert cache.get(_spec()) is None
+
+
+def test_invalidate_rejects_unknown_fields():
+    with pytest.raises(ValueError, match="area"):
+        AnswerCache().invalidate(area="shibuya")
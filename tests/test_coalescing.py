@@ -0,0 +1,156 @@
+"""Tests for :class:`ToolCallCoalescer`."""
+
+import asyncio
+
+import pytest
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.tools import ToolCallCoalescer
+
+
+class _Upstream:
+    """A Maps tool that counts its calls and can be held or made to fail."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.cancelled = 0
+        self.release = asyncio.Event()
+        self.error = error
+
+    def tool(self):
+        async def maps_geocode(address: str) -> str:
+            """Geocode an address.
+
+            Args:
+                address (str): The address.
+            """
+            self.calls.append(address)
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            if self.error is not None:
+                raise self.error
+            return f"location of {address}"
+
+        return FunctionTool(maps_geocode)
+
+
+def _wrap(coalescer, upstream):
+    (tool,) = coalescer.wrap_tools([upstream.tool()])
+    return tool.func
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+    async def run():
+        coalescer, upstream = ToolCallCoalescer(), _Upstream()
+        geocode = _wrap(coalescer, upstream)
+        callers = [
+            asyncio.ensure_future(geocode(address="Shibuya Station")) for _ in range(3)
+        ]
+        other = asyncio.ensure_future(geocode(address="Shinjuku Station"))
+        await _settle()
+        assert coalescer.stats()["in_flight"] == 2
+        upstream.release.set()
+        results = await asyncio.gather(*callers, other)
+        return coalescer, upstream, results
+
+    coalescer, upstream, results = asyncio.run(run())
+
+    assert sorted(upstream.calls) == ["Shibuya Station", "Shinjuku Station"]
+    assert results == ["location of Shibuya Station"] * 3 + [
+        "location of Shinjuku Station"
+    ]
+    stats = coalescer.stats()
+    assert (stats["calls"], stats["coalesced"], stats["in_flight"]) == (2, 2, 0)
+    assert stats["tools"] == {"maps_geocode": {"calls": 2, "coalesced": 2}}
+
+
+def test_completed_calls_are_not_reused():
+    async def run():
+        coalescer, upstream = ToolCallCoalescer(), _Upstream()
+        upstream.release.set()
+        geocode = _wrap(coalescer, upstream)
+        await geocode(address="Shibuya Station")
+        await geocode(address="Shibuya Station")
+        return upstream
+
+    assert len(asyncio.run(run()).calls) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def run():
+        coalescer, upstream = ToolCallCoalescer(), _Upstream()
+        geocode = _wrap(coalescer, upstream)
+        first = asyncio.ensure_future(geocode(address="Shibuya Station"))
+        second = asyncio.ensure_future(geocode(address="Shibuya Station"))
+        await _settle()
+        first.cancel()
+        await _settle()
+        upstream.release.set()
+        return upstream, first, await second
+
+    upstream, first, result = asyncio.run(run())
+
+    assert first.cancelled()
+    assert result == "location of Shibuya Station"
+    assert upstream.calls == ["Shibuya Station"]
+    assert upstream.cancelled == 0
+
+
+def test_upstream_call_is_cancelled_with_its_last_caller():
+    async def run():
+        coalescer, upstream = ToolCallCoalescer(), _Upstream()
+        geocode = _wrap(coalescer, upstream)
+        callers = [
+            asyncio.ensure_future(geocode(address="Shibuya Station")) for _ in range(2)
+        ]
+        await _settle()
+        for caller in callers:
+            caller.cancel()
+        await _settle()
+        in_flight = coalescer.stats()["in_flight"]
+        # A later identical call must not join the cancelled one.
+        upstream.release.set()
+        result = await geocode(address="Shibuya Station")
+        return upstream, in_flight, result
+
+    upstream, in_flight, result = asyncio.run(run())
+
+    assert upstream.cancelled == 1
+    assert in_flight == 0
+    assert result == "location of Shibuya Station"
+    assert len(upstream.calls) == 2
+
+
+def test_exceptions_reach_every_caller():
+    async def run():
+        upstream = _Upstream(error=ConnectionError("MCP server went away"))
+        geocode = _wrap(ToolCallCoalescer(), upstream)
+        callers = [
+            asyncio.ensure_future(geocode(address="Shibuya Station")) for _ in range(2)
+        ]
+        await _settle()
+        upstream.release.set()
+        return upstream, await asyncio.gather(*callers, return_exceptions=True)
+
+    upstream, results = asyncio.run(run())
+
+    assert len(upstream.calls) == 1
+    assert all(isinstance(r, ConnectionError) for r in results)
+
+
+@pytest.mark.parametrize(
+    "tools, wrapped", [(None, True), (["maps_geocode"], True), ([], False)]
+)
+def test_only_listed_tools_are_wrapped(tools, wrapped):
+    tool = _Upstream().tool()
+    (result,) = ToolCallCoalescer(tools=tools).wrap_tools([tool])
+    assert (result is not tool) == wrapped
+    assert result.get_openai_tool_schema() == tool.get_openai_tool_schema()
@@ -0,0 +1,196 @@
+"""Tests for :class:`CircuitBreaker` and :class:`HedgedModelBackend`."""
+
+import asyncio
+import time
+
+import pytest
+
+from restaurant_deep_research.metrics import QueryMetrics, metrics_scope
+from restaurant_deep_research.models import hedging
+from restaurant_deep_research.models.hedging import (
+    CircuitBreaker,
+    HedgedModelBackend,
+    ProvidersUnavailable,
+    is_rate_limit_error,
+)
+from restaurant_deep_research.replay import StubModelBackend
+
+MESSAGES = [{"role": "user", "content": "Cheap ramen near Shibuya tonight"}]
+
+
+class _Throttled(Exception):
+    status_code = 429
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(hedging.time, "monotonic", clock)
+    return clock
+
+
+def _content(response) -> str:
+    return response.choices[0].message.content
+
+
+def _always(error):
+    return lambda n: error
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.opened == 1
+
+
+def test_breaker_probes_once_when_half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed probe re-opens the breaker for another full timeout.
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+    clock.now += 10
+    assert breaker.allow()
+
+    # A probe given up without an outcome frees the slot for another one.
+    breaker.release()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_failover_to_next_provider():
+    backend = HedgedModelBackend(
+        {
+            "primary": StubModelBackend("primary", fail=_always(RuntimeError("down"))),
+            "fallback": StubModelBackend("fallback"),
+        },
+        hedge=False,
+    )
+    metrics = QueryMetrics()
+    with metrics_scope(metrics):
+        response = asyncio.run(backend.arun(MESSAGES))
+
+    assert _content(response) == "fallback"
+    stats = backend.stats()
+    assert stats["primary"]["failures"] == 1
+    assert stats["fallback"]["successes"] == 1
+    assert metrics.hedging == {"failover": 1}
+
+
+def test_sync_run_fails_over_without_hedging():
+    backend = HedgedModelBackend(
+        [
+            StubModelBackend("primary", fail=_always(RuntimeError("down"))),
+            StubModelBackend("fallback"),
+        ]
+    )
+    assert _content(backend.run(MESSAGES)) == "fallback"
+
+
+def test_slow_attempt_is_hedged_and_loser_cancelled():
+    backend = HedgedModelBackend(
+        {
+            "primary": StubModelBackend("primary", latency=5.0),
+            "fallback": StubModelBackend("fallback"),
+        },
+        hedge_delay=0.05,
+        min_hedge_delay=0.01,
+    )
+    metrics = QueryMetrics()
+
+    async def run():
+        with metrics_scope(metrics):
+            return await backend.arun(MESSAGES)
+
+    start = time.perf_counter()
+    response = asyncio.run(run())
+
+    assert time.perf_counter() - start < 1.0
+    assert _content(response) == "fallback"
+    stats = backend.stats()
+    assert stats["fallback"]["hedges"] == 1
+    assert stats["fallback"]["wins"] == 1
+    assert stats["primary"]["cancelled"] == 1
+    # Losing a race is not a failure of the provider.
+    assert stats["primary"]["breaker"] == "closed"
+    assert metrics.hedging == {"hedged": 1, "hedge_won": 1}
+
+
+def test_open_breaker_skips_provider(clock):
+    primary = StubModelBackend("primary", fail=_always(RuntimeError("down")))
+    backend = HedgedModelBackend(
+        {"primary": primary, "fallback": StubModelBackend("fallback")},
+        hedge=False,
+        failure_threshold=1,
+    )
+    asyncio.run(backend.arun(MESSAGES))
+    assert backend.stats()["primary"]["breaker"] == "open"
+
+    assert _content(asyncio.run(backend.arun(MESSAGES))) == "fallback"
+    assert primary.calls == 1
+
+
+def test_all_breakers_open_raises(clock):
+    backend = HedgedModelBackend(
+        [StubModelBackend(fail=_always(RuntimeError("down"))) for _ in range(2)],
+        hedge=False,
+        failure_threshold=1,
+    )
+    with pytest.raises(RuntimeError, match="down"):
+        asyncio.run(backend.arun(MESSAGES))
+    with pytest.raises(ProvidersUnavailable):
+        asyncio.run(backend.arun(MESSAGES))
+
+
+def test_throttling_halves_concurrency_limit():
+    backend = HedgedModelBackend(
+        {
+            "primary": StubModelBackend(fail=_always(_Throttled("slow down"))),
+            "fallback": StubModelBackend(),
+        },
+        hedge=False,
+        initial_concurrency=8,
+    )
+    asyncio.run(backend.arun(MESSAGES))
+
+    stats = backend.stats()
+    assert stats["primary"]["throttled"] == 1
+    assert stats["primary"]["concurrency_limit"] == 4
+    assert stats["fallback"]["concurrency_limit"] > 8
+
+
+@pytest.mark.parametrize(
+    "error, throttled",
+    [
+        (_Throttled(), True),
+        (type("RateLimitError", (Exception,), {})(), True),
+        (RuntimeError("429 in the message is not enough"), False),
+    ],
+)
+def test_is_rate_limit_error(error, throttled):
+    assert is_rate_limit_error(error) == throttled
@@ -0,0 +1,52 @@
+"""Importing the package and its lightweight modules must stay cheap.
+
+Each module is imported in a fresh interpreter. CAMEL, dotenv and colorama
+are only needed once a query runs, so they must not be loaded; see
+``benchmarks/import_time.py`` for a detailed breakdown.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Same default budget as ``benchmarks/import_time.py --check``.
+BUDGET_MS = 300.0
+HEAVY_PACKAGES = ("camel", "dotenv", "colorama")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(sys.modules)}}))
+"""
+
+
+def _import(module: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "restaurant_deep_research",
+        "restaurant_deep_research.cli",
+        "restaurant_deep_research.metrics",
+        "restaurant_deep_research.events",
+    ],
+)
+def test_import_is_light_and_within_budget(module):
+    # The fastest of a few runs, so that a busy machine does not fail it.
+    runs = [_import(module) for _ in range(3)]
+
+    loaded = {name.split(".")[0] for name in runs[0]["modules"]}
+    assert not loaded.intersection(HEAVY_PACKAGES)
+    assert min(run["ms"] for run in runs) <= BUDGET_MS
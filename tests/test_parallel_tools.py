@@ -0,0 +1,132 @@
+"""Tests for :class:`ParallelToolChatAgent`."""
+
+import asyncio
+
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.agents import ParallelToolChatAgent
+from restaurant_deep_research.replay import ReplayModelBackend
+from restaurant_deep_research.tools import ToolRateLimiter
+
+
+class _Tracker:
+    """Tool whose calls finish in reverse order and record concurrency."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = asyncio.Event()
+        self.cancelled = []
+
+    def tool(self, delays):
+        async def maps_place_details(place_id: str) -> str:
+            """Get details of a place.
+
+            Args:
+                place_id (str): The place ID.
+            """
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.started.set()
+            try:
+                await asyncio.sleep(delays[place_id])
+            except asyncio.CancelledError:
+                self.cancelled.append(place_id)
+                raise
+            finally:
+                self.in_flight -= 1
+            return f"details of {place_id}"
+
+        return FunctionTool(maps_place_details)
+
+
+def _details_calls(make_call, place_ids):
+    return make_call(
+        tool_calls=[("maps_place_details", {"place_id": p}) for p in place_ids]
+    )
+
+
+def test_tool_calls_run_concurrently_and_keep_their_order(make_call):
+    place_ids = ["a", "b", "c", "d"]
+    # The first call is the slowest, so results complete in reverse order.
+    delays = {"a": 0.08, "b": 0.06, "c": 0.04, "d": 0.02}
+    tracker = _Tracker()
+
+    async def run():
+        model = ReplayModelBackend(
+            [_details_calls(make_call, place_ids), make_call("Done.")]
+        )
+        agent = ParallelToolChatAgent(
+            "You are a helpful assistant.",
+            model=model,
+            tools=[tracker.tool(delays)],
+            rate_limiter=ToolRateLimiter(max_concurrency=4),
+        )
+        response = await agent.astep("Look up the places.")
+        return agent, response
+
+    agent, response = asyncio.run(run())
+
+    assert tracker.max_in_flight == 4
+    assert agent.parallel_batches == 1
+    assert agent.parallel_calls == 4
+    assert response.msg.content == "Done."
+    records = response.info["tool_calls"]
+    assert [r.args["place_id"] for r in records] == place_ids
+    assert [r.result for r in records] == [f"details of {p}" for p in place_ids]
+    tool_messages = [
+        m for m in (c.memory_record.message for c in agent.memory.retrieve())
+        if getattr(m, "func_name", None) == "maps_place_details" and m.result
+    ]
+    assert [m.result for m in tool_messages] == [f"details of {p}" for p in place_ids]
+
+
+def test_rate_limiter_caps_concurrency(make_call):
+    place_ids = ["a", "b", "c", "d"]
+    tracker = _Tracker()
+
+    async def run():
+        agent = ParallelToolChatAgent(
+            "You are a helpful assistant.",
+            model=ReplayModelBackend(
+                [_details_calls(make_call, place_ids), make_call("Done.")]
+            ),
+            tools=[tracker.tool(dict.fromkeys(place_ids, 0.02))],
+            rate_limiter=ToolRateLimiter(max_concurrency=2),
+        )
+        return await agent.astep("Look up the places.")
+
+    response = asyncio.run(run())
+
+    assert tracker.max_in_flight == 2
+    assert len(response.info["tool_calls"]) == 4
+
+
+def test_reset_cancels_uncollected_tool_calls(make_call):
+    place_ids = ["a", "b", "c"]
+    tracker = _Tracker()
+
+    async def run():
+        agent = ParallelToolChatAgent(
+            "You are a helpful assistant.",
+            model=ReplayModelBackend([_details_calls(make_call, place_ids)]),
+            tools=[tracker.tool(dict.fromkeys(place_ids, 10.0))],
+        )
+        step = asyncio.ensure_future(agent.astep("Look up the places."))
+        await asyncio.wait_for(tracker.started.wait(), 5)
+        await asyncio.sleep(0)
+        step.cancel()
+        await asyncio.gather(step, return_exceptions=True)
+        # The step was interrupted while collecting the first call; the
+        # others are still running until the agent is reset.
+        pending = len(agent._pending_tool_calls)
+        agent.reset()
+        await asyncio.sleep(0.01)
+        return pending, agent
+
+    pending, agent = asyncio.run(run())
+
+    assert pending == len(place_ids) - 1
+    assert agent._pending_tool_calls == {}
+    assert sorted(tracker.cancelled) == place_ids
+    assert tracker.in_flight == 0
@@ -0,0 +1,125 @@
+"""Tests for pipelined rounds of :class:`OwlRolePlaying`."""
+
+import asyncio
+import json
+
+import pytest
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.agents import build_society
+from restaurant_deep_research.metrics import QueryMetrics, metrics_scope
+from restaurant_deep_research.replay import ReplayModelBackend, StubModelBackend
+
+INSTRUCTION = "Instruction: Get the reviews of Ichiran Shibuya.\nInput: None"
+FOUND = "Ichiran Shibuya (4.5) is a cheap ramen place near Shibuya Station."
+NOT_FOUND = "I could not find a ramen place open tonight."
+
+
+class _User:
+    """User model that answers every prompt and records which were drafts."""
+
+    def __init__(self):
+        self.prompts = []
+        self.backend = StubModelBackend(self._reply)
+
+    def _reply(self, messages):
+        self.prompts.append(messages[-1]["content"])
+        return INSTRUCTION
+
+    @property
+    def drafts(self):
+        return sum(p.startswith("Solution (preliminary") for p in self.prompts)
+
+
+def _search_tool():
+    async def maps_search_places(query: str) -> str:
+        """Search for places.
+
+        Args:
+            query (str): The search query.
+        """
+        return json.dumps(
+            {"places": [{"name": "Ichiran Shibuya", "place_id": "p1", "rating": 4.5}]}
+        )
+
+    return FunctionTool(maps_search_places)
+
+
+def _run_rounds(make_call, solution):
+    user = _User()
+    solution_call = make_call(solution)
+    # The draft runs while the assistant writes its solution.
+    solution_call["elapsed"] = 0.05
+    assistant = ReplayModelBackend(
+        [
+            make_call(tool_calls=[("maps_search_places", {"query": "ramen"})]),
+            solution_call,
+            make_call("Ichiran Shibuya has mostly positive reviews."),
+        ],
+        time_scale=1.0,
+    )
+    society = build_society(
+        "Find cheap ramen near Shibuya Station.",
+        [_search_tool()],
+        {"user": user.backend, "assistant": assistant},
+        society_kwargs={"pipelined_turns": True},
+    )
+    metrics = QueryMetrics()
+
+    async def run():
+        with metrics_scope(metrics):
+            message = society.init_chat()
+            for _ in range(2):
+                assistant_response, user_response = await society.astep(message)
+                message = assistant_response.msg
+            return user_response
+
+    user_response = asyncio.run(run())
+    return user, metrics, user_response
+
+
+def test_accepted_draft_skips_the_user_model_call(make_call):
+    user, metrics, user_response = _run_rounds(make_call, FOUND)
+
+    # The first instruction and the draft; no call for the second round.
+    assert user.backend.calls == 2
+    assert user.drafts == 1
+    assert user_response.msg.content == INSTRUCTION
+    pipeline = metrics.pipeline_summary()
+    assert (pipeline["accepted"], pipeline["rejected"], pipeline["wasted"]) == (
+        1,
+        0,
+        0,
+    )
+    assert metrics.tokens["user"]["calls"] == 2
+    assert "draft_wasted" not in metrics.tokens
+
+
+def test_rejected_draft_falls_back_to_the_user_agent(make_call):
+    user, metrics, user_response = _run_rounds(make_call, NOT_FOUND)
+
+    # The draft is dropped and the user agent answers the real solution.
+    assert user.backend.calls == 3
+    assert user.drafts == 1
+    assert user.prompts[-1].startswith(NOT_FOUND)
+    assert user_response.msg.content == INSTRUCTION
+    pipeline = metrics.pipeline_summary()
+    assert (pipeline["accepted"], pipeline["rejected"], pipeline["wasted"]) == (
+        0,
+        1,
+        1,
+    )
+    # Only the two calls whose instructions were used count as user tokens.
+    assert metrics.tokens["user"]["calls"] == 2
+    assert metrics.tokens["draft_wasted"]["calls"] == 1
+    assert metrics.tokens["draft_wasted"]["prompt"] > 0
+    assert "draft_wasted" in metrics.summary()["tokens"]["by_role"]
+
+
+@pytest.mark.parametrize("solution", [FOUND, NOT_FOUND])
+def test_draft_tokens_are_counted_once(make_call, solution):
+    user, metrics, _ = _run_rounds(make_call, solution)
+
+    calls = sum(counts["calls"] for counts in metrics.tokens.values())
+    # Two assistant steps, the second of them a single reply.
+    assert calls == user.backend.calls + 2
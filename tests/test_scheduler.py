@@ -0,0 +1,213 @@
+"""Tests for :class:`ToolScheduler`.
+
+The scheduler's buckets and the event loop share ``time.monotonic``, which is
+replaced by a fake clock; the loop advances it instead of sleeping, so
+backoff and rate limits play out instantly and deterministically.
+"""
+
+import asyncio
+import time
+
+import pytest
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.tools import ToolScheduler
+from restaurant_deep_research.tools import scheduler as scheduler_module
+
+THROTTLED = "Place search failed: OVER_QUERY_LIMIT"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    # Back off by the full delay instead of a random fraction of it.
+    monkeypatch.setattr(scheduler_module.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def _run(clock, coro):
+    """Run ``coro`` on a loop that jumps the clock to its next timer."""
+    loop = asyncio.new_event_loop()
+    select = loop._selector.select
+
+    def select_without_sleeping(timeout=None):
+        events = select(0)
+        if not events and timeout:
+            clock.now += timeout
+        return events
+
+    loop._selector.select = select_without_sleeping
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class _Upstream:
+    """A Maps search tool recording when calls start and replaying results."""
+
+    def __init__(self, clock, results=()):
+        self.clock = clock
+        self.starts = []
+        self.results = list(results)
+
+    def tools(self, scheduler, flow, api_key="key"):
+        async def maps_search_places(query: str) -> str:
+            """Search for places.
+
+            Args:
+                query (str): The search query.
+            """
+            self.starts.append((flow, round(self.clock.now - 1000.0, 3)))
+            return self.results.pop(0) if self.results else "OK"
+
+        (tool,) = scheduler.wrap_tools([FunctionTool(maps_search_places)], api_key)
+        return tool.func
+
+
+def test_flows_take_turns(clock):
+    scheduler = ToolScheduler(key_rate=1.0)
+    upstream = _Upstream(clock)
+
+    async def run():
+        busy = upstream.tools(scheduler, "A")
+        quiet = upstream.tools(scheduler, "B")
+        calls = [busy(query=f"ramen {i}") for i in range(4)]
+        calls += [quiet(query=f"sushi {i}") for i in range(2)]
+        await asyncio.gather(*calls)
+
+    _run(clock, run())
+
+    # One call per second; the query with more calls does not go first.
+    assert upstream.starts == [
+        ("A", 0.0),
+        ("A", 1.0),
+        ("B", 2.0),
+        ("A", 3.0),
+        ("B", 4.0),
+        ("A", 5.0),
+    ]
+    stats = scheduler.stats()["tools"]["maps_search_places"]
+    assert (stats["calls"], stats["queued"], stats["peak_queued"]) == (6, 0, 5)
+
+
+def test_buckets_are_per_key_and_per_tool(clock):
+    scheduler = ToolScheduler(
+        key_rate=1.0, per_tool={"maps_search_places": {"rate": 100.0}}
+    )
+    upstream = _Upstream(clock)
+
+    async def run():
+        first = upstream.tools(scheduler, "A", api_key="first")
+        second = upstream.tools(scheduler, "B", api_key="second")
+        await asyncio.gather(
+            first(query="ramen"), first(query="soba"), second(query="sushi")
+        )
+
+    _run(clock, run())
+
+    # Each key has its own bucket; the tool's own rate is not the limit.
+    assert sorted(upstream.starts) == [("A", 0.0), ("A", 1.0), ("B", 0.0)]
+    assert len(scheduler.stats()["keys"]) == 2
+
+
+def test_tool_rate_limits_across_keys(clock):
+    scheduler = ToolScheduler(
+        key_rate=100.0, per_tool={"maps_search_places": {"rate": 2.0, "burst": 1}}
+    )
+    upstream = _Upstream(clock)
+
+    async def run():
+        calls = [
+            upstream.tools(scheduler, flow, api_key=flow)(query="ramen")
+            for flow in "ABC"
+        ]
+        await asyncio.gather(*calls)
+
+    _run(clock, run())
+
+    assert [start for _, start in upstream.starts] == [0.0, 0.5, 1.0]
+
+
+def test_throttled_call_backs_off_halves_rate_and_is_retried(clock):
+    scheduler = ToolScheduler(key_rate=10.0, backoff=1.0, recovery=0.05)
+    upstream = _Upstream(clock, results=[THROTTLED])
+
+    result = _run(clock, upstream.tools(scheduler, "A")(query="ramen"))
+
+    assert result == "OK"
+    # Paused for one second, then a token at the halved rate of 5 calls/s.
+    assert upstream.starts == [("A", 0.0), ("A", 1.2)]
+    stats = scheduler.stats()
+    assert stats["tools"]["maps_search_places"]["throttled"] == 1
+    assert stats["tools"]["maps_search_places"]["retried"] == 1
+    (key,) = stats["keys"].values()
+    # Halved to 5, then the successful retry restored 5% of the base rate.
+    assert key["rate"] == pytest.approx(5.5)
+    assert key["throttled"] == 1
+
+
+def test_retries_stop_at_max_retries_with_doubling_backoff(clock):
+    scheduler = ToolScheduler(key_rate=10.0, backoff=1.0, max_retries=2)
+    upstream = _Upstream(clock, results=[THROTTLED] * 5)
+
+    result = _run(clock, upstream.tools(scheduler, "A")(query="ramen"))
+
+    # The last throttled result is returned once the retries are used up.
+    assert result == THROTTLED
+    # Pauses of 1 s and 2 s, each followed by a token at 5 and 2.5 calls/s.
+    assert upstream.starts == [("A", 0.0), ("A", 1.2), ("A", 3.6)]
+    stats = scheduler.stats()
+    assert stats["tools"]["maps_search_places"]["retried"] == 2
+    (key,) = stats["keys"].values()
+    assert key["throttled"] == 3
+    assert key["rate"] == pytest.approx(1.25)
+
+
+def test_rate_recovers_gradually_after_throttling(clock):
+    scheduler = ToolScheduler(key_rate=10.0, backoff=1.0, recovery=0.1)
+    upstream = _Upstream(clock, results=[THROTTLED])
+    rates = []
+
+    async def run():
+        search = upstream.tools(scheduler, "A")
+        for i in range(7):
+            await search(query=f"ramen {i}")
+            (key,) = scheduler.stats()["keys"].values()
+            rates.append(key["rate"])
+
+    _run(clock, run())
+
+    # Halved to 5, then 10% of the base rate back per successful call.
+    assert rates == pytest.approx([6.0, 7.0, 8.0, 9.0, 10.0, 10.0, 10.0])
+
+
+def test_exceptions_with_status_429_are_retried(clock):
+    class QuotaError(Exception):
+        status_code = 429
+
+    scheduler = ToolScheduler(key_rate=10.0, max_retries=1)
+    calls = []
+
+    async def maps_geocode(address: str) -> str:
+        """Geocode an address.
+
+        Args:
+            address (str): The address.
+        """
+        calls.append(address)
+        raise QuotaError("quota exceeded")
+
+    (tool,) = scheduler.wrap_tools([FunctionTool(maps_geocode)], "key")
+    with pytest.raises(QuotaError):
+        _run(clock, tool.func(address="Shibuya Station"))
+    assert len(calls) == 2
@@ -0,0 +1,40 @@
+"""Tests for request parsing in :class:`RestaurantHTTPServer`."""
+
+import asyncio
+import json
+
+import pytest
+
+from restaurant_deep_research.server import RestaurantHTTPServer
+
+
+async def _request(raw: bytes):
+    # Malformed requests are rejected before the service is used.
+    server = RestaurantHTTPServer(service=None, port=0)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    finally:
+        await server.stop()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+@pytest.mark.parametrize("length", ["abc", "-1", "+5", "1_0", "1.5", "٣"])
+def test_malformed_content_length_is_a_bad_request(length):
+    raw = f"POST /query HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}"
+    status, body = asyncio.run(_request(raw.encode("utf-8")))
+
+    assert status == 400
+    assert "Content-Length" in body["error"]
+
+
+def test_oversized_body_is_rejected():
+    raw = b"POST /query HTTP/1.1\r\nContent-Length: 10000000\r\n\r\n"
+    status, _ = asyncio.run(_request(raw))
+
+    assert status == 413
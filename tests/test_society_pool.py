@@ -0,0 +1,89 @@
+"""Tests for :class:`SocietyPool` and :meth:`OwlRolePlaying.retarget`."""
+
+import asyncio
+
+from camel.toolkits import FunctionTool
+
+from restaurant_deep_research.agents import SocietyPool
+from restaurant_deep_research.replay import StubModelBackend
+
+RAMEN = "Find cheap ramen near Shibuya Station tonight."
+SUSHI = "Find a sushi counter in Ginza for Saturday lunch."
+
+
+class _Model:
+    """Stub model that keeps every prompt it was sent."""
+
+    def __init__(self, reply):
+        self.requests = []
+        self.backend = StubModelBackend(self._reply)
+        self.reply = reply
+
+    def _reply(self, messages):
+        self.requests.append(messages)
+        return self.reply
+
+
+def _tool(name):
+    async def tool(query: str) -> str:
+        """Call a Maps tool.
+
+        Args:
+            query (str): The query.
+        """
+        return "{}"
+
+    tool.__name__ = name
+    return FunctionTool(tool)
+
+
+def _memory(agent):
+    return [
+        context.memory_record.message.content for context in agent.memory.retrieve()
+    ]
+
+
+def test_released_society_keeps_nothing_from_its_last_query():
+    user = _Model("Instruction: Search for places.\nInput: None")
+    assistant = _Model("Solution: Ichiran Shibuya is open until 6 am.")
+    pool = SocietyPool(
+        {"user": user.backend, "assistant": assistant.backend}, max_size=1
+    )
+
+    async def run():
+        async with pool.acquire(RAMEN, [_tool("maps_search_places")]) as first:
+            await first.astep(first.init_chat())
+            assert any("Search for" in text for text in _memory(first.user_agent))
+            assert any("Ichiran" in text for text in _memory(first.assistant_agent))
+        sent = len(user.requests), len(assistant.requests)
+
+        async with pool.acquire(SUSHI, [_tool("maps_geocode")]) as second:
+            agents = (second.user_agent, second.assistant_agent)
+            state = {
+                "memories": [_memory(agent) for agent in agents],
+                "system": [agent.system_message.content for agent in agents],
+                "tools": sorted(second.assistant_agent.tool_dict),
+                "turn": second._turn,
+            }
+            await second.astep(second.init_chat())
+        return first, second, sent, state
+
+    first, second, (user_sent, assistant_sent), state = asyncio.run(run())
+
+    assert second is first
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 1
+    # Only the new system messages are left in memory.
+    for memory, system in zip(state["memories"], state["system"]):
+        assert memory == [system]
+        assert SUSHI in system
+        assert RAMEN not in system
+    assert state["tools"] == ["maps_geocode"]
+    assert state["turn"] == 0
+    # Nothing of the first conversation reaches the models in the second.
+    later_requests = user.requests[user_sent:] + assistant.requests[assistant_sent:]
+    assert later_requests
+    for messages in later_requests:
+        for message in messages:
+            assert "Shibuya" not in str(message.get("content"))
+            assert "maps_search_places" not in str(message)
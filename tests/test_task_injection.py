@@ -0,0 +1,72 @@
+"""Tests for the task-injection suffixes of :class:`OwlRolePlaying`."""
+
+import asyncio
+
+import pytest
+
+from restaurant_deep_research.agents import build_society
+from restaurant_deep_research.replay import StubModelBackend
+
+TASK = "Find cheap ramen near Shibuya Station tonight."
+SOLUTION = "Solution: Ichiran Shibuya is open until 6 am."
+FOLLOW_UP = "Provide me with the next instruction"
+
+
+class _User:
+    """User model that keeps every prompt it was sent."""
+
+    def __init__(self):
+        self.prompts = []
+        self.backend = StubModelBackend(self._reply)
+
+    def _reply(self, messages):
+        self.prompts.append(messages[-1]["content"])
+        return "Instruction: Get the reviews of Ichiran Shibuya.\nInput: None"
+
+
+def _society(mode):
+    user = _User()
+    society = build_society(
+        TASK,
+        [],
+        {"user": user.backend, "assistant": StubModelBackend(SOLUTION)},
+        society_kwargs={"task_injection": mode},
+    )
+    return society, user
+
+
+def _run_sync(mode, rounds=3):
+    society, user = _society(mode)
+    message = society.init_chat()
+    for _ in range(rounds):
+        assistant_response, _ = society.step(message)
+        message = assistant_response.msg
+    return society, user, message
+
+
+def _run_async(mode, rounds=3):
+    society, user = _society(mode)
+
+    async def run():
+        message = society.init_chat()
+        for _ in range(rounds):
+            assistant_response, _ = await society.astep(message)
+            message = assistant_response.msg
+        return message
+
+    message = asyncio.run(run())
+    return society, user, message
+
+
+@pytest.mark.parametrize("mode", ["always", "first_turn", "reference"])
+def test_sync_and_async_steps_give_the_user_the_same_prompts(mode):
+    sync_society, sync_user, _ = _run_sync(mode)
+    async_society, async_user, solution = _run_async(mode)
+
+    assert async_user.prompts == sync_user.prompts
+    assert all(FOLLOW_UP in prompt for prompt in async_user.prompts[1:])
+    assert async_society.prompt_tokens_saved == sync_society.prompt_tokens_saved
+    assert (async_society.prompt_tokens_saved > 0) == (mode != "always")
+    # The returned solution is the assistant's text alone.
+    assert solution.content == SOLUTION
+
@@ -0,0 +1,127 @@
+"""Tests for tool error and throttling detection in ``tools.wrapping``."""
+
+import json
+
+import pytest
+
+from restaurant_deep_research.tools import scheduler
+from restaurant_deep_research.tools.wrapping import (
+    is_throttled,
+    looks_like_tool_error,
+    tool_error,
+)
+
+PLACE = json.dumps(
+    {
+        "name": "Ichiran Shibuya",
+        "formatted_address": "1 Chome-22-7 Jinnan, Shibuya City, Tokyo",
+        "rating": 4.5,
+        "user_ratings_total": 429,
+        "reviews": [
+            {"text": "Error: they got my order wrong, too many requests to fix it."},
+            {"text": "Worth the wait. 429 seats would not be enough."},
+        ],
+    }
+)
+
+
+class _HTTPError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize(
+    "result, error",
+    [
+        ("Place search failed: OVER_QUERY_LIMIT", "OVER_QUERY_LIMIT"),
+        ("Geocoding failed: REQUEST_DENIED", "REQUEST_DENIED"),
+        ("Error: Invalid place_id", "Invalid place_id"),
+        (
+            {"error": "Error executing async tool 'maps_geocode': timed out"},
+            "Error executing async tool 'maps_geocode': timed out",
+        ),
+        (
+            {"isError": True, "content": [{"type": "text", "text": "Error: quota"}]},
+            "quota",
+        ),
+        (
+            json.dumps({"status": "INVALID_REQUEST", "error_message": "Missing key"}),
+            "INVALID_REQUEST: Missing key",
+        ),
+        (None, "no result"),
+        (TimeoutError(), "TimeoutError"),
+    ],
+)
+def test_error_envelopes_are_detected(result, error):
+    assert tool_error(result) == error
+    assert looks_like_tool_error(result)
+
+
+def test_stringified_camel_error_dict_is_detected():
+    # ChatAgent stores tool exceptions as str({"error": ...}) in memory.
+    result = str({"error": "Error executing async tool 'maps_geocode': timed out"})
+    assert tool_error(result).startswith(
+        "Error executing async tool 'maps_geocode': timed out"
+    )
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        PLACE,
+        json.loads(PLACE),
+        "429 Broadway, New York, NY 10013",
+        "Error-free delivery zone: all of Shibuya",
+        "Errors and omissions excepted",
+        json.dumps({"status": "OK", "results": []}),
+        json.dumps({"status": "ZERO_RESULTS", "results": []}),
+        {"isError": False, "content": [{"type": "text", "text": "Error: none"}]},
+        "Search results: the Error: prefix only counts at the start",
+        "{not json",
+    ],
+)
+def test_results_mentioning_errors_are_not_errors(result):
+    assert tool_error(result) is None
+    assert not looks_like_tool_error(result)
+    assert not is_throttled(result)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        "Place search failed: OVER_QUERY_LIMIT",
+        "Error: RESOURCE_EXHAUSTED: quota exceeded for the day",
+        "Error: 429 Too Many Requests",
+        "Error: HTTP/1.1 429 Too Many Requests",
+        "Error: Request failed with status code 429",
+        json.dumps({"status": "OVER_QUERY_LIMIT", "error_message": "Slow down"}),
+        {
+            "isError": True,
+            "content": [
+                {"type": "text", "text": "Place details failed: OVER_QUERY_LIMIT"}
+            ],
+        },
+        _HTTPError("rate limited", status_code=429),
+    ],
+)
+def test_quota_errors_are_throttled(result):
+    assert is_throttled(result)
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        "Place search failed: REQUEST_DENIED",
+        "Error: too many requests were cancelled by the user",
+        "Error: place 429 not found",
+        _HTTPError("server error", status_code=500),
+    ],
+)
+def test_other_errors_are_not_throttled(result):
+    assert looks_like_tool_error(result)
+    assert not is_throttled(result)
+
+
+def test_scheduler_shares_the_throttling_check():
+    assert scheduler.is_throttled is is_throttled